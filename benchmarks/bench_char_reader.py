@@ -0,0 +1,72 @@
+"""Benchmark of BufferedCharReader against TextIOReader
+
+Run from repository root:
+    python -m benchmarks.bench_char_reader
+"""
+
+import argparse
+import os
+import tempfile
+from timeit import timeit
+from typing import Callable
+
+from lexer.char_reader import CharReader, TextIOReader, BufferedCharReader
+from lexer.lexer import Lexer
+from lexer.token_type import TokenType
+
+
+EXAMPLE_PATH = "examples/binary_tree.txt"
+
+
+def read_all_chars(reader: CharReader):
+    while reader.get_curr_char() != "":
+        reader.next_char()
+
+
+def lex_all_tokens(reader: CharReader):
+    lexer = Lexer(reader)
+    while lexer.get_next_token().get_type() != TokenType.EOT:
+        pass
+
+
+def bench(name: str, reader_class: Callable[..., CharReader], consume, path: str, repeat: int):
+    def run():
+        with open(path, "r", encoding="ascii") as source_file:
+            consume(reader_class(source_file))
+
+    seconds = timeit(run, number=repeat) / repeat
+    print(f"{name:<40} {seconds * 1000:10.2f} ms")
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=200, help="How many times example source is repeated")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(EXAMPLE_PATH, "r", encoding="ascii") as f:
+        source = f.read() * args.scale
+    print(f"Source: {EXAMPLE_PATH} x {args.scale} = {len(source)} chars")
+
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="ascii") as tmp:
+        tmp.write(source)
+    try:
+        for consume in (read_all_chars, lex_all_tokens):
+            results = {
+                reader_class.__name__: bench(
+                    f"{consume.__name__} / {reader_class.__name__}",
+                    reader_class,
+                    consume,
+                    tmp.name,
+                    args.repeat,
+                )
+                for reader_class in (TextIOReader, BufferedCharReader)
+            }
+            print(f"speedup: {results['TextIOReader'] / results['BufferedCharReader']:.2f}x\n")
+    finally:
+        os.remove(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
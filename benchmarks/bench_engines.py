@@ -0,0 +1,95 @@
+"""Benchmark of execution engines on binary_tree example and on arithmetic loop
+
+Run from repository root:
+    python -m benchmarks.bench_engines
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+from time import perf_counter
+
+from interpreter.engines import ENGINES
+from lexer.char_reader import TextIOReader
+from lexer.lexer import Lexer
+from parser.my_parser import Parser
+
+
+EXAMPLE_PATH = "examples/binary_tree.txt"
+
+TREE_LOOP = """
+i : mut int = 0;
+total : mut int = 0;
+while i < {n}
+begin
+    total = total + sumTree(my_tree);
+    i = i + 1;
+end
+print(total);
+"""
+
+ARITHMETIC_LOOP = """
+i : mut int = 0;
+acc : mut float = 0.0;
+while i < {n}
+begin
+    if i / 2 * 2 == i
+    begin
+        acc = acc + i * 1.5;
+    end
+    else
+    begin
+        acc = acc - i / 3;
+    end
+    i = i + 1;
+end
+print(acc);
+"""
+
+
+def parse(source: str):
+    return Parser(Lexer(TextIOReader(io.StringIO(source)))).parse_program()
+
+
+def run(engine, program, check_types=False):
+    interpreter = engine(check_types=check_types)
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        start = perf_counter()
+        program.accept(interpreter)
+        seconds = perf_counter() - start
+    return seconds, output.getvalue()
+
+
+def bench(name: str, source: str, engines, check_types=False):
+    program = parse(source)
+    print(name)
+    results = {}
+    outputs = set()
+    for engine_name in engines:
+        seconds, output = run(ENGINES[engine_name], program, check_types)
+        results[engine_name] = seconds
+        outputs.add(output)
+        print(f"  {engine_name:<10} {seconds * 1000:10.1f} ms  {results[engines[0]] / seconds:6.2f}x")
+    if len(outputs) != 1:
+        print("  engines printed different output!")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=200, help="How many times tree is summed")
+    parser.add_argument("--loop", type=int, default=20_000, help="Iterations of arithmetic loop")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES.keys(), default=list(ENGINES.keys()))
+    parser.add_argument("--check-types", action="store_true", help="Run type checked programs")
+    args = parser.parse_args()
+    sys.setrecursionlimit(10_000)
+
+    with open(EXAMPLE_PATH, "r", encoding="ascii") as f:
+        example = f.read()
+    source = example + TREE_LOOP.format(n=args.n)
+    bench(f"{EXAMPLE_PATH} summed {args.n} times", source, args.engines, args.check_types)
+    bench(f"arithmetic loop x {args.loop}", ARITHMETIC_LOOP.format(n=args.loop), args.engines, args.check_types)
+
+
+if __name__ == "__main__":
+    main()
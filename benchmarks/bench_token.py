@@ -0,0 +1,110 @@
+"""Micro-benchmark of per-token cost of compact __slots__ Token
+against the previous Token implementation that copied values in accessors
+
+Run from repository root:
+    python -m benchmarks.bench_token
+"""
+
+import argparse
+import sys
+import tracemalloc
+from copy import copy
+from io import StringIO
+from time import perf_counter
+
+import lexer.lexer
+import lexer.regex_lexer
+from lexer.char_reader import BufferedCharReader
+from lexer.my_token import Token, tokentypes_should_none_value
+from lexer.regex_lexer import RegexLexer
+from parser.my_parser import Parser
+
+
+EXAMPLE_PATH = "examples/binary_tree.txt"
+
+
+class CopyingToken:
+    """Previous Token implementation: __dict__ based, accessors return copies"""
+
+    def __init__(self, token_type, token_value=None, position=None) -> None:
+        self.__type = None
+        self.__value = None
+        self.__pos = None
+        self.set_token_attrs(token_type, token_value, position)
+
+    def set_token_attrs(self, token_type, token_value=None, position=None):
+        self.__type = token_type
+        self.__value = token_value
+        self.__pos = position
+        if self.__type in tokentypes_should_none_value and not self.__value is None:
+            raise ValueError
+
+    def get_value(self):
+        return copy(self.__value)
+
+    def get_type(self):
+        return copy(self.__type)
+
+    def get_pos(self):
+        return copy(self.__pos)
+
+
+def use_token_class(token_class):
+    lexer.lexer.Token = token_class
+    lexer.regex_lexer.Token = token_class
+
+
+def parse(source: str):
+    parser = Parser(RegexLexer(BufferedCharReader(StringIO(source))))
+    return parser.parse_program()
+
+
+def count_tokens(source: str):
+    lex = RegexLexer(BufferedCharReader(StringIO(source)))
+    count = 0
+    while not lex._is_end_of_file():
+        lex._next_token()
+        count += 1
+    return count
+
+
+def bytes_per_token(token_class, n: int = 10_000):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tokens = [token_class(None, None, None) for _ in range(n)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del tokens
+    return size / n
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=10_000, help="How many times example source is repeated")
+    args = parser.parse_args()
+
+    with open(EXAMPLE_PATH, "r", encoding="ascii") as f:
+        source = f.read() * args.scale
+    sys.setrecursionlimit(10_000)
+    n_tokens = count_tokens(source)
+    print(f"Source: {EXAMPLE_PATH} x {args.scale} = {len(source)} chars, {n_tokens} tokens")
+
+    results = {}
+    for token_class in (CopyingToken, Token):
+        use_token_class(token_class)
+        start = perf_counter()
+        parse(source)
+        seconds = perf_counter() - start
+        results[token_class.__name__] = seconds
+        print(
+            f"{token_class.__name__:<15} parse: {seconds:8.2f} s"
+            f"  {seconds / n_tokens * 1e6:6.2f} us/token"
+            f"  {bytes_per_token(token_class):6.1f} B/token"
+        )
+    use_token_class(Token)
+    print(f"speedup: {results['CopyingToken'] / results['Token']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Facts about nodes of programs, kept by engines instead of on nodes of AST"""
+
+from typing import Any, Dict, Tuple
+
+from parser.AST import ASTNode, Literal
+from interpreter.interpreter_types import BuiltInValue, constant
+
+
+class NodeTable:
+    """Values attached to nodes of AST, found by identity of node.
+    Table keeps its nodes alive, so id of node is not reused while table has value for it"""
+
+    __slots__ = ("_entries",)
+
+    def __init__(self):
+        self._entries: Dict[int, Tuple[ASTNode, Any]] = {}
+
+    def get(self, node: ASTNode, default=None):
+        entry = self._entries.get(id(node))
+        return default if entry is None else entry[1]
+
+    def __setitem__(self, node: ASTNode, value):
+        self._entries[id(node)] = (node, value)
+
+    def __contains__(self, node: ASTNode) -> bool:
+        return id(node) in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class Annotations:
+    """What Resolver and TypeChecker found out about programs run by one interpreter,
+    and values of their literals. Addresses depend on scopes of the interpreter,
+    so they are not shared with other ones"""
+
+    def __init__(self):
+        self.resolved = NodeTable()  # program: True, when its variables have addresses
+        self.addresses = NodeTable()  # declaration, param, root of object access or assignment: (depth, slot)
+        self.conversions = NodeTable()  # declaration or assignment: KEEP, BUILT_IN or CONVERT
+        self.checked = NodeTable()  # visit: True, when visited variable is known to be variant
+        self.constants = NodeTable()  # literal: its builtin value
+
+    def constant_of(self, literal: Literal, type_: str) -> BuiltInValue:
+        """Value of literal, preallocated when the literal is evaluated or compiled first time"""
+        value = self.constants.get(literal)
+        if value is None:
+            value = self.constants[literal] = constant(type_, literal.value)
+        return value
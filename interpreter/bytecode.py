@@ -0,0 +1,354 @@
+"""Compiler of AST into bytecode run by VirtualMachine"""
+
+from array import array
+from typing import Callable, Dict, List
+
+from parser.AST import *
+from interpreter.opcodes import *
+from interpreter.annotations import Annotations
+from interpreter.interpreter_types import BuiltInValue, TRUE
+
+
+class CodeObject:
+    """Compiled program or function body.
+    code holds pairs of opcode and argument, positions holds source position of each pair.
+    Arguments index consts and names pools or are offsets in code. Function body keeps
+    line_index of its source, so errors raised in it are located even when it is called
+    from other program"""
+
+    __slots__ = ("name", "code", "consts", "names", "positions", "return_offset", "line_index")
+
+    def __init__(self, name: str, code: array, consts: list, names: List[str], positions: list, return_offset: int):
+        self.name = name
+        self.code = code
+        self.consts = consts
+        self.names = names
+        self.positions = positions
+        self.return_offset = return_offset
+        self.line_index = None
+
+
+class BytecodeProgram:
+    """Compiled body of function. VirtualMachine runs it in new frame"""
+
+    __slots__ = ("code",)
+
+    def __init__(self, code: CodeObject):
+        self.code = code
+
+    def accept(self, interpreter):
+        from interpreter.vm import VirtualMachine  # pylint: disable=import-outside-toplevel
+
+        return VirtualMachine(interpreter).run(self.code)
+
+
+class _CodeBuilder:
+    """Code object under construction"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.code = array("i")
+        self.consts = []
+        self.names = []
+        self.positions = []
+        self.scope_depth = 0
+        self._const_idx = {}
+        self._name_idx = {}
+
+    def emit(self, opcode: int, arg: int = 0, pos=None) -> int:
+        """Appends instruction and returns its offset"""
+        offset = len(self.code)
+        self.code.append(opcode)
+        self.code.append(arg)
+        self.positions.append(pos)
+        return offset
+
+    def offset(self) -> int:
+        return len(self.code)
+
+    def patch(self, offset: int, arg: int):
+        self.code[offset + 1] = arg
+
+    def add_const(self, value) -> int:
+        """Strings, tuples and builtin values of literals are stored once, other constants every time"""
+        key = (type(value), repr(value)) if isinstance(value, (str, tuple, BuiltInValue)) else None
+        if key is not None and key in self._const_idx:
+            return self._const_idx[key]
+        self.consts.append(value)
+        if key is not None:
+            self._const_idx[key] = len(self.consts) - 1
+        return len(self.consts) - 1
+
+    def add_name(self, name: str) -> int:
+        if name not in self._name_idx:
+            self._name_idx[name] = len(self.names)
+            self.names.append(name)
+        return self._name_idx[name]
+
+    def build(self, return_offset: int) -> CodeObject:
+        return CodeObject(self.name, self.code, self.consts, self.names, self.positions, return_offset)
+
+
+class BytecodeCompiler:
+    """Compiles AST nodes into code objects. Running compiled node gives the same value
+    and has the same effects on interpreter state as node.accept(interpreter).
+
+    Statements push nothing on the stack. Expressions push exactly one value.
+    Value of statement that returns something (function call, return, unknown node)
+    stops the whole code object - enclosing if, while and visit blocks included.
+    Addresses, conversions and checked visits are taken from annotations"""
+
+    _NAME = "<program>"
+
+    def __init__(self, annotations: Annotations = None):
+        self.annotations = annotations if annotations is not None else Annotations()
+        self._builder: _CodeBuilder = None
+        self._statement_compilers: Dict[type, Callable[[ASTNode], None]] = {
+            Program: self._compile_program,
+            AssignmentStatement: self._compile_assignment,
+            IfStatement: self._compile_if,
+            WhileStatement: self._compile_while,
+            VisitStatement: self._compile_visit,
+            VariableDeclaration: self._compile_var_dec,
+            StructDef: self._compile_struct_def,
+            VariantDef: self._compile_variant_def,
+            FuncDef: self._compile_func_def,
+        }
+        self._expression_compilers: Dict[type, Callable[[ASTNode], None]] = {
+            ReturnStatement: self._compile_return,
+            FunctionCall: self._compile_func_call,
+            ObjectAccess: self._compile_obj_access,
+            OrExpr: self._compile_or,
+            AndExpr: self._compile_and,
+            RelationExpr: self._compile_rel,
+            AddExpr: self._compile_add,
+            MultiExpr: self._compile_multi,
+            UnaryExpr: self._compile_unary,
+            NullLiteral: self._compile_null_literal,
+            IntLiteral: self._compile_int_literal,
+            FloatLiteral: self._compile_float_literal,
+            StrLiteral: self._compile_str_literal,
+        }
+
+    def compile(self, node: ASTNode) -> CodeObject:
+        """Returns code object that evaluates to the same value as node.accept(interpreter)"""
+        if type(node) in self._statement_compilers:
+            return self._compile_code(self._NAME, node, self._compile_statement, returns_value=False)
+        return self._compile_code(self._NAME, node, self._compile_expression, returns_value=True)
+
+    def _compile_code(self, name: str, node: ASTNode, compile_node, returns_value: bool) -> CodeObject:
+        outer_builder, self._builder = self._builder, _CodeBuilder(name)
+        try:
+            compile_node(node)
+            if not returns_value:
+                self._builder.emit(LOAD_NONE)
+            return self._builder.build(self._builder.emit(RETURN_VALUE))
+        finally:
+            self._builder = outer_builder
+
+    def _compile_statement(self, node: ASTNode):
+        if compiler := self._statement_compilers.get(type(node)):
+            compiler(node)
+            return
+        self._compile_expression(node)
+        self._builder.emit(RETURN_IF_VALUE, self._builder.scope_depth, node.pos)
+
+    def _compile_expression(self, node: ASTNode):
+        if compiler := self._expression_compilers.get(type(node)):
+            compiler(node)
+            return
+        self._builder.emit(EVAL_NODE, self._builder.add_const(node), getattr(node, "pos", None))
+
+    def _compile_block(self, program: Program):
+        """Program run in its own scope"""
+        builder = self._builder
+        builder.emit(PUSH_SCOPE)
+        builder.scope_depth += 1
+        self._compile_statement(program)
+        builder.scope_depth -= 1
+
+    def _compile_program(self, program: Program):
+        for statement in program.children:
+            self._compile_statement(statement)
+
+    def _compile_assignment(self, assignment: AssignmentStatement):
+        builder = self._builder
+        name_chain = assignment.obj_access.name_chain
+        pos = assignment.pos
+        address = self.annotations.addresses.get(assignment)
+        conversion = self.annotations.conversions.get(assignment)
+        name = builder.add_const((name_chain[0], address))
+        builder.emit(LOAD_VARIABLE, name, pos)
+        if len(name_chain) == 1:
+            self._compile_expression(assignment.expr)
+            store = builder.add_const((name_chain[0], address, conversion))
+            builder.emit(STORE_NAME, store, pos)
+            return
+        for attr_name in name_chain[1:]:
+            builder.emit(GET_INNER_VARIABLE, builder.add_name(attr_name), pos)
+        self._compile_expression(assignment.expr)
+        builder.emit(STORE_VARIABLE_VALUE, builder.add_const((conversion,)), pos)
+
+    def _compile_if(self, if_stmt: IfStatement):
+        builder = self._builder
+        pos = if_stmt.pos
+        self._compile_expression(if_stmt.cond)
+        jump_to_else = builder.emit(POP_JUMP_IF_FALSE, 0, pos)
+        self._compile_block(if_stmt.prog)
+        builder.emit(POP_SCOPE, 0, pos)
+        if if_stmt.else_prog:
+            jump_to_end = builder.emit(JUMP)
+            builder.patch(jump_to_else, builder.offset())
+            self._compile_block(if_stmt.else_prog)
+            builder.emit(POP_SCOPE, 0, pos)
+            builder.patch(jump_to_end, builder.offset())
+        else:
+            builder.patch(jump_to_else, builder.offset())
+
+    def _compile_while(self, while_stmt: WhileStatement):
+        builder = self._builder
+        pos = while_stmt.pos
+        start = builder.offset()
+        self._compile_expression(while_stmt.cond)
+        jump_to_end = builder.emit(POP_JUMP_IF_FALSE, 0, pos)
+        self._compile_block(while_stmt.prog)
+        builder.emit(POP_SCOPE, 0, pos)
+        builder.emit(JUMP, start)
+        builder.patch(jump_to_end, builder.offset())
+
+    def _compile_visit(self, visit_statement: VisitStatement):
+        builder = self._builder
+        pos = visit_statement.pos
+        self._compile_expression(visit_statement.obj)
+        if not self.annotations.checked.get(visit_statement, False):
+            builder.emit(VISIT_VARIANT, 0, pos)
+        jumps_to_end = []
+        for case_section in visit_statement.case_sections:
+            case_const = builder.add_const([case_section.type, 0])
+            builder.emit(ENTER_CASE, case_const, pos)
+            builder.scope_depth += 1
+            self._compile_statement(case_section.program)
+            builder.scope_depth -= 1
+            builder.emit(POP_SCOPE, 0, pos)
+            jumps_to_end.append(builder.emit(JUMP))
+            builder.consts[case_const] = (case_section.type, builder.offset())
+        builder.emit(POP)
+        for jump in jumps_to_end:
+            builder.patch(jump, builder.offset())
+
+    def _compile_var_dec(self, var_dec: VariableDeclaration):
+        builder = self._builder
+        pos = var_dec.pos
+        address = self.annotations.addresses.get(var_dec)
+        conversion = self.annotations.conversions.get(var_dec)
+        declaration = builder.add_const((var_dec.name, var_dec.type, var_dec.is_mutable, address, conversion))
+        builder.emit(DECLARE_VARIABLE, declaration, pos)
+        if var_dec.default_value is not None:
+            self._compile_expression(var_dec.default_value)
+        else:
+            builder.emit(LOAD_DEFAULT_VALUE, declaration, pos)
+        builder.emit(INIT_VARIABLE, declaration, pos)
+
+    def _compile_struct_def(self, struct_def: StructDef):
+        self._builder.emit(DEFINE_STRUCT, self._builder.add_const(struct_def), struct_def.pos)
+
+    def _compile_variant_def(self, variant_def: VariantDef):
+        self._builder.emit(DEFINE_VARIANT, self._builder.add_const(variant_def), variant_def.pos)
+
+    def _compile_func_def(self, func_def: FuncDef):
+        body = self._compile_code(func_def.name, func_def.prog, self._compile_statement, returns_value=False)
+        body.line_index = func_def.prog.line_index
+        compiled_def = FuncDef(func_def.name, func_def.params, func_def.type, BytecodeProgram(body), func_def.pos)
+        self._builder.emit(DEFINE_FUNCTION, self._builder.add_const(compiled_def), func_def.pos)
+
+    def _compile_return(self, return_stmt: ReturnStatement):
+        self._compile_expression(return_stmt.expr)
+
+    def _compile_func_call(self, func_call: FunctionCall):
+        for arg in func_call.args:
+            self._compile_expression(arg)
+        call = self._builder.add_const((func_call.name, len(func_call.args)))
+        self._builder.emit(CALL_FUNCTION, call, func_call.pos)
+
+    def _compile_obj_access(self, obj_access: ObjectAccess):
+        builder = self._builder
+        name_chain = obj_access.name_chain
+        obj_name = name_chain[0]
+        pos = obj_access.pos
+        if isinstance(obj_name, str):
+            variable = builder.add_const((obj_name, self.annotations.addresses.get(obj_access)))
+            if len(name_chain) == 1:
+                builder.emit(LOAD_NAME, variable, pos)
+                return
+            builder.emit(LOAD_VARIABLE_VALUE, variable, pos)
+        elif isinstance(obj_name, FunctionCall):
+            self._compile_func_call(obj_name)
+        else:
+            builder.emit(LOAD_NONE)
+        builder.emit(CHECK_HAS_VALUE, builder.add_const(obj_name), pos)
+        for attr_name in name_chain[1:]:
+            builder.emit(GET_ATTR, builder.add_const((attr_name, name_chain)), pos)
+        builder.emit(SHARE_VALUE)
+
+    def _compile_or(self, or_expr: OrExpr):
+        builder = self._builder
+        jumps_to_true = []
+        for child in or_expr.children:
+            self._compile_expression(child)
+            jumps_to_true.append(builder.emit(POP_JUMP_IF_TRUE))
+        builder.emit(LOAD_NONE)
+        jump_to_end = builder.emit(JUMP)
+        for jump in jumps_to_true:
+            builder.patch(jump, builder.offset())
+        builder.emit(LOAD_LITERAL, builder.add_const(TRUE))
+        builder.patch(jump_to_end, builder.offset())
+
+    def _compile_and(self, and_expr: AndExpr):
+        for child in and_expr.children:
+            self._compile_expression(child)
+            self._builder.emit(TEST_VALUE)
+        self._builder.emit(LOAD_LITERAL, self._builder.add_const(TRUE))
+
+    def _compile_rel(self, rel_expr: RelationExpr):
+        builder = self._builder
+        self._compile_expression(rel_expr.left)
+        self._compile_expression(rel_expr.right)
+        if rel_expr.operator in OPERATORS[4:]:
+            builder.emit(BINARY_OP, OPERATORS.index(rel_expr.operator), rel_expr.pos)
+            return
+        builder.emit(POP)
+        builder.emit(POP)
+        builder.emit(LOAD_NONE)
+
+    def _compile_add(self, add_expr: AddExpr):
+        self._compile_arithmetic(add_expr, ("+", "-"))
+
+    def _compile_multi(self, multi_expr: MultiExpr):
+        self._compile_arithmetic(multi_expr, ("*", "/"))
+
+    def _compile_arithmetic(self, expr, operators):
+        """Left-associative chain of operators. Operand of unknown operator is evaluated and ignored"""
+        builder = self._builder
+        self._compile_expression(expr.children[0])
+        for op, child in zip(expr.operations, expr.children[1:]):
+            self._compile_expression(child)
+            if op in operators:
+                builder.emit(BINARY_OP, OPERATORS.index(op), expr.pos)
+            else:
+                builder.emit(POP)
+
+    def _compile_unary(self, unary_expr: UnaryExpr):
+        self._compile_expression(unary_expr.negated)
+        self._builder.emit(UNARY_MINUS, 0, unary_expr.pos)
+
+    def _compile_null_literal(self, null_literal: NullLiteral):
+        self._builder.emit(LOAD_NONE)
+
+    def _compile_int_literal(self, int_literal: IntLiteral):
+        self._builder.emit(LOAD_LITERAL, self._builder.add_const(self.annotations.constant_of(int_literal, "int")))
+
+    def _compile_float_literal(self, float_literal: FloatLiteral):
+        self._builder.emit(LOAD_LITERAL, self._builder.add_const(self.annotations.constant_of(float_literal, "float")))
+
+    def _compile_str_literal(self, str_literal: StrLiteral):
+        self._builder.emit(LOAD_LITERAL, self._builder.add_const(self.annotations.constant_of(str_literal, "str")))
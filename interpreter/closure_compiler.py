@@ -0,0 +1,467 @@
+"""Execution engine that compiles AST into tree of Python closures once and runs them"""
+
+from typing import Callable, Dict
+
+from lexer.source_position import LineIndex, PositionedError
+from parser.AST import *
+from interpreter.interpreter import Interpreter
+from interpreter.interpreter_types import BuiltInValue, TRUE, share
+from interpreter.interpreter_errors import InterpreterError
+from interpreter.fast_ops import (
+    fast_add_with_limit,
+    fast_sub,
+    fast_mul,
+    fast_div,
+    fast_eq,
+    fast_ieq,
+    fast_lt,
+    fast_gt,
+    fast_lteq,
+    fast_gteq,
+)
+
+
+Closure = Callable[[], object]
+
+
+class CompiledProgram:
+    """Compiled body of function. Is called by function call like any other program.
+    Like Program, locates errors raised in it with line_index of its source"""
+
+    __slots__ = ("run", "line_index")
+
+    def __init__(self, run: Closure, line_index: LineIndex = None):
+        self.run = run
+        self.line_index = line_index
+
+    def accept(self, interpreter):
+        try:
+            return self.run()
+        except PositionedError as error:
+            error.locate(self.line_index)
+            raise
+
+
+class ClosureCompiler:
+    """Turns AST nodes into closures that return the same value as node.accept(interpreter).
+    Child nodes, operators and control flow are resolved once, at compile time.
+    Closures work on state of interpreter - its scopes and recursion counter"""
+
+    def __init__(self, interpreter: Interpreter):
+        self.interpreter = interpreter
+        self.annotations = interpreter.annotations
+        self.scopes = interpreter.scopes
+        self._compilers: Dict[type, Callable[[ASTNode], Closure]] = {
+            Program: self._compile_program,
+            AssignmentStatement: self._compile_assignment,
+            IfStatement: self._compile_if,
+            WhileStatement: self._compile_while,
+            ReturnStatement: self._compile_return,
+            VisitStatement: self._compile_visit,
+            FunctionCall: self._compile_func_call,
+            ObjectAccess: self._compile_obj_access,
+            VariableDeclaration: self._compile_var_dec,
+            StructDef: self._compile_struct_def,
+            VariantDef: self._compile_variant_def,
+            FuncDef: self._compile_func_def,
+            OrExpr: self._compile_or,
+            AndExpr: self._compile_and,
+            RelationExpr: self._compile_rel,
+            AddExpr: self._compile_add,
+            MultiExpr: self._compile_multi,
+            UnaryExpr: self._compile_unary,
+            NullLiteral: self._compile_null_literal,
+            IntLiteral: self._compile_int_literal,
+            FloatLiteral: self._compile_float_literal,
+            StrLiteral: self._compile_str_literal,
+        }
+
+    def compile(self, node: ASTNode) -> Closure:
+        """Returns closure evaluating node"""
+        if compiler := self._compilers.get(type(node)):
+            return compiler(node)
+        interpreter = self.interpreter
+        return lambda: node.accept(interpreter)
+
+    def _compile_program(self, program: Program):
+        statements = [self.compile(statement) for statement in program.children]
+
+        def run_program():
+            for statement in statements:
+                rv = statement()
+                if rv:
+                    return rv
+
+        return run_program
+
+    def _compile_assignment(self, assignment: AssignmentStatement):
+        interpreter = self.interpreter
+        scopes = self.scopes
+        name_chain = assignment.obj_access.name_chain
+        name = name_chain[0]
+        rest_address = name_chain[1:]
+        pos = assignment.pos
+        address = self.annotations.addresses.get(assignment)
+        expr = self.compile(assignment.expr)
+        convert = interpreter._converter_for_(self.annotations.conversions.get(assignment))
+
+        if not rest_address:
+
+            def run_simple_assignment():
+                variable = scopes.get_variable_at(address, name, pos)
+                scopes.set_at(address, name, convert(variable.type, expr(), pos), pos)
+
+            return run_simple_assignment
+
+        def run_complex_assignment():
+            variable = scopes.get_variable_at(address, name, pos)
+            for attr_name in rest_address:
+                variable = interpreter.get_inner_variable(variable, attr_name, pos)
+            variable.value = convert(variable.type, expr(), pos)
+
+        return run_complex_assignment
+
+    def _compile_if(self, if_stmt: IfStatement):
+        scopes = self.scopes
+        pos = if_stmt.pos
+        cond = self.compile(if_stmt.cond)
+        prog = self.compile(if_stmt.prog)
+        else_prog = self.compile(if_stmt.else_prog) if if_stmt.else_prog else None
+
+        def run_if():
+            if cond().bool():
+                scopes.push_scope()
+                rv = prog()
+                scopes.pop_scope(pos)
+                return rv
+            if else_prog is not None:
+                scopes.push_scope()
+                rv = else_prog()
+                scopes.pop_scope(pos)
+                return rv
+
+        return run_if
+
+    def _compile_while(self, while_stmt: WhileStatement):
+        scopes = self.scopes
+        pos = while_stmt.pos
+        cond = self.compile(while_stmt.cond)
+        prog = self.compile(while_stmt.prog)
+
+        def run_while():
+            rv = None
+            while rv is None and cond().bool():
+                scopes.push_scope()
+                rv = prog()
+                scopes.pop_scope(pos)
+            return rv
+
+        return run_while
+
+    def _compile_return(self, return_stmt: ReturnStatement):
+        return self.compile(return_stmt.expr)
+
+    def _compile_visit(self, visit_statement: VisitStatement):
+        scopes = self.scopes
+        pos = visit_statement.pos
+        obj = self.compile(visit_statement.obj)
+        case_sections = [(cs.type, self.compile(cs.program)) for cs in visit_statement.case_sections]
+        checked = self.annotations.checked.get(visit_statement, False)
+
+        def run_visit():
+            variant_value = obj()
+            if not checked and not scopes.is_variant_type_(variant_value.type):
+                raise InterpreterError(pos, "There is no variant type in visit")
+            for type_, program in case_sections:
+                if type_ == variant_value.name:
+                    scopes.push_scope()
+                    scopes.add_variable(
+                        variant_value.name, variant_value.type, False, variant_value.value, pos
+                    )
+                    rv = program()
+                    scopes.pop_scope(pos)
+                    return rv
+
+        return run_visit
+
+    def _compile_func_call(self, func_call: FunctionCall):
+        interpreter = self.interpreter
+        scopes = self.scopes
+        convert = interpreter._convert_to_
+        name = func_call.name
+        pos = func_call.pos
+        args = [self.compile(arg) for arg in func_call.args]
+
+        def run_func_call():
+            curr_scope = scopes.curr_scope
+            arg_values = [arg() for arg in args]
+            func_def, func_scope = scopes.get_function_definition_and_its_scope(name, pos)
+            scopes.curr_scope = func_scope
+            scopes.push_scope()
+            for param, arg in zip(func_def.params, arg_values):
+                scopes.add_variable(
+                    param.name, param.type, param.is_mutable, convert(param.type, arg, pos), pos
+                )
+            interpreter.curr_recursion += 1
+            if interpreter.curr_recursion > interpreter._max_recursion_depth:
+                raise InterpreterError(pos, "Maximal recursion depth reached!")
+            rv = convert(func_def.type, func_def.prog.accept(interpreter), pos)
+            interpreter.curr_recursion -= 1
+            scopes.pop_scope(pos)
+            scopes.curr_scope = curr_scope
+            return rv
+
+        return run_func_call
+
+    def _compile_obj_access(self, obj_access: ObjectAccess):
+        scopes = self.scopes
+        name_chain = obj_access.name_chain
+        obj_name = name_chain[0]
+        rest_address = name_chain[1:]
+        pos = obj_access.pos
+        address = self.annotations.addresses.get(obj_access)
+        if isinstance(obj_name, str):
+
+            def get_value():
+                return scopes.get_variable_at(address, obj_name, pos).value
+
+        elif isinstance(obj_name, FunctionCall):
+            get_value = self.compile(obj_name)
+        else:
+
+            def get_value():
+                return None
+
+        def run_obj_access():
+            value = get_value()
+            if value is None:
+                raise InterpreterError(pos, f"Variable '{obj_name}' has no value")
+            for attr_name in rest_address:
+                value = value[attr_name]
+                if value is None:
+                    raise InterpreterError(pos, f"Variable '{".".join(map(str, name_chain))}' has no value")
+            return share(value)
+
+        return run_obj_access
+
+    def _compile_var_dec(self, var_dec: VariableDeclaration):
+        interpreter = self.interpreter
+        scopes = self.scopes
+        name = var_dec.name
+        type_ = var_dec.type
+        is_mutable = var_dec.is_mutable
+        pos = var_dec.pos
+        address = self.annotations.addresses.get(var_dec)
+        conversion = self.annotations.conversions.get(var_dec)
+        if var_dec.default_value is not None:
+            get_default_value = self.compile(var_dec.default_value)
+        else:
+
+            def get_default_value():
+                return interpreter._get_default_value_for_(type_, 0, pos)
+
+        convert = interpreter._converter_for_(conversion)
+
+        if conversion is not None:
+
+            def run_checked_var_dec():
+                scopes.reserve_place_for_(name, type_, is_mutable, pos)
+                if default_value := get_default_value():
+                    scopes.set_at(address, name, convert(type_, default_value, pos), pos)
+
+            return run_checked_var_dec
+
+        def run_var_dec():
+            scopes.validate_type_name(type_, pos)
+            scopes.reserve_place_for_(name, type_, is_mutable, pos)
+            if default_value := get_default_value():
+                scopes.set_at(address, name, convert(type_, default_value, pos), pos)
+
+        return run_var_dec
+
+    def _compile_struct_def(self, struct_def: StructDef):
+        interpreter = self.interpreter
+        return lambda: Interpreter.visit_struct_def(interpreter, struct_def)
+
+    def _compile_variant_def(self, variant_def: VariantDef):
+        interpreter = self.interpreter
+        return lambda: Interpreter.visit_variant_def(interpreter, variant_def)
+
+    def _compile_func_def(self, func_def: FuncDef):
+        scopes = self.scopes
+        compiled_def = FuncDef(
+            func_def.name,
+            func_def.params,
+            func_def.type,
+            CompiledProgram(self.compile(func_def.prog), func_def.prog.line_index),
+            func_def.pos,
+        )
+        return lambda: scopes.add_function(compiled_def)
+
+    def _compile_or(self, or_expr: OrExpr):
+        children = [self.compile(child) for child in or_expr.children]
+
+        def run_or():
+            for child in children:
+                if child().bool():
+                    return TRUE
+
+        return run_or
+
+    def _compile_and(self, and_expr: AndExpr):
+        children = [self.compile(child) for child in and_expr.children]
+
+        def run_and():
+            for child in children:
+                child().bool()
+            return TRUE
+
+        return run_and
+
+    def _compile_rel(self, rel_expr: RelationExpr):
+        interpreter = self.interpreter
+        left = self.compile(rel_expr.left)
+        right = self.compile(rel_expr.right)
+        pos = rel_expr.pos
+        match rel_expr.operator:
+            case "==":
+                return self._binary_op(left, right, interpreter.eq, fast_eq, pos)
+            case "!=":
+                return self._binary_op(left, right, interpreter.ieq, fast_ieq, pos)
+            case "<":
+                return self._binary_op(left, right, interpreter.lt, fast_lt, pos)
+            case ">":
+                return self._binary_op(left, right, interpreter.gt, fast_gt, pos)
+            case "<=":
+                return self._binary_op(left, right, interpreter.lteq, fast_lteq, pos)
+            case ">=":
+                return self._binary_op(left, right, interpreter.gteq, fast_gteq, pos)
+
+        def run_unknown_rel():
+            left()
+            right()
+
+        return run_unknown_rel
+
+    def _compile_add(self, add_expr: AddExpr):
+        interpreter = self.interpreter
+        number_limit = interpreter.number_limit
+        pos = add_expr.pos
+        result = self.compile(add_expr.children[0])
+        for op, child in zip(add_expr.operations, add_expr.children[1:]):
+            right = self.compile(child)
+            if op == "+":
+                result = self._binary_op(
+                    result, right, interpreter.add, fast_add_with_limit(number_limit), pos
+                )
+            elif op == "-":
+                result = self._binary_op(result, right, interpreter.sub, fast_sub, pos)
+            else:
+                result = self._evaluate_and_keep_left(result, right)
+        return result
+
+    def _compile_multi(self, multi_expr: MultiExpr):
+        interpreter = self.interpreter
+        pos = multi_expr.pos
+        result = self.compile(multi_expr.children[0])
+        for op, child in zip(multi_expr.operations, multi_expr.children[1:]):
+            right = self.compile(child)
+            if op == "*":
+                result = self._binary_op(result, right, interpreter.mul, fast_mul, pos)
+            elif op == "/":
+                result = self._binary_op(result, right, interpreter.div, fast_div, pos)
+            else:
+                result = self._evaluate_and_keep_left(result, right)
+        return result
+
+    @staticmethod
+    def _evaluate_and_keep_left(left: Closure, right: Closure):
+        def run_unknown_op():
+            value = left()
+            right()
+            return value
+
+        return run_unknown_op
+
+    @staticmethod
+    def _binary_op(left: Closure, right: Closure, slow_op, fast_op, pos):
+        """Closure of binary operator. fast_op handles builtin values of common python types
+        and returns None for any other operands, which are passed to operator of interpreter"""
+
+        def run_binary_op():
+            left_value = left()
+            right_value = right()
+            if type(left_value) is BuiltInValue and type(right_value) is BuiltInValue:
+                result = fast_op(left_value.value, right_value.value, pos)
+                if result is not None:
+                    return result
+            return slow_op(left_value, right_value, pos)
+
+        return run_binary_op
+
+    def _compile_unary(self, unary_expr: UnaryExpr):
+        minus = self.interpreter.minus
+        negated = self.compile(unary_expr.negated)
+        pos = unary_expr.pos
+
+        def run_unary():
+            value = negated()
+            if type(value) is BuiltInValue:
+                raw = value.value
+                raw_type = type(raw)
+                if raw_type is int:
+                    return BuiltInValue("int", raw * -1)
+                if raw_type is float:
+                    return BuiltInValue("float", raw * -1)
+            return minus(value, pos)
+
+        return run_unary
+
+    def _compile_null_literal(self, null_literal: NullLiteral):
+        return lambda: None
+
+    def _compile_int_literal(self, int_literal: IntLiteral):
+        value = self.annotations.constant_of(int_literal, "int")
+        return lambda: value
+
+    def _compile_float_literal(self, float_literal: FloatLiteral):
+        value = self.annotations.constant_of(float_literal, "float")
+        return lambda: value
+
+    def _compile_str_literal(self, str_literal: StrLiteral):
+        value = self.annotations.constant_of(str_literal, "str")
+        return lambda: value
+
+
+class ClosureInterpreter(Interpreter):
+    """Interpreter that compiles visited node into closures and runs them.
+    Keeps the same state (scopes, recursion counter) and semantics as tree-walking Interpreter"""
+
+    def _run_compiled(self, node: ASTNode):
+        return ClosureCompiler(self).compile(node)()
+
+    def visit_program(self, program: Program):
+        self._resolve(program)
+        return self._run_compiled(program)
+
+    visit_assignment = _run_compiled
+    visit_if = _run_compiled
+    visit_while = _run_compiled
+    visit_return = _run_compiled
+    visit_visit = _run_compiled
+    visit_func_call = _run_compiled
+    visit_obj_access = _run_compiled
+    visit_var_dec = _run_compiled
+    visit_struct_def = _run_compiled
+    visit_variant_def = _run_compiled
+    visit_func_def = _run_compiled
+    visit_or = _run_compiled
+    visit_and = _run_compiled
+    visit_rel = _run_compiled
+    visit_add = _run_compiled
+    visit_multi = _run_compiled
+    visit_unary = _run_compiled
+    visit_null_literal = _run_compiled
+    visit_int_literal = _run_compiled
+    visit_float_literal = _run_compiled
+    visit_str_literal = _run_compiled
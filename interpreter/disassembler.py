@@ -0,0 +1,77 @@
+"""Human readable listing of bytecode, for debugging"""
+
+from typing import List
+
+from lexer.source_position import LineIndex
+from interpreter.bytecode import BytecodeProgram, CodeObject
+from interpreter.opcodes import *
+
+
+_JUMPS = {JUMP, POP_JUMP_IF_FALSE, POP_JUMP_IF_TRUE}
+
+
+def _describe_arg(code: CodeObject, opcode: int, arg: int) -> str:
+    if opcode in _JUMPS:
+        return f"to {arg}"
+    if opcode == BINARY_OP:
+        return OPERATORS[arg]
+    if opcode == GET_INNER_VARIABLE:
+        return code.names[arg]
+    if opcode == RETURN_IF_VALUE:
+        return f"pop {arg} scopes"
+    if opcode == DEFINE_FUNCTION:
+        return f"function {code.consts[arg].name}"
+    if opcode in (DEFINE_STRUCT, DEFINE_VARIANT):
+        return code.consts[arg].name
+    if opcode in (
+        LOAD_LITERAL,
+        LOAD_NAME,
+        LOAD_VARIABLE,
+        LOAD_VARIABLE_VALUE,
+        STORE_NAME,
+        STORE_VARIABLE_VALUE,
+        CHECK_HAS_VALUE,
+        GET_ATTR,
+        EVAL_NODE,
+        DECLARE_VARIABLE,
+        LOAD_DEFAULT_VALUE,
+        INIT_VARIABLE,
+        ENTER_CASE,
+        CALL_FUNCTION,
+    ):
+        return repr(code.consts[arg])
+    return ""
+
+
+def _nested_code_objects(code: CodeObject) -> List[CodeObject]:
+    return [
+        const.prog.code
+        for const in code.consts
+        if isinstance(getattr(const, "prog", None), BytecodeProgram)
+    ]
+
+
+def _row(pos, line_index: LineIndex):
+    if type(pos) is int:
+        return line_index.get_row_and_col(pos)[0] if line_index is not None else None
+    return pos[0] if pos is not None else None
+
+
+def disassemble(code: CodeObject, line_index: LineIndex = None) -> str:
+    """Lists instructions of code object and of all functions defined in it.
+    Each line has source line (when it changes), offset, opcode, argument and its meaning.
+    Source lines of offset positions are known only from line_index of source"""
+    lines = [f"Disassembly of {code.name}:"]
+    last_row = None
+    for offset in range(0, len(code.code), 2):
+        opcode, arg = code.code[offset], code.code[offset + 1]
+        row = _row(code.positions[offset >> 1], line_index)
+        row_column = f"{row:>5}" if row is not None and row != last_row else " " * 5
+        last_row = row if row is not None else last_row
+        description = _describe_arg(code, opcode, arg)
+        line = f"{row_column} {offset:>6} {OPCODE_NAMES[opcode]:<21} {arg:>4}"
+        lines.append(f"{line} ({description})" if description else line)
+    for nested in _nested_code_objects(code):
+        lines.append("")
+        lines.append(disassemble(nested, line_index))
+    return "\n".join(lines)
@@ -0,0 +1,22 @@
+"""Execution engines that can run parsed programs. All of them have the same semantics"""
+
+from interpreter.interpreter import Interpreter
+from interpreter.closure_compiler import ClosureInterpreter
+from interpreter.vm import VMInterpreter
+from interpreter.quickening import QuickeningInterpreter
+from interpreter.transpiler import TranspilingInterpreter
+from interpreter.tracing_jit import TracingInterpreter
+from interpreter.native import NativeInterpreter
+from interpreter.ir_machine import IRInterpreter
+
+
+ENGINES = {
+    "tree": Interpreter,
+    "closure": ClosureInterpreter,
+    "vm": VMInterpreter,
+    "quickening": QuickeningInterpreter,
+    "transpiler": TranspilingInterpreter,
+    "tracing": TracingInterpreter,
+    "native": NativeInterpreter,
+    "ir": IRInterpreter,
+}
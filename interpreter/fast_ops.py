@@ -0,0 +1,109 @@
+"""Fast paths of interpreter operators. Each one gives the same result as
+operator from interpreter.operators tables for the python types it handles and None for the rest"""
+
+from interpreter.interpreter_types import BuiltInValue, TRUTH
+from interpreter.interpreter_errors import DivisionByZero, NumberTooBig
+
+
+def fast_add_with_limit(number_limit):
+    def fast_add(left, right, pos):
+        left_type = type(left)
+        right_type = type(right)
+        if left_type is int and right_type is int:
+            result = int(left + right)
+            if result > number_limit:
+                raise NumberTooBig(pos, "Not good.")
+            return BuiltInValue("int", result)
+        if left_type is float:
+            if right_type is float:
+                return BuiltInValue("float", left + right)
+            if right_type is int:
+                return BuiltInValue("float", left + float(right))
+        elif left_type is str and right_type is str:
+            return BuiltInValue("str", left + right)
+        return None
+
+    return fast_add
+
+
+def fast_sub(left, right, pos):
+    left_type = type(left)
+    right_type = type(right)
+    if left_type is int and right_type is int:
+        return BuiltInValue("int", int(left - right))
+    if left_type is float:
+        if right_type is float:
+            return BuiltInValue("float", left - right)
+        if right_type is int:
+            return BuiltInValue("float", left - float(right))
+    return None
+
+
+def fast_mul(left, right, pos):
+    left_type = type(left)
+    right_type = type(right)
+    if left_type is int and right_type is int:
+        return BuiltInValue("int", left * right)
+    if left_type is float:
+        if right_type is float:
+            return BuiltInValue("float", left * right)
+        if right_type is int:
+            return BuiltInValue("float", left * float(right))
+    return None
+
+
+def fast_div(left, right, pos):
+    left_type = type(left)
+    right_type = type(right)
+    if left_type is int and right_type is int:
+        if right == 0:
+            raise DivisionByZero(pos, "Not good.")
+        return BuiltInValue("int", int(left / right))
+    if left_type is float:
+        if right_type is float:
+            return BuiltInValue("float", left / right)
+        if right_type is int:
+            return BuiltInValue("float", left / float(right))
+    return None
+
+
+def fast_eq(left, right, pos):
+    left_type = type(left)
+    if left_type is type(right) and left_type in (int, float, str):
+        return TRUTH[left == right]
+    return None
+
+
+def fast_lt(left, right, pos):
+    left_type = type(left)
+    right_type = type(right)
+    if left_type is right_type:
+        if left_type is int or left_type is float:
+            return TRUTH[left < right]
+        if left_type is str:
+            return TRUTH[len(left) < len(right)]
+    return None
+
+
+def fast_ieq(left, right, pos):
+    if type(left) is int and type(right) is int:
+        return TRUTH[left != right]
+    return None
+
+
+def fast_gt(left, right, pos):
+    if type(left) is int and type(right) is int:
+        return TRUTH[left > right]
+    return None
+
+
+def fast_gteq(left, right, pos):
+    if type(left) is int and type(right) is int:
+        return TRUTH[left >= right]
+    return None
+
+
+def fast_lteq(left, right, pos):
+    if type(left) is int and type(right) is int:
+        return TRUTH[left <= right]
+    return None
@@ -1,44 +1,83 @@
-from copy import deepcopy
 from typing import Dict, Callable
 from parser.AST import *
 from interpreter.visitor import Visitor
 from interpreter.scopes import Scopes
-from interpreter.interpreter_types import Variable, Value, StructValue, VariantValue, BuiltInValue
-from multipledispatch import dispatch
-from interpreter.interpreter_errors import InterpreterError, NotSupportedOperation, DivisionByZero, NumberTooBig
+from interpreter.annotations import Annotations
+from interpreter.resolver import Resolver
+from interpreter.optimizer import Optimizer
+from interpreter.type_checker import TypeChecker, KEEP, BUILT_IN, CONVERTIBLE_TYPE_NAMES
+from interpreter.interpreter_types import (
+    Variable,
+    Value,
+    StructValue,
+    VariantValue,
+    BuiltInValue,
+    FALSE,
+    TRUE,
+    share,
+    make_owned,
+    int_value,
+)
+from interpreter.operators import binary_operation, unary_operation
+from interpreter.interpreter_errors import InterpreterError
+
+
+def _keep(target_type: str, value: Value, pos):
+    return value
 
 
 class Interpreter(Visitor):
 
-    def __init__(self, max_recursion_depth: int = 100, max_struct_depth: int = 100):
+    def __init__(
+        self,
+        max_recursion_depth: int = 100,
+        max_struct_depth: int = 100,
+        optimize: bool = False,
+        check_types: bool = False,
+    ):
         self.scopes = Scopes()
         self._max_recursion_depth = max_recursion_depth
         self.curr_recursion = 1
         self.max_struct_depth = max_struct_depth
         self.number_limit = 10**9
+        self.optimize = optimize
+        self.check_types = check_types
+        self.annotations = Annotations()
 
 
 
     def visit_program(self, program):
+        self._resolve(program)
         for statement in program.children:
             rv = statement.accept(self)
             if rv:
                 return rv
 
-    def simple_assignment(self, name, target_type, expr, pos):
-        value = self._convert_to_(target_type, expr.accept(self), pos)
-        self.scopes.set_(name, value, pos)
+    def _resolve(self, program: Program):
+        """Gives variables of program not run before (depth, slot) addresses in scopes.
+        When optimize is set, program is optimized first. When check_types is set,
+        program with type errors is not run and checked parts of it skip dynamic checks"""
+        if program not in self.annotations.resolved:
+            if self.optimize:
+                Optimizer(self).optimize(program)
+            if self.check_types and (errors := TypeChecker(self.scopes, self.annotations).check(program)):
+                raise errors[0]
+            Resolver(self.scopes.current_scope_names(), self.annotations).resolve(program)
+
+    def simple_assignment(self, name, target_type, expr, pos, address=None, conversion=None):
+        value = self._converter_for_(conversion)(target_type, expr.accept(self), pos)
+        self.scopes.set_at(address, name, value, pos)
         return
 
     def is_simple_assignment(self, name_chain):
         return len(name_chain) == 1
 
     def complex_assignment(
-        self, variable: Variable, rest_addres: list[str], expr: Expr, pos
+        self, variable: Variable, rest_addres: list[str], expr: Expr, pos, conversion=None
     ):
         for attr_name in rest_addres:
             variable = self.get_inner_variable(variable, attr_name, pos)
-        variable.value = self._convert_to_(variable.type, expr.accept(self), pos)
+        variable.value = self._converter_for_(conversion)(variable.type, expr.accept(self), pos)
 
     def find_matching_named_type_with_(
         self, attr_name: str, named_types: list[NamedType], variant_type: str, pos
@@ -56,16 +95,18 @@ class Interpreter(Visitor):
         if self.scopes.is_built_in_type_(variable.type):
             raise InterpreterError(pos, "Simple types do not have attributes!")
         if self.scopes.is_struct_type_(variable.type):
-            variable.value = StructValue(variable.type, dict())
+            layout = self.scopes.get_layout_for_(variable.type, pos)
+            variable.value = StructValue(layout, layout.empty_values())
             return
         elif self.scopes.is_variant_type_(variable.type):
             named_types = self.scopes.get_named_types_for_(variable.type, pos)
             matched_named_type = self.find_matching_named_type_with_(
                 attr_name, named_types, variable.type, pos
             )
+            layout = self.scopes.get_layout_for_(matched_named_type.type, pos)
             variable.value = VariantValue(
                 variable.type,
-                StructValue(matched_named_type.type, dict()),
+                StructValue(layout, layout.empty_values()),
                 matched_named_type.name,
             )
             return
@@ -77,6 +118,7 @@ class Interpreter(Visitor):
             raise InterpreterError(pos,"Trying to reassign value to a non-mutable attribute.")
         if not variable.is_initialised():
             self.initialise_empty_complex_variable(variable, attr_name, pos)
+        make_owned(variable)
 
         if self.variable_needs_extending(variable, attr_name):
             self.extend_(variable, attr_name, pos)
@@ -88,11 +130,13 @@ class Interpreter(Visitor):
         name_chain = assignment.obj_access.name_chain
         name = name_chain[0]
         pos = assignment.pos
-        variable = self.scopes.get_variable(name, pos)
+        address = self.annotations.addresses.get(assignment)
+        conversion = self.annotations.conversions.get(assignment)
+        variable = self.scopes.get_variable_at(address, name, pos)
         if self.is_simple_assignment(name_chain):
-            self.simple_assignment(name, variable.type, assignment.expr, pos)
+            self.simple_assignment(name, variable.type, assignment.expr, pos, address, conversion)
             return
-        self.complex_assignment(variable, name_chain[1:], assignment.expr, pos)
+        self.complex_assignment(variable, name_chain[1:], assignment.expr, pos, conversion)
 
     def check_attr_name_in_struct_type(self, attr_name: str, struct_type: str, pos):
         if self.scopes.is_struct_type_(struct_type):
@@ -106,12 +150,8 @@ class Interpreter(Visitor):
         return not variable.value.is_attr_in_(attr_name)
 
     def extend_(self, variable: Variable, attr_name, pos):
-        attr_def = self.get_attr_def_from_type_(
-            attr_name, variable.value.get_concrete_type(), pos
-        )
-        variable.value.add_attr(
-            attr_def.name, Variable(attr_def.type, attr_def.is_mutable, None)
-        )
+        """Struct values have place for every attribute of their type, so only unknown attribute needs it"""
+        self.check_attr_name_in_(variable.value.get_concrete_type(), attr_name, pos)
 
     def get_attr_def_from_type_(self, attr_name, type_, pos):
         var_defs: List[VariableDeclaration] = self.scopes.get_var_defs_for_(type_, pos)
@@ -132,7 +172,8 @@ class Interpreter(Visitor):
     def visit_visit(self, visit_statement: VisitStatement):
         variant_value = visit_statement.obj.accept(self)
         pos = visit_statement.pos
-        if not self.scopes.is_variant_type_(variant_value.type):
+        checked = self.annotations.checked.get(visit_statement, False)
+        if not checked and not self.scopes.is_variant_type_(variant_value.type):
             raise InterpreterError(pos,"There is no variant type in visit")
         for cs in visit_statement.case_sections:
             if cs.type == variant_value.name:
@@ -177,10 +218,10 @@ class Interpreter(Visitor):
         curr_scope = self.scopes.curr_scope
         pos = func_call.pos
         args = [arg.accept(self) for arg in func_call.args]
-        func_def, func_scope_idx = (
-            self.scopes.get_function_definition_and_its_scope_idx(func_call.name, pos)
+        func_def, func_scope = (
+            self.scopes.get_function_definition_and_its_scope(func_call.name, pos)
         )
-        self.scopes.curr_scope = func_scope_idx
+        self.scopes.curr_scope = func_scope
         self.scopes.push_scope()
         for param, arg in zip(func_def.params, args):
             self.scopes.add_variable(
@@ -200,12 +241,18 @@ class Interpreter(Visitor):
         self.scopes.curr_scope = curr_scope
         return rv
 
+    def _run_body_of_(self, func_def: FuncDef):
+        """Runs body of called function in scope of the call, with arguments already declared.
+        Used by engines that call functions with evaluated arguments; visit_func_call runs
+        body itself, so calls of tree-walking Interpreter do not take one more Python frame"""
+        return func_def.prog.accept(self)
+
     def visit_obj_access(self, obj_access: ObjectAccess):
         value: Value = None
         obj_name = obj_access.name_chain[0]
         pos = obj_access.pos
         if isinstance(obj_name, str):
-            variable = self.scopes.get_variable(obj_name, pos)
+            variable = self.scopes.get_variable_at(self.annotations.addresses.get(obj_access), obj_name, pos)
             value = variable.value
         elif isinstance(obj_name, FunctionCall):
             value = obj_name.accept(self)
@@ -216,22 +263,32 @@ class Interpreter(Visitor):
             value = value[attr_name]
             if value is None:
                 raise InterpreterError(pos,
-                    f"Variable '{".".join(obj_access.name_chain)}' has no value"
+                    f"Variable '{".".join(map(str, obj_access.name_chain))}' has no value"
                 )
-        return deepcopy(value)
+        return share(value)
 
     def visit_var_dec(self, var_dec: VariableDeclaration):
         name: str = var_dec.name
         type_: str = var_dec.type
         pos = var_dec.pos
-        self.scopes.validate_type_name(type_, pos)
+        conversion = self.annotations.conversions.get(var_dec)
+        if conversion is None:
+            self.scopes.validate_type_name(type_, pos)
         is_mutable: bool = var_dec.is_mutable
         value: ASTNode = var_dec.default_value
 
         self.scopes.reserve_place_for_(name, type_, is_mutable, pos)
         if default_value := self._get_default_value(type_, value, depth=0, pos=pos):
-            converted = self._convert_to_(type_, default_value, pos)
-            self.scopes.set_(name, converted, pos)
+            converted = self._converter_for_(conversion)(type_, default_value, pos)
+            self.scopes.set_at(self.annotations.addresses.get(var_dec), name, converted, pos)
+
+    def _converter_for_(self, conversion: str) -> Callable:
+        """Function converting value to target type. TypeChecker chooses it for checked nodes"""
+        if conversion == KEEP:
+            return _keep
+        if conversion == BUILT_IN:
+            return self._convert_built_in_to_
+        return self._convert_to_
 
     def _convert_to_(self, target_type: str, value: Value, pos):
         if value is None and target_type == "null_type":
@@ -241,7 +298,7 @@ class Interpreter(Visitor):
         if value.type == target_type:
             return value
         if self.scopes.is_variant_type_(value.type):
-            return self._convert_to_(target_type, value.value, pos)
+            return self._convert_to_(target_type, share(value.value), pos)
         if self.scopes.is_struct_type_(value.type):
             if self.scopes.is_struct_type_(target_type):
                 raise InterpreterError(pos,
@@ -260,45 +317,11 @@ class Interpreter(Visitor):
                     f"No matching struct variant option while converting from struct '{value.type}' to variant type '{target_type}'"
                 )
         if self.scopes.is_built_in_type_(value.type):
-            if target_type == "str":
-                if value.type == "int":
-                    value.value = str(value.value)
-                elif value.type == "float":
-                    value.value = f"{value.value:.4f}"
-                else:
-                    raise InterpreterError(pos,
-                        f"Hmmm something went wrong when converting from {value.type} into str"
-                    )
-                value.type = "str"
-                return value
-            if target_type == "int":
-                if value.type == "float":
-                    value.value = int(value.value)
-                elif value.type == "str":
-                    try:
-                        value.value = int(float(value.value))
-                    except Exception:
-                        raise InterpreterError(pos,
-                            f"Can not convert '{value.value}' str into int"
-                        )
-                else:
-                    raise InterpreterError(pos,
-                        f"Hmmm something went wrong when converting from {value.type} into int"
-                    )
-                value.type = "int"
-                return value
-            if target_type == "float":
-                if value.type == "int":
-                    value.value = float(value.value)
-                if value.type == "str":
-                    try:
-                        value.value = float(value.value)
-                    except Exception:
-                        raise InterpreterError(pos,
-                            f"Can not convert '{value.value}' str into float"
-                        )
-                value.type = "float"
-                return value
+            if type(value) is VariantValue:
+                # variant holding builtin has type of the builtin, value it holds is converted
+                return self._convert_to_(target_type, value.value, pos)
+            if target_type in CONVERTIBLE_TYPE_NAMES:
+                return self._convert_built_in_to_(target_type, value, pos)
             if self.scopes.is_variant_type_(target_type):
                 # TODO add compatible types - for example traverse named types second time - if there is no direct type then pick first built in
                 named_types = self.scopes.get_named_types_for_(target_type, pos)
@@ -330,6 +353,45 @@ class Interpreter(Visitor):
                     return VariantValue(named_type.type, value, named_type.name)
         return value
 
+    def _convert_built_in_to_(self, target_type: str, value: Value, pos):
+        """Converts value of builtin type, also one held by variant, to int, float or str"""
+        if type(value) is VariantValue:
+            value = value.value
+        if value.type == target_type:
+            return value
+        if target_type == "str":
+            if value.type == "int":
+                return BuiltInValue("str", str(value.value))
+            if value.type == "float":
+                return BuiltInValue("str", f"{value.value:.4f}")
+            raise InterpreterError(pos,
+                f"Hmmm something went wrong when converting from {value.type} into str"
+            )
+        if target_type == "int":
+            if value.type == "float":
+                return int_value(int(value.value))
+            if value.type == "str":
+                try:
+                    return int_value(int(float(value.value)))
+                except Exception:
+                    raise InterpreterError(pos,
+                        f"Can not convert '{value.value}' str into int"
+                    )
+            raise InterpreterError(pos,
+                f"Hmmm something went wrong when converting from {value.type} into int"
+            )
+        if target_type == "float":
+            if value.type == "int":
+                return BuiltInValue("float", float(value.value))
+            if value.type == "str":
+                try:
+                    return BuiltInValue("float", float(value.value))
+                except Exception:
+                    raise InterpreterError(pos,
+                        f"Can not convert '{value.value}' str into float"
+                    )
+            return BuiltInValue("float", value.value)
+
     def _get_default_value(self, type_: str, value: ASTNode, depth, pos):
         if value is not None:
             return value.accept(self)
@@ -350,20 +412,18 @@ class Interpreter(Visitor):
             raise InterpreterError(pos,
                 f"Max struct depth reached. Probably you have cycle dependency in type '{type_}'"
             )
-        var_defs: List[VariableDeclaration] = self.scopes.get_var_defs_for_(type_, pos)
-        attr_dict: Dict[str, Variable] = dict()
+        layout = self.scopes.get_layout_for_(type_, pos)
+        values = []
         not_none = False
-        for var_def in var_defs:
+        for var_def in layout.attributes:
             default_value = self._get_default_value(
                 var_def.type, var_def.default_value, depth + 1, pos
             )
             if default_value:
                 not_none = True
-            attr_dict[var_def.name] = Variable(
-                var_def.type, var_def.is_mutable, default_value
-            )
+            values.append(default_value)
         if not_none:
-            return StructValue(type_, attr_dict)
+            return StructValue(layout, values)
         return None
 
     def _get_default_value_for_variant_(self, type_: str):
@@ -394,14 +454,14 @@ class Interpreter(Visitor):
     def visit_or(self, or_expr):
         for child in or_expr.children:
             if child.accept(self).bool():
-                return BuiltInValue('int', 1)
+                return TRUE
         BuiltInValue('int', 0)
 
     def visit_and(self, and_expr):
         for child in and_expr.children:
             if not child.accept(self).bool():
                 BuiltInValue('int', 0)
-        return BuiltInValue('int', 1)
+        return TRUE
 
     def visit_rel(self, rel_expr):
         left = rel_expr.left.accept(self)
@@ -447,488 +507,56 @@ class Interpreter(Visitor):
         return None
 
     def visit_int_literal(self, int_literal):
-        return BuiltInValue("int", int_literal.value)
+        return self.annotations.constant_of(int_literal, "int")
 
     def visit_float_literal(self, float_literal):
-        return BuiltInValue("float", float_literal.value)
+        return self.annotations.constant_of(float_literal, "float")
 
     def visit_str_literal(self, str_literal):
-        return BuiltInValue("str", str_literal.value)
+        return self.annotations.constant_of(str_literal, "str")
     
-    @dispatch(BuiltInValue, object) 
-    def minus(self, value, pos):
-        return self.minus(value.value, pos)
-
-    @dispatch(int, object) 
     def minus(self, value, pos):
-        value *= -1
-        return BuiltInValue('int', value)
+        return unary_operation(self, "-", value, pos)
 
-    @dispatch(float, object) 
-    def minus(self, value, pos):
-        value *= -1
-        return BuiltInValue('float', value)
-    
-    @dispatch(str, object) 
-    def minus(self, value, pos):
-        raise NotSupportedOperation(pos, "Can not '-' a string.")
-
-    @dispatch(StructValue, object) 
-    def minus(self, value, pos):
-        raise NotSupportedOperation(pos, "Can not '-' a struct.")
-
-    @dispatch(VariantValue, object) 
-    def minus(self, value, pos):
-        value.value = self.minus(value.value, pos)
-        return value
-    
-    @dispatch(BuiltInValue, BuiltInValue, object)
-    def mul(self, left, right, pos):
-        return self.mul(left.value, right.value, pos)
-
-    @dispatch(int, int, object)
-    def mul(self, left, right, pos):
-        return BuiltInValue('int', left * right)
-    
-    @dispatch(int, float, object)
     def mul(self, left, right, pos):
-        right = self._convert_to_('int', BuiltInValue('float', right), pos)
-        return self.mul(BuiltInValue('int', left), right, pos)
+        return binary_operation(self, "*", left, right, pos)
 
-    @dispatch(int, str, object)
-    def mul(self, left, right, pos):
-        right = self._convert_to_('int', BuiltInValue('str', right), pos)
-        return self.mul(BuiltInValue('int', left), right, pos)
-
-    @dispatch(object, StructValue, object)
-    def mul(self, left, right, pos):
-        raise NotSupportedOperation(pos, "Can not '*' a  struct.")
-    
-    @dispatch(StructValue, object, object)
-    def mul(self, left, right, pos):
-        raise NotSupportedOperation(pos, "Can not '*' a struct.")
-
-    @dispatch(BuiltInValue, VariantValue, object)
-    def mul(self, left, right, pos):
-        return self.mul(left, right.value, pos)
-    
-    @dispatch(VariantValue, BuiltInValue, object)
-    def mul(self, left, right, pos):
-        return self.mul(left.value, right, pos)
-    
-    @dispatch(VariantValue, VariantValue, object)
-    def mul(self, left, right, pos):
-        return self.mul(left.value, right.value, pos)
-
-    @dispatch(float, int, object)
-    def mul(self, left, right, pos):
-        return BuiltInValue('float', left * float(right))
-    
-    @dispatch(float, float, object)
-    def mul(self, left, right, pos):
-        return BuiltInValue('float', left * right)
-    
-    @dispatch(float, str, object)
-    def mul(self, left, right, pos):
-        right = self._convert_to_('float', BuiltInValue('str', right), pos)
-        return self.mul(BuiltInValue('float', left), right, pos)
-    
-    @dispatch(str, int, object)
-    def mul(self, left, right, pos):
-        return BuiltInValue('str', left*right) # reapeating right times left value.
-    
-    @dispatch(str, float, object)
-    def mul(self, left, right, pos):
-        right = self._convert_to_('int', BuiltInValue('float', right), pos)
-        return self.mul(BuiltInValue('str', left), right, pos)
-
-    @dispatch(str, str, object)
-    def mul(self, left, right, pos):
-        result = []
-        for l, r in zip(left,right):
-            result.append((l+r))
-        return BuiltInValue('str', "".join(result))
-    
-    @dispatch(BuiltInValue, BuiltInValue, object)
-    def div(self, left, right, pos):
-        return self.div(left.value, right.value, pos)
-    
-    @dispatch(VariantValue, VariantValue, object)
-    def div(self, left, right, pos):
-        return self.div(left.value, right.value, pos)
-
-    @dispatch(int, int, object)
-    def div(self, left, right, pos):
-        if right == 0:
-            raise DivisionByZero(pos, "Not good.")
-        return BuiltInValue('int', int(left / right))
-
-    @dispatch(int, float, object)
-    def div(self, left, right, pos):
-        right = self._convert_to_('int', BuiltInValue('float', right), pos)
-        if right.value == 0:
-            raise DivisionByZero(pos, "Not good.")
-        return BuiltInValue('int', int(left / right.value))
-
-    @dispatch(int, str, object)
-    def div(self, left, right, pos):
-        right = self._convert_to_('int', BuiltInValue('str', right), pos)
-        if right.value == 0:
-            raise DivisionByZero(pos, "Not good.")
-        return BuiltInValue('int', int(left / right.value))
-    
-
-    @dispatch(object, StructValue, object)
-    def div(self, left, right, pos):
-        raise NotSupportedOperation(pos, "Can not '/' struct.")
-    
-    @dispatch(StructValue, object, object)
-    def div(self, left, right, pos):
-        raise NotSupportedOperation(pos, "Can not '/' struct.")
-
-    @dispatch(BuiltInValue, VariantValue, object)
-    def div(self, left, right, pos):
-        return self.div(left, right.value, pos)
-    
-    @dispatch(VariantValue, BuiltInValue, object)
-    def div(self, left, right, pos):
-        return self.div(left.value, right, pos)
-    
-
-    @dispatch(float, int, object)
     def div(self, left, right, pos):
-        return BuiltInValue('float', left / float(right))
-    
-    @dispatch(float, float, object)
-    def div(self, left, right, pos):
-        return BuiltInValue('float', left / right)
-    
-    @dispatch(float, str, object)
-    def div(self, left, right, pos):
-        right = self._convert_to_('float', BuiltInValue('str', right), pos)
-        return self.div(BuiltInValue('float', left), right, pos)
-    
-    @dispatch(str, int, object)
-    def div(self, left, right, pos):
-        return BuiltInValue('str', left[right] if len(left) > right else "") # getting char at right idx
-    
-    @dispatch(str, float, object)
-    def div(self, left, right, pos):
-        right = self._convert_to_('int', BuiltInValue('float', right), pos)
-        return self.div(BuiltInValue('str', left), right, pos)
-
-    @dispatch(str, str, object)
-    def div(self, left, right, pos):
-        return BuiltInValue('str', left.replace(right, ""))
-    
-
-    @dispatch(BuiltInValue, BuiltInValue, object)
-    def add(self, left, right, pos):
-        return self.add(left.value, right.value, pos)
-    
-    @dispatch(VariantValue, VariantValue, object)
-    def add(self, left, right, pos):
-        return self.add(left.value, right.value, pos)
-
-    @dispatch(int, int, object)
-    def add(self, left, right, pos):
-        if int(left + right) > self.number_limit:
-            raise NumberTooBig(pos, "Not good.")
-        return BuiltInValue('int', int(left + right))
-
-    @dispatch(int, float, object)
-    def add(self, left, right, pos):
-        right = self._convert_to_('int', BuiltInValue('float', right), pos)
-        return BuiltInValue('int', int(left + right.value))
-
-    @dispatch(int, str, object)
-    def add(self, left, right, pos):
-        right = self._convert_to_('int', BuiltInValue('str', right), pos)
-        return BuiltInValue('int', int(left + right.value))
-    
-
-    @dispatch(object, StructValue, object)
-    def add(self, left, right, pos):
-        raise NotSupportedOperation(pos, "Can not '+' struct.")
-    
-    @dispatch(StructValue, object, object)
-    def add(self, left, right, pos):
-        raise NotSupportedOperation(pos, "Can not '+' struct.")
-
-    @dispatch(BuiltInValue, VariantValue, object)
-    def add(self, left, right, pos):
-        return self.add(left, right.value, pos)
-    
-    @dispatch(VariantValue, BuiltInValue, object)
-    def add(self, left, right, pos):
-        return self.add(left.value, right, pos)
-    
-
-    @dispatch(float, int, object)
-    def add(self, left, right, pos):
-        return BuiltInValue('float', left + float(right))
-    
-    @dispatch(float, float, object)
-    def add(self, left, right, pos):
-        return BuiltInValue('float', left + right)
-    
-    @dispatch(float, str, object)
-    def add(self, left, right, pos):
-        right = self._convert_to_('float', BuiltInValue('str', right), pos)
-        return self.add(BuiltInValue('float', left), right, pos)
-    
-    @dispatch(str, int, object)
-    def add(self, left, right, pos):
-        right = self._convert_to_('str', BuiltInValue('int', right), pos)
-        return BuiltInValue('str', left + right.value)
-    
-    @dispatch(str, float, object)
-    def add(self, left, right, pos):
-        right = self._convert_to_('str', BuiltInValue('float', right), pos)
-        return BuiltInValue('str', left + right.value)
+        return binary_operation(self, "/", left, right, pos)
 
-    @dispatch(str, str, object)
     def add(self, left, right, pos):
-        return BuiltInValue('str', left + right)
-    
-
-    @dispatch(BuiltInValue, BuiltInValue, object)
-    def sub(self, left, right, pos):
-        return self.sub(left.value, right.value, pos)
-    
-    @dispatch(VariantValue, VariantValue, object)
-    def sub(self, left, right, pos):
-        return self.sub(left.value, right.value, pos)
-
-    @dispatch(int, int, object)
-    def sub(self, left, right, pos):
-        return BuiltInValue('int', int(left - right))
+        return binary_operation(self, "+", left, right, pos)
 
-    @dispatch(int, float, object)
-    def sub(self, left, right, pos):
-        right = self._convert_to_('int', BuiltInValue('float', right), pos)
-        return BuiltInValue('int', int(left - right.value))
-
-    @dispatch(int, str, object)
-    def sub(self, left, right, pos):
-        right = self._convert_to_('int', BuiltInValue('str', right), pos)
-        return BuiltInValue('int', int(left - right.value))
-    
-
-    @dispatch(BuiltInValue, StructValue, object)
-    def sub(self, left, right, pos):
-        raise NotSupportedOperation(pos, "Can not '-' struct.")
-    
-    @dispatch(StructValue, BuiltInValue, object)
     def sub(self, left, right, pos):
-        raise NotSupportedOperation(pos, "Can not '-' struct.")
+        return binary_operation(self, "-", left, right, pos)
 
-    @dispatch(BuiltInValue, VariantValue, object)
-    def sub(self, left, right, pos):
-        return self.sub(left, right.value, pos)
-    
-    @dispatch(VariantValue, BuiltInValue, object)
-    def sub(self, left, right, pos):
-        return self.sub(left.value, right, pos)
-    
-
-    @dispatch(float, int, object)
-    def sub(self, left, right, pos):
-        return BuiltInValue('float', left - float(right))
-    
-    @dispatch(float, float, object)
-    def sub(self, left, right, pos):
-        return BuiltInValue('float', left - right)
-    
-    @dispatch(float, str, object)
-    def sub(self, left, right, pos):
-        right = self._convert_to_('float', BuiltInValue('str', right), pos)
-        return self.sub(BuiltInValue('float', left), right, pos)
-    
-    @dispatch(str, int, object)
-    def sub(self, left, right, pos):
-        right = self._convert_to_('str', BuiltInValue('int', right), pos)
-        return self.sub(BuiltInValue('str', left), right, pos)
-
-    @dispatch(str, float, object)
-    def sub(self, left, right, pos):
-        right = self._convert_to_('str', BuiltInValue('float', right), pos)
-        return self.sub(BuiltInValue('str', left), right, pos)
-    
-
-    @dispatch(str, str, object)
-    def sub(self, left, right, pos):
-        right_index = left.find(right)
-        if right_index == -1:
-            return BuiltInValue('str', left)    
-        return BuiltInValue('str', left[:right_index] + left[right_index + len(right):])
-    
-
-    @dispatch(BuiltInValue, BuiltInValue, object)
-    def eq(self, left, right, pos):
-        return self.eq(left.value, right.value, pos)
-    
-    @dispatch(VariantValue, VariantValue, object)
     def eq(self, left, right, pos):
-        return self.eq(left.value, right.value, pos)
-
-    @dispatch(int, int, object)
-    def eq(self, left, right, pos):
-        return BuiltInValue('int', int(left==right))
-
-    @dispatch(int, float, object)
-    def eq(self, left, right, pos):
-        right = self._convert_to_('int', BuiltInValue('float', right), pos)
-        return self.eq(BuiltInValue('int', left), right, pos)
-
-    @dispatch(int, str, object)
-    def eq(self, left, right, pos):
-        right = self._convert_to_('int', BuiltInValue('str', right), pos)
-        return self.eq(BuiltInValue('int', left), right, pos)
-    
-
-    @dispatch(object, StructValue, object)
-    def eq(self, left, right, pos):
-        raise NotSupportedOperation(pos, "Can not '==' '!=' struct.")
-    
-    @dispatch(StructValue, object, object)
-    def eq(self, left, right, pos):
-        raise NotSupportedOperation(pos, "Can not '==' '!=' struct.")
-
-    @dispatch(BuiltInValue, VariantValue, object)
-    def eq(self, left, right, pos):
-        return self.eq(left, right.value, pos)
-    
-    @dispatch(VariantValue, BuiltInValue, object)
-    def eq(self, left, right, pos):
-        return self.eq(left.value, right, pos)
-    
-
-    @dispatch(float, int, object)
-    def eq(self, left, right, pos):
-        right = self._convert_to_('float', BuiltInValue('int', right), pos)
-        return self.eq(left, right.value)
-    
-    @dispatch(float, float, object)
-    def eq(self, left, right, pos):
-        return BuiltInValue('int', int(left==right))
-    
-    @dispatch(float, str, object)
-    def eq(self, left, right, pos):
-        right = self._convert_to_('float', BuiltInValue('str', right), pos)
-        return self.eq(left, right.value, pos)
-    
-    @dispatch(str, int, object)
-    def eq(self, left, right, pos):
-        right = self._convert_to_('str', BuiltInValue('int', right), pos)
-        return self.eq(left, right.value, pos)
-
-    @dispatch(str, float, object)
-    def eq(self, left, right, pos):
-        right = self._convert_to_('str', BuiltInValue('float', right), pos)
-        return self.eq(left, right.value, pos)
-    
-
-    @dispatch(str, str, object)
-    def eq(self, left, right, pos):   
-        return BuiltInValue('int', int(left==right))
-    
+        return binary_operation(self, "==", left, right, pos)
 
     def not_(self, int_value: BuiltInValue):
         if int_value.value == 1:
-            return BuiltInValue('int', 0)
+            return FALSE
         if int_value.value == 0:
-            return BuiltInValue('int', 1)
+            return TRUE
         
     
-    @dispatch(object, object, object)
     def ieq(self, left, right, pos):
         return self.not_(self.eq(left,right,pos))
     
-    @dispatch(BuiltInValue, BuiltInValue, object)
-    def lt(self, left, right, pos):
-        return self.lt(left.value, right.value, pos)
-    
-    @dispatch(VariantValue, VariantValue, object)
-    def lt(self, left, right, pos):
-        return self.lt(left.value, right.value, pos)
-
-    @dispatch(int, int, object)
-    def lt(self, left, right, pos):
-        return BuiltInValue('int', int(left<right))
-
-    @dispatch(int, float, object)
-    def lt(self, left, right, pos):
-        right = self._convert_to_('int', BuiltInValue('float', right), pos)
-        return self.lt(BuiltInValue('int', left), right, pos)
-
-    @dispatch(int, str, object)
-    def lt(self, left, right, pos):
-        right = self._convert_to_('int', BuiltInValue('str', right), pos)
-        return self.lt(BuiltInValue('int', left), right, pos)
-    
-
-    @dispatch(object, StructValue, object)
-    def lt(self, left, right, pos):
-        raise NotSupportedOperation(pos, "Can not '<' '>' '>=' '<=' a struct.")
-    
-    @dispatch(StructValue, object, object)
-    def lt(self, left, right, pos):
-        raise NotSupportedOperation(pos, "Can not '<' '>' '>=' '<=' a struct.")
-
-    @dispatch(BuiltInValue, VariantValue, object)
     def lt(self, left, right, pos):
-        return self.lt(left, right.value, pos)
-    
-    @dispatch(VariantValue, BuiltInValue, object)
-    def lt(self, left, right, pos):
-        return self.lt(left.value, right, pos)
-    
-
-    @dispatch(float, int, object)
-    def lt(self, left, right, pos):
-        right = self._convert_to_('float', BuiltInValue('int', right), pos)
-        return self.lt(left, right.value)
-    
-    @dispatch(float, float, object)
-    def lt(self, left, right, pos):
-        return BuiltInValue('int', int(left<right))
-    
-    @dispatch(float, str, object)
-    def lt(self, left, right, pos):
-        right = self._convert_to_('float', BuiltInValue('str', right), pos)
-        return self.lt(left, right.value, pos)
-    
-    @dispatch(str, int, object)
-    def lt(self, left, right, pos):
-        right = self._convert_to_('str', BuiltInValue('int', right), pos)
-        return self.lt(left, right.value, pos)
-
-    @dispatch(str, float, object)
-    def lt(self, left, right, pos):
-        right = self._convert_to_('str', BuiltInValue('float', right), pos)
-        return self.lt(left, right.value, pos)
-    
-
-    @dispatch(str, str, object)
-    def lt(self, left, right, pos):   
-        return BuiltInValue('int', int(len(left)<len(right)))
-    
+        return binary_operation(self, "<", left, right, pos)
 
     def and_(self, left, right):
         if left.value == 1 and right.value == 1:
             return left
-        return BuiltInValue('int', 0)
+        return FALSE
 
-    @dispatch(object, object, object)
     def gt(self, left, right, pos):
         # 'A' > 'B' yields true but it should yield False
         return self.and_(self.not_(self.lt(left,right,pos)), self.not_(self.eq(left,right,pos)))
     
-    @dispatch(object, object, object)
     def gteq(self, left, right, pos):
         return self.not_(self.lt(left,right,pos))
     
-    @dispatch(object, object, object)
     def lteq(self, left, right, pos):
         return self.not_(self.gt(left,right,pos))
\ No newline at end of file
@@ -1,14 +1,14 @@
 """Errors raised by interpreter or scopes classes"""
 
+from lexer.source_position import PositionedError
 
 
-class InterpreterError(Exception):
+class InterpreterError(PositionedError):
     """Class for all Interpreter related errors"""
 
     def __init__(self, position, msg : str):
-        self.row, self.col = position
         self.msg = msg
-        super().__init__()
+        super().__init__(position)
 
     def __str__(self):
         return f"{self.__class__.__name__}: row: {self.row}, column: {self.col}, {self.msg}"
@@ -22,4 +22,7 @@ class DivisionByZero(InterpreterError):
 
 
 class NumberTooBig(InterpreterError):
-    pass
\ No newline at end of file
+    pass
+
+class TypeCheckError(InterpreterError):
+    """Type error found by TypeChecker before program is run"""
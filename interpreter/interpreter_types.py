@@ -1,3 +1,6 @@
+import sys
+
+
 class Variable:
     def __init__(self, type_, is_mutable, value):
         self.type = type_
@@ -14,7 +17,13 @@ class Variable:
         self.value = new_value
 
 
+BUILT_IN_TYPE_NAMES = frozenset({"int", "float", "str", "null_type"})
+
+
 class Value:
+    __slots__ = ("type", "value")
+    shared = False  # set on struct and variant values that have more than one owner, see share
+
     def __init__(self, type_, value):
         self.type = type_
         self.value = value
@@ -24,30 +33,131 @@ class Value:
 
 
 class BuiltInValue(Value):
+    """Never changed after it is created (conversions return new values),
+    so one builtin value can be held by any number of owners"""
+
+    __slots__ = ()
+
     def bool(self):
         return bool(self.value)
 
+    def __repr__(self):
+        return f"BuiltInValue({self.type!r}, {self.value!r})"
+
+
+_SMALL_INTS = tuple(BuiltInValue("int", raw) for raw in range(-5, 257))
+FALSE = _SMALL_INTS[5]
+TRUE = _SMALL_INTS[6]
+TRUTH = (FALSE, TRUE)  # indexed by result of python comparison
+_STRINGS: dict[str, BuiltInValue] = {}
+
+
+def int_value(raw: int) -> BuiltInValue:
+    """Int value, preallocated for small ints"""
+    if -5 <= raw <= 256:
+        return _SMALL_INTS[raw + 5]
+    return BuiltInValue("int", raw)
+
+
+def constant(type_: str, raw) -> BuiltInValue:
+    """Builtin value of literal. Small ints and strings are cached, so equal literals share one value"""
+    if type_ == "int":
+        return int_value(raw)
+    if type_ == "str":
+        value = _STRINGS.get(raw)
+        if value is None:
+            value = _STRINGS[raw] = BuiltInValue("str", sys.intern(raw))
+        return value
+    return BuiltInValue(type_, raw)
+
+
+class StructLayout:
+    """Attributes of struct type, computed once when the type is defined.
+    Values of struct are kept in list, at offsets of their attributes"""
+
+    def __init__(self, name: str, attributes: list):
+        self.name = name
+        self.attributes = attributes  # VariableDeclaration of each attribute
+        self.names = tuple(attr.name for attr in attributes)
+        self.types = tuple(attr.type for attr in attributes)
+        self.mutables = tuple(attr.is_mutable for attr in attributes)
+        self.offsets = {name: offset for offset, name in enumerate(self.names)}
+        self.clone = self._make_clone()
+
+    def _make_clone(self):
+        """Copy of values of struct for copy on write: values of struct and variant attributes
+        become shared by both structs. Builtins are immutable, so both structs can hold them"""
+        complex_offsets = tuple(
+            offset for offset, type_ in enumerate(self.types) if type_ not in BUILT_IN_TYPE_NAMES
+        )
+        if not complex_offsets:
+            return list.copy
+
+        def clone(values: list) -> list:
+            values = values.copy()
+            for offset in complex_offsets:
+                share(values[offset])
+            return values
+
+        return clone
+
+    def empty_values(self) -> list:
+        return [None] * len(self.names)
+
+
+class Attribute(Variable):
+    """Attribute of struct value seen as a variable. Its type and mutability come
+    from layout of struct, its value is kept in values of struct"""
+
+    __slots__ = ("struct", "offset")
+
+    def __init__(self, struct: "StructValue", offset: int):
+        self.struct = struct
+        self.offset = offset
+
+    @property
+    def type(self):
+        return self.struct.layout.types[self.offset]
+
+    @property
+    def is_mutable(self):
+        return self.struct.layout.mutables[self.offset]
+
+    @property
+    def value(self):
+        return self.struct.values[self.offset]
+
+    @value.setter
+    def value(self, new_value):
+        self.struct.values[self.offset] = new_value
+
 
 class StructValue(Value):
-    """Holds only initialised attributes"""
+    """Values of attributes in order of layout of struct type, None when attribute is not initialised"""
 
-    def __init__(self, type_: str, value: dict[str, Variable]):
-        super().__init__(type_, value)
+    __slots__ = ("layout", "values", "shared")
+
+    def __init__(self, layout: StructLayout, values: list):
+        self.type = layout.name
+        self.layout = layout
+        self.values = values
+        self.shared = False
+
+    @property
+    def value(self) -> dict[str, Attribute]:
+        return {name: Attribute(self, offset) for offset, name in enumerate(self.layout.names)}
 
     def __getitem__(self, attr_name):
-        return self.value[attr_name].value
+        return self.values[self.layout.offsets[attr_name]]
 
     def update_value_of_attr(self, attr_name, new_value):
-        self.value[attr_name].value = new_value
-
-    def add_attr(self, attr_name, variable):
-        self.value[attr_name] = variable
+        self.values[self.layout.offsets[attr_name]] = new_value
 
     def get_inner_variable(self, attr_name):
-        return self.value[attr_name]
+        return Attribute(self, self.layout.offsets[attr_name])
 
     def is_attr_in_(self, attr_name):
-        return attr_name in self.value.keys()
+        return attr_name in self.layout.offsets
 
     def get_concrete_type(self):
         return self.type
@@ -57,16 +167,16 @@ class StructValue(Value):
 
 
 class VariantValue(Value):
+    __slots__ = ("name", "shared")
+
     def __init__(self, type_: str, value, name):
         super().__init__(type_, value)
         self.name = name
+        self.shared = False
 
     def __getitem__(self, attr_name):
         return self.value[attr_name]
 
-    def add_attr(self, attr_name, variable):
-        self.value.value[attr_name] = variable
-
     def get_inner_variable(self, attr_name):
         return self.value.get_inner_variable(attr_name)
 
@@ -78,3 +188,30 @@ class VariantValue(Value):
 
     def bool(self):
         return True
+
+
+def share(value):
+    """Value read from variable for one more owner - variable, param or operand.
+    Builtins are immutable and struct and variant values are not copied, only marked as shared,
+    so reading a tree is O(1). Owner that changes shared value copies it first, see make_owned"""
+    if type(value) is StructValue or type(value) is VariantValue:
+        value.shared = True
+    return value
+
+
+def _copy_one_level(value):
+    """Copy of struct or variant value whose parts are shared with the original"""
+    if type(value) is StructValue:
+        return StructValue(value.layout, value.layout.clone(value.values))
+    return VariantValue(value.type, share(value.value), value.name)
+
+
+def make_owned(variable: Variable):
+    """Copy on write: called before value of variable is changed in place (its attribute is
+    assigned). Shared value is replaced by a copy owned only by variable, so other
+    owners still see the value as it was. For variant, struct held by it is made owned too"""
+    value = variable.value
+    if value.shared:
+        value = variable.value = _copy_one_level(value)
+    if type(value) is VariantValue and value.value is not None and value.value.shared:
+        value.value = _copy_one_level(value.value)
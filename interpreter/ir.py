@@ -0,0 +1,531 @@
+"""Three-address intermediate representation lowered from AST. Every instruction
+reads its operands from temps, writes at most one temp and has one immediate argument"""
+
+from typing import Callable, Dict, List
+
+from lexer.source_position import LineIndex, PositionedError
+from parser.AST import *
+from interpreter.annotations import Annotations
+from interpreter.interpreter_types import TRUE
+from interpreter.opcodes import OPERATORS
+
+
+# Values
+CONST = 0  # dest = arg, builtin value or None
+COPY = 1  # dest = args[0]
+LOAD = 2  # dest = shared value of variable, raises when it has none, arg is (name, address)
+VALUE = 3  # dest = value of variable as it is, arg is (name, address)
+CHECK = 4  # raises when args[0] is None, arg is name in error
+ATTR = 5  # dest = attribute of args[0], raises when it has no value, arg is (attribute name, name chain)
+SHARE = 6  # dest = args[0] shared with its new owner
+BINARY = 7  # dest = args[0] OPERATORS[arg] args[1]
+MINUS = 8  # dest = -args[0]
+TEST = 9  # calls bool() of args[0]
+
+# Variables and definitions
+VARIABLE = 10  # dest = Variable object, arg is (name, address)
+INNER = 11  # dest = attribute arg of Variable args[0] as Variable
+CONVERT = 12  # dest = args[0] converted to type of Variable args[1], arg is (conversion, declared type)
+CONVERT_INIT = 13  # dest = args[0] converted to declared type, None is kept, arg is (type, conversion)
+STORE = 14  # value of Variable args[0] = args[1] when it can be updated, arg is (name, address, known mutable)
+SET = 15  # value of Variable args[0] = args[1], mutability is checked by INNER
+DECLARE = 16  # dest = new Variable, arg is (name, type, is_mutable, conversion, address)
+DEFAULT = 17  # dest = default value of type arg
+CALL = 18  # dest = value of function arg called with args
+EVAL = 19  # dest = arg.accept(interpreter), for nodes that are not lowered
+DEFINE_STRUCT = 20  # arg is StructDef
+DEFINE_VARIANT = 21  # arg is VariantDef
+DEFINE_FUNCTION = 22  # arg is FuncDef with lowered body
+
+# Control flow
+PUSH_SCOPE = 23
+POP_SCOPE = 24
+VISIT = 25  # raises when args[0] is not value of variant type
+CASE = 26  # arg is (case type, label of next case). Matching case opens scope with variant value in it
+JUMP = 27  # arg is label
+JUMP_IF_FALSE = 28
+JUMP_IF_TRUE = 29
+RETURN_IF = 30  # returns args[0] when it is not None, after popping arg scopes
+RETURN = 31
+LABEL = 32  # arg is label, removed when code is assembled
+LOOP = 33  # marks place before while loop, arg is (label of its condition, label after it)
+
+# Loop invariant code motion, see interpreter.ir_passes
+HOIST = 34  # dest = value of instruction arg, POISON when it fails or may have effects
+REDO = 35  # when dest is POISON, instruction arg is run again
+
+OP_NAMES = {value: name for name, value in list(globals().items()) if name.isupper() and isinstance(value, int)}
+
+JUMPS = frozenset({JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE})
+BLOCK_ENDS = frozenset({JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE, CASE, RETURN_IF, RETURN})
+"""Instructions after which control may go elsewhere, so they end basic block"""
+
+
+class Poison:
+    """Value of hoisted instruction that has to be run again in loop"""
+
+    def __repr__(self):
+        return "POISON"
+
+
+POISON = Poison()
+
+
+class Instruction:
+    """dest = op(args), where dest and args are temps"""
+
+    __slots__ = ("op", "dest", "args", "arg", "pos")
+
+    def __init__(self, op: int, dest: int = None, args: tuple = (), arg=None, pos=None):
+        self.op = op
+        self.dest = dest
+        self.args = args
+        self.arg = arg
+        self.pos = pos
+
+    def __repr__(self):
+        return format_instruction(self)
+
+
+class IRCode:
+    """Lowered program or function body and number of temps it uses.
+    Passes rewrite instructions, IRMachine runs them once they are assembled"""
+
+    __slots__ = ("name", "instructions", "temps", "_assembled")
+
+    def __init__(self, name: str, instructions: List[Instruction], temps: int):
+        self.name = name
+        self.instructions = instructions
+        self.temps = temps
+        self._assembled = None
+
+    def new_temp(self) -> int:
+        self.temps += 1
+        return self.temps - 1
+
+    def nested_codes(self) -> List["IRCode"]:
+        """Bodies of functions defined in code"""
+        return [
+            instruction.arg.prog.code for instruction in self.instructions if instruction.op == DEFINE_FUNCTION
+        ]
+
+    def assembled(self) -> list:
+        """Instructions as (op, dest, a, b, arg, pos) tuples, with indexes of instructions
+        instead of labels. CALL has tuple of its arguments as a"""
+        if self._assembled is None:
+            targets = {}
+            kept = []
+            for instruction in self.instructions:
+                if instruction.op == LABEL:
+                    targets[instruction.arg] = len(kept)
+                elif instruction.op != LOOP:
+                    kept.append(instruction)
+            self._assembled = [_assemble(instruction, targets) for instruction in kept]
+        return self._assembled
+
+
+def _assemble(instruction: Instruction, targets: Dict[int, int]) -> tuple:
+    op, args, arg = instruction.op, instruction.args, instruction.arg
+    if op in JUMPS:
+        arg = targets[arg]
+    elif op == CASE:
+        arg = (arg[0], targets[arg[1]])
+    elif op in (HOIST, REDO):
+        arg = _assemble(arg, targets)
+    if op == CALL:
+        return op, instruction.dest, args, None, arg, instruction.pos
+    first = args[0] if args else None
+    second = args[1] if len(args) > 1 else None
+    return op, instruction.dest, first, second, arg, instruction.pos
+
+
+class IRProgram:
+    """Lowered body of function. IRMachine runs it with its own temps.
+    Like Program, locates errors raised in it with line_index of its source"""
+
+    __slots__ = ("code", "line_index")
+
+    def __init__(self, code: IRCode, line_index: LineIndex = None):
+        self.code = code
+        self.line_index = line_index
+
+    def accept(self, interpreter):
+        from interpreter.ir_machine import IRMachine  # pylint: disable=import-outside-toplevel
+
+        try:
+            return IRMachine(interpreter).run(self.code)
+        except PositionedError as error:
+            error.locate(self.line_index)
+            raise
+
+
+class _IRBuilder:
+    """Code under construction and declarations of its scopes known at lowering"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.instructions: List[Instruction] = []
+        self.temps = 0
+        self.labels = 0
+        self.scope_depth = 0
+        # name -> (slot, declaration) for each scope of code, like scopes of Resolver
+        self.declared: List[Dict[str, tuple]] = [{}]
+
+    def emit(self, op: int, args: tuple = (), arg=None, pos=None) -> int:
+        """Appends instruction that writes new temp and returns the temp"""
+        self.temps += 1
+        self.instructions.append(Instruction(op, self.temps - 1, args, arg, pos))
+        return self.temps - 1
+
+    def emit_effect(self, op: int, args: tuple = (), arg=None, pos=None):
+        """Appends instruction that writes no temp"""
+        self.instructions.append(Instruction(op, None, args, arg, pos))
+
+    def new_label(self) -> int:
+        self.labels += 1
+        return self.labels - 1
+
+    def mark(self, label: int):
+        self.emit_effect(LABEL, arg=label)
+
+    def declaration_of(self, name: str, address) -> VariableDeclaration:
+        """Declaration of variable at address when it was declared in this code, None otherwise"""
+        if address is None:
+            return None
+        depth, slot = address
+        idx = len(self.declared) - 1 - depth
+        if idx < 0:
+            return None
+        entry = self.declared[idx].get(name)
+        if entry is None or entry[0] != slot:
+            return None
+        return entry[1]
+
+    def build(self) -> IRCode:
+        return IRCode(self.name, self.instructions, self.temps)
+
+
+class IRLowering:
+    """Lowers AST nodes into IR code. Running lowered node gives the same value
+    and has the same effects on interpreter state as node.accept(interpreter).
+
+    Lowering of expression returns temp holding its value. Value of statement that
+    returns something (function call, return, unknown node) stops the whole code -
+    enclosing if, while and visit blocks included. Addresses, conversions and checked
+    visits are taken from annotations"""
+
+    _NAME = "<program>"
+
+    def __init__(self, annotations: Annotations = None):
+        self.annotations = annotations if annotations is not None else Annotations()
+        self._builder: _IRBuilder = None
+        self._statement_lowerings: Dict[type, Callable[[ASTNode], None]] = {
+            Program: self._lower_program,
+            AssignmentStatement: self._lower_assignment,
+            IfStatement: self._lower_if,
+            WhileStatement: self._lower_while,
+            VisitStatement: self._lower_visit,
+            VariableDeclaration: self._lower_var_dec,
+            StructDef: self._lower_struct_def,
+            VariantDef: self._lower_variant_def,
+            FuncDef: self._lower_func_def,
+        }
+        self._expression_lowerings: Dict[type, Callable[[ASTNode], int]] = {
+            ReturnStatement: self._lower_return,
+            FunctionCall: self._lower_func_call,
+            ObjectAccess: self._lower_obj_access,
+            OrExpr: self._lower_or,
+            AndExpr: self._lower_and,
+            RelationExpr: self._lower_rel,
+            AddExpr: self._lower_add,
+            MultiExpr: self._lower_multi,
+            UnaryExpr: self._lower_unary,
+            NullLiteral: self._lower_null_literal,
+            IntLiteral: self._lower_int_literal,
+            FloatLiteral: self._lower_float_literal,
+            StrLiteral: self._lower_str_literal,
+        }
+
+    def lower(self, node: ASTNode) -> IRCode:
+        """Returns code that evaluates to the same value as node.accept(interpreter)"""
+        if type(node) in self._statement_lowerings:
+            return self._lower_code(self._NAME, node, self._lower_statement, returns_value=False)
+        return self._lower_code(self._NAME, node, self._lower_expression, returns_value=True)
+
+    def _lower_code(self, name: str, node: ASTNode, lower_node, returns_value: bool) -> IRCode:
+        outer_builder, self._builder = self._builder, _IRBuilder(name)
+        try:
+            value = lower_node(node)
+            if not returns_value:
+                value = self._builder.emit(CONST, arg=None)
+            self._builder.emit_effect(RETURN, (value,))
+            return self._builder.build()
+        finally:
+            self._builder = outer_builder
+
+    def _lower_statement(self, node: ASTNode):
+        if lowering := self._statement_lowerings.get(type(node)):
+            lowering(node)
+            return
+        value = self._lower_expression(node)
+        self._builder.emit_effect(RETURN_IF, (value,), self._builder.scope_depth, node.pos)
+
+    def _lower_expression(self, node: ASTNode) -> int:
+        if lowering := self._expression_lowerings.get(type(node)):
+            return lowering(node)
+        return self._builder.emit(EVAL, arg=node, pos=getattr(node, "pos", None))
+
+    def _lower_block(self, program: Program, pos):
+        """Program run in its own scope"""
+        builder = self._builder
+        builder.emit_effect(PUSH_SCOPE)
+        self._lower_in_scope(program)
+        builder.emit_effect(POP_SCOPE, pos=pos)
+
+    def _lower_in_scope(self, program: Program):
+        builder = self._builder
+        builder.scope_depth += 1
+        builder.declared.append({})
+        self._lower_statement(program)
+        builder.declared.pop()
+        builder.scope_depth -= 1
+
+    def _lower_program(self, program: Program):
+        for statement in program.children:
+            self._lower_statement(statement)
+
+    def _lower_assignment(self, assignment: AssignmentStatement):
+        builder = self._builder
+        name_chain = assignment.obj_access.name_chain
+        name = name_chain[0]
+        pos = assignment.pos
+        address = self.annotations.addresses.get(assignment)
+        conversion = self.annotations.conversions.get(assignment)
+        variable = builder.emit(VARIABLE, arg=(name, address), pos=pos)
+        if len(name_chain) == 1:
+            declaration = builder.declaration_of(name, address)
+            value = self._lower_expression(assignment.expr)
+            declared_type = declaration.type if declaration is not None else None
+            value = builder.emit(CONVERT, (value, variable), (conversion, declared_type), pos)
+            known_mutable = declaration is not None and declaration.is_mutable
+            builder.emit_effect(STORE, (variable, value), (name, address, known_mutable), pos)
+            return
+        for attr_name in name_chain[1:]:
+            variable = builder.emit(INNER, (variable,), attr_name, pos)
+        value = self._lower_expression(assignment.expr)
+        value = builder.emit(CONVERT, (value, variable), (conversion, None), pos)
+        builder.emit_effect(SET, (variable, value), pos=pos)
+
+    def _lower_if(self, if_stmt: IfStatement):
+        builder = self._builder
+        pos = if_stmt.pos
+        condition = self._lower_expression(if_stmt.cond)
+        else_label = builder.new_label()
+        builder.emit_effect(JUMP_IF_FALSE, (condition,), else_label, pos)
+        self._lower_block(if_stmt.prog, pos)
+        if if_stmt.else_prog:
+            end_label = builder.new_label()
+            builder.emit_effect(JUMP, arg=end_label)
+            builder.mark(else_label)
+            self._lower_block(if_stmt.else_prog, pos)
+            builder.mark(end_label)
+        else:
+            builder.mark(else_label)
+
+    def _lower_while(self, while_stmt: WhileStatement):
+        builder = self._builder
+        pos = while_stmt.pos
+        start_label, end_label = builder.new_label(), builder.new_label()
+        builder.emit_effect(LOOP, arg=(start_label, end_label))
+        builder.mark(start_label)
+        condition = self._lower_expression(while_stmt.cond)
+        builder.emit_effect(JUMP_IF_FALSE, (condition,), end_label, pos)
+        self._lower_block(while_stmt.prog, pos)
+        builder.emit_effect(JUMP, arg=start_label)
+        builder.mark(end_label)
+
+    def _lower_visit(self, visit_statement: VisitStatement):
+        builder = self._builder
+        pos = visit_statement.pos
+        variant_value = self._lower_expression(visit_statement.obj)
+        if not self.annotations.checked.get(visit_statement, False):
+            builder.emit_effect(VISIT, (variant_value,), pos=pos)
+        end_label = builder.new_label()
+        for case_section in visit_statement.case_sections:
+            next_label = builder.new_label()
+            builder.emit_effect(CASE, (variant_value,), (case_section.type, next_label), pos)
+            self._lower_in_scope(case_section.program)
+            builder.emit_effect(POP_SCOPE, pos=pos)
+            builder.emit_effect(JUMP, arg=end_label)
+            builder.mark(next_label)
+        builder.mark(end_label)
+
+    def _lower_var_dec(self, var_dec: VariableDeclaration):
+        builder = self._builder
+        pos = var_dec.pos
+        address = self.annotations.addresses.get(var_dec)
+        conversion = self.annotations.conversions.get(var_dec)
+        declaration = (var_dec.name, var_dec.type, var_dec.is_mutable, conversion, address)
+        variable = builder.emit(DECLARE, arg=declaration, pos=pos)
+        if var_dec.default_value is not None:
+            value = self._lower_expression(var_dec.default_value)
+        else:
+            value = builder.emit(DEFAULT, arg=var_dec.type, pos=pos)
+        value = builder.emit(CONVERT_INIT, (value,), (var_dec.type, conversion), pos)
+        builder.emit_effect(STORE, (variable, value), (var_dec.name, address, True), pos)
+        if address is not None:
+            builder.declared[-1][var_dec.name] = (address[1], var_dec)
+        else:
+            builder.declared[-1][var_dec.name] = None
+
+    def _lower_struct_def(self, struct_def: StructDef):
+        self._builder.emit_effect(DEFINE_STRUCT, arg=struct_def, pos=struct_def.pos)
+
+    def _lower_variant_def(self, variant_def: VariantDef):
+        self._builder.emit_effect(DEFINE_VARIANT, arg=variant_def, pos=variant_def.pos)
+
+    def _lower_func_def(self, func_def: FuncDef):
+        body = self._lower_code(func_def.name, func_def.prog, self._lower_statement, returns_value=False)
+        lowered_def = FuncDef(func_def.name, func_def.params, func_def.type, IRProgram(body, func_def.prog.line_index), func_def.pos)
+        self._builder.emit_effect(DEFINE_FUNCTION, arg=lowered_def, pos=func_def.pos)
+
+    def _lower_return(self, return_stmt: ReturnStatement) -> int:
+        return self._lower_expression(return_stmt.expr)
+
+    def _lower_func_call(self, func_call: FunctionCall) -> int:
+        args = tuple(self._lower_expression(arg) for arg in func_call.args)
+        return self._builder.emit(CALL, args, func_call.name, func_call.pos)
+
+    def _lower_obj_access(self, obj_access: ObjectAccess) -> int:
+        builder = self._builder
+        name_chain = obj_access.name_chain
+        obj_name = name_chain[0]
+        pos = obj_access.pos
+        if isinstance(obj_name, str):
+            variable = (obj_name, self.annotations.addresses.get(obj_access))
+            if len(name_chain) == 1:
+                return builder.emit(LOAD, arg=variable, pos=pos)
+            value = builder.emit(VALUE, arg=variable, pos=pos)
+        elif isinstance(obj_name, FunctionCall):
+            value = self._lower_func_call(obj_name)
+        else:
+            value = builder.emit(CONST, arg=None)
+        builder.emit_effect(CHECK, (value,), obj_name, pos)
+        for attr_name in name_chain[1:]:
+            value = builder.emit(ATTR, (value,), (attr_name, name_chain), pos)
+        return builder.emit(SHARE, (value,))
+
+    def _lower_or(self, or_expr: OrExpr) -> int:
+        builder = self._builder
+        true_label, end_label = builder.new_label(), builder.new_label()
+        for child in or_expr.children:
+            builder.emit_effect(JUMP_IF_TRUE, (self._lower_expression(child),), true_label)
+        result = builder.emit(CONST, arg=None)
+        builder.emit_effect(JUMP, arg=end_label)
+        builder.mark(true_label)
+        builder.instructions.append(Instruction(CONST, result, (), TRUE))
+        builder.mark(end_label)
+        return result
+
+    def _lower_and(self, and_expr: AndExpr) -> int:
+        for child in and_expr.children:
+            self._builder.emit_effect(TEST, (self._lower_expression(child),))
+        return self._builder.emit(CONST, arg=TRUE)
+
+    def _lower_rel(self, rel_expr: RelationExpr) -> int:
+        left = self._lower_expression(rel_expr.left)
+        right = self._lower_expression(rel_expr.right)
+        if rel_expr.operator in OPERATORS[4:]:
+            return self._builder.emit(BINARY, (left, right), OPERATORS.index(rel_expr.operator), rel_expr.pos)
+        return self._builder.emit(CONST, arg=None)
+
+    def _lower_add(self, add_expr: AddExpr) -> int:
+        return self._lower_arithmetic(add_expr, ("+", "-"))
+
+    def _lower_multi(self, multi_expr: MultiExpr) -> int:
+        return self._lower_arithmetic(multi_expr, ("*", "/"))
+
+    def _lower_arithmetic(self, expr, operators) -> int:
+        """Left-associative chain of operators. Operand of unknown operator is evaluated and ignored"""
+        result = self._lower_expression(expr.children[0])
+        for op, child in zip(expr.operations, expr.children[1:]):
+            right = self._lower_expression(child)
+            if op in operators:
+                result = self._builder.emit(BINARY, (result, right), OPERATORS.index(op), expr.pos)
+        return result
+
+    def _lower_unary(self, unary_expr: UnaryExpr) -> int:
+        value = self._lower_expression(unary_expr.negated)
+        return self._builder.emit(MINUS, (value,), pos=unary_expr.pos)
+
+    def _lower_null_literal(self, null_literal: NullLiteral) -> int:
+        return self._builder.emit(CONST, arg=None)
+
+    def _lower_int_literal(self, int_literal: IntLiteral) -> int:
+        return self._builder.emit(CONST, arg=self.annotations.constant_of(int_literal, "int"))
+
+    def _lower_float_literal(self, float_literal: FloatLiteral) -> int:
+        return self._builder.emit(CONST, arg=self.annotations.constant_of(float_literal, "float"))
+
+    def _lower_str_literal(self, str_literal: StrLiteral) -> int:
+        return self._builder.emit(CONST, arg=self.annotations.constant_of(str_literal, "str"))
+
+
+def _describe_arg(instruction: Instruction) -> str:
+    op, arg = instruction.op, instruction.arg
+    if op in JUMPS or op == LABEL:
+        return f"L{arg}"
+    if op == CASE:
+        return f"{arg[0]} else L{arg[1]}"
+    if op == LOOP:
+        return f"L{arg[0]} to L{arg[1]}"
+    if op == BINARY:
+        return OPERATORS[arg]
+    if op in (LOAD, VALUE, VARIABLE, STORE):
+        return arg[0] if arg[1] is None else f"{arg[0]} at {arg[1]}"
+    if op == DECLARE:
+        return f"{arg[0]} : {arg[1]}"
+    if op == ATTR:
+        return arg[0]
+    if op in (CONVERT, CONVERT_INIT):
+        return f"{arg[0]}, {arg[1]}"
+    if op in (DEFINE_STRUCT, DEFINE_VARIANT, DEFINE_FUNCTION):
+        return arg.name
+    if op == EVAL:
+        return type(arg).__name__
+    if op == RETURN_IF:
+        return f"pop {arg} scopes"
+    if op in (HOIST, REDO):
+        return format_instruction(arg)
+    if op == CONST:
+        return repr(arg)
+    if arg is None:
+        return ""
+    return str(arg)
+
+
+def format_instruction(instruction: Instruction) -> str:
+    """One line of IR listing, e.g. t3 = BINARY t1, t2 (+)"""
+    if instruction.op == LABEL:
+        return f"L{instruction.arg}:"
+    text = OP_NAMES[instruction.op]
+    if instruction.dest is not None:
+        text = f"t{instruction.dest} = {text}"
+    if instruction.args:
+        text += " " + ", ".join(f"t{arg}" for arg in instruction.args)
+    description = _describe_arg(instruction)
+    return f"{text} ({description})" if description else text
+
+
+def format_ir(code: IRCode) -> str:
+    """Lists instructions of code and of all functions defined in it"""
+    lines = [f"IR of {code.name}:"]
+    for idx, instruction in enumerate(code.instructions):
+        if instruction.op == LABEL:
+            lines.append(f"       {format_instruction(instruction)}")
+        else:
+            lines.append(f"{idx:>5}    {format_instruction(instruction)}")
+    for nested in code.nested_codes():
+        lines.append("")
+        lines.append(format_ir(nested))
+    return "\n".join(lines)
@@ -0,0 +1,279 @@
+"""Register machine running IR code, and engine that lowers and optimizes programs for it"""
+
+from parser.AST import ASTNode, Program
+from interpreter.fast_ops import (
+    fast_add_with_limit,
+    fast_sub,
+    fast_mul,
+    fast_div,
+    fast_eq,
+    fast_ieq,
+    fast_lt,
+    fast_gt,
+    fast_lteq,
+    fast_gteq,
+)
+from interpreter.interpreter import Interpreter
+from interpreter.interpreter_errors import InterpreterError
+from interpreter.interpreter_types import BuiltInValue, share
+from interpreter.ir import *
+from interpreter.ir_passes import optimize_ir
+
+
+class IRMachine:
+    """Runs IR code on state of interpreter - its scopes and recursion counter.
+    Temps of code live in list of registers, one list for each run of code"""
+
+    def __init__(self, interpreter: Interpreter):
+        self.interpreter = interpreter
+        self.scopes = interpreter.scopes
+
+    def _binary_operators(self):
+        """(fast path, operator of interpreter) for each of OPERATORS"""
+        interpreter = self.interpreter
+        return (
+            (fast_add_with_limit(interpreter.number_limit), interpreter.add),
+            (fast_sub, interpreter.sub),
+            (fast_mul, interpreter.mul),
+            (fast_div, interpreter.div),
+            (fast_eq, interpreter.eq),
+            (fast_ieq, interpreter.ieq),
+            (fast_lt, interpreter.lt),
+            (fast_gt, interpreter.gt),
+            (fast_lteq, interpreter.lteq),
+            (fast_gteq, interpreter.gteq),
+        )
+
+    def _call(self, name: str, args: list, pos):
+        """Calls function like Interpreter.visit_func_call, with arguments already evaluated"""
+        interpreter = self.interpreter
+        scopes = self.scopes
+        curr_scope = scopes.curr_scope
+        func_def, func_scope = scopes.get_function_definition_and_its_scope(name, pos)
+        scopes.curr_scope = func_scope
+        scopes.push_scope()
+        for param, arg in zip(func_def.params, args):
+            scopes.add_variable(
+                param.name, param.type, param.is_mutable, interpreter._convert_to_(param.type, arg, pos), pos
+            )
+        interpreter.curr_recursion += 1
+        if interpreter.curr_recursion > interpreter._max_recursion_depth:
+            raise InterpreterError(pos, "Maximal recursion depth reached!")
+        rv = interpreter._convert_to_(func_def.type, interpreter._run_body_of_(func_def), pos)
+        interpreter.curr_recursion -= 1
+        scopes.pop_scope(pos)
+        scopes.curr_scope = curr_scope
+        return rv
+
+    def _value_of(self, instruction: tuple, regs: list, binary_operators):
+        """Value of hoistable instruction, the same as when it is run by run"""
+        op, _, a, b, arg, pos = instruction
+        if op == LOAD:
+            value = self.scopes.get_variable_at(arg[1], arg[0], pos).value
+            if value is None:
+                raise InterpreterError(pos, f"Variable '{arg[0]}' has no value")
+            return share(value)
+        if op == VALUE:
+            return self.scopes.get_variable_at(arg[1], arg[0], pos).value
+        if op == ATTR:
+            value = regs[a][arg[0]]
+            if value is None:
+                raise InterpreterError(pos, f"Variable '{".".join(map(str, arg[1]))}' has no value")
+            return value
+        if op == SHARE:
+            return share(regs[a])
+        if op == BINARY:
+            left, right = regs[a], regs[b]
+            fast_op, slow_op = binary_operators[arg]
+            if type(left) is BuiltInValue and type(right) is BuiltInValue:
+                result = fast_op(left.value, right.value, pos)
+                if result is not None:
+                    return result
+            return slow_op(left, right, pos)
+        if op == MINUS:
+            return self.interpreter.minus(regs[a], pos)
+        if op == CONST:
+            return arg
+        return regs[a]
+
+    def _speculate(self, instruction: tuple, regs: list, binary_operators):
+        """Value of instruction hoisted out of loop. Instruction that fails, reads POISON
+        or would share value that is not builtin gives POISON, so it is run in loop again"""
+        op, _, a, b, _, _ = instruction
+        if any(temp is not None and regs[temp] is POISON for temp in (a, b)):
+            return POISON
+        try:
+            if op == LOAD:
+                value = self._value_of((VALUE,) + instruction[1:], regs, binary_operators)
+                return value if type(value) is BuiltInValue else POISON
+            if op == SHARE:
+                return regs[a] if type(regs[a]) is BuiltInValue else POISON
+            return self._value_of(instruction, regs, binary_operators)
+        except Exception:  # pylint: disable=broad-exception-caught
+            return POISON
+
+    def run(self, code: IRCode):
+        """Runs code and returns its value"""
+        interpreter = self.interpreter
+        scopes = self.scopes
+        binary_operators = self._binary_operators()
+        instructions = code.assembled()
+        regs = [None] * code.temps
+        ip = 0
+
+        while True:
+            op, dest, a, b, arg, pos = instructions[ip]
+            ip += 1
+
+            if op == LOAD:
+                value = scopes.get_variable_at(arg[1], arg[0], pos).value
+                if value is None:
+                    raise InterpreterError(pos, f"Variable '{arg[0]}' has no value")
+                regs[dest] = share(value)
+            elif op == CONST:
+                regs[dest] = arg
+            elif op == BINARY:
+                left = regs[a]
+                right = regs[b]
+                fast_op, slow_op = binary_operators[arg]
+                if type(left) is BuiltInValue and type(right) is BuiltInValue:
+                    result = fast_op(left.value, right.value, pos)
+                    if result is not None:
+                        regs[dest] = result
+                        continue
+                regs[dest] = slow_op(left, right, pos)
+            elif op == JUMP_IF_FALSE:
+                if not regs[a].bool():
+                    ip = arg
+            elif op == VARIABLE:
+                regs[dest] = scopes.get_variable_at(arg[1], arg[0], pos)
+            elif op == CONVERT:
+                regs[dest] = interpreter._converter_for_(arg[0])(regs[b].type, regs[a], pos)
+            elif op == STORE:
+                variable = regs[a]
+                if variable.value is not None and not variable.is_mutable:
+                    raise InterpreterError(pos, "Trying to reassign value to non mutable variable")
+                variable.value = regs[b]
+            elif op == JUMP:
+                ip = arg
+            elif op == REDO:
+                if regs[dest] is POISON:
+                    regs[dest] = self._value_of(arg, regs, binary_operators)
+            elif op == COPY:
+                regs[dest] = regs[a]
+            elif op == PUSH_SCOPE:
+                scopes.push_scope()
+            elif op == POP_SCOPE:
+                scopes.pop_scope(pos)
+            elif op == CALL:
+                regs[dest] = self._call(arg, [regs[temp] for temp in a], pos)
+            elif op == RETURN_IF:
+                value = regs[a]
+                if value is not None:
+                    for _ in range(arg):
+                        scopes.pop_scope(pos)
+                    return value
+            elif op == VALUE:
+                regs[dest] = scopes.get_variable_at(arg[1], arg[0], pos).value
+            elif op == CHECK:
+                if regs[a] is None:
+                    raise InterpreterError(pos, f"Variable '{arg}' has no value")
+            elif op == ATTR:
+                value = regs[a][arg[0]]
+                if value is None:
+                    raise InterpreterError(pos, f"Variable '{".".join(map(str, arg[1]))}' has no value")
+                regs[dest] = value
+            elif op == SHARE:
+                regs[dest] = share(regs[a])
+            elif op == HOIST:
+                regs[dest] = self._speculate(arg, regs, binary_operators)
+            elif op == MINUS:
+                value = regs[a]
+                if type(value) is BuiltInValue:
+                    raw_type = type(value.value)
+                    if raw_type is int:
+                        regs[dest] = BuiltInValue("int", value.value * -1)
+                        continue
+                    if raw_type is float:
+                        regs[dest] = BuiltInValue("float", value.value * -1)
+                        continue
+                regs[dest] = interpreter.minus(value, pos)
+            elif op == JUMP_IF_TRUE:
+                if regs[a].bool():
+                    ip = arg
+            elif op == TEST:
+                regs[a].bool()
+            elif op == RETURN:
+                return regs[a]
+            elif op == INNER:
+                regs[dest] = interpreter.get_inner_variable(regs[a], arg, pos)
+            elif op == SET:
+                regs[a].value = regs[b]
+            elif op == DECLARE:
+                name, type_, is_mutable, conversion, _ = arg
+                if conversion is None:
+                    scopes.validate_type_name(type_, pos)
+                scopes.reserve_place_for_(name, type_, is_mutable, pos)
+                regs[dest] = scopes.curr_scope.variables[name]
+            elif op == CONVERT_INIT:
+                value = regs[a]
+                if value is not None:
+                    value = interpreter._converter_for_(arg[1])(arg[0], value, pos)
+                regs[dest] = value
+            elif op == DEFAULT:
+                regs[dest] = interpreter._get_default_value_for_(arg, 0, pos)
+            elif op == VISIT:
+                if not scopes.is_variant_type_(regs[a].type):
+                    raise InterpreterError(pos, "There is no variant type in visit")
+            elif op == CASE:
+                type_, next_case = arg
+                variant_value = regs[a]
+                if type_ == variant_value.name:
+                    scopes.push_scope()
+                    scopes.add_variable(variant_value.name, variant_value.type, False, variant_value.value, pos)
+                else:
+                    ip = next_case
+            elif op == DEFINE_FUNCTION:
+                scopes.add_function(arg)
+            elif op == DEFINE_STRUCT:
+                Interpreter.visit_struct_def(interpreter, arg)
+            elif op == DEFINE_VARIANT:
+                Interpreter.visit_variant_def(interpreter, arg)
+            elif op == EVAL:
+                regs[dest] = arg.accept(interpreter)
+            else:
+                raise ValueError(f"Unknown IR instruction {OP_NAMES.get(op, op)} in {code.name}")
+
+
+class IRInterpreter(Interpreter):
+    """Interpreter that lowers visited node into IR, optimizes it and runs it on IRMachine.
+    Keeps the same state (scopes, recursion counter) and semantics as tree-walking Interpreter"""
+
+    def _run_compiled(self, node: ASTNode):
+        return IRMachine(self).run(optimize_ir(IRLowering(self.annotations).lower(node)))
+
+    def visit_program(self, program: Program):
+        self._resolve(program)
+        return self._run_compiled(program)
+
+    visit_assignment = _run_compiled
+    visit_if = _run_compiled
+    visit_while = _run_compiled
+    visit_return = _run_compiled
+    visit_visit = _run_compiled
+    visit_func_call = _run_compiled
+    visit_obj_access = _run_compiled
+    visit_var_dec = _run_compiled
+    visit_struct_def = _run_compiled
+    visit_variant_def = _run_compiled
+    visit_func_def = _run_compiled
+    visit_or = _run_compiled
+    visit_and = _run_compiled
+    visit_rel = _run_compiled
+    visit_add = _run_compiled
+    visit_multi = _run_compiled
+    visit_unary = _run_compiled
+    visit_null_literal = _run_compiled
+    visit_int_literal = _run_compiled
+    visit_float_literal = _run_compiled
+    visit_str_literal = _run_compiled
@@ -0,0 +1,324 @@
+"""Optimization passes over IR code: common subexpression elimination, copy propagation,
+dead store elimination and loop invariant code motion. Code optimized by any of them
+gives the same value and has the same effects on interpreter state as code before it"""
+
+from collections import Counter
+from typing import Dict, Iterator, List, Set
+
+from interpreter.interpreter_types import BuiltInValue
+from interpreter.ir import *
+from interpreter.type_checker import KEEP
+
+
+HOISTABLE = frozenset({CONST, COPY, LOAD, VALUE, ATTR, SHARE, BINARY, MINUS})
+"""Instructions whose value depends only on their operands and on variables they read"""
+LOOP_BARRIERS = frozenset({CALL, EVAL, DEFINE_STRUCT, DEFINE_VARIANT, DEFINE_FUNCTION})
+"""Instructions that may change any variable or type, so nothing is hoisted out of loop with them"""
+SILENT = frozenset({CONST, COPY})
+"""Instructions that never fail and read no variables"""
+REMOVABLE = frozenset({CONST, COPY})
+"""Instructions that have no effects besides writing their temp"""
+
+
+def optimize_ir(code: IRCode) -> IRCode:
+    """Runs PASSES on code and on bodies of functions defined in it"""
+    for ir_pass in PASSES:
+        ir_pass(code)
+    for nested in code.nested_codes():
+        optimize_ir(nested)
+    return code
+
+
+def _blocks(instructions: List[Instruction]) -> Iterator[List[Instruction]]:
+    """Basic blocks: label or loop marker starts block, jump or return ends it"""
+    block = []
+    for instruction in instructions:
+        if instruction.op in (LABEL, LOOP) and block:
+            yield block
+            block = []
+        block.append(instruction)
+        if instruction.op in BLOCK_ENDS:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def _operands(instruction: Instruction) -> tuple:
+    if instruction.op in (HOIST, REDO):
+        return instruction.arg.args
+    return instruction.args
+
+
+def _definitions(instructions: List[Instruction]) -> Counter:
+    """How many instructions write each temp. Temps written once have one value wherever they are read"""
+    return Counter(instruction.dest for instruction in instructions if instruction.dest is not None)
+
+
+def _defined_once(instructions: List[Instruction]) -> Set[int]:
+    return {temp for temp, count in _definitions(instructions).items() if count == 1}
+
+
+def _is_identity_conversion(op: int, value: int, arg: tuple, constants: Dict[int, BuiltInValue]) -> bool:
+    """Conversion that returns converted value as it is, so it never fails"""
+    if op == CONVERT:
+        conversion, target_type = arg
+    else:
+        target_type, conversion = arg
+        if value in constants and constants[value] is None:
+            return True
+    constant = constants.get(value)
+    return conversion == KEEP or (constant is not None and constant.type == target_type)
+
+
+def _value_key(op: int, args: tuple, arg) -> tuple:
+    if op == ATTR:
+        return ("attr", args[0], arg[0])
+    if op == VARIABLE:
+        return ("variable",) + arg
+    return (op,) + args + (arg,)
+
+
+def eliminate_common_subexpressions(code: IRCode):
+    """Local value numbering. Instruction that computes value already held by a temp of its
+    basic block, e.g. repeated object access chain like node.left.value, becomes copy of that
+    temp. Read of variable after store to it becomes copy of the stored value, checks of
+    values known to be there and sharing of already shared values are dropped"""
+    stable = _defined_once(code.instructions)
+    instructions = []
+    for block in _blocks(code.instructions):
+        instructions.extend(_number_values(block, stable))
+    code.instructions = instructions
+
+
+def _number_values(block: List[Instruction], stable: Set[int]) -> List[Instruction]:
+    available: Dict[tuple, int] = {}  # key of computed value -> temp holding it
+    copies: Dict[int, int] = {}
+    checked: Set[int] = set()  # temps known not to be None
+    shared: Set[int] = set()  # temps holding values already shared
+    constants: Dict[int, BuiltInValue] = {}
+    result = []
+
+    def canonical(temp: int) -> int:
+        return copies.get(temp, temp)
+
+    def reuse(instruction: Instruction, temp: int):
+        result.append(Instruction(COPY, instruction.dest, (temp,), pos=instruction.pos))
+        if instruction.dest in stable:
+            copies[instruction.dest] = temp
+
+    def remember(key: tuple, instruction: Instruction, args: tuple):
+        if instruction.dest in stable and all(arg in stable for arg in args):
+            available[key] = instruction.dest
+
+    def forget(name: str = None):
+        """Forgets values read from memory, of all variables or of variables with name"""
+        for key in list(available):
+            if key[0] in ("value", "variable") and (name is None or key[1] == name):
+                del available[key]
+            elif name is None and key[0] == "attr":
+                del available[key]
+
+    for instruction in block:
+        op = instruction.op
+        args = tuple(canonical(arg) for arg in instruction.args)
+        dest = instruction.dest
+        if op == COPY:
+            if dest in stable and args[0] in stable:
+                copies[dest] = args[0]
+            result.append(instruction)
+        elif op == CONST:
+            if dest in stable:
+                constants[dest] = instruction.arg
+                if instruction.arg is not None:
+                    checked.add(dest)
+            result.append(instruction)
+        elif op == CHECK:
+            if args[0] not in checked:
+                checked.add(args[0])
+                result.append(instruction)
+        elif op in (LOAD, VALUE):
+            name, address = instruction.arg
+            key = ("value", name, address)
+            if (temp := available.get(key)) is None:
+                remember(key, instruction, ())
+                if op == LOAD:
+                    checked.add(dest)
+                    shared.add(dest)
+                result.append(instruction)
+            elif op == VALUE:
+                reuse(instruction, temp)
+            else:
+                if temp not in checked:
+                    result.append(Instruction(CHECK, None, (temp,), name, instruction.pos))
+                    checked.add(temp)
+                if temp in shared:
+                    reuse(instruction, temp)
+                else:
+                    result.append(Instruction(SHARE, dest, (temp,), pos=instruction.pos))
+                    shared.add(dest)
+                checked.add(dest)
+        elif op in (ATTR, SHARE, BINARY, MINUS, VARIABLE):
+            if op == SHARE and args[0] in shared:
+                reuse(instruction, args[0])
+                continue
+            key = _value_key(op, args, instruction.arg)
+            if (temp := available.get(key)) is not None:
+                reuse(instruction, temp)
+                continue
+            remember(key, instruction, args)
+            if op == ATTR or (op == SHARE and args[0] in checked):
+                checked.add(dest)
+            if op == SHARE:
+                shared.add(dest)
+            result.append(instruction)
+        elif op in (CONVERT, CONVERT_INIT) and _is_identity_conversion(op, args[0], instruction.arg, constants):
+            reuse(instruction, args[0])
+        elif op == STORE:
+            name, address, _ = instruction.arg
+            forget(name)
+            if args[0] in stable:
+                available[("variable", name, address)] = args[0]
+            if args[1] in stable:
+                available[("value", name, address)] = args[1]
+            result.append(instruction)
+        elif op == DECLARE:
+            forget(instruction.arg[0])
+            if dest in stable:
+                available[("variable", instruction.arg[0], instruction.arg[4])] = dest
+            result.append(instruction)
+        elif op in (INNER, SET):
+            forget()
+            result.append(instruction)
+        elif op in (CALL, EVAL, DEFINE_STRUCT, DEFINE_VARIANT, DEFINE_FUNCTION, PUSH_SCOPE, POP_SCOPE):
+            available.clear()
+            result.append(instruction)
+        else:
+            result.append(instruction)
+    return result
+
+
+def propagate_copies(code: IRCode):
+    """Instructions read source of copy instead of its temp, within basic block of the copy.
+    Copies read nowhere else are removed by remove_unused_temps"""
+    stable = _defined_once(code.instructions)
+    for block in _blocks(code.instructions):
+        copies: Dict[int, int] = {}
+        for instruction in block:
+            if instruction.args and copies:
+                instruction.args = tuple(copies.get(arg, arg) for arg in instruction.args)
+            if instruction.op == COPY and instruction.dest in stable and instruction.args[0] in stable:
+                copies[instruction.dest] = instruction.args[0]
+
+
+def eliminate_dead_stores(code: IRCode):
+    """Removes store to variable that is stored again later in its basic block, when variable
+    is known to be mutable and nothing in between can read it or fail. Value of removed store
+    is still computed and converted, so errors of it are raised as before"""
+    instructions = []
+    for block in _blocks(code.instructions):
+        for idx, instruction in enumerate(block):
+            if instruction.op != STORE or not _is_overwritten(block, idx):
+                instructions.append(instruction)
+    code.instructions = instructions
+
+
+def _is_overwritten(block: List[Instruction], idx: int) -> bool:
+    name, address, _ = block[idx].arg
+    for instruction in block[idx + 1 :]:
+        if instruction.op == STORE and instruction.arg[:2] == (name, address):
+            return instruction.arg[2]
+        if instruction.op not in SILENT:
+            return False
+    return False
+
+
+def remove_unused_temps(code: IRCode):
+    """Removes constants and copies whose temps are not read"""
+    while True:
+        used = Counter(arg for instruction in code.instructions for arg in _operands(instruction))
+        instructions = [
+            instruction
+            for instruction in code.instructions
+            if instruction.op not in REMOVABLE or instruction.dest in used
+        ]
+        if len(instructions) == len(code.instructions):
+            return
+        code.instructions = instructions
+
+
+def hoist_loop_invariants(code: IRCode):
+    """Moves instructions whose value is the same in every iteration of while loop before the loop.
+    Constants are moved as they are. Other instructions may fail or read variable that is
+    not builtin value, so they are run speculatively as HOIST: their temp holds POISON when
+    they fail, and REDO left in place of them runs them in loop, where error is raised as before"""
+    loops = [instruction.arg for instruction in code.instructions if instruction.op == LOOP]
+    for start_label, end_label in reversed(loops):
+        _hoist_from_loop(code, start_label, end_label)
+
+
+def _rebased(instruction: Instruction, level: int) -> Instruction:
+    """Instruction run in scope of loop instead of scope of loop body at level 1"""
+    if level == 0 or instruction.op not in (LOAD, VALUE) or instruction.arg[1] is None:
+        return instruction
+    name, (depth, slot) = instruction.arg
+    return Instruction(instruction.op, instruction.dest, instruction.args, (name, (depth - 1, slot)), instruction.pos)
+
+
+def _is_invariant_read(instruction: Instruction, level: int, written: Set[str]) -> bool:
+    """Variable read the same way from scope of loop, not written anywhere in loop"""
+    name, address = instruction.arg
+    if name in written:
+        return False
+    return level == 0 or address is None or address[0] > 0
+
+
+def _hoist_from_loop(code: IRCode, start_label: int, end_label: int):
+    instructions = code.instructions
+    marker = next(idx for idx, ins in enumerate(instructions) if ins.op == LOOP and ins.arg[0] == start_label)
+    end = next(idx for idx, ins in enumerate(instructions) if ins.op == LABEL and ins.arg == end_label)
+    loop = instructions[marker + 1 : end]
+    if any(instruction.op in LOOP_BARRIERS for instruction in loop):
+        return
+    definitions = _definitions(instructions)
+    defined_in_loop = {instruction.dest for instruction in loop if instruction.dest is not None}
+    stores_values = any(instruction.op in (INNER, SET) for instruction in loop)
+    written = {instruction.arg[0] for instruction in loop if instruction.op in (VARIABLE, STORE, DECLARE, CASE)}
+
+    invariant: Set[int] = set()
+    preheader: List[Instruction] = []
+    body: List[Instruction] = []
+    level = 0  # 0 in condition of loop, 1 in its body, more in blocks nested in body
+    for instruction in loop:
+        op = instruction.op
+        if op in (PUSH_SCOPE, CASE):
+            level += 1
+        elif op == POP_SCOPE:
+            level -= 1
+        hoisted = (
+            op in HOISTABLE
+            and level <= 1
+            and definitions[instruction.dest] == 1
+            and all(arg in invariant or arg not in defined_in_loop for arg in instruction.args)
+            and not (op == ATTR and stores_values)
+            and not (op in (LOAD, VALUE) and not _is_invariant_read(instruction, level, written))
+        )
+        if not hoisted:
+            body.append(instruction)
+            continue
+        invariant.add(instruction.dest)
+        if op == CONST:
+            preheader.append(instruction)
+            continue
+        preheader.append(Instruction(HOIST, instruction.dest, (), _rebased(instruction, level), instruction.pos))
+        body.append(Instruction(REDO, instruction.dest, (), instruction, instruction.pos))
+    code.instructions = instructions[: marker + 1] + preheader + body + instructions[end:]
+
+
+PASSES = (
+    eliminate_common_subexpressions,
+    propagate_copies,
+    eliminate_dead_stores,
+    remove_unused_temps,
+    hoist_loop_invariants,
+)
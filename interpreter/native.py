@@ -0,0 +1,393 @@
+"""Execution engine that compiles numeric functions into C and calls them through ctypes"""
+
+import ctypes
+import hashlib
+import os
+import shlex
+import subprocess
+import sysconfig
+import tempfile
+from typing import Dict, List, Tuple
+
+from parser.AST import *
+from interpreter.interpreter import Interpreter
+from interpreter.interpreter_types import BuiltInValue
+from interpreter.interpreter_errors import InterpreterError, NumberTooBig, DivisionByZero
+from interpreter.transpiler import call_function
+
+
+NATIVE_TYPES = {"int": "int64_t", "float": "double"}
+CTYPES = {"int": ctypes.c_int64, "float": ctypes.c_double}
+INT64_MIN, INT64_MAX = -(2**63), 2**63 - 1
+
+# statuses returned by generated function
+OK = 0
+NUMBER_TOO_BIG = 1
+DIVISION_BY_ZERO = 2
+MAX_RECURSION = 3
+FALLBACK = 4  # result can not be computed like in Python, e.g. int64 overflow
+NO_VALUE = 5
+
+PRELUDE = """#include <stdint.h>
+#include <math.h>
+
+typedef struct { int64_t max_depth, limit, site, depth; } context;
+
+#define OK 0
+#define NUMBER_TOO_BIG 1
+#define DIVISION_BY_ZERO 2
+#define MAX_RECURSION 3
+#define FALLBACK 4
+#define NO_VALUE 5
+#define FAIL(status, s, d) do { ctx->site = s; ctx->depth = d; return status; } while (0)
+#define EXACT_IN_DOUBLE(x) ((x) <= 9007199254740992LL && (x) >= -9007199254740992LL)
+
+/* int() of float, 0 when Python raises for it or result does not fit in int64 */
+static int to_int(double x, int64_t *out) {
+    if (!isfinite(x) || x >= 9223372036854775808.0 || x < -9223372036854775808.0) return 0;
+    *out = (int64_t)x;
+    return 1;
+}
+"""
+
+
+class Context(ctypes.Structure):
+    _fields_ = [(name, ctypes.c_int64) for name in ("max_depth", "limit", "site", "depth")]
+
+
+class NotNumeric(Exception):
+    """Function uses something that native code does not support"""
+
+
+class CGenerator:
+    """Translates function with int and float params, locals and result into C function
+    run(params..., depth, context, out) returning one of statuses. Operations and
+    conversions follow operators of interpreter, whatever can not be computed exactly
+    like in Python (int64 overflow, int() of inf, float division by zero) returns FALLBACK,
+    so the call is run by interpreter instead. Function can call only itself, since other
+    names of functions are looked up in scopes when called. Failing run reports index of
+    its site in self.sites - positions of nodes that can fail"""
+
+    def __init__(self, func_def: FuncDef):
+        self._func_def = func_def
+        self._lines: List[str] = []
+        self._indent = 1
+        self._counter = 0
+        self._scopes: List[Dict[str, Tuple[str, bool, bool]]] = []  # name: (type, is_mutable, has_value)
+        self.sites = []
+
+    def generate(self) -> str:
+        func_def = self._func_def
+        if func_def.type not in NATIVE_TYPES or not isinstance(func_def.prog, Program):
+            raise NotNumeric()
+        scope = {}
+        for param in func_def.params:
+            if param.type not in NATIVE_TYPES or param.name in scope:
+                raise NotNumeric()
+            scope[param.name] = (param.type, param.is_mutable, True)
+        self._scopes.append(scope)
+        self._block(func_def.prog)
+        self._emit("return NO_VALUE;")
+        return "\n".join([PRELUDE, self._signature() + " {", *self._lines, "}", ""])
+
+    def _signature(self) -> str:
+        params = [f"{NATIVE_TYPES[param.type]} v_{param.name}" for param in self._func_def.params]
+        params += ["int64_t depth", "context *ctx", f"{NATIVE_TYPES[self._func_def.type]} *out"]
+        return f"int run({', '.join(params)})"
+
+    def _emit(self, line: str):
+        self._lines.append("    " * self._indent + line)
+
+    def _temp(self, type_: str, code: str = None) -> str:
+        self._counter += 1
+        name = f"t{self._counter}"
+        self._emit(f"{NATIVE_TYPES[type_]} {name}{f' = {code}' if code else ''};")
+        return name
+
+    def _fail(self, status: str, pos, depth: str = "depth") -> str:
+        self.sites.append(pos)
+        return f"FAIL({status}, {len(self.sites) - 1}, {depth});"
+
+    def _lookup(self, name) -> Tuple[str, bool, bool]:
+        if not isinstance(name, str):
+            raise NotNumeric()
+        for scope in reversed(self._scopes):
+            if name in scope:
+                return scope[name]
+        raise NotNumeric()
+
+    # statements
+
+    def _block(self, program: Program):
+        for statement in program.children:
+            match statement:
+                case VariableDeclaration():
+                    self._var_dec(statement)
+                case AssignmentStatement():
+                    self._assignment(statement)
+                case IfStatement():
+                    self._if(statement)
+                case WhileStatement():
+                    self._while(statement)
+                case ReturnStatement() if statement.expr is not None:
+                    value = self._converted(*self._expr(statement.expr), self._func_def.type)
+                    self._emit(f"*out = {value};")
+                    self._emit("return OK;")
+                case _:
+                    raise NotNumeric()
+
+    def _nested_block(self, program: Program):
+        self._emit("{")
+        self._indent += 1
+        self._scopes.append({})
+        self._block(program)
+        self._scopes.pop()
+        self._indent -= 1
+        self._emit("}")
+
+    def _var_dec(self, var_dec: VariableDeclaration):
+        """Variable is declared before its value is evaluated, like in Interpreter"""
+        scope = self._scopes[-1]
+        if var_dec.type not in NATIVE_TYPES or var_dec.default_value is None or var_dec.name in scope:
+            raise NotNumeric()
+        scope[var_dec.name] = (var_dec.type, var_dec.is_mutable, False)
+        value = self._converted(*self._expr(var_dec.default_value), var_dec.type)
+        self._emit(f"{NATIVE_TYPES[var_dec.type]} v_{var_dec.name} = {value};")
+        scope[var_dec.name] = (var_dec.type, var_dec.is_mutable, True)
+
+    def _assignment(self, assignment: AssignmentStatement):
+        name_chain = assignment.obj_access.name_chain
+        if len(name_chain) != 1:
+            raise NotNumeric()
+        type_, is_mutable, _ = self._lookup(name_chain[0])
+        if not is_mutable:
+            raise NotNumeric()
+        value = self._converted(*self._expr(assignment.expr), type_)
+        self._emit(f"v_{name_chain[0]} = {value};")
+
+    def _if(self, if_stmt: IfStatement):
+        cond = self._expr(if_stmt.cond)
+        self._emit(f"if ({self._truth(*cond)})")
+        self._nested_block(if_stmt.prog)
+        if if_stmt.else_prog:
+            self._emit("else")
+            self._nested_block(if_stmt.else_prog)
+
+    def _while(self, while_stmt: WhileStatement):
+        self._emit("while (1) {")
+        self._indent += 1
+        cond = self._expr(while_stmt.cond)
+        self._emit(f"if (!({self._truth(*cond)})) break;")
+        self._nested_block(while_stmt.prog)
+        self._indent -= 1
+        self._emit("}")
+
+    def _truth(self, value: str, type_: str) -> str:
+        return f"{value} != 0" if type_ == "int" else f"{value} != 0.0"
+
+    def _converted(self, value: str, type_: str, target_type: str) -> str:
+        """Same as Interpreter._convert_to_ between int and float"""
+        if type_ == target_type:
+            return value
+        if target_type == "float":
+            return f"(double){value}"
+        converted = self._temp("int")
+        self._emit(f"if (!to_int({value}, &{converted})) return FALLBACK;")
+        return converted
+
+    # expressions, each one emits statements and returns (C expression, type)
+
+    def _expr(self, expr: ASTNode) -> Tuple[str, str]:
+        match expr:
+            case IntLiteral() if INT64_MIN < expr.value <= INT64_MAX:
+                return f"{expr.value}LL", "int"
+            case FloatLiteral() if expr.value not in (float("inf"), float("-inf")) and expr.value == expr.value:
+                return repr(expr.value), "float"
+            case ObjectAccess() if len(expr.name_chain) == 1 and isinstance(expr.name_chain[0], FunctionCall):
+                return self._call(expr.name_chain[0])
+            case ObjectAccess() if len(expr.name_chain) == 1:
+                type_, _, has_value = self._lookup(expr.name_chain[0])
+                if not has_value:
+                    raise NotNumeric()
+                return f"v_{expr.name_chain[0]}", type_
+            case FunctionCall():
+                return self._call(expr)
+            case RelationExpr():
+                return self._binary(expr.operator, self._expr(expr.left), expr.right, expr.pos)
+            case AddExpr() | MultiExpr():
+                result = self._expr(expr.children[0])
+                for operator, child in zip(expr.operations, expr.children[1:]):
+                    result = self._binary(operator, result, child, expr.pos)
+                return result
+            case UnaryExpr():
+                return self._minus(self._expr(expr.negated))
+        raise NotNumeric()
+
+    def _call(self, func_call: FunctionCall) -> Tuple[str, str]:
+        """Recursive call, arguments are converted to params before depth is checked"""
+        func_def = self._func_def
+        if func_call.name != func_def.name or len(func_call.args) != len(func_def.params):
+            raise NotNumeric()
+        args = [self._expr(arg) for arg in func_call.args]
+        args = [self._converted(*arg, param.type) for arg, param in zip(args, func_def.params)]
+        self._emit(f"if (depth + 1 > ctx->max_depth) {self._fail('MAX_RECURSION', func_call.pos, 'depth + 1')}")
+        result = self._temp(func_def.type)
+        self._counter += 1
+        status = f"s{self._counter}"
+        self._emit(f"int {status} = run({', '.join(args + ['depth + 1', 'ctx', '&' + result])});")
+        self._emit(f"if ({status} == NO_VALUE) return FALLBACK;")
+        self._emit(f"if ({status} != OK) return {status};")
+        return result, func_def.type
+
+    def _minus(self, operand: Tuple[str, str]) -> Tuple[str, str]:
+        value, type_ = operand
+        if type_ == "float":
+            return self._temp("float", f"-{value}"), "float"
+        result = self._temp("int")
+        self._emit(f"if (__builtin_mul_overflow({value}, -1LL, &{result})) return FALLBACK;")
+        return result, "int"
+
+    def _binary(self, operator: str, left: Tuple[str, str], right_expr: Expr, pos) -> Tuple[str, str]:
+        left_value, left_type = left
+        right_value, right_type = self._expr(right_expr)
+        if left_type == "int" and right_type == "float":
+            right_value = self._converted(right_value, "float", "int")
+        elif left_type == "float" and right_type == "int":
+            if operator not in "+-*/":
+                raise NotNumeric()
+            right_value = f"(double){right_value}"
+        if operator in "+-*/":
+            return self._arithmetic(operator, left_value, right_value, left_type, right_type, pos)
+        lt = f"({left_value} < {right_value})"
+        eq = f"({left_value} == {right_value})"
+        relations = {
+            "==": eq,
+            "<": lt,
+            "!=": f"!{eq}",
+            ">": f"(!{lt} && !{eq})",
+            ">=": f"!{lt}",
+            "<=": f"!(!{lt} && !{eq})",
+        }
+        return self._temp("int", f"{relations[operator]} ? 1 : 0"), "int"
+
+    def _arithmetic(self, operator, left, right, left_type, right_type, pos) -> Tuple[str, str]:
+        if left_type == "float":
+            if operator == "/":
+                self._emit(f"if ({right} == 0.0) return FALLBACK;")
+            return self._temp("float", f"{left} {operator} {right}"), "float"
+        result = self._temp("int")
+        if operator == "/":
+            self._emit(f"if ({right} == 0) {self._fail('DIVISION_BY_ZERO', pos)}")
+            self._emit(f"if (!EXACT_IN_DOUBLE({left}) || !EXACT_IN_DOUBLE({right})) return FALLBACK;")
+            self._emit(f"if (!to_int((double){left} / (double){right}, &{result})) return FALLBACK;")
+            return result, "int"
+        builtin = {"+": "add", "-": "sub", "*": "mul"}[operator]
+        self._emit(f"if (__builtin_{builtin}_overflow({left}, {right}, &{result})) return FALLBACK;")
+        if operator == "+" and right_type == "int":
+            self._emit(f"if ({result} > ctx->limit) {self._fail('NUMBER_TOO_BIG', pos)}")
+        return result, "int"
+
+
+def compiler_command() -> List[str]:
+    return shlex.split(os.environ.get("CC") or sysconfig.get_config_var("CC") or "cc")
+
+
+def build_shared_object(source: str, cache_dir: str) -> str:
+    """Path of shared object compiled from C source, cached under hash of source and compiler.
+    None when there is no compiler or it failed"""
+    compiler = compiler_command()
+    digest = hashlib.sha256("\0".join([*compiler, source]).encode()).hexdigest()
+    path = os.path.join(cache_dir, f"{digest}.so")
+    if os.path.exists(path):
+        return path
+    os.makedirs(cache_dir, exist_ok=True)
+    source_path = os.path.join(cache_dir, f"{digest}.c")
+    with open(source_path, "w", encoding="ascii") as f:
+        f.write(source)
+    partial_path = f"{path}.{os.getpid()}.tmp"
+    command = [*compiler, "-O2", "-shared", "-fPIC", "-o", partial_path, source_path, "-lm"]
+    try:
+        subprocess.run(command, check=True, capture_output=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    os.replace(partial_path, path)
+    return path
+
+
+class NativeFunction:
+    """Function of shared object built from code of CGenerator"""
+
+    __slots__ = ("func_def", "sites", "run")
+
+    def __init__(self, func_def: FuncDef, path: str, sites: list):
+        self.func_def = func_def
+        self.sites = sites
+        self.run = ctypes.CDLL(path).run
+        self.run.restype = ctypes.c_int
+        self.run.argtypes = [
+            *(CTYPES[param.type] for param in func_def.params),
+            ctypes.c_int64,
+            ctypes.POINTER(Context),
+            ctypes.POINTER(CTYPES[func_def.type]),
+        ]
+
+    def call(self, interpreter: Interpreter, args: list):
+        """Value returned by body of function, like Interpreter._run_body_of_"""
+        if any(type(arg) is int and not INT64_MIN <= arg <= INT64_MAX for arg in args):
+            return self.func_def.prog.accept(interpreter)
+        limit = min(max(interpreter.number_limit, INT64_MIN), INT64_MAX)
+        context = Context(interpreter._max_recursion_depth, limit, 0, 0)
+        out = CTYPES[self.func_def.type]()
+        status = self.run(*args, interpreter.curr_recursion, ctypes.byref(context), ctypes.byref(out))
+        if status == OK:
+            return BuiltInValue(self.func_def.type, out.value)
+        if status == NO_VALUE:
+            return None
+        if status == FALLBACK:
+            return self.func_def.prog.accept(interpreter)
+        interpreter.curr_recursion = context.depth
+        pos = self.sites[context.site]
+        if status == NUMBER_TOO_BIG:
+            error = NumberTooBig(pos, "Not good.")
+        elif status == DIVISION_BY_ZERO:
+            error = DivisionByZero(pos, "Not good.")
+        else:
+            error = InterpreterError(pos, "Maximal recursion depth reached!")
+        error.locate(self.func_def.prog.line_index)
+        raise error
+
+
+class NativeInterpreter(Interpreter):
+    """Interpreter that runs functions with only int and float params, locals and result,
+    and with while and if control flow, as native code. Each such function is translated
+    into C when it is called first, compiled by system C compiler into shared object
+    cached in native_cache_dir and called through ctypes. Other functions, and all of them
+    when there is no C compiler, are interpreted. Runtime error of native function leaves
+    scopes in the scope of its outermost call"""
+
+    def __init__(self, *args, native_cache_dir: str = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.native_cache_dir = native_cache_dir or os.path.join(tempfile.gettempdir(), "interpreter-native")
+        self._native: Dict[int, Tuple[FuncDef, NativeFunction]] = {}
+
+    def visit_func_call(self, func_call: FunctionCall):
+        """Calls function like Interpreter.visit_func_call, with its body run by _run_body_of_"""
+        return call_function(self, func_call.name, [arg.accept(self) for arg in func_call.args], func_call.pos)
+
+    def _run_body_of_(self, func_def: FuncDef):
+        if (entry := self._native.get(id(func_def))) is None:
+            entry = self._native[id(func_def)] = (func_def, self._build(func_def))
+        native = entry[1]
+        slots = self.scopes.curr_scope.slots
+        if native is None or len(slots) != len(func_def.params):
+            return super()._run_body_of_(func_def)
+        return native.call(self, [variable.value.value for _, variable in slots])
+
+    def _build(self, func_def: FuncDef) -> NativeFunction:
+        try:
+            generator = CGenerator(func_def)
+            source = generator.generate()
+        except (NotNumeric, RecursionError):
+            return None
+        path = build_shared_object(source, self.native_cache_dir)
+        return NativeFunction(func_def, path, generator.sites) if path is not None else None
@@ -0,0 +1,46 @@
+"""Opcodes of bytecode run by VirtualMachine.
+Every instruction takes two slots of code array: opcode and its argument"""
+
+# Values
+LOAD_NONE = 0
+LOAD_LITERAL = 1  # consts[arg] is constant builtin value
+LOAD_NAME = 2  # shared value of variable (see interpreter_types.share), consts[arg] is (name, address)
+LOAD_VARIABLE = 3  # Variable object, consts[arg] is (name, address)
+LOAD_VARIABLE_VALUE = 4  # value of variable, not copied, consts[arg] is (name, address)
+CHECK_HAS_VALUE = 5  # raises when top of stack is None, consts[arg] is name in error
+GET_ATTR = 6  # consts[arg] is (attribute name, name chain used in error)
+SHARE_VALUE = 7  # top of stack read from attribute is shared with its new owner
+EVAL_NODE = 8  # value of consts[arg].accept(interpreter)
+POP = 9
+
+# Operators
+BINARY_OP = 10  # OPERATORS[arg]
+UNARY_MINUS = 11
+TEST_VALUE = 12  # pops value after calling its bool()
+
+# Variables and definitions
+STORE_NAME = 13  # pops value and Variable, sets variable, consts[arg] is (name, address, conversion)
+GET_INNER_VARIABLE = 14  # attribute names[arg] of Variable on top of stack
+STORE_VARIABLE_VALUE = 15  # pops value and Variable, sets value of the Variable, consts[arg] is (conversion,)
+DECLARE_VARIABLE = 16  # consts[arg] is (name, type, is_mutable, address, conversion)
+LOAD_DEFAULT_VALUE = 17  # consts[arg] is (name, type, is_mutable, address, conversion)
+INIT_VARIABLE = 18  # consts[arg] is (name, type, is_mutable, address, conversion)
+DEFINE_STRUCT = 19  # consts[arg] is StructDef
+DEFINE_VARIANT = 20  # consts[arg] is VariantDef
+DEFINE_FUNCTION = 21  # consts[arg] is FuncDef with compiled body
+
+# Control flow
+JUMP = 22  # arg is offset in code array
+POP_JUMP_IF_FALSE = 23
+POP_JUMP_IF_TRUE = 24
+PUSH_SCOPE = 25
+POP_SCOPE = 26
+VISIT_VARIANT = 27  # checks that top of stack is value of variant type, not emitted for checked visit
+ENTER_CASE = 28  # consts[arg] is (case type, offset of next case)
+CALL_FUNCTION = 29  # consts[arg] is (function name, number of args)
+RETURN_IF_VALUE = 30  # arg is number of scopes to pop before return
+RETURN_VALUE = 31
+
+OPCODE_NAMES = {value: name for name, value in list(globals().items()) if name.isupper()}
+
+OPERATORS = ("+", "-", "*", "/", "==", "!=", "<", ">", "<=", ">=")
@@ -0,0 +1,405 @@
+"""Arithmetic and comparison operators of interpreter as dispatch tables.
+
+Tables are built once, at import. Key of binary operator is (operator, left tag, right tag),
+key of unary one is (operator, tag). Tag of builtin value is python type of its raw value,
+tag of struct or variant value is its class. Function found in table gets raw values of
+builtins (and struct or variant values as they are), so one lookup selects code
+specialized for both operand types."""
+
+from typing import Callable, Dict, Tuple
+
+from interpreter.interpreter_types import BuiltInValue, StructValue, VariantValue, TRUTH
+from interpreter.interpreter_errors import NotSupportedOperation, DivisionByZero, NumberTooBig
+
+
+NoneType = type(None)
+BUILT_IN_TAGS = (int, float, str, NoneType)
+TAGS = BUILT_IN_TAGS + (StructValue, VariantValue)
+
+BinaryOperator = Callable[[object, object, object, tuple], BuiltInValue]
+
+BINARY_OPERATORS: Dict[Tuple[str, type, type], BinaryOperator] = {}
+UNARY_OPERATORS: Dict[Tuple[str, type], Callable] = {}
+
+
+def binary_operation(interpreter, operator: str, left, right, pos):
+    """Result of left operator right. Operands are values (or raw values of builtins)"""
+    if type(left) is BuiltInValue:
+        left = left.value
+    if type(right) is BuiltInValue:
+        right = right.value
+    function = BINARY_OPERATORS.get((operator, type(left), type(right)))
+    if function is None:
+        raise NotImplementedError(
+            f"Could not find signature for '{operator}': <{type(left).__name__}, {type(right).__name__}>"
+        )
+    return function(interpreter, left, right, pos)
+
+
+def unary_operation(interpreter, operator: str, value, pos):
+    if type(value) is BuiltInValue:
+        value = value.value
+    function = UNARY_OPERATORS.get((operator, type(value)))
+    if function is None:
+        raise NotImplementedError(
+            f"Could not find signature for unary '{operator}': <{type(value).__name__}>"
+        )
+    return function(interpreter, value, pos)
+
+
+def _convert(interpreter, target_type: str, source_type: str, raw, pos):
+    """Raw value converted by interpreter from builtin type to the other one"""
+    return interpreter._convert_to_(target_type, BuiltInValue(source_type, raw), pos).value
+
+
+def _register(operator: str, left_tag: type, right_tag: type):
+    def register(function):
+        BINARY_OPERATORS[(operator, left_tag, right_tag)] = function
+        return function
+
+    return register
+
+
+# +
+
+
+@_register("+", int, int)
+def _add_int_int(interpreter, left, right, pos):
+    result = int(left + right)
+    if result > interpreter.number_limit:
+        raise NumberTooBig(pos, "Not good.")
+    return BuiltInValue("int", result)
+
+
+@_register("+", int, float)
+def _add_int_float(interpreter, left, right, pos):
+    return BuiltInValue("int", int(left + _convert(interpreter, "int", "float", right, pos)))
+
+
+@_register("+", int, str)
+def _add_int_str(interpreter, left, right, pos):
+    return BuiltInValue("int", int(left + _convert(interpreter, "int", "str", right, pos)))
+
+
+@_register("+", float, int)
+def _add_float_int(interpreter, left, right, pos):
+    return BuiltInValue("float", left + float(right))
+
+
+@_register("+", float, float)
+def _add_float_float(interpreter, left, right, pos):
+    return BuiltInValue("float", left + right)
+
+
+@_register("+", float, str)
+def _add_float_str(interpreter, left, right, pos):
+    return BuiltInValue("float", left + _convert(interpreter, "float", "str", right, pos))
+
+
+@_register("+", str, int)
+def _add_str_int(interpreter, left, right, pos):
+    return BuiltInValue("str", left + _convert(interpreter, "str", "int", right, pos))
+
+
+@_register("+", str, float)
+def _add_str_float(interpreter, left, right, pos):
+    return BuiltInValue("str", left + _convert(interpreter, "str", "float", right, pos))
+
+
+@_register("+", str, str)
+def _add_str_str(interpreter, left, right, pos):
+    return BuiltInValue("str", left + right)
+
+
+# -
+
+
+@_register("-", int, int)
+def _sub_int_int(interpreter, left, right, pos):
+    return BuiltInValue("int", int(left - right))
+
+
+@_register("-", int, float)
+def _sub_int_float(interpreter, left, right, pos):
+    return BuiltInValue("int", int(left - _convert(interpreter, "int", "float", right, pos)))
+
+
+@_register("-", int, str)
+def _sub_int_str(interpreter, left, right, pos):
+    return BuiltInValue("int", int(left - _convert(interpreter, "int", "str", right, pos)))
+
+
+@_register("-", float, int)
+def _sub_float_int(interpreter, left, right, pos):
+    return BuiltInValue("float", left - float(right))
+
+
+@_register("-", float, float)
+def _sub_float_float(interpreter, left, right, pos):
+    return BuiltInValue("float", left - right)
+
+
+@_register("-", float, str)
+def _sub_float_str(interpreter, left, right, pos):
+    return BuiltInValue("float", left - _convert(interpreter, "float", "str", right, pos))
+
+
+@_register("-", str, str)
+def _sub_str_str(interpreter, left, right, pos):
+    """Removes first occurrence of right from left"""
+    right_index = left.find(right)
+    if right_index == -1:
+        return BuiltInValue("str", left)
+    return BuiltInValue("str", left[:right_index] + left[right_index + len(right):])
+
+
+@_register("-", str, int)
+def _sub_str_int(interpreter, left, right, pos):
+    return _sub_str_str(interpreter, left, _convert(interpreter, "str", "int", right, pos), pos)
+
+
+@_register("-", str, float)
+def _sub_str_float(interpreter, left, right, pos):
+    return _sub_str_str(interpreter, left, _convert(interpreter, "str", "float", right, pos), pos)
+
+
+# *
+
+
+@_register("*", int, int)
+def _mul_int_int(interpreter, left, right, pos):
+    return BuiltInValue("int", left * right)
+
+
+@_register("*", int, float)
+def _mul_int_float(interpreter, left, right, pos):
+    return BuiltInValue("int", left * _convert(interpreter, "int", "float", right, pos))
+
+
+@_register("*", int, str)
+def _mul_int_str(interpreter, left, right, pos):
+    return BuiltInValue("int", left * _convert(interpreter, "int", "str", right, pos))
+
+
+@_register("*", float, int)
+def _mul_float_int(interpreter, left, right, pos):
+    return BuiltInValue("float", left * float(right))
+
+
+@_register("*", float, float)
+def _mul_float_float(interpreter, left, right, pos):
+    return BuiltInValue("float", left * right)
+
+
+@_register("*", float, str)
+def _mul_float_str(interpreter, left, right, pos):
+    return BuiltInValue("float", left * _convert(interpreter, "float", "str", right, pos))
+
+
+@_register("*", str, int)
+def _mul_str_int(interpreter, left, right, pos):
+    """Repeats left right times"""
+    return BuiltInValue("str", left * right)
+
+
+@_register("*", str, float)
+def _mul_str_float(interpreter, left, right, pos):
+    return BuiltInValue("str", left * _convert(interpreter, "int", "float", right, pos))
+
+
+@_register("*", str, str)
+def _mul_str_str(interpreter, left, right, pos):
+    """Interleaves chars of both strings, up to length of the shorter one"""
+    return BuiltInValue("str", "".join(l + r for l, r in zip(left, right)))
+
+
+# /
+
+
+@_register("/", int, int)
+def _div_int_int(interpreter, left, right, pos):
+    if right == 0:
+        raise DivisionByZero(pos, "Not good.")
+    return BuiltInValue("int", int(left / right))
+
+
+@_register("/", int, float)
+def _div_int_float(interpreter, left, right, pos):
+    return _div_int_int(interpreter, left, _convert(interpreter, "int", "float", right, pos), pos)
+
+
+@_register("/", int, str)
+def _div_int_str(interpreter, left, right, pos):
+    return _div_int_int(interpreter, left, _convert(interpreter, "int", "str", right, pos), pos)
+
+
+@_register("/", float, int)
+def _div_float_int(interpreter, left, right, pos):
+    return BuiltInValue("float", left / float(right))
+
+
+@_register("/", float, float)
+def _div_float_float(interpreter, left, right, pos):
+    return BuiltInValue("float", left / right)
+
+
+@_register("/", float, str)
+def _div_float_str(interpreter, left, right, pos):
+    return BuiltInValue("float", left / _convert(interpreter, "float", "str", right, pos))
+
+
+@_register("/", str, int)
+def _div_str_int(interpreter, left, right, pos):
+    """Char of left at index right"""
+    return BuiltInValue("str", left[right] if len(left) > right else "")
+
+
+@_register("/", str, float)
+def _div_str_float(interpreter, left, right, pos):
+    return _div_str_int(interpreter, left, _convert(interpreter, "int", "float", right, pos), pos)
+
+
+@_register("/", str, str)
+def _div_str_str(interpreter, left, right, pos):
+    """Removes all occurrences of right from left"""
+    return BuiltInValue("str", left.replace(right, ""))
+
+
+# == and <. There are no (float, int) versions of them: such comparison is not supported
+
+
+@_register("==", int, int)
+@_register("==", float, float)
+@_register("==", str, str)
+def _eq_same_types(interpreter, left, right, pos):
+    return TRUTH[left == right]
+
+
+@_register("==", int, float)
+def _eq_int_float(interpreter, left, right, pos):
+    return TRUTH[left == _convert(interpreter, "int", "float", right, pos)]
+
+
+@_register("==", int, str)
+def _eq_int_str(interpreter, left, right, pos):
+    return TRUTH[left == _convert(interpreter, "int", "str", right, pos)]
+
+
+@_register("==", float, str)
+def _eq_float_str(interpreter, left, right, pos):
+    return TRUTH[left == _convert(interpreter, "float", "str", right, pos)]
+
+
+@_register("==", str, int)
+def _eq_str_int(interpreter, left, right, pos):
+    return TRUTH[left == _convert(interpreter, "str", "int", right, pos)]
+
+
+@_register("==", str, float)
+def _eq_str_float(interpreter, left, right, pos):
+    return TRUTH[left == _convert(interpreter, "str", "float", right, pos)]
+
+
+@_register("<", int, int)
+@_register("<", float, float)
+def _lt_numbers(interpreter, left, right, pos):
+    return TRUTH[left < right]
+
+
+@_register("<", str, str)
+def _lt_str_str(interpreter, left, right, pos):
+    """Shorter string is the lesser one"""
+    return TRUTH[len(left) < len(right)]
+
+
+@_register("<", int, float)
+def _lt_int_float(interpreter, left, right, pos):
+    return TRUTH[left < _convert(interpreter, "int", "float", right, pos)]
+
+
+@_register("<", int, str)
+def _lt_int_str(interpreter, left, right, pos):
+    return TRUTH[left < _convert(interpreter, "int", "str", right, pos)]
+
+
+@_register("<", float, str)
+def _lt_float_str(interpreter, left, right, pos):
+    return TRUTH[left < _convert(interpreter, "float", "str", right, pos)]
+
+
+@_register("<", str, int)
+def _lt_str_int(interpreter, left, right, pos):
+    return _lt_str_str(interpreter, left, _convert(interpreter, "str", "int", right, pos), pos)
+
+
+@_register("<", str, float)
+def _lt_str_float(interpreter, left, right, pos):
+    return _lt_str_str(interpreter, left, _convert(interpreter, "str", "float", right, pos), pos)
+
+
+# structs and variants
+
+
+def _raising(message: str):
+    """Operator (binary or unary) that is not supported for its operands"""
+
+    def raise_not_supported(interpreter, *operands_and_pos):
+        raise NotSupportedOperation(operands_and_pos[-1], message)
+
+    return raise_not_supported
+
+
+def _unwrap_variants(operator: str) -> BinaryOperator:
+    """Applies operator to values held by variant operands"""
+
+    def apply_to_variant_values(interpreter, left, right, pos):
+        if type(left) is VariantValue:
+            left = left.value
+        if type(right) is VariantValue:
+            right = right.value
+        return binary_operation(interpreter, operator, left, right, pos)
+
+    return apply_to_variant_values
+
+
+_STRUCT_MESSAGES = {
+    "+": ("Can not '+' struct.", "Can not '+' struct."),
+    "-": ("Can not '-' struct.", "Can not '-' struct."),
+    "*": ("Can not '*' a  struct.", "Can not '*' a struct."),
+    "/": ("Can not '/' struct.", "Can not '/' struct."),
+    "==": ("Can not '==' '!=' struct.", "Can not '==' '!=' struct."),
+    "<": ("Can not '<' '>' '>=' '<=' a struct.", "Can not '<' '>' '>=' '<=' a struct."),
+}
+
+def _register_struct_and_variant_operators():
+    for operator, (right_struct_message, left_struct_message) in _STRUCT_MESSAGES.items():
+        for tag in BUILT_IN_TAGS + (VariantValue,):
+            BINARY_OPERATORS[(operator, VariantValue, tag)] = _unwrap_variants(operator)
+            BINARY_OPERATORS[(operator, tag, VariantValue)] = _unwrap_variants(operator)
+        # '-' of struct and variant (or of two structs) has never been defined
+        other_tags = BUILT_IN_TAGS if operator == "-" else TAGS
+        for tag in other_tags:
+            BINARY_OPERATORS[(operator, tag, StructValue)] = _raising(right_struct_message)
+        for tag in other_tags:
+            BINARY_OPERATORS[(operator, StructValue, tag)] = _raising(left_struct_message)
+
+
+_register_struct_and_variant_operators()
+
+
+# unary -
+
+
+def _minus_variant(interpreter, value: VariantValue, pos):
+    return VariantValue(value.type, unary_operation(interpreter, "-", value.value, pos), value.name)
+
+
+UNARY_OPERATORS.update(
+    {
+        ("-", int): lambda interpreter, value, pos: BuiltInValue("int", value * -1),
+        ("-", float): lambda interpreter, value, pos: BuiltInValue("float", value * -1),
+        ("-", str): _raising("Can not '-' a string."),
+        ("-", StructValue): _raising("Can not '-' a struct."),
+        ("-", VariantValue): _minus_variant,
+    }
+)
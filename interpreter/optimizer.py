@@ -0,0 +1,282 @@
+"""Optional pass between parsing and execution: constant folding, propagation of
+immutable variables initialised with literals and removal of dead code"""
+
+from typing import Dict, List
+
+from parser.AST import *
+from interpreter.visitor import Visitor
+from interpreter.interpreter_types import BuiltInValue
+
+
+CONSTANT_LITERALS = {"int": IntLiteral, "float": FloatLiteral, "str": StrLiteral}
+RELATION_METHODS = {"==": "eq", "!=": "ieq", "<": "lt", ">": "gt", "<=": "lteq", ">=": "gteq"}
+# str multiplied by bigger number is left to runtime, so folding never builds huge strings
+MAX_FOLDED_REPEAT = 1024
+# expressions that never evaluate to no value, so return of them always leaves block
+VALUED_EXPRS = (
+    IntLiteral,
+    FloatLiteral,
+    StrLiteral,
+    AndExpr,
+    RelationExpr,
+    AddExpr,
+    MultiExpr,
+    UnaryExpr,
+    ObjectAccess,
+)
+DECLARATIONS = (VariableDeclaration, StructDef, VariantDef, FuncDef)
+
+
+class Optimizer(Visitor):
+    """Rewrites program in place before it is resolved. Expressions are evaluated with operators
+    and conversions of interpreter that will run the program, so folded values, number limit
+    and conversions are the same as at runtime. Expression whose evaluation fails is left
+    unchanged and fails at runtime. Visits of expressions return expression replacing the
+    visited one, visits of statements return statements replacing the visited one.
+
+    Immutable variable of builtin type initialised with literal never changes, so its uses
+    are replaced with converted literal. Like in Resolver, function body runs after its
+    definition, so variables declared outside of function are not propagated into it"""
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self._scopes: List[Dict[str, Literal]] = [{}]
+        self._function_scope = 0
+
+    def optimize(self, program: Program) -> Program:
+        program.accept(self)
+        return program
+
+    def _push_scope(self):
+        self._scopes.append({})
+
+    def _pop_scope(self):
+        self._scopes.pop()
+
+    def _constant_of_variable(self, name: str) -> Literal:
+        for idx in range(len(self._scopes) - 1, self._function_scope - 1, -1):
+            if name in self._scopes[idx]:
+                return self._scopes[idx][name]
+        return None
+
+    def _optimize_block(self, program: Program):
+        self._push_scope()
+        program.accept(self)
+        self._pop_scope()
+
+    def _statements(self, statement: ASTNode) -> List[Statement]:
+        if isinstance(statement, (FunctionCall, ObjectAccess)):
+            return [statement.accept(self)]
+        return statement.accept(self)
+
+    def _evaluate(self, expr: Expr) -> BuiltInValue:
+        """Returns value of literal that is not null, None for other expressions"""
+        if isinstance(expr, Literal) and type(expr) is not NullLiteral:
+            return expr.accept(self.interpreter)
+        return None
+
+    def _fold(self, method: str, *operands_and_pos) -> Literal:
+        """Returns literal with result of interpreter method, None when it fails in any way"""
+        try:
+            value = getattr(self.interpreter, method)(*operands_and_pos)
+        except Exception:
+            return None
+        return CONSTANT_LITERALS[value.type](value.value)
+
+    def _fold_chain(self, expr: AddExpr | MultiExpr, methods: Dict[str, str]) -> Expr:
+        """Folds constant operands at the start of chain of left associative operators"""
+        expr.children = [child.accept(self) for child in expr.children]
+        folded = expr.children[0]
+        left = self._evaluate(folded)
+        done = 0
+        while left is not None and done < len(expr.operations):
+            operation = expr.operations[done]
+            right = self._evaluate(expr.children[done + 1])
+            if right is None or self._too_long_repetition(operation, left, right):
+                break
+            result = self._fold(methods[operation], left, right, expr.pos)
+            if result is None:
+                break
+            folded, left = result, self._evaluate(result)
+            done += 1
+        if done == len(expr.operations):
+            return folded
+        if done:
+            expr.children = [folded] + expr.children[done + 1 :]
+            expr.operations = expr.operations[done:]
+        return expr
+
+    @staticmethod
+    def _too_long_repetition(operation: str, left: BuiltInValue, right: BuiltInValue):
+        return (
+            operation == "*"
+            and left.type == "str"
+            and right.type != "str"
+            and right.value > MAX_FOLDED_REPEAT
+        )
+
+    def _constant_of_declaration(self, var_dec: VariableDeclaration) -> Literal:
+        value = self._evaluate(var_dec.default_value)
+        if var_dec.is_mutable or var_dec.type not in CONSTANT_LITERALS or value is None:
+            return None
+        return self._fold("_convert_to_", var_dec.type, value, var_dec.pos)
+
+    def _is_constant_return(self, statement: Statement):
+        return isinstance(statement, ReturnStatement) and isinstance(statement.expr, VALUED_EXPRS)
+
+    def _declares(self, program: Program) -> bool:
+        """Declarations of bare begin ... end blocks nested in program are in scope of program"""
+        return any(
+            isinstance(statement, DECLARATIONS) or isinstance(statement, Program) and self._declares(statement)
+            for statement in program.children
+        )
+
+    def visit_program(self, program: Program):
+        """Statements after return of value are never run. Bare begin ... end block nested
+        in other block has no scope of its own, like in Interpreter, so its declarations stay
+        visible after it"""
+        children = []
+        for statement in program.children:
+            children.extend(self._statements(statement))
+            if children and self._is_constant_return(children[-1]):
+                break
+        program.children = children
+        return [program]
+
+    def visit_assignment(self, assignment: AssignmentStatement):
+        assignment.obj_access = self._access_arguments(assignment.obj_access)
+        assignment.expr = assignment.expr.accept(self)
+        return [assignment]
+
+    def visit_if(self, if_stmt: IfStatement):
+        """Only taken branch of constant condition is kept. Branch that declares nothing
+        does not need its own scope, so its statements replace if statement"""
+        if_stmt.cond = if_stmt.cond.accept(self)
+        condition = self._evaluate(if_stmt.cond)
+        if condition is None:
+            self._optimize_block(if_stmt.prog)
+            if if_stmt.else_prog:
+                self._optimize_block(if_stmt.else_prog)
+            return [if_stmt]
+        branch = if_stmt.prog if condition.bool() else if_stmt.else_prog
+        if branch is None:
+            return []
+        self._optimize_block(branch)
+        if self._declares(branch):
+            return [IfStatement(IntLiteral(1), branch, pos=if_stmt.pos)]
+        return branch.children
+
+    def visit_while(self, while_stmt: WhileStatement):
+        while_stmt.cond = while_stmt.cond.accept(self)
+        condition = self._evaluate(while_stmt.cond)
+        if condition is not None and not condition.bool():
+            return []
+        self._optimize_block(while_stmt.prog)
+        return [while_stmt]
+
+    def visit_return(self, return_stmt: ReturnStatement):
+        if return_stmt.expr is not None:
+            return_stmt.expr = return_stmt.expr.accept(self)
+        return [return_stmt]
+
+    def visit_case_section(self, case_section: CaseSection):
+        self._push_scope()
+        self._scopes[-1][case_section.type] = None
+        case_section.program.accept(self)
+        self._pop_scope()
+
+    def visit_func_call(self, func_call: FunctionCall):
+        func_call.args = [arg.accept(self) for arg in func_call.args]
+        return func_call
+
+    def _access_arguments(self, obj_access: ObjectAccess):
+        obj_name = obj_access.name_chain[0]
+        if isinstance(obj_name, FunctionCall):
+            obj_name.accept(self)
+        return obj_access
+
+    def visit_obj_access(self, obj_access: ObjectAccess):
+        obj_name = obj_access.name_chain[0]
+        if isinstance(obj_name, str) and len(obj_access.name_chain) == 1:
+            if literal := self._constant_of_variable(obj_name):
+                return type(literal)(literal.value)
+        return self._access_arguments(obj_access)
+
+    def visit_var_dec(self, var_dec: VariableDeclaration):
+        if var_dec.default_value is not None:
+            var_dec.default_value = var_dec.default_value.accept(self)
+        self._scopes[-1][var_dec.name] = self._constant_of_declaration(var_dec)
+        return [var_dec]
+
+    def visit_struct_def(self, struct_def: StructDef):
+        """Default values of attributes are evaluated where struct variable is declared"""
+        return [struct_def]
+
+    def visit_variant_def(self, variant_def: VariantDef):
+        return [variant_def]
+
+    def visit_named_type(self, named_type: NamedType):
+        pass
+
+    def visit_visit(self, visit_statement: VisitStatement):
+        self._access_arguments(visit_statement.obj)
+        for case_section in visit_statement.case_sections:
+            case_section.accept(self)
+        return [visit_statement]
+
+    def visit_param(self, param: Param):
+        self._scopes[-1][param.name] = None
+
+    def visit_func_def(self, func_def: FuncDef):
+        outer_function_scope = self._function_scope
+        self._push_scope()
+        self._function_scope = len(self._scopes) - 1
+        for param in func_def.params:
+            param.accept(self)
+        func_def.prog.accept(self)
+        self._pop_scope()
+        self._function_scope = outer_function_scope
+        return [func_def]
+
+    def visit_or(self, or_expr: OrExpr):
+        or_expr.children = [child.accept(self) for child in or_expr.children]
+        return or_expr
+
+    def visit_and(self, and_expr: AndExpr):
+        and_expr.children = [child.accept(self) for child in and_expr.children]
+        return and_expr
+
+    def visit_rel(self, rel_expr: RelationExpr):
+        rel_expr.left = rel_expr.left.accept(self)
+        rel_expr.right = rel_expr.right.accept(self)
+        left = self._evaluate(rel_expr.left)
+        right = self._evaluate(rel_expr.right)
+        if left is not None and right is not None:
+            if folded := self._fold(RELATION_METHODS[rel_expr.operator], left, right, rel_expr.pos):
+                return folded
+        return rel_expr
+
+    def visit_add(self, add_expr: AddExpr):
+        return self._fold_chain(add_expr, {"+": "add", "-": "sub"})
+
+    def visit_multi(self, multi_expr: MultiExpr):
+        return self._fold_chain(multi_expr, {"*": "mul", "/": "div"})
+
+    def visit_unary(self, unary_expr: UnaryExpr):
+        unary_expr.negated = unary_expr.negated.accept(self)
+        value = self._evaluate(unary_expr.negated)
+        if value is not None and (folded := self._fold("minus", value, unary_expr.pos)):
+            return folded
+        return unary_expr
+
+    def visit_null_literal(self, null_literal: NullLiteral):
+        return null_literal
+
+    def visit_int_literal(self, int_literal: IntLiteral):
+        return int_literal
+
+    def visit_float_literal(self, float_literal: FloatLiteral):
+        return float_literal
+
+    def visit_str_literal(self, str_literal: StrLiteral):
+        return str_literal
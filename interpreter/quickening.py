@@ -0,0 +1,267 @@
+"""Execution engine whose operator nodes specialize themselves on types of their operands"""
+
+from typing import Callable, Dict, List, Tuple
+
+from parser.AST import *
+from interpreter.annotations import NodeTable
+from interpreter.interpreter import Interpreter
+from interpreter.interpreter_types import BuiltInValue, TRUTH, share
+from interpreter.interpreter_errors import InterpreterError
+from interpreter.operators import BINARY_OPERATORS
+
+
+WARMUP = 8
+"""Evaluations with the same operand tags after which operation is specialized"""
+MAX_DEOPTIMIZATIONS = 4
+"""Operation whose specialization failed that many times stays generic"""
+
+GENERIC_METHODS = {
+    "+": Interpreter.add,
+    "-": Interpreter.sub,
+    "*": Interpreter.mul,
+    "/": Interpreter.div,
+    "==": Interpreter.eq,
+    "!=": Interpreter.ieq,
+    "<": Interpreter.lt,
+    ">": Interpreter.gt,
+    "<=": Interpreter.lteq,
+    ">=": Interpreter.gteq,
+}
+
+Evaluator = Callable[[Interpreter], object]
+SpecializedOperation = Callable[[Interpreter, object, object, tuple], BuiltInValue]
+
+# operation for (operator, left tag, right tag) of raw builtin values, same as generic one
+SPECIALIZED: Dict[Tuple[str, type, type], SpecializedOperation] = {
+    key: function
+    for key, function in BINARY_OPERATORS.items()
+    if key[0] in GENERIC_METHODS and key[1] in (int, float, str) and key[2] in (int, float, str)
+}
+# operators that interpreter composes of == and < are specialized for numbers of the same type
+for _tag in (int, float):
+    SPECIALIZED[("!=", _tag, _tag)] = lambda interpreter, left, right, pos: TRUTH[left != right]
+    SPECIALIZED[(">", _tag, _tag)] = lambda interpreter, left, right, pos: TRUTH[left > right]
+    SPECIALIZED[("<=", _tag, _tag)] = lambda interpreter, left, right, pos: TRUTH[left <= right]
+    SPECIALIZED[(">=", _tag, _tag)] = lambda interpreter, left, right, pos: TRUTH[left >= right]
+SPECIALIZED[("!=", str, str)] = lambda interpreter, left, right, pos: TRUTH[left != right]
+
+
+LITERAL_TYPES = {IntLiteral: "int", FloatLiteral: "float", StrLiteral: "str"}
+
+
+def _operand(interpreter: Interpreter, node: Expr) -> Evaluator:
+    """Evaluator of operand. Literals and variables are read directly, other nodes are visited"""
+    if type(node) in (IntLiteral, FloatLiteral, StrLiteral):
+        value = interpreter.annotations.constant_of(node, LITERAL_TYPES[type(node)])
+        return lambda interpreter: value
+    if type(node) is ObjectAccess and len(node.name_chain) == 1:
+        name = node.name_chain[0]
+        if isinstance(name, str):
+            return _variable_read(name, interpreter.annotations.addresses.get(node), node.pos)
+    return node.accept
+
+
+def _variable_read(name: str, address, pos) -> Evaluator:
+    """Same as visit of ObjectAccess of variable, with slot of resolved address read inline"""
+    if address is None:
+        depth, slot = 0, -1
+    else:
+        depth, slot = address
+
+    def read_variable(interpreter):
+        scopes = interpreter.scopes
+        frame = scopes.curr_scope
+        for _ in range(depth):
+            frame = frame.parent
+            if frame is None:
+                break
+        if frame is not None and 0 <= slot < len(frame.slots) and frame.slots[slot][0] == name:
+            value = frame.slots[slot][1].value
+        else:
+            value = scopes.get_variable_at(address, name, pos).value
+        if value is None:
+            raise InterpreterError(pos, f"Variable '{name}' has no value")
+        if type(value) is BuiltInValue:
+            return value
+        return share(value)
+
+    return read_variable
+
+
+class Operation:
+    """One binary operation of operator node with feedback of operand tags it has seen.
+    After WARMUP evaluations with the same tags it is specialized for them. Specialized
+    operation that gets other operands falls back to generic one of interpreter"""
+
+    __slots__ = ("operator", "pos", "tags", "count", "deoptimizations", "specialized", "node")
+
+    def __init__(self, operator: str, pos, node: "QuickenedNode"):
+        self.operator = operator
+        self.pos = pos
+        self.tags = None
+        self.count = 0
+        self.deoptimizations = 0
+        self.specialized: SpecializedOperation = None
+        self.node = node
+
+    @property
+    def is_generic(self):
+        return self.deoptimizations >= MAX_DEOPTIMIZATIONS
+
+    def record(self, left, right):
+        """Counts tags of operands and specializes operation after warm-up"""
+        if type(left) is BuiltInValue and type(right) is BuiltInValue:
+            tags = (type(left.value), type(right.value))
+        else:
+            tags = None
+        if tags != self.tags:
+            self.tags = tags
+            self.count = 0
+        self.count += 1
+        if self.count >= WARMUP and tags is not None:
+            specialized = SPECIALIZED.get((self.operator, *tags))
+            if specialized is not None:
+                self.specialized = specialized
+                self.node.rebuild()
+
+    def deoptimize(self, interpreter: Interpreter, left, right):
+        """Drops specialization whose guard failed and runs generic operation"""
+        self.specialized = None
+        self.tags = None
+        self.count = 0
+        self.deoptimizations += 1
+        self.node.rebuild()
+        return GENERIC_METHODS[self.operator](interpreter, left, right, self.pos)
+
+    def evaluator(self, left: Evaluator, right: Evaluator) -> Evaluator:
+        """Evaluator of operation in its current state"""
+        generic = GENERIC_METHODS[self.operator]
+        pos = self.pos
+        if self.is_generic:
+
+            def run_generic(interpreter):
+                return generic(interpreter, left(interpreter), right(interpreter), pos)
+
+            return run_generic
+        if self.specialized is None:
+            record = self.record
+
+            def run_profiled(interpreter):
+                left_value = left(interpreter)
+                right_value = right(interpreter)
+                record(left_value, right_value)
+                return generic(interpreter, left_value, right_value, pos)
+
+            return run_profiled
+        if (self.operator, *self.tags) == ("+", int, int):
+            return self._add_int_int(left, right)
+        return self._specialized(left, right)
+
+    def _specialized(self, left: Evaluator, right: Evaluator) -> Evaluator:
+        function = self.specialized
+        left_tag, right_tag = self.tags
+        deoptimize = self.deoptimize
+        pos = self.pos
+
+        def run_specialized(interpreter):
+            left_value = left(interpreter)
+            right_value = right(interpreter)
+            if type(left_value) is BuiltInValue and type(right_value) is BuiltInValue:
+                left_raw = left_value.value
+                right_raw = right_value.value
+                if type(left_raw) is left_tag and type(right_raw) is right_tag:
+                    return function(interpreter, left_raw, right_raw, pos)
+            return deoptimize(interpreter, left_value, right_value)
+
+        return run_specialized
+
+    def _add_int_int(self, left: Evaluator, right: Evaluator) -> Evaluator:
+        """Most common operation in loops, with generic int + int inlined"""
+        deoptimize = self.deoptimize
+        pos = self.pos
+        add = SPECIALIZED[("+", int, int)]
+
+        def run_add_int_int(interpreter):
+            left_value = left(interpreter)
+            right_value = right(interpreter)
+            if type(left_value) is BuiltInValue and type(right_value) is BuiltInValue:
+                left_raw = left_value.value
+                right_raw = right_value.value
+                if type(left_raw) is int and type(right_raw) is int:
+                    result = left_raw + right_raw
+                    if result > interpreter.number_limit:
+                        return add(interpreter, left_raw, right_raw, pos)
+                    return BuiltInValue("int", result)
+            return deoptimize(interpreter, left_value, right_value)
+
+        return run_add_int_int
+
+
+class QuickenedNode:
+    """Evaluator of chain of binary operations of AddExpr, MultiExpr or RelationExpr.
+    Is rebuilt whenever one of its operations is specialized or deoptimized"""
+
+    __slots__ = ("operands", "operations", "evaluate")
+
+    def __init__(self, interpreter: Interpreter, operands: List[Expr], operators: List[str], pos):
+        self.operands = [_operand(interpreter, operand) for operand in operands]
+        self.operations = [Operation(operator, pos, self) for operator in operators]
+        self.rebuild()
+
+    def rebuild(self):
+        evaluate = self.operands[0]
+        for operation, right in zip(self.operations, self.operands[1:]):
+            evaluate = operation.evaluator(evaluate, right)
+        self.evaluate = evaluate
+
+
+class QuickeningInterpreter(Interpreter):
+    """Tree-walking interpreter whose operator nodes collect types of operands they see
+    and rewrite themselves into code specialized for them (quickening). Operands and
+    results are the same as in Interpreter, so specialization is invisible to programs.
+    Quickened nodes are kept in self.quickened, so other interpreters running the same
+    program specialize it for themselves"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.quickened = NodeTable()
+
+    def visit_rel(self, rel_expr: RelationExpr):
+        quickened = self.quickened.get(rel_expr)
+        if quickened is None:
+            quickened = self.quickened[rel_expr] = QuickenedNode(
+                self, [rel_expr.left, rel_expr.right], [rel_expr.operator], rel_expr.pos
+            )
+        return quickened.evaluate(self)
+
+    def visit_add(self, add_expr: AddExpr):
+        quickened = self.quickened.get(add_expr)
+        if quickened is None:
+            quickened = self.quickened[add_expr] = QuickenedNode(
+                self, add_expr.children, add_expr.operations, add_expr.pos
+            )
+        return quickened.evaluate(self)
+
+    def visit_multi(self, multi_expr: MultiExpr):
+        quickened = self.quickened.get(multi_expr)
+        if quickened is None:
+            quickened = self.quickened[multi_expr] = QuickenedNode(
+                self, multi_expr.children, multi_expr.operations, multi_expr.pos
+            )
+        return quickened.evaluate(self)
+
+    def visit_assignment(self, assignment: AssignmentStatement):
+        """Builtin value of variable type needs no conversion and is stored into variable
+        found for the assignment, without second lookup"""
+        name_chain = assignment.obj_access.name_chain
+        if len(name_chain) != 1:
+            return super().visit_assignment(assignment)
+        pos = assignment.pos
+        annotations = self.annotations
+        variable = self.scopes.get_variable_at(annotations.addresses.get(assignment), name_chain[0], pos)
+        value = assignment.expr.accept(self)
+        if type(value) is not BuiltInValue or value.type != variable.type:
+            value = self._converter_for_(annotations.conversions.get(assignment))(variable.type, value, pos)
+        if not variable.can_variable_be_updated():
+            raise InterpreterError(pos, "Trying to reassign value to non mutable variable")
+        variable.value = value
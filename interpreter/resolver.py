@@ -0,0 +1,181 @@
+"""Static resolution of variables to (depth, slot) addresses"""
+
+from typing import Dict, List, Tuple
+
+from parser.AST import *
+from interpreter.annotations import Annotations
+from interpreter.visitor import Visitor
+
+
+Address = tuple[int, int]
+
+
+class Resolver(Visitor):
+    """Walks program in order of execution and gives each variable declaration, param
+    and root of object access or assignment an address: depth is number of scopes
+    above the current one, slot is position of variable in its scope.
+    Scope of function call is linked to scope of function definition, so depth counts
+    scopes of function body and then scopes enclosing its definition.
+
+    Function body runs after its definition, when enclosing scopes may already declare
+    more variables. Name that is declared later in scope between function and resolved
+    variable gets no address. Such names, names declared outside of the resolved program
+    and names that are not declared at all are looked up by name. Addresses and resolved
+    programs are kept in annotations"""
+
+    def __init__(self, current_scope_names: List[str] = None, annotations: Annotations = None):
+        self.annotations = annotations if annotations is not None else Annotations()
+        self._scopes: List[Dict[str, int]] = [
+            {name: slot for slot, name in enumerate(current_scope_names or [])}
+        ]
+        self._slot_counts: List[int] = [len(current_scope_names or [])]
+        self._function_scope = 0
+        self._outer_accesses: List[Tuple[ASTNode, str, List[Dict[str, int]]]] = []
+
+    def resolve(self, program: Program):
+        program.accept(self)
+        addresses = self.annotations.addresses
+        for node, name, crossed_scopes in self._outer_accesses:
+            if any(name in scope for scope in crossed_scopes):
+                addresses[node] = None
+
+    def _push_scope(self):
+        self._scopes.append({})
+        self._slot_counts.append(0)
+
+    def _pop_scope(self):
+        self._scopes.pop()
+        self._slot_counts.pop()
+
+    def _declare(self, name: str) -> Address:
+        """Reserves slot in the current scope. Redeclaration fails at runtime, so it gets no address"""
+        if name in self._scopes[-1]:
+            return None
+        slot = self._slot_counts[-1]
+        self._scopes[-1][name] = slot
+        self._slot_counts[-1] += 1
+        return 0, slot
+
+    def _resolve_name(self, node: ASTNode, name):
+        """Sets address of variable used by node"""
+        addresses = self.annotations.addresses
+        addresses[node] = None
+        if not isinstance(name, str):
+            return
+        for idx in range(len(self._scopes) - 1, -1, -1):
+            if name in self._scopes[idx]:
+                addresses[node] = len(self._scopes) - 1 - idx, self._scopes[idx][name]
+                if idx < self._function_scope:
+                    self._outer_accesses.append((node, name, self._scopes[idx + 1 : self._function_scope]))
+                return
+
+    def _resolve_block(self, program: Program):
+        self._push_scope()
+        program.accept(self)
+        self._pop_scope()
+
+    def visit_program(self, program: Program):
+        for statement in program.children:
+            statement.accept(self)
+        self.annotations.resolved[program] = True
+
+    def visit_assignment(self, assignment: AssignmentStatement):
+        self._resolve_name(assignment, assignment.obj_access.name_chain[0])
+        assignment.expr.accept(self)
+
+    def visit_if(self, if_stmt: IfStatement):
+        if_stmt.cond.accept(self)
+        self._resolve_block(if_stmt.prog)
+        if if_stmt.else_prog:
+            self._resolve_block(if_stmt.else_prog)
+
+    def visit_while(self, while_stmt: WhileStatement):
+        while_stmt.cond.accept(self)
+        self._resolve_block(while_stmt.prog)
+
+    def visit_return(self, return_stmt: ReturnStatement):
+        if return_stmt.expr is not None:
+            return_stmt.expr.accept(self)
+
+    def visit_case_section(self, case_section: CaseSection):
+        self._push_scope()
+        self._declare(case_section.type)
+        case_section.program.accept(self)
+        self._pop_scope()
+
+    def visit_func_call(self, func_call: FunctionCall):
+        for arg in func_call.args:
+            arg.accept(self)
+
+    def visit_obj_access(self, obj_access: ObjectAccess):
+        obj_name = obj_access.name_chain[0]
+        if isinstance(obj_name, FunctionCall):
+            obj_name.accept(self)
+        self._resolve_name(obj_access, obj_name)
+
+    def visit_var_dec(self, var_dec: VariableDeclaration):
+        self.annotations.addresses[var_dec] = self._declare(var_dec.name)
+        if var_dec.default_value is not None:
+            var_dec.default_value.accept(self)
+
+    def visit_struct_def(self, struct_def: StructDef):
+        """Default values of attributes are evaluated where struct variable is declared"""
+
+    def visit_variant_def(self, variant_def: VariantDef):
+        pass
+
+    def visit_named_type(self, named_type: NamedType):
+        pass
+
+    def visit_visit(self, visit_statement: VisitStatement):
+        visit_statement.obj.accept(self)
+        for case_section in visit_statement.case_sections:
+            case_section.accept(self)
+
+    def visit_param(self, param: Param):
+        self.annotations.addresses[param] = self._declare(param.name)
+
+    def visit_func_def(self, func_def: FuncDef):
+        outer_function_scope = self._function_scope
+        self._push_scope()
+        self._function_scope = len(self._scopes) - 1
+        for param in func_def.params:
+            param.accept(self)
+        func_def.prog.accept(self)
+        self._pop_scope()
+        self._function_scope = outer_function_scope
+
+    def visit_or(self, or_expr: OrExpr):
+        for child in or_expr.children:
+            child.accept(self)
+
+    def visit_and(self, and_expr: AndExpr):
+        for child in and_expr.children:
+            child.accept(self)
+
+    def visit_rel(self, rel_expr: RelationExpr):
+        rel_expr.left.accept(self)
+        rel_expr.right.accept(self)
+
+    def visit_add(self, add_expr: AddExpr):
+        for child in add_expr.children:
+            child.accept(self)
+
+    def visit_multi(self, multi_expr: MultiExpr):
+        for child in multi_expr.children:
+            child.accept(self)
+
+    def visit_unary(self, unary_expr: UnaryExpr):
+        unary_expr.negated.accept(self)
+
+    def visit_null_literal(self, null_literal: NullLiteral):
+        pass
+
+    def visit_int_literal(self, int_literal: IntLiteral):
+        pass
+
+    def visit_float_literal(self, float_literal: FloatLiteral):
+        pass
+
+    def visit_str_literal(self, str_literal: StrLiteral):
+        pass
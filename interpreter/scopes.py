@@ -1,5 +1,7 @@
+from types import MappingProxyType
+
 from parser.AST import *
-from interpreter.interpreter_types import Variable, Value
+from interpreter.interpreter_types import Variable, Value, StructLayout, BUILT_IN_TYPE_NAMES
 from interpreter.interpreter_errors import InterpreterError
 
 
@@ -9,59 +11,69 @@ class PrintProg:
         print(f"interpreter  >>> {text}")
 
 
+_NOTHING = MappingProxyType({})
+
+
+class Frame:
+    """Scope linked to its parent. Namespaces are shared empty mapping
+    until something is declared in them, so entering a block allocates only the frame"""
+
+    __slots__ = ("parent", "variables", "slots", "functions", "structs", "variants")
+
+    def __init__(self, parent: "Frame" = None):
+        self.parent = parent
+        self.variables = _NOTHING
+        self.slots = ()  # (name, Variable) in order of declaration, addressed by Resolver
+        self.functions = _NOTHING
+        self.structs = _NOTHING
+        self.variants = _NOTHING
+
+
 class Scopes:
     def __init__(self):
-        self.built_in_type_names = {"int", "float", "str", "null_type"}
-        self.variable_stack = [{}]
-        self.function_stack = [
-            {
-                "print": FuncDef(
-                    "print", [Param("text", "str", False)], "null_type", PrintProg()
-                )
-            }
-        ]
-        self.struct_stack = [{}]
-        self.variant_stack = [{}]  # ?
-        self.curr_scope = 0
+        self.built_in_type_names = BUILT_IN_TYPE_NAMES
+        self.global_scope = Frame()
+        self.global_scope.functions = {
+            "print": FuncDef(
+                "print", [Param("text", "str", False)], "null_type", PrintProg()
+            )
+        }
+        self.curr_scope = self.global_scope
 
     def push_scope(self):
-
-        self.curr_scope += 1
-        self.variable_stack.insert(self.curr_scope, {})
-        self.function_stack.insert(self.curr_scope, {})
-        self.struct_stack.insert(self.curr_scope, {})
-        self.variant_stack.insert(self.curr_scope, {})
+        self.curr_scope = Frame(self.curr_scope)
 
     def pop_scope(self, pos):
-        if len(self.variable_stack) > 1:
-            self.variable_stack.pop(self.curr_scope)
-            self.function_stack.pop(self.curr_scope)
-            self.struct_stack.pop(self.curr_scope)
-            self.variant_stack.pop(self.curr_scope)
-            self.curr_scope -= 1
-        else:
+        if self.curr_scope.parent is None:
             raise InterpreterError(pos, "Cannot pop the global scope")
+        self.curr_scope = self.curr_scope.parent
 
     def reserve_place_for_(self, name: str, type_: str, is_mutable: bool, pos):
-        if name not in self.variable_stack[self.curr_scope].keys():
-            self.variable_stack[self.curr_scope][name] = Variable(
-                type_, is_mutable, None
+        frame = self.curr_scope
+        if name in frame.variables:
+            raise InterpreterError(
+                pos, f"Variable '{name}' already declared in the current scope"
             )
-            return
-        raise InterpreterError(
-            pos, f"Variable '{name}' already declared in the current scope"
-        )
+        if frame.variables is _NOTHING:
+            frame.variables = {}
+            frame.slots = []
+        variable = Variable(type_, is_mutable, None)
+        frame.variables[name] = variable
+        frame.slots.append((name, variable))
 
     def set_(self, name: str, value, pos):
-        for scope in reversed(self.variable_stack[: self.curr_scope + 1]):
-            if name in scope:
-                if scope[name].can_variable_be_updated():
-                    scope[name].value = value
+        frame = self.curr_scope
+        while frame is not None:
+            if name in frame.variables:
+                variable = frame.variables[name]
+                if variable.can_variable_be_updated():
+                    variable.value = value
                 else:
                     raise InterpreterError(
                         pos, "Trying to reassign value to non mutable variable"
                     )
                 return
+            frame = frame.parent
         raise InterpreterError(
             pos, f"Trying to assign value to not defined variable '{name}'"
         )
@@ -71,79 +83,127 @@ class Scopes:
         self.set_(name, value, pos)
 
     def get_variable(self, name, pos) -> Variable:
-        for scope in reversed(self.variable_stack[: self.curr_scope + 1]):
-            if name in scope:
-                return scope[name]
+        frame = self.curr_scope
+        while frame is not None:
+            if name in frame.variables:
+                return frame.variables[name]
+            frame = frame.parent
         raise InterpreterError(pos, f"Variable '{name}' not found in any scope")
 
+    def _variable_at(self, address, name) -> Variable:
+        """Variable at (depth, slot) address or None when address is unknown
+        or the slot holds other variable (e.g. when function got less arguments than params)"""
+        if address is None:
+            return None
+        depth, slot = address
+        frame = self.curr_scope
+        for _ in range(depth):
+            frame = frame.parent
+            if frame is None:
+                return None
+        slots = frame.slots
+        if slot < len(slots) and slots[slot][0] == name:
+            return slots[slot][1]
+        return None
+
+    def get_variable_at(self, address, name, pos) -> Variable:
+        """get_variable that indexes slots of scope when Resolver gave address"""
+        if (variable := self._variable_at(address, name)) is not None:
+            return variable
+        return self.get_variable(name, pos)
+
+    def set_at(self, address, name, value, pos):
+        """set_ that indexes slots of scope when Resolver gave address"""
+        if (variable := self._variable_at(address, name)) is None:
+            self.set_(name, value, pos)
+        elif variable.can_variable_be_updated():
+            variable.value = value
+        else:
+            raise InterpreterError(pos, "Trying to reassign value to non mutable variable")
+
+    def current_scope_names(self) -> list[str]:
+        """Names of variables of the current scope in order of their slots"""
+        return [name for name, _ in self.curr_scope.slots]
+
+    def _find(self, namespace: str, name: str):
+        """Frame whose namespace ('functions', 'structs' or 'variants') has name, or None"""
+        frame = self.curr_scope
+        while frame is not None:
+            if name in getattr(frame, namespace):
+                return frame
+            frame = frame.parent
+        return None
+
     def get_var_defs_for_(self, type_: str, pos) -> list[VariableDeclaration]:
-        for scope in reversed(self.struct_stack[: self.curr_scope + 1]):
-            if type_ in scope:
-                return scope[type_]
+        return self.get_layout_for_(type_, pos).attributes
+
+    def get_layout_for_(self, type_: str, pos) -> StructLayout:
+        if frame := self._find("structs", type_):
+            return frame.structs[type_]
 
         raise InterpreterError(pos, f"Type '{type_}' not found in any scope")
 
     def get_named_types_for_(self, type_: str, pos) -> list[NamedType]:
-        for scope in reversed(self.variant_stack[: self.curr_scope + 1]):
-            if type_ in scope:
-                return scope[type_]
+        if frame := self._find("variants", type_):
+            return frame.variants[type_]
 
         raise InterpreterError(pos, f"Type '{type_}' not found in any scope")
 
-    def set_active_scope_to_(self, scope_idx: int):
-        self.curr_scope = scope_idx  # TODO add value checking if within correct range
+    def set_active_scope_to_(self, scope: Frame):
+        self.curr_scope = scope
 
     def is_built_in_type_(self, type_):
         return type_ in self.built_in_type_names
 
-    def is_type_in_stack(self, type_, stack):
-        for i in range(self.curr_scope, -1, -1):
-            if type_ in stack[i]:
-                return True
-        return False
-
     def is_struct_type_(self, type_):
-        return self.is_type_in_stack(type_, self.struct_stack)
+        return self._find("structs", type_) is not None
 
     def is_variant_type_(self, type_):
-        return self.is_type_in_stack(type_, self.variant_stack)
+        return self._find("variants", type_) is not None
 
     def add_function(self, func_def: FuncDef):
         name = func_def.name
         self.validate_type_name(func_def.type, func_def.pos)
-        if name in self.function_stack[self.curr_scope]:
+        frame = self.curr_scope
+        if name in frame.functions:
             raise InterpreterError(
                 func_def.pos, f"Function '{name}' already declared in the current scope"
             )
-        self.function_stack[self.curr_scope][name] = func_def
-
-    def get_function_definition_and_its_scope_idx(self, name, pos):
-        for idx, scope in enumerate(
-            reversed(self.function_stack[: self.curr_scope + 1])
-        ):
-            if name in scope:
-                return scope[name], len(self.function_stack) - idx - 1
+        if frame.functions is _NOTHING:
+            frame.functions = {}
+        frame.functions[name] = func_def
+
+    def get_function_definition_and_its_scope(self, name, pos):
+        """Function and the scope it was defined in. Scope of call is linked to it"""
+        if frame := self._find("functions", name):
+            return frame.functions[name], frame
         raise InterpreterError(pos, f"Function '{name}' not found in any scope")
 
     def add_struct_type(self, name, attrs: List[VariableDeclaration], pos):
-        if name in self.struct_stack[self.curr_scope]:
+        frame = self.curr_scope
+        if name in frame.structs:
             raise InterpreterError(
                 pos, f"Type '{name}' already declared in the current scope"
             )
-        self.struct_stack[self.curr_scope][name] = attrs
+        if frame.structs is _NOTHING:
+            frame.structs = {}
+        frame.structs[name] = StructLayout(name, attrs)
 
     def type_exists_in_all_scopes(self, name):
-        return any(name in scope for scope in self.struct_stack[: self.curr_scope + 1])
+        return self.is_struct_type_(name)
 
     def add_variant_type(self, name, named_types: List[NamedType], pos):
-        if name in self.variant_stack[self.curr_scope]:
+        frame = self.curr_scope
+        if name in frame.variants:
             raise InterpreterError(
                 pos, f"Variant '{name}' already declared in the current scope"
             )
-        self.variant_stack[self.curr_scope][name] = named_types
+        if frame.variants is _NOTHING:
+            frame.variants = {}
+        frame.variants[name] = named_types
 
 
     def validate_type_name(self, type_name :str, pos):
         if not self.is_built_in_type_(type_name) and not self.is_struct_type_(type_name) and not self.is_variant_type_(type_name):
             raise InterpreterError(pos, f"Type '{type_name}' not found")
-        return True
\ No newline at end of file
+        return True
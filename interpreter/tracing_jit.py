@@ -0,0 +1,144 @@
+"""Execution engine that compiles hot loops and functions into Python code traced for their scopes"""
+
+from typing import Callable, Dict
+
+from lexer.source_position import PositionedError
+from parser.AST import *
+from interpreter.interpreter import Interpreter
+from interpreter.transpiler import GUARD_FAILED, NotTranspilable, Transpiler, call_function
+
+
+HOT_THRESHOLD = 8
+"""Loop iterations or function calls after which loop or function is traced and compiled"""
+MAX_TRACES = 4
+"""Loop or function traced that many times, e.g. because guards of its traces failed, is only interpreted"""
+
+
+class JITStats:
+    """Counters of TracingInterpreter, for instrumentation"""
+
+    __slots__ = (
+        "compiled_loops",
+        "compiled_functions",
+        "compiled_runs",
+        "guard_failures",
+        "compile_failures",
+        "blacklisted",
+    )
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        counters = ", ".join(f"{name}={value}" for name, value in self.as_dict().items())
+        return f"JITStats({counters})"
+
+
+class Trace:
+    """Hotness of loop or function and code traced for it"""
+
+    __slots__ = ("node", "count", "traces", "main", "definitions")
+
+    def __init__(self, node: WhileStatement | FuncDef):
+        self.node = node
+        self.count = 0
+        self.traces = 0
+        self.main: Callable = None
+        self.definitions: list = None
+
+
+class TracingInterpreter(Interpreter):
+    """Tree-walking interpreter that counts iterations of each loop and calls of each function.
+    Loop or function that gets hot is traced: Transpiler generates Python code specialized for
+    variables and their types seen in the current scopes, and it runs while guards of that code
+    hold. Code whose guards failed is dropped and the loop or function is interpreted again,
+    so it can be traced again for the scopes it runs in now"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.jit_stats = JITStats()
+        self._traces: Dict[int, Trace] = {}
+
+    def visit_while(self, while_stmt: WhileStatement):
+        """Loop becomes hot between iterations, so its code takes over the rest of them"""
+        trace = self._trace_of(while_stmt)
+        pos = while_stmt.pos
+        while True:
+            if trace.main is not None and (rv := self._run(trace)) is not GUARD_FAILED:
+                return rv
+            if not while_stmt.cond.accept(self).bool():
+                return None
+            self.scopes.push_scope()
+            rv = while_stmt.prog.accept(self)
+            self.scopes.pop_scope(pos)
+            if rv is not None:
+                return rv
+            self._heat(trace, while_stmt)
+
+    def visit_func_call(self, func_call: FunctionCall):
+        """Calls function like Interpreter.visit_func_call, with its body run by _run_body_of_"""
+        return call_function(self, func_call.name, [arg.accept(self) for arg in func_call.args], func_call.pos)
+
+    def _run_body_of_(self, func_def: FuncDef):
+        if not isinstance(func_def.prog, Program):
+            return super()._run_body_of_(func_def)
+        trace = self._trace_of(func_def)
+        if trace.main is None:
+            self._heat(trace, func_def.prog)
+        if trace.main is not None:
+            try:
+                rv = self._run(trace)
+            except PositionedError as error:
+                error.locate(func_def.prog.line_index)
+                raise
+            if rv is not GUARD_FAILED:
+                return rv
+        return func_def.prog.accept(self)
+
+    def _trace_of(self, node: WhileStatement | FuncDef) -> Trace:
+        if (trace := self._traces.get(id(node))) is None:
+            trace = self._traces[id(node)] = Trace(node)
+        return trace
+
+    def _heat(self, trace: Trace, node: WhileStatement | Program):
+        if trace.main is not None or trace.traces >= MAX_TRACES:
+            return
+        trace.count += 1
+        if trace.count >= HOT_THRESHOLD:
+            self._compile(trace, node)
+
+    def _compile(self, trace: Trace, node: WhileStatement | Program):
+        """Traces node for the current scope, which is scope of loop or of function call.
+        Node that can not be traced is only interpreted"""
+        trace.count = 0
+        trace.traces += 1
+        transpiler = Transpiler(self.annotations, self.scopes.curr_scope)
+        try:
+            code = compile(transpiler.trace(node), "<trace>", "exec")
+        except (NotTranspilable, SyntaxError, RecursionError, MemoryError):
+            trace.traces = MAX_TRACES
+            self.jit_stats.compile_failures += 1
+            return
+        namespace = {}
+        exec(code, namespace)
+        trace.main = namespace["main"]
+        trace.definitions = transpiler.definitions
+        if isinstance(node, WhileStatement):
+            self.jit_stats.compiled_loops += 1
+        else:
+            self.jit_stats.compiled_functions += 1
+
+    def _run(self, trace: Trace):
+        rv = trace.main(self, trace.definitions)
+        if rv is not GUARD_FAILED:
+            self.jit_stats.compiled_runs += 1
+            return rv
+        self.jit_stats.guard_failures += 1
+        trace.main = None
+        if trace.traces >= MAX_TRACES:
+            self.jit_stats.blacklisted += 1
+        return rv
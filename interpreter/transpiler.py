@@ -0,0 +1,717 @@
+"""Execution engine that translates program into source of Python module and runs it"""
+
+import hashlib
+import math
+from typing import Callable, Dict, List, Tuple
+
+from lexer.source_position import LineIndex
+from parser.AST import *
+from interpreter.annotations import Annotations
+from interpreter.interpreter import Interpreter
+from interpreter.closure_compiler import CompiledProgram
+from interpreter.interpreter_errors import InterpreterError
+from interpreter.scopes import Frame
+from interpreter.type_checker import KEEP, BUILT_IN
+
+
+TRANSPILER_FORMAT_VERSION = 4
+"""Has to be bumped whenever generated code changes, so old cached modules are never run"""
+
+TRANSPILED_SUFFIX = ".transpiled.py"
+
+MODULE_HEADER = '''"""Generated by interpreter.transpiler. Do not edit"""
+
+from parser.AST import FuncDef, Param, StructDef, VariableDeclaration, VariantDef, NamedType
+from interpreter.scopes import Frame
+from interpreter.interpreter_types import BuiltInValue, TRUE, TRUTH, constant, share
+from interpreter.interpreter_errors import InterpreterError, NumberTooBig, DivisionByZero
+from interpreter.closure_compiler import CompiledProgram
+from interpreter.transpiler import CompiledExpr, GUARD_FAILED, call_function
+from interpreter.fast_ops import (
+    fast_add_with_limit,
+    fast_sub,
+    fast_mul,
+    fast_div,
+    fast_eq,
+    fast_ieq,
+    fast_lt,
+    fast_gt,
+    fast_lteq,
+    fast_gteq,
+)
+'''
+
+LITERAL_TYPES = {IntLiteral: "int", FloatLiteral: "float", StrLiteral: "str"}
+# operator: (method of interpreter, fast operation, python operator for two ints)
+BINARY_OPERATORS = {
+    "+": ("add", "fast_add", "+"),
+    "-": ("sub", "fast_sub", "-"),
+    "*": ("mul", "fast_mul", "*"),
+    "/": ("div", "fast_div", "/"),
+    "==": ("eq", "fast_eq", "=="),
+    "!=": ("ieq", "fast_ieq", "!="),
+    "<": ("lt", "fast_lt", "<"),
+    ">": ("gt", "fast_gt", ">"),
+    "<=": ("lteq", "fast_lteq", "<="),
+    ">=": ("gteq", "fast_gteq", ">="),
+}
+CONVERTERS = {KEEP: None, BUILT_IN: "convert_built_in_to"}
+
+GUARD_FAILED = object()
+"""Returned by main of traced code when scopes differ from the ones it was traced in"""
+
+
+class NotTranspilable(Exception):
+    """Program has node that Transpiler does not translate"""
+
+
+class CompiledExpr:
+    """Generated expression seen as AST node, for code of interpreter that visits
+    expressions itself: default values of struct attributes and assigned attributes"""
+
+    __slots__ = ("evaluate",)
+
+    def __init__(self, evaluate: Callable[[], object]):
+        self.evaluate = evaluate
+
+    def accept(self, interpreter):
+        return self.evaluate()
+
+
+def call_function(interpreter: Interpreter, name: str, args: list, pos):
+    """Same as Interpreter.visit_func_call, for arguments that are already evaluated"""
+    scopes = interpreter.scopes
+    convert = interpreter._convert_to_
+    curr_scope = scopes.curr_scope
+    func_def, func_scope = scopes.get_function_definition_and_its_scope(name, pos)
+    scopes.curr_scope = func_scope
+    scopes.push_scope()
+    for param, arg in zip(func_def.params, args):
+        scopes.add_variable(
+            param.name, param.type, param.is_mutable, convert(param.type, arg, pos), pos
+        )
+    interpreter.curr_recursion += 1
+    if interpreter.curr_recursion > interpreter._max_recursion_depth:
+        raise InterpreterError(pos, "Maximal recursion depth reached!")
+    rv = convert(func_def.type, interpreter._run_body_of_(func_def), pos)
+    interpreter.curr_recursion -= 1
+    scopes.pop_scope(pos)
+    scopes.curr_scope = curr_scope
+    return rv
+
+
+class Transpiler:
+    """Translates resolved program into source of Python module with function
+    main(interpreter, definitions=None). Main runs the program in the current scope of
+    interpreter, with the same semantics as Interpreter: variables, functions and types
+    are kept in scopes of interpreter, so state is shared with other programs run by it.
+
+    Blocks are inlined and their frames are kept in locals f0, f1, ..., so variables with
+    (depth, slot) address are read from slots of known frame. Function definitions become
+    nested Python functions, visit becomes dispatch on name of variant option and operators
+    get inlined code for two ints, fast operations for other builtins and operators of
+    interpreter for the rest. Generated module does not refer to AST of program,
+    so it can be cached and run again without parsing. Struct and variant definitions
+    are rebuilt by it, unless nodes of definitions (in order of self.definitions) are given.
+    Line indexes of sources of function bodies, which locate errors raised in them,
+    are taken from definitions too.
+
+    Transpiler given entry frame traces code for it instead: variables of that frame and
+    its ancestors are read from their slots without lookups, their types are the ones
+    seen in entry frame and main starts with guards returning GUARD_FAILED when scopes
+    it runs in have other variables in those slots.
+
+    Positions of nodes are kept in generated code as they are, or as (row, column)
+    computed from line_index, so module run without AST reports rows and columns.
+    Addresses, conversions and checked visits are taken from annotations"""
+
+    def __init__(
+        self, annotations: Annotations = None, entry_frame: Frame = None, line_index: LineIndex = None
+    ):
+        self.annotations = annotations if annotations is not None else Annotations()
+        self._lines: List[str] = []
+        self._indent = 1
+        self._constants: Dict[str, str] = {}
+        self.definitions: List[StructDef | VariantDef | LineIndex] = []
+        self._counter = 0
+        self._level = 0  # frame of the current block is f{level}
+        self._base = 0  # frame of block that generated function runs, return goes back to it
+        self._frames = True  # False in expressions evaluated where struct variable is declared
+        self._entry_frame = entry_frame
+        self._line_index = line_index
+        self._outer_depth = 0  # ancestors o1, o2, ... of f0 used by traced code
+        self._guards: Dict[Tuple[int, int], Tuple[str, str]] = {}  # (ancestor, slot): (name, type)
+        self._types: Dict[str, str] = {}  # variable: its type known from guard
+        self._ints = set()  # operands holding builtin int values
+
+    def transpile(self, program: Program) -> str:
+        self._block(program)
+        return self._module()
+
+    def trace(self, node: WhileStatement | Program) -> str:
+        """Module running hot loop, or body of hot function, in the current scope of interpreter"""
+        if isinstance(node, WhileStatement):
+            self._while(node)
+        else:
+            self._block(node)
+        return self._module()
+
+    def _at(self, pos) -> str:
+        if type(pos) is int and self._line_index is not None:
+            pos = self._line_index.get_row_and_col(pos)
+        return repr(pos)
+
+    def _module(self) -> str:
+        body = self._lines
+        self._lines = []
+        self._emit("s = interpreter.scopes")
+        self._emit("number_limit = interpreter.number_limit")
+        self._emit("fast_add = fast_add_with_limit(number_limit)")
+        self._emit("convert_to = interpreter._convert_to_")
+        self._emit("convert_built_in_to = interpreter._convert_built_in_to_")
+        self._emit("f0 = s.curr_scope")
+        self._emit_guards()
+        constants = [f"{name} = {code}" for code, name in self._constants.items()]
+        main = "def main(interpreter, definitions=None):"
+        return "\n".join([MODULE_HEADER, *constants, "", "", main, *self._lines, *body, ""])
+
+    def _emit_guards(self):
+        for ancestor in range(1, self._outer_depth + 1):
+            self._emit(f"o{ancestor} = {self._ancestor(ancestor - 1)}.parent")
+            self._emit(f"if o{ancestor} is None:")
+            self._emit("    return GUARD_FAILED")
+        for (ancestor, slot), (name, type_) in self._guards.items():
+            frame = self._ancestor(ancestor)
+            self._emit(f"sl = {frame}.slots")
+            self._emit(
+                f"if not ({slot} < len(sl) and sl[{slot}][0] == {name!r} "
+                f"and sl[{slot}][1].type == {type_!r}):"
+            )
+            self._emit("    return GUARD_FAILED")
+
+    def _ancestor(self, ancestor: int) -> str:
+        return f"o{ancestor}" if ancestor else "f0"
+
+    def _emit(self, line: str):
+        self._lines.append("    " * self._indent + line)
+
+    def _name(self, prefix: str) -> str:
+        self._counter += 1
+        return f"{prefix}{self._counter}"
+
+    def _constant(self, literal: Literal) -> str:
+        type_ = LITERAL_TYPES[type(literal)]
+        raw = literal.value
+        if type_ == "float" and not math.isfinite(raw):
+            raw_code = f"float({str(raw)!r})"
+        else:
+            raw_code = repr(raw)
+        code = f"constant({type_!r}, {raw_code})"
+        if code not in self._constants:
+            self._constants[code] = f"K{len(self._constants)}"
+            if type_ == "int":
+                self._ints.add(self._constants[code])
+        return self._constants[code]
+
+    def _push_block(self):
+        """Enters scope of block. Frame of block is the current scope of interpreter"""
+        self._emit(f"f{self._level + 1} = s.curr_scope = Frame(f{self._level})")
+        self._level += 1
+
+    def _pop_block(self):
+        self._level -= 1
+        self._emit(f"s.curr_scope = f{self._level}")
+
+    def _return_if_value(self, value: str):
+        """Statement with value stops program like in Interpreter.visit_program"""
+        self._emit(f"if {value} is not None:")
+        self._indent += 1
+        self._emit(f"s.curr_scope = f{self._base}")
+        self._emit(f"return {value}")
+        self._indent -= 1
+
+    # statements
+
+    def _block(self, program: Program):
+        if not program.children:
+            self._emit("pass")
+        for statement in program.children:
+            self._statement(statement)
+
+    def _statement(self, statement: ASTNode):
+        match statement:
+            case AssignmentStatement():
+                self._assignment(statement)
+            case IfStatement():
+                self._if(statement)
+            case WhileStatement():
+                self._while(statement)
+            case ReturnStatement():
+                self._return(statement)
+            case VisitStatement():
+                self._visit(statement)
+            case VariableDeclaration():
+                self._var_dec(statement)
+            case StructDef():
+                self._struct_def(statement)
+            case VariantDef():
+                self._variant_def(statement)
+            case FuncDef():
+                self._func_def(statement)
+            case FunctionCall() | ObjectAccess():
+                self._return_if_value(self._expr(statement))
+            case Program():
+                # bare begin ... end block has no scope of its own, like in Interpreter
+                self._block(statement)
+            case _:
+                raise NotTranspilable(f"Can not transpile {type(statement).__name__}")
+
+    def _converted(self, value: str, target_type: str, conversion: str, pos):
+        """Converts value to target type unless it is builtin value of that type already"""
+        converter = CONVERTERS.get(conversion, "convert_to")
+        if converter is None:
+            return
+        self._emit(f"if type({value}) is not BuiltInValue or {value}.type != {target_type}:")
+        self._emit(f"    {value} = {converter}({target_type}, {value}, {self._at(pos)})")
+
+    def _assignment(self, assignment: AssignmentStatement):
+        name_chain = assignment.obj_access.name_chain
+        pos = assignment.pos
+        conversion = self.annotations.conversions.get(assignment)
+        variable = self._variable(name_chain[0], self.annotations.addresses.get(assignment), pos)
+        if len(name_chain) > 1:
+            expr = self._thunk(assignment.expr)
+            self._emit(
+                f"interpreter.complex_assignment({variable}, {name_chain[1:]!r}, "
+                f"CompiledExpr({expr}), {self._at(pos)}, {conversion!r})"
+            )
+            return
+        value = self._operand_in_temp(self._expr(assignment.expr))
+        if not (value in self._ints and self._types.get(variable) == "int"):
+            self._converted(value, f"{variable}.type", conversion, pos)
+        self._emit(f"if {variable}.value is not None and not {variable}.is_mutable:")
+        self._emit(
+            f'    raise InterpreterError({self._at(pos)}, "Trying to reassign value to non mutable variable")'
+        )
+        self._emit(f"{variable}.value = {value}")
+
+    def _truth(self, value: str) -> str:
+        if value in self._ints:
+            return f"{value}.value"
+        return f"({value}.value if type({value}) is BuiltInValue else {value}.bool())"
+
+    def _if(self, if_stmt: IfStatement):
+        cond = self._expr(if_stmt.cond)
+        self._emit(f"if {self._truth(cond)}:")
+        self._indent += 1
+        self._push_block()
+        self._block(if_stmt.prog)
+        self._pop_block()
+        self._indent -= 1
+        if if_stmt.else_prog:
+            self._emit("else:")
+            self._indent += 1
+            self._push_block()
+            self._block(if_stmt.else_prog)
+            self._pop_block()
+            self._indent -= 1
+
+    def _while(self, while_stmt: WhileStatement):
+        self._emit("while True:")
+        self._indent += 1
+        cond = self._expr(while_stmt.cond)
+        self._emit(f"if not {self._truth(cond)}:")
+        self._emit("    break")
+        self._push_block()
+        self._block(while_stmt.prog)
+        self._pop_block()
+        self._indent -= 1
+
+    def _return(self, return_stmt: ReturnStatement):
+        if return_stmt.expr is None:
+            raise NotTranspilable("Can not transpile return without value")
+        self._return_if_value(self._expr(return_stmt.expr))
+
+    def _visit(self, visit_statement: VisitStatement):
+        pos = visit_statement.pos
+        value = self._expr(visit_statement.obj)
+        if not self.annotations.checked.get(visit_statement, False):
+            self._emit(f"if not s.is_variant_type_({value}.type):")
+            self._emit(f'    raise InterpreterError({self._at(pos)}, "There is no variant type in visit")')
+        if not visit_statement.case_sections:
+            return
+        option = self._name("n")
+        self._emit(f"{option} = {value}.name")
+        keyword = "if"
+        for case_section in visit_statement.case_sections:
+            self._emit(f"{keyword} {option} == {case_section.type!r}:")
+            keyword = "elif"
+            self._indent += 1
+            self._push_block()
+            self._emit(
+                f"s.add_variable({value}.name, {value}.type, False, {value}.value, {self._at(pos)})"
+            )
+            self._block(case_section.program)
+            self._pop_block()
+            self._indent -= 1
+
+    def _var_dec(self, var_dec: VariableDeclaration):
+        name = var_dec.name
+        type_ = var_dec.type
+        pos = var_dec.pos
+        conversion = self.annotations.conversions.get(var_dec)
+        if conversion is None:
+            self._emit(f"s.validate_type_name({type_!r}, {self._at(pos)})")
+        self._emit(f"s.reserve_place_for_({name!r}, {type_!r}, {var_dec.is_mutable!r}, {self._at(pos)})")
+        if var_dec.default_value is not None:
+            value = self._operand_in_temp(self._expr(var_dec.default_value))
+        else:
+            value = self._name("t")
+            self._emit(f"{value} = interpreter._get_default_value_for_({type_!r}, 0, {self._at(pos)})")
+        self._emit(f"if {value} is not None:")
+        self._indent += 1
+        self._converted(value, repr(type_), conversion, pos)
+        address = self.annotations.addresses.get(var_dec)
+        self._emit(f"s.set_at({address!r}, {name!r}, {value}, {self._at(pos)})")
+        self._indent -= 1
+
+    def _struct_def(self, struct_def: StructDef):
+        attributes = []
+        for attribute in struct_def.attributes:
+            default_value = None
+            if attribute.default_value is not None:
+                frames = self._frames
+                self._frames = False
+                default_value = f"CompiledExpr({self._thunk(attribute.default_value)})"
+                self._frames = frames
+            attributes.append(
+                f"VariableDeclaration({attribute.name!r}, {attribute.type!r}, "
+                f"{attribute.is_mutable!r}, {default_value}, {self._at(attribute.pos)})"
+            )
+        rebuilt = f"StructDef({struct_def.name!r}, [{', '.join(attributes)}], {self._at(struct_def.pos)})"
+        self._emit(f"interpreter.visit_struct_def({self._definition(struct_def, rebuilt)})")
+
+    def _variant_def(self, variant_def: VariantDef):
+        named_types = ", ".join(
+            f"NamedType({named_type.name!r}, {named_type.type!r}, {self._at(named_type.pos)})"
+            for named_type in variant_def.named_types
+        )
+        rebuilt = f"VariantDef({variant_def.name!r}, [{named_types}], {self._at(variant_def.pos)})"
+        self._emit(f"interpreter.visit_variant_def({self._definition(variant_def, rebuilt)})")
+
+    def _definition(self, definition: StructDef | VariantDef | LineIndex, rebuilt: str) -> str:
+        index = len(self.definitions)
+        self.definitions.append(definition)
+        return f"definitions[{index}] if definitions else {rebuilt}"
+
+    def _func_def(self, func_def: FuncDef):
+        """Body runs in scope of call, linked to scope of definition. Frames of definition
+        are found from scope of call, as function may be called from other block"""
+        function = self._name("fn")
+        outer_level, outer_base = self._level, self._base
+        self._emit(f"def {function}():")
+        self._indent += 1
+        self._level = self._base = outer_level + 1
+        self._emit(f"f{self._level} = s.curr_scope")
+        for level in range(self._level - 1, -1, -1):
+            self._emit(f"f{level} = f{level + 1}.parent")
+        self._block(func_def.prog)
+        self._indent -= 1
+        self._level, self._base = outer_level, outer_base
+        params = ", ".join(
+            f"Param({param.name!r}, {param.type!r}, {param.is_mutable!r}, None, {self._at(param.pos)})"
+            for param in func_def.params
+        )
+        line_index = "None"
+        if self._line_index is None and func_def.prog.line_index is not None:
+            line_index = self._definition(func_def.prog.line_index, "None")
+        self._emit(
+            f"s.add_function(FuncDef({func_def.name!r}, [{params}], {func_def.type!r}, "
+            f"CompiledProgram({function}, {line_index}), {self._at(func_def.pos)}))"
+        )
+
+    # expressions, each one emits statements and returns operand holding its value
+
+    def _operand_in_temp(self, operand: str) -> str:
+        """Operand that can be reassigned, e.g. by conversion"""
+        if operand.startswith("t"):
+            return operand
+        temp = self._name("t")
+        self._emit(f"{temp} = {operand}")
+        if operand in self._ints:
+            self._ints.add(temp)
+        return temp
+
+    def _thunk(self, expr: Expr) -> str:
+        """Nested function returning value of expression"""
+        function = self._name("e")
+        self._emit(f"def {function}():")
+        self._indent += 1
+        self._emit(f"return {self._expr(expr)}")
+        self._indent -= 1
+        return function
+
+    def _expr(self, expr: ASTNode) -> str:
+        match expr:
+            case IntLiteral() | FloatLiteral() | StrLiteral():
+                return self._constant(expr)
+            case NullLiteral():
+                return "None"
+            case ObjectAccess():
+                return self._obj_access(expr)
+            case FunctionCall():
+                return self._func_call(expr)
+            case OrExpr():
+                return self._or(expr)
+            case AndExpr():
+                return self._and(expr)
+            case RelationExpr():
+                return self._binary(expr.operator, self._expr(expr.left), expr.right, expr.pos)
+            case AddExpr() | MultiExpr():
+                result = self._expr(expr.children[0])
+                for operator, child in zip(expr.operations, expr.children[1:]):
+                    result = self._binary(operator, result, child, expr.pos)
+                return result
+            case UnaryExpr():
+                return self._unary(expr)
+        raise NotTranspilable(f"Can not transpile {type(expr).__name__}")
+
+    def _frame(self, address) -> str:
+        """Local holding frame of address, None when it is not known at this point"""
+        if address is None or not self._frames:
+            return None
+        depth, _ = address
+        if depth <= self._level:
+            return f"f{self._level - depth}"
+        if self._live_frame(depth - self._level) is None:
+            return None
+        self._outer_depth = max(self._outer_depth, depth - self._level)
+        return f"o{depth - self._level}"
+
+    def _live_frame(self, ancestor: int) -> Frame:
+        """Ancestor of entry frame, None when code is not traced or there is no such frame"""
+        frame = self._entry_frame
+        for _ in range(ancestor):
+            if frame is None:
+                break
+            frame = frame.parent
+        return frame
+
+    def _variable(self, name: str, address, pos) -> str:
+        """Same as Scopes.get_variable_at, with slot of known frame read inline.
+        Traced variable of entry frame or its ancestor is guarded and read from its slot"""
+        variable = self._name("v")
+        frame = self._frame(address)
+        if frame is None:
+            self._emit(f"{variable} = s.get_variable_at({address!r}, {name!r}, {self._at(pos)})")
+            return variable
+        depth, slot = address
+        if depth >= self._level and (live := self._live_frame(depth - self._level)) is not None:
+            if slot < len(live.slots) and live.slots[slot][0] == name:
+                type_ = live.slots[slot][1].type
+                self._guards[(depth - self._level, slot)] = (name, type_)
+                self._types[variable] = type_
+                self._emit(f"{variable} = {frame}.slots[{slot}][1]")
+                return variable
+        slots = self._name("sl")
+        self._emit(f"{slots} = {frame}.slots")
+        self._emit(
+            f"{variable} = {slots}[{slot}][1] if {slot} < len({slots}) and "
+            f"{slots}[{slot}][0] == {name!r} else s.get_variable({name!r}, {self._at(pos)})"
+        )
+        return variable
+
+    def _obj_access(self, obj_access: ObjectAccess) -> str:
+        name_chain = obj_access.name_chain
+        obj_name = name_chain[0]
+        pos = obj_access.pos
+        value = self._name("t")
+        variable = None
+        if isinstance(obj_name, FunctionCall):
+            self._emit(f"{value} = {self._func_call(obj_name)}")
+        else:
+            variable = self._variable(obj_name, self.annotations.addresses.get(obj_access), pos)
+            self._emit(f"{value} = {variable}.value")
+        message = f"Variable '{obj_name}' has no value"
+        self._emit(f"if {value} is None:")
+        self._emit(f"    raise InterpreterError({self._at(pos)}, {message!r})")
+        if len(name_chain) == 1 and self._types.get(variable) == "int":
+            self._ints.add(value)
+            return value
+        message = f"Variable '{".".join(map(str, name_chain))}' has no value"
+        for attr_name in name_chain[1:]:
+            self._emit(f"{value} = {value}[{attr_name!r}]")
+            self._emit(f"if {value} is None:")
+            self._emit(f"    raise InterpreterError({self._at(pos)}, {message!r})")
+        self._emit(f"if type({value}) is not BuiltInValue:")
+        self._emit(f"    share({value})")
+        return value
+
+    def _func_call(self, func_call: FunctionCall) -> str:
+        args = [self._expr(arg) for arg in func_call.args]
+        result = self._name("t")
+        self._emit(
+            f"{result} = call_function(interpreter, {func_call.name!r}, "
+            f"[{', '.join(args)}], {self._at(func_call.pos)})"
+        )
+        return result
+
+    def _or(self, or_expr: OrExpr) -> str:
+        """First true child gives true, children after it are not evaluated. No true child gives no value"""
+        result = self._name("t")
+        for child in or_expr.children:
+            value = self._expr(child)
+            self._emit(f"if {self._truth(value)}:")
+            self._emit(f"    {result} = TRUE")
+            self._emit("else:")
+            self._indent += 1
+        self._emit(f"{result} = None")
+        self._indent -= len(or_expr.children)
+        return result
+
+    def _and(self, and_expr: AndExpr) -> str:
+        """Every child is evaluated and the result is true"""
+        for child in and_expr.children:
+            self._emit(f"{self._expr(child)}.bool()")
+        return "TRUE"
+
+    def _binary(self, operator: str, left: str, right_expr: Expr, pos) -> str:
+        right = self._expr(right_expr)
+        method, fast_operation, _ = BINARY_OPERATORS[operator]
+        result = self._name("t")
+        if left in self._ints and right in self._ints:
+            self._int_operation(operator, result, f"{left}.value", f"{right}.value", pos)
+            self._ints.add(result)
+            return result
+        left_raw, right_raw = self._name("a"), self._name("b")
+        self._emit(f"if type({left}) is BuiltInValue and type({right}) is BuiltInValue:")
+        self._indent += 1
+        self._emit(f"{left_raw} = {left}.value")
+        self._emit(f"{right_raw} = {right}.value")
+        self._emit(f"if type({left_raw}) is int and type({right_raw}) is int:")
+        self._indent += 1
+        self._int_operation(operator, result, left_raw, right_raw, pos)
+        self._indent -= 1
+        self._emit("else:")
+        self._emit(f"    {result} = {fast_operation}({left_raw}, {right_raw}, {self._at(pos)})")
+        self._emit(f"    if {result} is None:")
+        self._emit(f"        {result} = interpreter.{method}({left}, {right}, {self._at(pos)})")
+        self._indent -= 1
+        self._emit("else:")
+        self._emit(f"    {result} = interpreter.{method}({left}, {right}, {self._at(pos)})")
+        return result
+
+    def _int_operation(self, operator: str, result: str, left_raw: str, right_raw: str, pos):
+        """Same as operation of interpreter for two ints"""
+        raw = f"{left_raw} {BINARY_OPERATORS[operator][2]} {right_raw}"
+        if operator == "+":
+            self._emit(f"{result} = {raw}")
+            self._emit(f"if {result} > number_limit:")
+            self._emit(f'    raise NumberTooBig({self._at(pos)}, "Not good.")')
+            self._emit(f"{result} = BuiltInValue('int', {result})")
+        elif operator == "/":
+            self._emit(f"if {right_raw} == 0:")
+            self._emit(f'    raise DivisionByZero({self._at(pos)}, "Not good.")')
+            self._emit(f"{result} = BuiltInValue('int', int({raw}))")
+        elif operator in "-*":
+            self._emit(f"{result} = BuiltInValue('int', {raw})")
+        else:
+            self._emit(f"{result} = TRUTH[{raw}]")
+
+    def _unary(self, unary_expr: UnaryExpr) -> str:
+        value = self._expr(unary_expr.negated)
+        result = self._name("t")
+        if value in self._ints:
+            self._emit(f"{result} = BuiltInValue('int', {value}.value * -1)")
+            self._ints.add(result)
+            return result
+        raw = self._name("a")
+        self._emit(f"{raw} = {value}.value if type({value}) is BuiltInValue else None")
+        self._emit(f"if type({raw}) is int:")
+        self._emit(f"    {result} = BuiltInValue('int', {raw} * -1)")
+        self._emit(f"elif type({raw}) is float:")
+        self._emit(f"    {result} = BuiltInValue('float', {raw} * -1)")
+        self._emit("else:")
+        self._emit(f"    {result} = interpreter.minus({value}, {self._at(unary_expr.pos)})")
+        return result
+
+
+class TranspilingInterpreter(Interpreter):
+    """Interpreter that transpiles each program into Python module, loads it once and runs its main.
+    Program that is not transpilable, or whose generated module Python can not compile,
+    e.g. with too deeply nested loops, is run by Interpreter. Other nodes are visited like in Interpreter"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._modules: Dict[int, Tuple[Program, Callable, list]] = {}
+
+    def visit_program(self, program: Program):
+        self._resolve(program)
+        if (entry := self._modules.get(id(program))) is None:
+            transpiler = Transpiler(self.annotations)
+            main = self._load(lambda: transpiler.transpile(program), "<transpiled>")
+            entry = self._modules[id(program)] = (program, main, transpiler.definitions)
+        _, main, definitions = entry
+        if main is None:
+            return Interpreter.visit_program(self, program)
+        return main(self, definitions)
+
+    def _load(self, transpile: Callable[[], str], filename: str) -> Callable:
+        """Function main of generated module, None when program is not transpilable or Python can not compile it"""
+        try:
+            code = compile(transpile(), filename, "exec")
+        except (NotTranspilable, SyntaxError, RecursionError, MemoryError):
+            return None
+        namespace = {}
+        exec(code, namespace)
+        return namespace["main"]
+
+    def interpret_file(self, source_path: str, parse: Callable[[], Program]):
+        """Runs source file. Generated module is kept next to it and run again without parsing
+        while the source, transpiler and options are the same. Interpreter that already
+        declared something gives other addresses to the program, so it is not cached"""
+        if not self._is_fresh():
+            return parse().accept(self)
+        cache_path = source_path + TRANSPILED_SUFFIX
+        header = self._cache_header(source_path)
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                source = f.read()
+        except OSError:
+            source = None
+        program = None
+        if source is None or source.partition("\n")[0] != header:
+            program = parse()
+            self._resolve(program)
+            try:
+                transpiler = Transpiler(self.annotations, line_index=program.line_index)
+                source = f"{header}\n{transpiler.transpile(program)}"
+            except (NotTranspilable, RecursionError):
+                source = None
+        main = self._load(lambda: source, cache_path) if source is not None else None
+        if main is None:
+            return (program or parse()).accept(self)
+        if program is not None:
+            try:
+                with open(cache_path, "w", encoding="utf-8") as f:
+                    f.write(source)
+            except OSError:
+                pass
+        return main(self)
+
+    def _cache_header(self, source_path: str) -> str:
+        with open(source_path, "rb") as f:
+            digest = hashlib.file_digest(f, "sha256").hexdigest()
+        options = f"optimize={self.optimize} check_types={self.check_types}"
+        return f"# source sha256 {digest} format {TRANSPILER_FORMAT_VERSION} {options}"
+
+    def _is_fresh(self):
+        scopes = self.scopes
+        frame = scopes.global_scope
+        return (
+            scopes.curr_scope is frame
+            and not frame.slots
+            and not frame.structs
+            and not frame.variants
+            and list(frame.functions) == ["print"]
+        )
@@ -0,0 +1,340 @@
+"""Static type checking of programs before they are run"""
+
+from typing import Dict, List
+
+from parser.AST import *
+from interpreter.annotations import Annotations
+from interpreter.visitor import Visitor
+from interpreter.scopes import Scopes
+from interpreter.interpreter_types import BUILT_IN_TYPE_NAMES
+from interpreter.interpreter_errors import TypeCheckError
+
+
+KEEP = "keep"  # value already has target type, it is used as it is
+BUILT_IN = "built_in"  # value of builtin type is converted to other builtin type
+CONVERT = "convert"  # conversion depends on value, it is chosen at runtime by Interpreter._convert_to_
+
+CONVERTIBLE_TYPE_NAMES = frozenset({"int", "float", "str"})
+DECLARATIONS = (VariableDeclaration, StructDef, VariantDef, FuncDef)
+
+BUILT_IN_KIND = "built_in"
+STRUCT_KIND = "struct"
+VARIANT_KIND = "variant"
+
+
+class _Scope:
+    """Names known to checker in one scope and names declared anywhere in its block"""
+
+    def __init__(self, program: Program = None, names: List[str] = ()):
+        self.variables: Dict[str, str] = {}
+        self.functions: Dict[str, FuncDef] = {}
+        self.structs: Dict[str, List[VariableDeclaration]] = {}
+        self.variants: Dict[str, List[NamedType]] = {}
+        self.declared = set(names)
+        if program is not None:
+            self.declared.update(
+                statement.name for statement in program.children if isinstance(statement, DECLARATIONS)
+            )
+
+
+class TypeChecker(Visitor):
+    """Gives every expression of program its static type - name of type of its value, or None
+    when type is known only at runtime (null, '|', variant operands, names checker can not see).
+    Definite type errors are collected with positions of statements they are in. Declarations,
+    assignments and visits whose types are known are annotated, so engines skip dynamic checks:
+    conversion of declaration or assignment is KEEP, BUILT_IN or CONVERT and visit of variant
+    whose every option is struct is checked. Annotations are kept in annotations.
+
+    Names are resolved like at runtime: in order of execution, then in scopes of interpreter
+    that will run the program. Function body runs after its definition, so name declared
+    anywhere in scope between function and the found name is not known statically"""
+
+    def __init__(self, scopes: Scopes, annotations: Annotations = None):
+        self.scopes = scopes
+        self.annotations = annotations if annotations is not None else Annotations()
+        self.errors: List[TypeCheckError] = []
+        self._scopes: List[_Scope] = []
+        self._function_scope = 0
+        self._function_types: List[str] = []
+        self._statement_pos = (1, 1)
+
+    def check(self, program: Program) -> List[TypeCheckError]:
+        """Annotates program and returns type errors found in it"""
+        self._scopes.append(_Scope(program))
+        program.accept(self)
+        self._scopes.pop()
+        for error in self.errors:
+            error.locate(program.line_index)
+        return self.errors
+
+    def _error(self, pos, msg: str):
+        self.errors.append(TypeCheckError(pos or self._statement_pos, msg))
+
+    def _check_block(self, program: Program, scope: _Scope = None):
+        self._scopes.append(scope or _Scope(program))
+        program.accept(self)
+        self._scopes.pop()
+
+    def _lookup(self, namespace: str, name: str):
+        """Variable type, function, struct attributes or variant options of name, None when not known"""
+        for idx in range(len(self._scopes) - 1, -1, -1):
+            if name in getattr(self._scopes[idx], namespace):
+                if self._declared_between_function_and_(idx, name):
+                    return None
+                return getattr(self._scopes[idx], namespace)[name]
+        if self._declared_between_function_and_(-1, name):
+            return None
+        return self._lookup_in_interpreter_scopes(namespace, name)
+
+    def _declared_between_function_and_(self, idx: int, name: str):
+        return any(name in scope.declared for scope in self._scopes[idx + 1 : self._function_scope])
+
+    def _lookup_in_interpreter_scopes(self, namespace: str, name: str):
+        frame = self.scopes.curr_scope
+        while frame is not None:
+            if name in getattr(frame, namespace):
+                found = getattr(frame, namespace)[name]
+                if namespace == "variables":
+                    return found.type
+                if namespace == "structs":
+                    return found.attributes
+                return found
+            frame = frame.parent
+        return None
+
+    def _kind_of(self, type_: str):
+        if type_ is None:
+            return None
+        if type_ in BUILT_IN_TYPE_NAMES:
+            return BUILT_IN_KIND
+        if self._lookup("variants", type_) is not None:
+            return VARIANT_KIND
+        if self._lookup("structs", type_) is not None:
+            return STRUCT_KIND
+        return None
+
+    def _check_type_name(self, type_: str, pos) -> bool:
+        """Whether type is known. Type not declared anywhere is an error"""
+        if self._kind_of(type_) is not None:
+            return True
+        if not any(type_ in scope.declared for scope in self._scopes):
+            self._error(pos, f"Type '{type_}' not found")
+        return False
+
+    def _conversion(self, source: str, target: str, pos) -> str:
+        """Conversion of value of source type to target type. Reports conversions that always fail"""
+        source_kind, target_kind = self._kind_of(source), self._kind_of(target)
+        if source_kind is None or target_kind is None or source_kind == VARIANT_KIND:
+            return CONVERT
+        if source == target and target_kind != VARIANT_KIND:
+            return KEEP
+        if source in CONVERTIBLE_TYPE_NAMES and target in CONVERTIBLE_TYPE_NAMES:
+            return BUILT_IN
+        if target_kind == VARIANT_KIND:
+            self._check_conversion_to_variant(source, source_kind, target, pos)
+        elif source_kind == STRUCT_KIND and target_kind == STRUCT_KIND:
+            self._error(pos, f"Can not convert struct type '{source}' to struct type '{target}'")
+        elif source_kind == STRUCT_KIND and target in CONVERTIBLE_TYPE_NAMES:
+            self._error(pos, f"Can not convert struct type '{source}' to builtin type '{target}'")
+        elif source in CONVERTIBLE_TYPE_NAMES and target_kind == STRUCT_KIND:
+            self._error(pos, f"Can not convert built in type '{source}' into struct type '{target}'")
+        return CONVERT
+
+    def _check_conversion_to_variant(self, source: str, source_kind: str, target: str, pos):
+        named_types = self._lookup("variants", target)
+        if any(named_type.type == source for named_type in named_types):
+            return
+        if source_kind == STRUCT_KIND:
+            self._error(
+                pos,
+                f"No matching struct variant option while converting from struct '{source}' to variant type '{target}'",
+            )
+        elif source in CONVERTIBLE_TYPE_NAMES and not any(
+            named_type.type in BUILT_IN_TYPE_NAMES for named_type in named_types
+        ):
+            self._error(
+                pos,
+                f"There is no built in type in named types of variant '{target}' so can not convert built in of type '{source}'",
+            )
+
+    def _attribute_type(self, type_: str, attr_name: str, pos):
+        kind = self._kind_of(type_)
+        if kind == STRUCT_KIND:
+            for attribute in self._lookup("structs", type_):
+                if attribute.name == attr_name:
+                    return attribute.type
+            self._error(pos, f"Attribute '{attr_name}' not found in type '{type_}'")
+        elif kind == BUILT_IN_KIND:
+            self._error(pos, f"Value of builtin type '{type_}' has no attribute '{attr_name}'")
+        return None
+
+    def _check_operand(self, operator: str, type_: str, pos):
+        if self._kind_of(type_) == STRUCT_KIND:
+            self._error(pos, f"Operator '{operator}' is not supported for struct type '{type_}'")
+
+    def visit_program(self, program: Program):
+        for statement in program.children:
+            self._statement_pos = statement.pos or self._statement_pos
+            statement.accept(self)
+
+    def visit_assignment(self, assignment: AssignmentStatement):
+        name_chain = assignment.obj_access.name_chain
+        pos = assignment.pos
+        target = self._lookup("variables", name_chain[0])
+        for attr_name in name_chain[1:]:
+            target = self._attribute_type(target, attr_name, pos)
+        source = assignment.expr.accept(self)
+        if self._kind_of(target) is not None:
+            self.annotations.conversions[assignment] = self._conversion(source, target, pos)
+
+    def visit_if(self, if_stmt: IfStatement):
+        if_stmt.cond.accept(self)
+        self._check_block(if_stmt.prog)
+        if if_stmt.else_prog:
+            self._check_block(if_stmt.else_prog)
+
+    def visit_while(self, while_stmt: WhileStatement):
+        while_stmt.cond.accept(self)
+        self._check_block(while_stmt.prog)
+
+    def visit_return(self, return_stmt: ReturnStatement):
+        if return_stmt.expr is None:
+            return
+        source = return_stmt.expr.accept(self)
+        if self._function_types and self._kind_of(self._function_types[-1]) is not None:
+            self._conversion(source, self._function_types[-1], return_stmt.pos)
+
+    def visit_case_section(self, case_section: CaseSection):
+        """Case variable has type of variant option, visit_visit passes it in current scope"""
+        case_section.program.accept(self)
+
+    def visit_func_call(self, func_call: FunctionCall):
+        arg_types = [arg.accept(self) for arg in func_call.args]
+        func_def = self._lookup("functions", func_call.name)
+        if func_def is None:
+            return None
+        for param, arg_type in zip(func_def.params, arg_types):
+            if self._kind_of(param.type) is not None:
+                self._conversion(arg_type, param.type, func_call.pos)
+        return func_def.type if func_def.type != "null_type" else None
+
+    def visit_obj_access(self, obj_access: ObjectAccess):
+        obj_name = obj_access.name_chain[0]
+        if isinstance(obj_name, FunctionCall):
+            type_ = obj_name.accept(self)
+        else:
+            type_ = self._lookup("variables", obj_name)
+        for attr_name in obj_access.name_chain[1:]:
+            type_ = self._attribute_type(type_, attr_name, obj_access.pos)
+        return type_
+
+    def visit_var_dec(self, var_dec: VariableDeclaration):
+        """Variable is declared before its default value is evaluated"""
+        self._scopes[-1].variables[var_dec.name] = var_dec.type
+        known = self._check_type_name(var_dec.type, var_dec.pos)
+        if var_dec.default_value is None:
+            source = None
+        else:
+            source = var_dec.default_value.accept(self)
+        if known:
+            self.annotations.conversions[var_dec] = self._conversion(source, var_dec.type, var_dec.pos)
+
+    def visit_struct_def(self, struct_def: StructDef):
+        """Default values of attributes are evaluated where struct variable is declared"""
+        self._scopes[-1].structs[struct_def.name] = struct_def.attributes
+
+    def visit_variant_def(self, variant_def: VariantDef):
+        self._scopes[-1].variants[variant_def.name] = variant_def.named_types
+
+    def visit_named_type(self, named_type: NamedType):
+        pass
+
+    def visit_visit(self, visit_statement: VisitStatement):
+        type_ = visit_statement.obj.accept(self)
+        kind = self._kind_of(type_)
+        named_types = []
+        if kind == VARIANT_KIND:
+            named_types = self._lookup("variants", type_)
+            self.annotations.checked[visit_statement] = all(
+                self._kind_of(named_type.type) == STRUCT_KIND for named_type in named_types
+            )
+        elif kind is not None:
+            self._error(visit_statement.pos, "There is no variant type in visit")
+        options = {named_type.name: named_type.type for named_type in named_types}
+        for case_section in visit_statement.case_sections:
+            scope = _Scope(case_section.program, [case_section.type])
+            if case_section.type in options:
+                scope.variables[case_section.type] = options[case_section.type]
+            self._scopes.append(scope)
+            case_section.accept(self)
+            self._scopes.pop()
+
+    def visit_param(self, param: Param):
+        self._check_type_name(param.type, param.pos)
+        self._scopes[-1].variables[param.name] = param.type
+
+    def visit_func_def(self, func_def: FuncDef):
+        self._check_type_name(func_def.type, func_def.pos)
+        self._scopes[-1].functions[func_def.name] = func_def
+        outer_function_scope = self._function_scope
+        self._scopes.append(_Scope(func_def.prog, [param.name for param in func_def.params]))
+        self._function_scope = len(self._scopes) - 1
+        self._function_types.append(func_def.type)
+        for param in func_def.params:
+            param.accept(self)
+        func_def.prog.accept(self)
+        self._function_types.pop()
+        self._scopes.pop()
+        self._function_scope = outer_function_scope
+
+    def visit_or(self, or_expr: OrExpr):
+        """'|' gives no value when none of its operands is true"""
+        for child in or_expr.children:
+            child.accept(self)
+        return None
+
+    def visit_and(self, and_expr: AndExpr):
+        for child in and_expr.children:
+            child.accept(self)
+        return "int"
+
+    def visit_rel(self, rel_expr: RelationExpr):
+        for operand in (rel_expr.left, rel_expr.right):
+            self._check_operand(rel_expr.operator, operand.accept(self), rel_expr.pos)
+        return "int"
+
+    def _chain_type(self, expr: AddExpr | MultiExpr):
+        """Result of builtin operands has type of left operand, variant operand is known at runtime"""
+        result = expr.children[0].accept(self)
+        self._check_operand(expr.operations[0], result, expr.pos)
+        for operator, child in zip(expr.operations, expr.children[1:]):
+            right = child.accept(self)
+            self._check_operand(operator, right, expr.pos)
+            if self._kind_of(result) != BUILT_IN_KIND:
+                result = None
+        return result
+
+    def visit_add(self, add_expr: AddExpr):
+        return self._chain_type(add_expr)
+
+    def visit_multi(self, multi_expr: MultiExpr):
+        return self._chain_type(multi_expr)
+
+    def visit_unary(self, unary_expr: UnaryExpr):
+        type_ = unary_expr.negated.accept(self)
+        self._check_operand("-", type_, unary_expr.pos)
+        if type_ == "str":
+            self._error(unary_expr.pos, "Operator '-' is not supported for type 'str'")
+        return type_ if type_ in ("int", "float") else None
+
+    def visit_null_literal(self, null_literal: NullLiteral):
+        return None
+
+    def visit_int_literal(self, int_literal: IntLiteral):
+        return "int"
+
+    def visit_float_literal(self, float_literal: FloatLiteral):
+        return "float"
+
+    def visit_str_literal(self, str_literal: StrLiteral):
+        return "str"
@@ -0,0 +1,292 @@
+"""Stack based virtual machine running bytecode of BytecodeCompiler"""
+
+from typing import List
+
+from lexer.source_position import PositionedError
+from parser.AST import ASTNode, FuncDef, Program
+from interpreter.bytecode import BytecodeCompiler, BytecodeProgram, CodeObject
+from interpreter.fast_ops import (
+    fast_add_with_limit,
+    fast_sub,
+    fast_mul,
+    fast_div,
+    fast_eq,
+    fast_ieq,
+    fast_lt,
+    fast_gt,
+    fast_lteq,
+    fast_gteq,
+)
+from interpreter.interpreter import Interpreter
+from interpreter.interpreter_errors import InterpreterError
+from interpreter.interpreter_types import BuiltInValue, share
+from interpreter.scopes import Frame
+from interpreter.opcodes import *
+
+
+class _CallFrame:
+    """Caller of function whose body is being run"""
+
+    __slots__ = ("code", "ip", "func_def", "curr_scope", "pos")
+
+    def __init__(self, code: CodeObject, ip: int, func_def: FuncDef, curr_scope: Frame, pos):
+        self.code = code
+        self.ip = ip
+        self.func_def = func_def
+        self.curr_scope = curr_scope
+        self.pos = pos
+
+
+class VirtualMachine:
+    """Runs code objects on state of interpreter - its scopes and recursion counter.
+    Calls of compiled functions push explicit frames instead of recursing in Python,
+    so depth of recursion is limited only by _max_recursion_depth of interpreter"""
+
+    def __init__(self, interpreter: Interpreter):
+        self.interpreter = interpreter
+        self.scopes = interpreter.scopes
+
+    def _binary_operators(self):
+        """(fast path, operator of interpreter) for each of OPERATORS"""
+        interpreter = self.interpreter
+        return (
+            (fast_add_with_limit(interpreter.number_limit), interpreter.add),
+            (fast_sub, interpreter.sub),
+            (fast_mul, interpreter.mul),
+            (fast_div, interpreter.div),
+            (fast_eq, interpreter.eq),
+            (fast_ieq, interpreter.ieq),
+            (fast_lt, interpreter.lt),
+            (fast_gt, interpreter.gt),
+            (fast_lteq, interpreter.lteq),
+            (fast_gteq, interpreter.gteq),
+        )
+
+    def _enter_function(self, func_def: FuncDef, func_scope: Frame, args: list, pos):
+        """Opens scope of function with its params, like Interpreter.visit_func_call"""
+        interpreter = self.interpreter
+        scopes = self.scopes
+        scopes.curr_scope = func_scope
+        scopes.push_scope()
+        for param, arg in zip(func_def.params, args):
+            scopes.add_variable(
+                param.name, param.type, param.is_mutable, interpreter._convert_to_(param.type, arg, pos), pos
+            )
+        interpreter.curr_recursion += 1
+        if interpreter.curr_recursion > interpreter._max_recursion_depth:
+            raise InterpreterError(pos, "Maximal recursion depth reached!")
+
+    def _leave_function(self, func_def: FuncDef, rv, curr_scope: Frame, pos):
+        """Closes scope of function and returns its converted return value"""
+        interpreter = self.interpreter
+        rv = interpreter._convert_to_(func_def.type, rv, pos)
+        interpreter.curr_recursion -= 1
+        self.scopes.pop_scope(pos)
+        self.scopes.curr_scope = curr_scope
+        return rv
+
+    def run(self, code_object: CodeObject):
+        """Runs code object and returns its value. Errors are located with line index
+        of the function body they are raised in"""
+        interpreter = self.interpreter
+        scopes = self.scopes
+        binary_operators = self._binary_operators()
+        frames: List[_CallFrame] = []
+        stack = []
+        code = code_object.code
+        consts = code_object.consts
+        names = code_object.names
+        positions = code_object.positions
+        ip = 0
+
+        try:
+            while True:
+                op = code[ip]
+                arg = code[ip + 1]
+                pos = positions[ip >> 1]
+                ip += 2
+
+                if op == LOAD_NAME:
+                    name, address = consts[arg]
+                    value = scopes.get_variable_at(address, name, pos).value
+                    if value is None:
+                        raise InterpreterError(pos, f"Variable '{name}' has no value")
+                    stack.append(share(value))
+                elif op == LOAD_LITERAL:
+                    stack.append(consts[arg])
+                elif op == BINARY_OP:
+                    right = stack.pop()
+                    left = stack[-1]
+                    fast_op, slow_op = binary_operators[arg]
+                    if type(left) is BuiltInValue and type(right) is BuiltInValue:
+                        result = fast_op(left.value, right.value, pos)
+                        if result is not None:
+                            stack[-1] = result
+                            continue
+                    stack[-1] = slow_op(left, right, pos)
+                elif op == POP_JUMP_IF_FALSE:
+                    if not stack.pop().bool():
+                        ip = arg
+                elif op == LOAD_VARIABLE:
+                    name, address = consts[arg]
+                    stack.append(scopes.get_variable_at(address, name, pos))
+                elif op == STORE_NAME:
+                    value = stack.pop()
+                    variable = stack.pop()
+                    name, address, conversion = consts[arg]
+                    convert = interpreter._converter_for_(conversion)
+                    scopes.set_at(address, name, convert(variable.type, value, pos), pos)
+                elif op == JUMP:
+                    ip = arg
+                elif op == PUSH_SCOPE:
+                    scopes.push_scope()
+                elif op == POP_SCOPE:
+                    scopes.pop_scope(pos)
+                elif op == CALL_FUNCTION:
+                    name, argc = consts[arg]
+                    args = stack[len(stack) - argc :]
+                    del stack[len(stack) - argc :]
+                    curr_scope = scopes.curr_scope
+                    func_def, func_scope = scopes.get_function_definition_and_its_scope(name, pos)
+                    self._enter_function(func_def, func_scope, args, pos)
+                    if type(func_def.prog) is BytecodeProgram:
+                        frames.append(_CallFrame(code_object, ip, func_def, curr_scope, pos))
+                        code_object = func_def.prog.code
+                        code = code_object.code
+                        consts = code_object.consts
+                        names = code_object.names
+                        positions = code_object.positions
+                        ip = 0
+                    else:
+                        rv = func_def.prog.accept(interpreter)
+                        stack.append(self._leave_function(func_def, rv, curr_scope, pos))
+                elif op == RETURN_IF_VALUE:
+                    if stack[-1] is None:
+                        stack.pop()
+                    else:
+                        for _ in range(arg):
+                            scopes.pop_scope(pos)
+                        ip = code_object.return_offset
+                elif op == RETURN_VALUE:
+                    rv = stack.pop()
+                    if not frames:
+                        return rv
+                    frame = frames.pop()
+                    code_object = frame.code
+                    code = code_object.code
+                    consts = code_object.consts
+                    names = code_object.names
+                    positions = code_object.positions
+                    ip = frame.ip
+                    stack.append(self._leave_function(frame.func_def, rv, frame.curr_scope, frame.pos))
+                elif op == LOAD_NONE:
+                    stack.append(None)
+                elif op == LOAD_VARIABLE_VALUE:
+                    name, address = consts[arg]
+                    stack.append(scopes.get_variable_at(address, name, pos).value)
+                elif op == CHECK_HAS_VALUE:
+                    if stack[-1] is None:
+                        raise InterpreterError(pos, f"Variable '{consts[arg]}' has no value")
+                elif op == GET_ATTR:
+                    attr_name, name_chain = consts[arg]
+                    value = stack[-1][attr_name]
+                    if value is None:
+                        raise InterpreterError(pos, f"Variable '{".".join(map(str, name_chain))}' has no value")
+                    stack[-1] = value
+                elif op == SHARE_VALUE:
+                    stack[-1] = share(stack[-1])
+                elif op == UNARY_MINUS:
+                    value = stack[-1]
+                    if type(value) is BuiltInValue:
+                        raw_type = type(value.value)
+                        if raw_type is int:
+                            stack[-1] = BuiltInValue("int", value.value * -1)
+                            continue
+                        if raw_type is float:
+                            stack[-1] = BuiltInValue("float", value.value * -1)
+                            continue
+                    stack[-1] = interpreter.minus(value, pos)
+                elif op == POP_JUMP_IF_TRUE:
+                    if stack.pop().bool():
+                        ip = arg
+                elif op == TEST_VALUE:
+                    stack.pop().bool()
+                elif op == POP:
+                    stack.pop()
+                elif op == GET_INNER_VARIABLE:
+                    stack[-1] = interpreter.get_inner_variable(stack[-1], names[arg], pos)
+                elif op == STORE_VARIABLE_VALUE:
+                    value = stack.pop()
+                    variable = stack.pop()
+                    variable.value = interpreter._converter_for_(consts[arg][0])(variable.type, value, pos)
+                elif op == DECLARE_VARIABLE:
+                    name, type_, is_mutable, _, conversion = consts[arg]
+                    if conversion is None:
+                        scopes.validate_type_name(type_, pos)
+                    scopes.reserve_place_for_(name, type_, is_mutable, pos)
+                elif op == LOAD_DEFAULT_VALUE:
+                    stack.append(interpreter._get_default_value_for_(consts[arg][1], 0, pos))
+                elif op == INIT_VARIABLE:
+                    name, type_, _, address, conversion = consts[arg]
+                    if default_value := stack.pop():
+                        convert = interpreter._converter_for_(conversion)
+                        scopes.set_at(address, name, convert(type_, default_value, pos), pos)
+                elif op == VISIT_VARIANT:
+                    if not scopes.is_variant_type_(stack[-1].type):
+                        raise InterpreterError(pos, "There is no variant type in visit")
+                elif op == ENTER_CASE:
+                    type_, next_case = consts[arg]
+                    variant_value = stack[-1]
+                    if type_ == variant_value.name:
+                        stack.pop()
+                        scopes.push_scope()
+                        scopes.add_variable(variant_value.name, variant_value.type, False, variant_value.value, pos)
+                    else:
+                        ip = next_case
+                elif op == DEFINE_FUNCTION:
+                    scopes.add_function(consts[arg])
+                elif op == DEFINE_STRUCT:
+                    Interpreter.visit_struct_def(interpreter, consts[arg])
+                elif op == DEFINE_VARIANT:
+                    Interpreter.visit_variant_def(interpreter, consts[arg])
+                elif op == EVAL_NODE:
+                    stack.append(consts[arg].accept(interpreter))
+                else:
+                    raise ValueError(f"Unknown opcode {op} at offset {ip - 2} of {code_object.name}")
+        except PositionedError as error:
+            error.locate(code_object.line_index)
+            raise
+
+
+class VMInterpreter(Interpreter):
+    """Interpreter that compiles visited node into bytecode and runs it on VirtualMachine.
+    Keeps the same state (scopes, recursion counter) and semantics as tree-walking Interpreter"""
+
+    def _run_compiled(self, node: ASTNode):
+        return VirtualMachine(self).run(BytecodeCompiler(self.annotations).compile(node))
+
+    def visit_program(self, program: Program):
+        self._resolve(program)
+        return self._run_compiled(program)
+
+    visit_assignment = _run_compiled
+    visit_if = _run_compiled
+    visit_while = _run_compiled
+    visit_return = _run_compiled
+    visit_visit = _run_compiled
+    visit_func_call = _run_compiled
+    visit_obj_access = _run_compiled
+    visit_var_dec = _run_compiled
+    visit_struct_def = _run_compiled
+    visit_variant_def = _run_compiled
+    visit_func_def = _run_compiled
+    visit_or = _run_compiled
+    visit_and = _run_compiled
+    visit_rel = _run_compiled
+    visit_add = _run_compiled
+    visit_multi = _run_compiled
+    visit_unary = _run_compiled
+    visit_null_literal = _run_compiled
+    visit_int_literal = _run_compiled
+    visit_float_literal = _run_compiled
+    visit_str_literal = _run_compiled
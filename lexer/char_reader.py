@@ -1,5 +1,7 @@
+import mmap
 from abc import ABC, abstractmethod
-from io import TextIOBase
+from io import TextIOBase, BufferedIOBase
+from lexer.source_position import LineIndex, LazyLineIndex
 
 class CharReader(ABC):
     """
@@ -7,10 +9,10 @@ class CharReader(ABC):
     while tracking position of the current character
     """
 
-    def __init__(self):
+    def __init__(self, line_index: LineIndex = None):
         self._char: str
-        self._row: int = 1
-        self._col: int = 1
+        self._offset: int = 0
+        self._line_index = line_index if line_index is not None else LineIndex()
 
     def next_char(self):
         """Advances to next char in source"""
@@ -19,8 +21,16 @@ class CharReader(ABC):
 
 
     def get_position(self):
-        """Returns position of current char in source"""
-        return self._row+0, self._col+0
+        """Returns (row, column) of current char in source, computed from its offset"""
+        return self._line_index.get_row_and_col(self._offset)
+
+    def get_offset(self):
+        """Returns offset of current char from the start of source"""
+        return self._offset
+
+    def get_line_index(self):
+        """Returns table of line starts that translates offsets into rows and columns"""
+        return self._line_index
     
     def get_curr_char(self):
         """Returns current char"""
@@ -33,17 +43,23 @@ class CharReader(ABC):
     def _update_position(self):
         if self._char == '':
             return
+        self._offset += 1
         if self._char == '\n':
-            self._col = 1
-            self._row += 1
-        else:
-            self._col += 1
+            self._line_index.add_line_start(self._offset)
 
     def get_next_char(self):
         """Advances one char and returns it"""
         self.next_char()
         return self._char
 
+    def read_rest(self):
+        """Returns rest of the source starting from current char and advances to its end"""
+        chars = []
+        while self._char != '':
+            chars.append(self._char)
+            self.next_char()
+        return "".join(chars)
+
 
 class TextIOReader(CharReader):
     """CharReader that works with any TextIOBase"""
@@ -55,3 +71,141 @@ class TextIOReader(CharReader):
 
     def _next_char(self):
         self._char = self.text_io.read(1)
+
+    def read_rest(self):
+        """Returns rest of the source starting from current char and advances to its end"""
+        rest = self._char + self.text_io.read()
+        self._line_index.feed(rest, self._offset)
+        self._offset += len(rest)
+        self._char = ''
+        return rest
+
+
+class BufferedCharReader(CharReader):
+    """CharReader that reads TextIOBase in large chunks
+    and moves through the buffered chunk by index"""
+
+    DEFAULT_CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, text_io: TextIOBase, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        super().__init__()
+        if chunk_size < 1:
+            raise ValueError("Chunk size has to be a positive integer")
+        self.text_io = text_io
+        self.chunk_size = chunk_size
+        self._buffer = ""
+        self._buffer_len = 0
+        self._idx = -1
+        self._next_char()
+
+    def next_char(self):
+        """Advances to next char in source"""
+        if self._char == '':
+            return
+        self._offset += 1
+        idx = self._idx + 1
+        if idx < self._buffer_len:
+            self._idx = idx
+            self._char = self._buffer[idx]
+            return
+        self._fill_buffer()
+
+    def get_next_char(self):
+        """Advances one char and returns it"""
+        self.next_char()
+        return self._char
+
+    def _next_char(self):
+        idx = self._idx + 1
+        if idx < self._buffer_len:
+            self._idx = idx
+            self._char = self._buffer[idx]
+            return
+        self._fill_buffer()
+
+    def read_rest(self):
+        """Returns rest of the source starting from current char and advances to its end"""
+        if self._char == '':
+            return ''
+        buffered = self._buffer[self._idx:]
+        unbuffered = self.text_io.read()
+        self._line_index.feed(unbuffered, self._offset + len(buffered))
+        self._offset += len(buffered) + len(unbuffered)
+        self._buffer = ""
+        self._buffer_len = 0
+        self._idx = -1
+        self._char = ''
+        return buffered + unbuffered
+
+    def _fill_buffer(self):
+        self._buffer = self.text_io.read(self.chunk_size)
+        self._buffer_len = len(self._buffer)
+        self._line_index.feed(self._buffer, self._offset)
+        self._idx = 0
+        self._char = self._buffer[0] if self._buffer_len else ''
+
+
+class MmapCharReader(CharReader):
+    """CharReader that memory-maps binary source file and decodes ASCII chars lazily"""
+
+    def __init__(self, binary_io: BufferedIOBase):
+        self._mmap = None
+        self._data = b""
+        if binary_io.seek(0, 2) > 0:
+            self._mmap = mmap.mmap(binary_io.fileno(), 0, access=mmap.ACCESS_READ)
+            self._data = self._mmap
+        super().__init__(LazyLineIndex(self._data))
+        self._size = len(self._data)
+        self._idx = -1
+        self._next_char()
+
+    def next_char(self):
+        """Advances to next char in source"""
+        if self._char == '':
+            return
+        self._offset += 1
+        self._next_char()
+
+    def get_next_char(self):
+        """Advances one char and returns it"""
+        self.next_char()
+        return self._char
+
+    def _next_char(self):
+        idx = self._idx + 1
+        if idx >= self._size:
+            self._idx = self._size
+            self._char = ''
+            return
+        self._idx = idx
+        byte = self._data[idx]
+        if byte > 127:
+            raise UnicodeDecodeError(
+                "ascii", bytes([byte]), idx, idx + 1, "ordinal not in range(128)"
+            )
+        self._char = chr(byte)
+
+    def read_rest(self):
+        """Returns rest of the source starting from current char and advances to its end"""
+        if self._char == '':
+            return ''
+        rest = self._data[self._idx:].decode("ascii")
+        self._offset += len(rest)
+        self._idx = self._size
+        self._char = ''
+        return rest
+
+    def close(self):
+        """Releases memory map. Positions already returned by reader stay valid"""
+        if self._mmap is not None:
+            self._line_index.detach()
+            self._mmap.close()
+            self._mmap = None
+            self._data = b""
+            self._size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,12 +1,13 @@
 """Lexer class"""
 
 import string
-from typing import List, Tuple
+from typing import List
 
 from lexer.token_type import TokenType
 from lexer.keywords import KEYWORDS_STRS, KEYWORDS_TO_TOKEN_TYPE
 from lexer.char_reader import CharReader
 from lexer.my_token import Token, PositionType
+from lexer.source_position import PositionedError, located_errors
 from lexer.my_token_exceptions import (
     StringLiteralNotEnded,
     EscapingWrongChar,
@@ -37,6 +38,7 @@ class Lexer:
 
     def __init__(self, reader: CharReader) -> None:
         self.reader = reader
+        self._line_index = reader.get_line_index()
 
         self.curr_token = None
         # pylint: disable=C0103:invalid-name
@@ -46,9 +48,26 @@ class Lexer:
 
     def get_next_token(self):
         """Returns next my_token from reader"""
-        self._next_token()
+        try:
+            self._next_token()
+        except PositionedError as error:
+            error.locate(self.get_line_index())
+            raise
         return self.curr_token
 
+    def iter_tokens(self):
+        """Yields tokens one by one. EOT token is the last one"""
+        with located_errors(self.get_line_index()):
+            while True:
+                self._next_token()
+                yield self.curr_token
+                if self.curr_token.get_type() == TokenType.EOT:
+                    return
+
+    def get_line_index(self):
+        """Returns table of line starts that gives row and column of offset positions of tokens"""
+        return self.reader.get_line_index()
+
     def _next_token(self):
         if self._EOT_token_in_place:
             return
@@ -57,7 +76,7 @@ class Lexer:
 
         if self._is_end_of_file():
             self.curr_token = Token(
-                TokenType.EOT, position=self.reader.get_position()
+                TokenType.EOT, position=self.reader.get_offset(), line_index=self._line_index
             )
             return
 
@@ -65,7 +84,7 @@ class Lexer:
 
     def _parse_token(self):
         char = self.reader.get_curr_char()
-        pos = self.reader.get_position()
+        pos = self.reader.get_offset()
         match char:
             case Lexer.STRING_LITERAL_DELIMITER:
                 self._parse_string_literal(pos)
@@ -79,40 +98,40 @@ class Lexer:
                 self._parse_comment(pos)
             case ",":
                 self.reader.next_char()
-                self.curr_token = Token(TokenType.COMMA, position=pos)
+                self.curr_token = Token(TokenType.COMMA, position=pos, line_index=self._line_index)
             case "(":
                 self.reader.next_char()
-                self.curr_token = Token(TokenType.LEFT_BRACKET, position=pos)
+                self.curr_token = Token(TokenType.LEFT_BRACKET, position=pos, line_index=self._line_index)
             case ")":
                 self.reader.next_char()
-                self.curr_token = Token(TokenType.RIGHT_BRACKET, position=pos)
+                self.curr_token = Token(TokenType.RIGHT_BRACKET, position=pos, line_index=self._line_index)
             case ";":
                 self.reader.next_char()
-                self.curr_token = Token(TokenType.SEMICOLON, position=pos)
+                self.curr_token = Token(TokenType.SEMICOLON, position=pos, line_index=self._line_index)
             case ":":
                 self.reader.next_char()
-                self.curr_token = Token(TokenType.COLON, position=pos)
+                self.curr_token = Token(TokenType.COLON, position=pos, line_index=self._line_index)
             case ".":
                 self.reader.next_char()
-                self.curr_token = Token(TokenType.DOT, position=pos)
+                self.curr_token = Token(TokenType.DOT, position=pos, line_index=self._line_index)
             case "&":
                 self.reader.next_char()
-                self.curr_token = Token(TokenType.AND, position=pos)
+                self.curr_token = Token(TokenType.AND, position=pos, line_index=self._line_index)
             case "|":
                 self.reader.next_char()
-                self.curr_token = Token(TokenType.OR, position=pos)
+                self.curr_token = Token(TokenType.OR, position=pos, line_index=self._line_index)
             case "+":
                 self.reader.next_char()
-                self.curr_token = Token(TokenType.PLUS, position=pos)
+                self.curr_token = Token(TokenType.PLUS, position=pos, line_index=self._line_index)
             case "-":
                 self.reader.next_char()
-                self.curr_token = Token(TokenType.MINUS, position=pos)
+                self.curr_token = Token(TokenType.MINUS, position=pos, line_index=self._line_index)
             case "*":
                 self.reader.next_char()
-                self.curr_token = Token(TokenType.TIMES, position=pos)
+                self.curr_token = Token(TokenType.TIMES, position=pos, line_index=self._line_index)
             case "/":
                 self.reader.next_char()
-                self.curr_token = Token(TokenType.DIVIDE, position=pos)
+                self.curr_token = Token(TokenType.DIVIDE, position=pos, line_index=self._line_index)
             case "<":
                 self._try_parse_two_char_operator(
                     TokenType.LESS, TokenType.LESS_EQUAL, position=pos
@@ -130,33 +149,33 @@ class Lexer:
                 if char != "=":
                     raise ExclamationMarkError(position=pos)
                 self.reader.next_char()
-                self.curr_token = Token(TokenType.INEQUAL, position=pos)
+                self.curr_token = Token(TokenType.INEQUAL, position=pos, line_index=self._line_index)
             case '"':
                 raise UseOfQuotationMarksIsInvalid(position=pos)
             case _:
                 raise UnrecognisedStartOfToken(position=pos)
 
     def _try_parse_two_char_operator(
-        self, if_one_char: TokenType, if_two_chars: TokenType, position: Tuple[int, int]
+        self, if_one_char: TokenType, if_two_chars: TokenType, position: PositionType
     ):
         char = self.reader.get_next_char()
         if char == "=":
             self.reader.next_char()
-            self.curr_token = Token(if_two_chars, position=position)
+            self.curr_token = Token(if_two_chars, position=position, line_index=self._line_index)
             return
-        self.curr_token = Token(if_one_char, position=position)
+        self.curr_token = Token(if_one_char, position=position, line_index=self._line_index)
 
     def _parse_string_literal(self, position: PositionType):
         char = self.reader.get_next_char()
         if char == '' or char == "\n":
-            raise StringLiteralNotEnded(self.reader.get_position())
+            raise StringLiteralNotEnded(self.reader.get_offset())
 
 
         
         
         string_literal_value = self._parse_str_literal_value()
 
-        self.curr_token = Token(TokenType.STR_LITERAL, string_literal_value, position)
+        self.curr_token = Token(TokenType.STR_LITERAL, string_literal_value, position, self._line_index)
 
     def _parse_str_literal_value(self):
         string_literal_value: List[str] = []
@@ -169,7 +188,7 @@ class Lexer:
                 string_literal_value.append(char)
             char = self.reader.get_next_char()
             if char == '' or char == "\n":
-                raise StringLiteralNotEnded(self.reader.get_position())
+                raise StringLiteralNotEnded(self.reader.get_offset())
             is_escaped = char == Lexer.STRING_ESCAPE
         self.reader.next_char()
         return "".join(string_literal_value)
@@ -185,9 +204,9 @@ class Lexer:
             case Lexer.STRING_LITERAL_DELIMITER:
                 string_literal_buffer.append(Lexer.STRING_LITERAL_DELIMITER)
             case "":
-                raise EscapingEOT(self.reader.get_position())
+                raise EscapingEOT(self.reader.get_offset())
             case _:
-                raise EscapingWrongChar(self.reader.get_position())
+                raise EscapingWrongChar(self.reader.get_offset())
         
 
     def _parse_keyword_or_identifier(self, position: PositionType):
@@ -200,7 +219,7 @@ class Lexer:
         buffer: List[str] = []
         buffer.append(self.reader.get_curr_char())
         value = self._parse_identifier_body(buffer, position)
-        self.curr_token = Token(TokenType.IDENTIFIER, value, position)
+        self.curr_token = Token(TokenType.IDENTIFIER, value, position, self._line_index)
 
 
     def _parse_identifier_body(self, buffer : List[str], pos : PositionType):
@@ -232,7 +251,7 @@ class Lexer:
         char_counter = 1
         value, char_counter = self._try_build_int_part(first_digit_value, char_counter, position)
         if self.reader.get_curr_char() != ".":
-            self.curr_token = Token(TokenType.INT_LITERAL, value, position)
+            self.curr_token = Token(TokenType.INT_LITERAL, value, position, self._line_index)
             return
         char = self.reader.get_next_char()
         if char == '' or not char in string.digits:
@@ -240,7 +259,7 @@ class Lexer:
         int_part_len = char_counter + 0
         value, char_counter = self._try_build_float(value, char_counter, position)
         self.curr_token = Token(
-            TokenType.FLOAT_LITERAL, value / (10**(char_counter - int_part_len)), position
+            TokenType.FLOAT_LITERAL, value / (10**(char_counter - int_part_len)), position, self._line_index
         )
 
     def _check_for_preciding_zeros(self, first_digit_value, pos):
@@ -270,7 +289,7 @@ class Lexer:
 
 
 
-    def _parse_comment(self, position: Tuple[int, int]):
+    def _parse_comment(self, position: PositionType):
         self.reader.next_char()
         comment_value: List[str] = []
 
@@ -282,7 +301,7 @@ class Lexer:
 
         comment_value = "".join(comment_value)
 
-        self.curr_token = Token(TokenType.COMMENT, comment_value, position)
+        self.curr_token = Token(TokenType.COMMENT, comment_value, position, self._line_index)
 
     def _is_end_of_file(self):
         return self.reader.get_curr_char() == ''
@@ -1,13 +1,14 @@
 """."""
 
 from typing import Tuple
-from copy import copy
 from lexer.token_type import TokenType
+from lexer.source_position import LineIndex
 
 
 RowType = int
 ColumnType = int
-PositionType = Tuple[RowType, ColumnType]
+OffsetType = int
+PositionType = Tuple[RowType, ColumnType] | OffsetType
 
 tokentypes_should_none_value = set(TokenType.__members__.values())
 
@@ -23,24 +24,35 @@ class ValueShouldBeNoneError(Exception):
 
 
 class Token:
-    """Token has type, optional value and position in source"""
+    """Token has type, optional value and position in source.
+    Type, value and position are immutable, so accessors return them without copying.
+    Lexer gives offset position with line index of source, so row and column
+    are computed only when get_pos needs them"""
+
+    __slots__ = ("__type", "__value", "__pos", "__line_index")
 
     def __init__(
-        self, token_type: TokenType, token_value=None, position: PositionType = None
+        self,
+        token_type: TokenType,
+        token_value=None,
+        position: PositionType = None,
+        line_index: LineIndex = None,
     ) -> None:
-        self.__type = None
-        self.__value = None
-        self.__pos = None
-        self.set_token_attrs(token_type, token_value, position)
+        self.__type = token_type
+        self.__value = token_value
+        self.__pos = position
+        self.__line_index = line_index
+        if token_value is not None and token_type in tokentypes_should_none_value:
+            raise ValueShouldBeNoneError
 
 
     def copy(self):
         """Returns a copy of an instance of a Token object"""
-        return Token(self.__type, self.__value, self.__pos)
+        return Token(self.__type, self.__value, self.__pos, self.__line_index)
 
     def __str__(self) -> str:
         add_quotation = self.__type == TokenType.STR_LITERAL or self.__type == TokenType.IDENTIFIER
-        return f'Token({self.__type}{f', {"'" if add_quotation else ""}{self.__value}{"'" if add_quotation else ""}' if self.__value is not None else ""}{f', position={self.__pos}' if self.__pos is not None else ""})'
+        return f'Token({self.__type}{f', {"'" if add_quotation else ""}{self.__value}{"'" if add_quotation else ""}' if self.__value is not None else ""}{f', position={self.get_pos()}' if self.__pos is not None else ""})'
 
     def _check_definite_none_value(self):
         if self.__type in tokentypes_should_none_value and not self.__value is None:
@@ -56,8 +68,8 @@ class Token:
         self._check_definite_none_value()
 
     def get_value(self):
-        """Returns copy of the value of the token. Encapsulation preserved"""
-        return copy(self.__value)
+        """Returns value of the token"""
+        return self.__value
     
     def set_value_and_type(self, token_type: TokenType, token_value=None):
         '''Allows to change just value and type of token instance'''
@@ -66,12 +78,19 @@ class Token:
         self._check_definite_none_value()
 
     def get_type(self):
-        """Returns copy of token type"""
-        return copy(self.__type)
-    
+        """Returns token type"""
+        return self.__type
+
     def get_pos(self):
-        """Returns copy of position"""
-        return copy(self.__pos)
+        """Returns position as (row, column)"""
+        pos = self.__pos
+        if type(pos) is int and self.__line_index is not None:
+            return self.__line_index.get_row_and_col(pos)
+        return pos
+
+    def get_offset(self):
+        """Returns position as it is kept - offset in source when token comes from lexer"""
+        return self.__pos
     
     def set_pos(self, new_pos: PositionType):
         """Allows to set postion attribute. Used mainly in testing"""
@@ -82,7 +101,7 @@ class Token:
         return (
             self.__type.value == __value.get_type().value
             and self.__value == __value.get_value()
-            and self.__pos == __value.get_pos()
+            and self.get_pos() == __value.get_pos()
         )
 
 
@@ -1,14 +1,14 @@
 """Token exceptions"""
 
 from lexer.my_token import PositionType
+from lexer.source_position import PositionedError
 
 
-class MyTokenException(Exception):
+class MyTokenException(PositionedError):
     """Base class for all Lexer related errors"""
 
     def __init__(self, position: PositionType = (None, None)):
-        self.row, self.col = position
-        super().__init__()
+        super().__init__(position)
 
     def __str__(self):
         return f"{self.__class__.__name__}: row: {self.row}, column: {self.col}, {self.__doc__}"
@@ -58,9 +58,8 @@ class NumberLiteralTooManyChars(NumberError):
     """Number literals have a limit. Sum of digits of integer part and fractional part can not exceed"""
 
     def __init__(self, position: PositionType = (None, None), limit: int = 30):
-        self.row, self.col = position
         self.limit = limit
-        super().__init__()
+        super().__init__(position)
 
     def __str__(self):
         return f"{self.__class__.__name__}: row: {self.row}, column: {self.col}, {self.__doc__}: {self.limit}"
@@ -0,0 +1,198 @@
+"""Lexer engine that scans whole buffered source with one compiled master regex"""
+
+import re
+import string
+
+from lexer.lexer import Lexer
+from lexer.token_type import TokenType
+from lexer.keywords import KEYWORDS_TO_TOKEN_TYPE
+from lexer.char_reader import CharReader
+from lexer.my_token import Token
+from lexer.my_token_exceptions import (
+    StringLiteralNotEnded,
+    EscapingWrongChar,
+    ExclamationMarkError,
+    IntLiteralTooBig,
+    FloatLiteralTooBig,
+    DigitRequiredAfterDot,
+    PrecidingZerosError,
+    IdentifierTooLong,
+    IdentifierCanNotStartWithUnderscore,
+    EscapingEOT,
+    InvalidCharInIdentifier,
+    UseOfQuotationMarksIsInvalid,
+    UnrecognisedStartOfToken,
+)
+from lexer.utils import is_separator
+
+
+MASTER_PATTERN = re.compile(
+    r"""
+    (?P<whitespace>\s+)
+    |(?P<identifier>[A-Za-z][A-Za-z0-9_]*)
+    |(?P<number>[0-9]+)
+    |(?P<string>'(?:[^'\\\n]|\\[tn\\'])*')
+    |(?P<comment>@[^\n]*)
+    |(?P<operator><=|>=|==|!=|[,();:.&|+\-*/<>=])
+    """,
+    re.VERBOSE,
+)
+
+DIGITS_PATTERN = re.compile(r"[0-9]*")
+ESCAPE_PATTERN = re.compile(r"\\(.)")
+
+OPERATORS_TO_TOKEN_TYPE = {
+    ",": TokenType.COMMA,
+    "(": TokenType.LEFT_BRACKET,
+    ")": TokenType.RIGHT_BRACKET,
+    ";": TokenType.SEMICOLON,
+    ":": TokenType.COLON,
+    ".": TokenType.DOT,
+    "&": TokenType.AND,
+    "|": TokenType.OR,
+    "+": TokenType.PLUS,
+    "-": TokenType.MINUS,
+    "*": TokenType.TIMES,
+    "/": TokenType.DIVIDE,
+    "<": TokenType.LESS,
+    "<=": TokenType.LESS_EQUAL,
+    ">": TokenType.GREATER,
+    ">=": TokenType.GREATER_EQUAL,
+    "=": TokenType.ASSIGNMENT,
+    "==": TokenType.EQUAL,
+    "!=": TokenType.INEQUAL,
+}
+
+ESCAPED_CHARS = {"t": "\t", "n": "\n", "\\": "\\", "'": "'"}
+
+
+class RegexLexer(Lexer):
+    """Lexer that reads rest of the source from reader at once and tokenises it with regex.
+    Produces the same tokens and raises the same exceptions as Lexer"""
+
+    def __init__(self, reader: CharReader) -> None:
+        super().__init__(reader)
+        self._base_offset = reader.get_offset()
+        self._text = reader.read_rest()
+        self._text_len = len(self._text)
+        self._idx = 0
+
+    def _next_token(self):
+        if self._EOT_token_in_place:
+            return
+        text = self._text
+        match = MASTER_PATTERN.match(text, self._idx)
+        if match is not None and match.lastgroup == "whitespace":
+            self._idx = match.end()
+            match = MASTER_PATTERN.match(text, self._idx)
+
+        if self._idx >= self._text_len:
+            self.curr_token = Token(TokenType.EOT, position=self._position(self._idx), line_index=self._line_index)
+            return
+        if match is None:
+            self._raise_unrecognised(self._idx)
+
+        start = self._idx
+        kind = match.lastgroup
+        value = match.group()
+        pos = self._position(start)
+        if kind == "operator":
+            self.curr_token = Token(OPERATORS_TO_TOKEN_TYPE[value], position=pos, line_index=self._line_index)
+            self._idx = match.end()
+        elif kind == "identifier":
+            self._check_identifier(match.end() - start, match.end(), pos)
+            token_type = KEYWORDS_TO_TOKEN_TYPE.get(value)
+            if token_type is not None:
+                self.curr_token = Token(token_type, position=pos, line_index=self._line_index)
+            else:
+                self.curr_token = Token(TokenType.IDENTIFIER, value, pos, self._line_index)
+            self._idx = match.end()
+        elif kind == "number":
+            self._build_number(start, match.end(), pos)
+        elif kind == "string":
+            self.curr_token = Token(TokenType.STR_LITERAL, self._unescape(value[1:-1]), pos, self._line_index)
+            self._idx = match.end()
+        else:
+            self.curr_token = Token(TokenType.COMMENT, value[1:], pos, self._line_index)
+            self._idx = match.end()
+
+    def _is_end_of_file(self):
+        return self._idx >= self._text_len
+
+    def _position(self, idx: int):
+        return self._base_offset + idx
+
+    def _char_at(self, idx: int):
+        return self._text[idx] if idx < self._text_len else ""
+
+    def _check_identifier(self, length: int, end: int, pos):
+        if length > Lexer.IDENTIFIER_LEN_LIMIT + 1:
+            raise IdentifierTooLong(position=pos)
+        char = self._char_at(end)
+        if char != "" and not is_separator(char):
+            raise InvalidCharInIdentifier(position=pos)
+        if length > Lexer.IDENTIFIER_LEN_LIMIT:
+            raise IdentifierTooLong(position=pos)
+
+    def _build_number(self, start: int, end: int, pos):
+        text = self._text
+        if text[start] == "0" and end - start > 1:
+            raise PrecidingZerosError(position=pos)
+        max_digits = self.NUMBER_CHAR_LIMIT + 1
+        int_end = min(end, start + max_digits)
+        int_part_len = int_end - start
+        if self._char_at(int_end) != ".":
+            if int_part_len > self.INT_CHAR_LIMIT:
+                raise IntLiteralTooBig(pos, self.INT_CHAR_LIMIT)
+            self.curr_token = Token(TokenType.INT_LITERAL, int(text[start:int_end]), pos, self._line_index)
+            self._idx = int_end
+            return
+        fraction_start = int_end + 1
+        char = self._char_at(fraction_start)
+        if char == "" or char not in string.digits:
+            raise DigitRequiredAfterDot(pos)
+        fraction_end = DIGITS_PATTERN.match(text, fraction_start).end()
+        fraction_end = min(fraction_end, fraction_start + max_digits - int_part_len)
+        fraction_len = fraction_end - fraction_start
+        if int_part_len + fraction_len > self.FLOAT_CHAR_LIMIT:
+            raise FloatLiteralTooBig(pos, self.FLOAT_CHAR_LIMIT)
+        value = int(text[start:int_end] + text[fraction_start:fraction_end])
+        self.curr_token = Token(TokenType.FLOAT_LITERAL, value / (10**fraction_len), pos, self._line_index)
+        self._idx = fraction_end
+
+    @staticmethod
+    def _unescape(body: str):
+        if "\\" not in body:
+            return body
+        return ESCAPE_PATTERN.sub(lambda m: ESCAPED_CHARS[m.group(1)], body)
+
+    def _raise_unrecognised(self, idx: int):
+        pos = self._position(idx)
+        match self._text[idx]:
+            case Lexer.STRING_LITERAL_DELIMITER:
+                self._raise_string_error(idx)
+            case "_":
+                raise IdentifierCanNotStartWithUnderscore(position=pos)
+            case "!":
+                raise ExclamationMarkError(position=pos)
+            case '"':
+                raise UseOfQuotationMarksIsInvalid(position=pos)
+            case _:
+                raise UnrecognisedStartOfToken(position=pos)
+
+    def _raise_string_error(self, idx: int):
+        idx += 1
+        char = self._char_at(idx)
+        while char not in ("", "\n"):
+            if char == Lexer.STRING_ESCAPE:
+                idx += 1
+                char = self._char_at(idx)
+                if char == "":
+                    raise EscapingEOT(self._position(idx))
+                if char not in ESCAPED_CHARS:
+                    raise EscapingWrongChar(self._position(idx))
+            elif char == Lexer.STRING_LITERAL_DELIMITER:
+                break
+            idx += 1
+            char = self._char_at(idx)
+        raise StringLiteralNotEnded(self._position(idx))
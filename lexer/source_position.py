@@ -0,0 +1,105 @@
+"""Offset based positions in source.
+Row and column are computed on demand from table of line starts"""
+
+from bisect import bisect_right
+from contextlib import contextmanager
+from typing import List
+
+
+class LineIndex:
+    """Table of offsets at which lines of source start"""
+
+    __slots__ = ("_line_starts",)
+
+    def __init__(self):
+        self._line_starts: List[int] = [0]
+
+    def add_line_start(self, offset: int):
+        """Registers that new line starts at offset. Offsets have to be added in ascending order"""
+        self._line_starts.append(offset)
+
+    def feed(self, text: str, text_offset: int):
+        """Registers line starts of text chunk that begins at text_offset in source"""
+        line_starts = self._line_starts
+        idx = text.find("\n")
+        while idx != -1:
+            line_starts.append(text_offset + idx + 1)
+            idx = text.find("\n", idx + 1)
+
+    @classmethod
+    def from_line_starts(cls, line_starts: List[int]):
+        """Creates LineIndex with already known line starts"""
+        index = cls()
+        index._line_starts = list(line_starts)
+        return index
+
+    def get_row_and_col(self, offset: int):
+        """Returns (row, column) of offset. Both are counted from 1"""
+        self._ensure_scanned_up_to(offset)
+        row = bisect_right(self._line_starts, offset)
+        return row, offset - self._line_starts[row - 1] + 1
+
+    def _ensure_scanned_up_to(self, offset: int):
+        pass
+
+
+class LazyLineIndex(LineIndex):
+    """LineIndex that scans source only when position is requested.
+    Source has to support find(b'\\n', start) - bytes or mmap"""
+
+    __slots__ = ("_source", "_scanned_to")
+
+    def __init__(self, source):
+        super().__init__()
+        self._source = source
+        self._scanned_to = 0
+
+    def detach(self):
+        """Scans rest of the source and releases reference to it, so source can be closed"""
+        if self._source is not None:
+            self._ensure_scanned_up_to(len(self._source))
+            self._source = None
+
+    def __reduce__(self):
+        if self._source is not None:
+            self._ensure_scanned_up_to(len(self._source))
+        return (LineIndex.from_line_starts, (self._line_starts,))
+
+    def _ensure_scanned_up_to(self, offset: int):
+        if offset <= self._scanned_to or self._source is None:
+            return
+        source = self._source
+        line_starts = self._line_starts
+        idx = source.find(b"\n", self._scanned_to)
+        while idx != -1 and idx < offset:
+            line_starts.append(idx + 1)
+            idx = source.find(b"\n", idx + 1)
+        self._scanned_to = len(source) if idx == -1 else idx
+
+
+class PositionedError(Exception):
+    """Error at position in source. Position is (row, column), or offset from the start
+    of source, which locate turns into row and column when error is reported"""
+
+    def __init__(self, position=(None, None)):
+        self.offset = None
+        if type(position) is int:
+            self.offset, position = position, (None, None)
+        self.row, self.col = position
+        super().__init__()
+
+    def locate(self, line_index: LineIndex):
+        """Computes row and column of offset position from line_index of source"""
+        if self.offset is not None and line_index is not None:
+            self.row, self.col = line_index.get_row_and_col(self.offset)
+            self.offset = None
+
+
+@contextmanager
+def located_errors(line_index: LineIndex):
+    """Locates PositionedError raised inside with line_index and raises it further"""
+    try:
+        yield
+    except PositionedError as error:
+        error.locate(line_index)
+        raise
@@ -0,0 +1,64 @@
+"""Stream of tokens with fixed-size lookahead"""
+
+from typing import Iterable, List
+
+from lexer.my_token import Token
+from lexer.source_position import LineIndex
+from lexer.token_type import TokenType
+
+
+class TokenStream:
+    """Provides tokens from any iterable of tokens - live lexer generator or pre-lexed list.
+    Has the same interface as Lexer, so Parser can use both.
+    Tokens that were peeked at are kept in a fixed-size ring buffer.
+    Line index of their source gives row and column of offset positions of tokens"""
+
+    def __init__(self, tokens: Iterable[Token], max_lookahead: int = 2, line_index: LineIndex = None):
+        if max_lookahead < 0:
+            raise ValueError("Lookahead can not be negative")
+        self._tokens = iter(tokens)
+        self._size = max_lookahead + 1
+        self._buffer: List[Token] = [None] * self._size
+        self._head = 0
+        self._count = 1
+        self._eot_token: Token = None
+        self._last_pos = None
+        self._line_index = line_index
+        self.curr_token: Token = None
+
+    def get_next_token(self):
+        """Returns next token from stream"""
+        self._next_token()
+        return self.curr_token
+
+    def get_line_index(self):
+        """Returns line index of source of tokens, None when it is not known"""
+        return self._line_index
+
+    def _next_token(self):
+        self._head = (self._head + 1) % self._size
+        if self._count > 1:
+            self._count -= 1
+        else:
+            self._buffer[self._head] = self._pull()
+        self.curr_token = self._buffer[self._head]
+
+    def peek(self, k: int = 1):
+        """Returns k-th token after current one without consuming anything. peek(0) is current token"""
+        if not 0 <= k < self._size:
+            raise ValueError(f"Lookahead has to be in range [0, {self._size - 1}]")
+        while self._count <= k:
+            self._buffer[(self._head + self._count) % self._size] = self._pull()
+            self._count += 1
+        return self._buffer[(self._head + k) % self._size]
+
+    def _pull(self):
+        if self._eot_token is not None:
+            return self._eot_token
+        token = next(self._tokens, None)
+        if token is None:
+            token = Token(TokenType.EOT, position=self._last_pos, line_index=self._line_index)
+        self._last_pos = token.get_offset()
+        if token.get_type() == TokenType.EOT:
+            self._eot_token = token
+        return token
@@ -1,14 +1,63 @@
 import warnings
 import argparse
 import os
-from lexer.char_reader import TextIOReader
+from lexer.char_reader import TextIOReader, BufferedCharReader, MmapCharReader
 from io import StringIO
 from lexer.lexer import Lexer
+from lexer.regex_lexer import RegexLexer
+from lexer.source_position import located_errors
 from parser.my_parser import Parser
-from interpreter.interpreter import Interpreter
+from parser.iterative_parser import IterativeParser
+from parser.ast_cache import ASTCache
+from interpreter.engines import ENGINES
+from interpreter.bytecode import BytecodeCompiler
+from interpreter.disassembler import disassemble
+from interpreter.ir import IRLowering, format_ir
+from interpreter.ir_passes import optimize_ir
+from interpreter.optimizer import Optimizer
+from interpreter.resolver import Resolver
 
 warnings.filterwarnings("ignore")
 
+MMAP_SIZE_THRESHOLD = 16 * 1024 * 1024
+
+LEXER_ENGINES = {
+    "default": Lexer,
+    "regex": RegexLexer,
+}
+
+PARSER_ENGINES = {
+    "recursive": Parser,
+    "iterative": IterativeParser,
+}
+
+
+def parse_source(source_path, lexer_class=Lexer, parser_class=Parser):
+    """Lexes and parses source file.
+    Files bigger than MMAP_SIZE_THRESHOLD are memory-mapped instead of read in chunks"""
+    if os.path.getsize(source_path) > MMAP_SIZE_THRESHOLD:
+        with open(source_path, "rb") as sf, MmapCharReader(sf) as reader:
+            return parser_class(lexer_class(reader)).parse_program()
+    with open(source_path, "r", encoding="ascii") as sf:
+        return parser_class(lexer_class(BufferedCharReader(sf))).parse_program()
+
+
+def interpret_source(
+    source_path, interpreter, lexer_class=Lexer, cache: ASTCache = None, parser_class=Parser, cache_transpiled=False
+):
+    """Parses and interprets source file. When cache is given, unchanged sources are not parsed again.
+    When cache_transpiled is set, transpiling interpreter keeps generated module next to the source"""
+
+    def parse():
+        if cache is not None:
+            return cache.get_or_parse(source_path, lambda: parse_source(source_path, lexer_class, parser_class))
+        return parse_source(source_path, lexer_class, parser_class)
+
+    if cache_transpiled:
+        interpreter.interpret_file(source_path, parse)
+    else:
+        parse().accept(interpreter)
+
 
 def main():
     parser = argparse.ArgumentParser()
@@ -24,22 +73,106 @@ def main():
         action="store_true",
         help="Enable passing expressions to be printed. If --source specified then source will be interpreted first.",
     )
+    parser.add_argument(
+        "--lexer",
+        choices=LEXER_ENGINES.keys(),
+        default="default",
+        help="Choose lexer engine. 'regex' tokenises whole source with one compiled regex.",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=PARSER_ENGINES.keys(),
+        default="recursive",
+        help="Choose parser. 'iterative' parses arbitrarily deep nesting without recursion.",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES.keys(),
+        default="tree",
+        help="Choose execution engine. 'closure' compiles program into Python closures before running it, "
+        "'vm' compiles it into bytecode run by stack based virtual machine, "
+        "'quickening' specializes operators on types of their operands, "
+        "'transpiler' translates it into Python module, "
+        "'tracing' compiles hot loops and functions into Python code traced for their scopes, "
+        "'native' compiles numeric functions into C (needs C compiler, e.g. cc or $CC), "
+        "'ir' lowers it into three-address IR optimized by common subexpression elimination, "
+        "copy propagation, dead store elimination and loop invariant code motion.",
+    )
+    parser.add_argument(
+        "--optimize",
+        action="store_true",
+        help="Fold constant expressions, propagate immutable literals and remove dead code before running program.",
+    )
+    parser.add_argument(
+        "--check-types",
+        action="store_true",
+        help="Check types before running program. Checked program skips type checks at runtime.",
+    )
+    parser.add_argument(
+        "--disassemble",
+        action="store_true",
+        help="Print bytecode of the source instead of interpreting it.",
+    )
+    parser.add_argument(
+        "--dump-ir",
+        action="store_true",
+        help="Print optimized IR of the source instead of interpreting it.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        help="Cache parsed programs in this directory. Unchanged sources are not parsed again.",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=64,
+        help="Maximal size of cache directory. Least recently used programs are evicted first.",
+    )
+    parser.add_argument(
+        "--cache-transpiled",
+        action="store_true",
+        help="Keep Python module generated by 'transpiler' engine next to the source and run it while source is unchanged.",
+    )
+    parser.add_argument(
+        "--jit-stats",
+        action="store_true",
+        help="Print statistics of 'tracing' engine (compiled loops and functions, guard failures) after program is run.",
+    )
     args = parser.parse_args()
-    interpreter = Interpreter()
+    if args.cache_transpiled and args.engine != "transpiler":
+        parser.error("--cache-transpiled requires --engine transpiler")
+    if args.jit_stats and args.engine != "tracing":
+        parser.error("--jit-stats requires --engine tracing")
+    lexer_class = LEXER_ENGINES[args.lexer]
+    parser_class = PARSER_ENGINES[args.parser]
+    cache = ASTCache(args.cache_dir, args.cache_max_mb * 1024 * 1024) if args.cache_dir else None
+    interpreter = ENGINES[args.engine](optimize=args.optimize, check_types=args.check_types)
     if args.source:
         if not os.path.exists(args.source):
             print(f"Error: The specified source path does not exist: {args.source}")
             return
-        with open(args.source, "r", encoding="ascii") as sf:
-            try:
-                reader = TextIOReader(sf)
-                lexer = Lexer(reader)
-                parser = Parser(lexer)
-                ast = parser.parse_program()
-                ast.accept(interpreter)
-            except Exception as e:
-                print(e)
-                return
+        if args.disassemble or args.dump_ir:
+            program = parse_source(args.source, lexer_class, parser_class)
+            if args.optimize:
+                Optimizer(interpreter).optimize(program)
+            if args.dump_ir:
+                resolver = Resolver()
+                resolver.resolve(program)
+                print(format_ir(optimize_ir(IRLowering(resolver.annotations).lower(program))))
+            else:
+                print(disassemble(BytecodeCompiler().compile(program), program.line_index))
+            return
+        try:
+            interpret_source(
+                args.source, interpreter, lexer_class, cache, parser_class, args.cache_transpiled
+            )
+        except Exception as e:
+            print(e)
+            return
+        finally:
+            if args.jit_stats:
+                print(interpreter.jit_stats)
     else:
         print("No source specified.")
 
@@ -47,12 +180,13 @@ def main():
         print("Interactive mode enabled. Type q to quit")
         statement_code = input("Type statement : ")
         while statement_code != "q":
+            reader = TextIOReader(StringIO(statement_code))
             try:
-                reader = TextIOReader(StringIO(statement_code))
-                lexer = Lexer(reader)
-                parser = Parser(lexer)
-                ast = parser._parse_statement()
-                ast.accept(interpreter)
+                with located_errors(reader.get_line_index()):
+                    lexer = lexer_class(reader)
+                    parser = parser_class(lexer)
+                    ast = parser._parse_statement()
+                    ast.accept(interpreter)
             except Exception as e:
                 print(e)
             statement_code = input("Type statement : ")
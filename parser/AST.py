@@ -2,6 +2,8 @@
 
 from typing import List
 
+from lexer.source_position import LineIndex, PositionedError
+
 
 class ASTNode:
     def __init__(self, pos=None):
@@ -26,12 +28,17 @@ def _eq_for_ast_with_children(my_object: object, other: object):
 
 
 class Program(ASTNode):
-    def __init__(self, children: List[Statement], pos=None) -> None:
+    def __init__(self, children: List[Statement], pos=None, line_index: LineIndex = None) -> None:
         self.children = children
+        self.line_index = line_index  # of source of whole program or function body, errors raised in it are located with it
         super().__init__(pos)
 
     def accept(self, visitor):
-        return visitor.visit_program(self)
+        try:
+            return visitor.visit_program(self)
+        except PositionedError as error:
+            error.locate(self.line_index)
+            raise
 
     def __eq__(self, other: object) -> bool:
         return _eq_for_ast_with_children(self, other)
@@ -229,6 +236,9 @@ class FunctionCall(ASTNode):
     def accept(self, visitor):
         return visitor.visit_func_call(self)
 
+    def __str__(self) -> str:
+        return f"{self.name}()"
+
     def __eq__(self, other: object) -> bool:
         return (
             isinstance(other, FunctionCall)
@@ -0,0 +1,122 @@
+"""On-disk cache of parsed programs"""
+
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from typing import Callable
+
+from parser.AST import Program
+
+
+AST_FORMAT_VERSION = 8
+"""Has to be bumped whenever grammar or AST classes change, so old entries are never loaded"""
+
+CACHE_FILE_SUFFIX = ".ast"
+
+
+class ASTCache:
+    """Stores Program returned by Parser.parse_program in cache directory.
+    Entries are keyed by hash of source and AST format version.
+    When total size of entries exceeds max_size_bytes, least recently used entries are evicted"""
+
+    def __init__(self, cache_dir: str, max_size_bytes: int = 64 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key_for_source(self, source: bytes):
+        """Returns cache key of source code"""
+        digest = hashlib.sha256(self._version_tag())
+        digest.update(source)
+        return digest.hexdigest()
+
+    def key_for_file(self, source_path: str):
+        """Returns cache key of source file without reading it into memory at once"""
+        with open(source_path, "rb") as f:
+            digest = hashlib.file_digest(f, lambda: hashlib.sha256(self._version_tag()))
+        return digest.hexdigest()
+
+    def load(self, key: str):
+        """Returns cached Program or None. Unreadable entries are removed"""
+        path = self._path_for(key)
+        try:
+            with open(path, "rb") as f:
+                version_tag, program = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            self._remove(path)
+            return None
+        if version_tag != self._version_tag() or not isinstance(program, Program):
+            self._remove(path)
+            return None
+        os.utime(path)
+        return program
+
+    def store(self, key: str, program: Program):
+        """Saves program under key. Programs that can not be pickled are not cached"""
+        try:
+            data = pickle.dumps((self._version_tag(), program), pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, RecursionError, TypeError):
+            return False
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path_for(key))
+        except OSError:
+            self._remove(tmp_path)
+            return False
+        self.evict()
+        return True
+
+    def get_or_parse(self, source_path: str, parse: Callable[[], Program]):
+        """Returns cached program of source file or parses it and caches the result"""
+        key = self.key_for_file(source_path)
+        if (program := self.load(key)) is not None:
+            return program
+        program = parse()
+        self.store(key, program)
+        return program
+
+    def evict(self):
+        """Removes least recently used entries until cache fits in max_size_bytes"""
+        entries = []
+        total_size = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(CACHE_FILE_SUFFIX):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            total_size += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.max_size_bytes:
+                break
+            self._remove(path)
+            total_size -= size
+
+    def clear(self):
+        """Removes all entries"""
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(CACHE_FILE_SUFFIX):
+                self._remove(entry.path)
+
+    def _path_for(self, key: str):
+        return os.path.join(self.cache_dir, key + CACHE_FILE_SUFFIX)
+
+    @staticmethod
+    def _version_tag():
+        return f"sl-ast-{AST_FORMAT_VERSION}-py{sys.version_info[0]}.{sys.version_info[1]}".encode()
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,242 @@
+"""Parser that does not use Python recursion for nested blocks and expressions"""
+
+from typing import Callable, List
+
+from lexer.token_type import TokenType
+from parser.AST import (
+    CaseSection,
+    FunctionCall,
+    IfStatement,
+    ObjectAccess,
+    Program,
+    UnaryExpr,
+    VisitStatement,
+)
+from parser.my_parser import (
+    BINARY_OPERATORS,
+    LITERAL_CLASSES,
+    OR_PRECEDENCE,
+    Parser,
+    _BinaryExprBuilder,
+)
+from parser.parser_exceptions import ExpectedDifferentToken
+
+
+class _OpenBlock:
+    """Program whose statements are being parsed.
+    After its statements, 'end' is expected (unless it is the whole program) and then is called"""
+
+    __slots__ = ("program", "closed_by_end", "then")
+
+    def __init__(self, program: Program, closed_by_end: bool = True, then: Callable[[], None] = None):
+        self.program = program
+        self.closed_by_end = closed_by_end
+        self.then = then
+
+
+class IterativeParser(Parser):
+    """Builds the same AST as Parser, with the same errors,
+    but nesting depth of blocks and expressions is limited only by memory.
+
+    Blocks are returned as soon as 'begin' is parsed and are filled with statements afterwards.
+    Open blocks are kept on explicit stack, so statement containing block
+    (if, while, visit, function definition) does not recurse into it.
+    Expressions are parsed by generators that yield sub-expressions to parse,
+    driven by _run with explicit stack of generators"""
+
+    def __init__(self, lexer):
+        self._open_blocks: List[_OpenBlock] = None
+        super().__init__(lexer)
+
+    def _parse_program(self):
+        program = Program([], self._get_current_pos())
+        self._parse_blocks([_OpenBlock(program, closed_by_end=False)])
+        return program
+
+    def _parse_blocks(self, blocks: List[_OpenBlock]):
+        outer_blocks, self._open_blocks = self._open_blocks, blocks
+        try:
+            while blocks:
+                block = blocks[-1]
+                depth = len(blocks)
+                while statement := self._try_parse_statement():
+                    block.program.children.append(statement)
+                    if len(blocks) != depth:
+                        break
+                else:
+                    blocks.pop()
+                    if block.closed_by_end:
+                        self._must_parse(TokenType.END)
+                    if block.then is not None:
+                        block.then()
+        finally:
+            self._open_blocks = outer_blocks
+
+    def _try_parse_block(self, then: Callable[[], None] = None):
+        """block ::= 'begin', program, 'end';
+        Returns empty program that is filled when parsing of open blocks continues"""
+        if self._try_parse(TokenType.BEGIN):
+            program = Program([], self._get_current_pos())
+            block = _OpenBlock(program, then=then)
+            if self._open_blocks is None:
+                self._parse_blocks([block])
+            else:
+                self._open_blocks.append(block)
+            return program
+
+    def _parse_block(self, then: Callable[[], None] = None):
+        if block := self._try_parse_block(then):
+            return block
+        raise ExpectedDifferentToken(self.lexer.curr_token.get_offset(), "Expected block")
+
+    def _try_parse_if_statement(self):
+        """if_statement ::= 'if', expression, block, ['else', block];"""
+        pos = self._get_current_pos()
+        if self._try_parse(TokenType.IF):
+            cond = self._parse_expr()
+            statement = IfStatement(cond, None, None, pos)
+            statement.prog = self._parse_block(then=lambda: self._try_parse_else(statement))
+            return statement
+
+    def _try_parse_else(self, statement: IfStatement):
+        if self._try_parse(TokenType.ELSE):
+            statement.else_prog = self._parse_block()
+
+    def _try_parse_visit_statement(self):
+        """visit_statement ::= 'visit', object_access, 'begin', {case_section} ,'end';"""
+        pos = self._get_current_pos()
+        if self._try_parse(TokenType.VISIT):
+            obj = self._parse_object_access()
+            self._must_parse(TokenType.BEGIN)
+            statement = VisitStatement(obj, [], pos)
+            self._parse_next_case_section(statement.case_sections)
+            return statement
+
+    def _parse_next_case_section(self, case_sections: List[CaseSection]):
+        """case_section or 'end' of visit statement"""
+        pos = self._get_current_pos()
+        if self._try_parse(TokenType.CASE):
+            type_ = self._parse_type()
+            case_section = CaseSection(type_, None, pos)
+            case_sections.append(case_section)
+            case_section.program = self._parse_block(then=lambda: self._parse_next_case_section(case_sections))
+        else:
+            self._must_parse(TokenType.END)
+
+    def _parse_expr(self):
+        return self._run(self._expr_steps())
+
+    def _try_parse_expr(self):
+        return self._run(self._expr_steps(try_only=True))
+
+    def _parse_unary_expr(self):
+        return self._run(self._unary_steps())
+
+    def _try_parse_unary_expr(self):
+        return self._run(self._unary_steps(try_only=True))
+
+    def _try_parse_term(self):
+        return self._run(self._term_steps(try_only=True))
+
+    def _try_parse_object_access(self, initial_name: str = None, pos=None):
+        return self._run(self._object_access_steps(initial_name, pos))
+
+    def _try_parse_func_or_name(self, name=None):
+        return self._run(self._func_or_name_steps(name))
+
+    def _try_parse_args(self, initial_arg=None):
+        return self._run(self._args_steps(initial_arg))
+
+    @staticmethod
+    def _run(steps):
+        """Runs generator of parsing steps. Generator yields generator of sub-parse
+        and gets back its result. Returns result of the outermost generator"""
+        stack = [steps]
+        result = None
+        while True:
+            try:
+                sub_steps = stack[-1].send(result)
+            except StopIteration as stop:
+                stack.pop()
+                if not stack:
+                    return stop.value
+                result = stop.value
+            else:
+                stack.append(sub_steps)
+                result = None
+
+    def _expr_steps(self, try_only: bool = False):
+        """expression, with try_only=True relational operator is not accepted before '&' or '|'"""
+        first = yield self._unary_steps(try_only)
+        if first is None or self.lexer.curr_token.get_type() not in BINARY_OPERATORS:
+            return first
+        builder = _BinaryExprBuilder(first, OR_PRECEDENCE, allow_leading_relation=not try_only)
+        while builder.accepts(self.lexer.curr_token.get_type()):
+            self._consume_token()
+            builder.operand = yield self._unary_steps()
+        return builder.build()
+
+    def _unary_steps(self, try_only: bool = False):
+        """unary_expr ::= ['-'], term;"""
+        pos = self._get_current_pos()
+        if self._try_parse(TokenType.MINUS):
+            term = yield self._term_steps()
+            return UnaryExpr(term, pos)
+        return (yield self._term_steps(try_only))
+
+    def _term_steps(self, try_only: bool = False):
+        """term  ::=	literal
+        | object_access
+        | '(', expression, ')';"""
+        token_type = self.lexer.curr_token.get_type()
+        if token_type == TokenType.LEFT_BRACKET:
+            self._consume_token()
+            expr = yield self._expr_steps()
+            self._must_parse(TokenType.RIGHT_BRACKET)
+            return expr
+        if token_type == TokenType.IDENTIFIER:
+            return (yield self._object_access_steps())
+        if token_type in LITERAL_CLASSES:
+            return self._try_parse_literal()
+        if try_only:
+            return None
+        raise ExpectedDifferentToken(
+            self.lexer.curr_token.get_offset(),
+            "Expected literal, object access or nested expression",
+        )
+
+    def _object_access_steps(self, initial_name: str = None, pos=None):
+        """object_access ::=  func_or_ident, {('.', func_or_ident)};"""
+        pos = self._get_current_pos() if not pos else pos
+        funcs_or_idents = [(yield self._func_or_name_steps(initial_name))]
+        if funcs_or_idents[0]:
+            while self._try_parse(TokenType.DOT):
+                if not (func_or_name := (yield self._func_or_name_steps())):
+                    raise ExpectedDifferentToken(
+                        self._get_current_pos(), "Expected function call or just identifier"
+                    )
+                funcs_or_idents.append(func_or_name)
+            return ObjectAccess(funcs_or_idents, pos)
+
+    def _func_or_name_steps(self, name=None):
+        """identifier ['(', args, ')']"""
+        pos = self._get_current_pos()
+        if not name:
+            name = self._try_parse_identifier()
+        if self._try_parse(TokenType.LEFT_BRACKET):
+            args = yield self._args_steps()
+            self._must_parse(TokenType.RIGHT_BRACKET)
+            return FunctionCall(name, args, pos)
+        return name
+
+    def _args_steps(self, initial_arg=None):
+        """args ::= [expression , {',', expression}]"""
+        args = []
+        if initial_arg:
+            args.append(initial_arg)
+            self._try_parse(TokenType.COMMA)
+        if expr := (yield self._expr_steps(try_only=True)):
+            args.append(expr)
+            while self._try_parse(TokenType.COMMA):
+                args.append((yield self._expr_steps()))
+        return args
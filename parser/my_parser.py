@@ -1,7 +1,10 @@
 """Module for parser"""
 
-from typing import List
+from typing import List, Iterable
 from lexer.lexer import Lexer
+from lexer.my_token import Token
+from lexer.source_position import located_errors
+from lexer.token_stream import TokenStream
 from parser.AST import *
 from lexer.token_type import TokenType
 from parser.parser_exceptions import (
@@ -12,18 +15,151 @@ from parser.parser_exceptions import (
 from lexer.utils import get_type_name
 
 
+OR_PRECEDENCE = 1
+AND_PRECEDENCE = 2
+REL_PRECEDENCE = 3
+ADD_PRECEDENCE = 4
+MULTI_PRECEDENCE = 5
+
+BINARY_OPERATORS = {
+    TokenType.OR: (OR_PRECEDENCE, "|"),
+    TokenType.AND: (AND_PRECEDENCE, "&"),
+    TokenType.LESS: (REL_PRECEDENCE, "<"),
+    TokenType.LESS_EQUAL: (REL_PRECEDENCE, "<="),
+    TokenType.INEQUAL: (REL_PRECEDENCE, "!="),
+    TokenType.EQUAL: (REL_PRECEDENCE, "=="),
+    TokenType.GREATER_EQUAL: (REL_PRECEDENCE, ">="),
+    TokenType.GREATER: (REL_PRECEDENCE, ">"),
+    TokenType.PLUS: (ADD_PRECEDENCE, "+"),
+    TokenType.MINUS: (ADD_PRECEDENCE, "-"),
+    TokenType.TIMES: (MULTI_PRECEDENCE, "*"),
+    TokenType.DIVIDE: (MULTI_PRECEDENCE, "/"),
+}
+
+LITERAL_CLASSES = {
+    TokenType.NULL: NullLiteral,
+    TokenType.INT_LITERAL: IntLiteral,
+    TokenType.STR_LITERAL: StrLiteral,
+    TokenType.FLOAT_LITERAL: FloatLiteral,
+}
+
+
+class _PendingExpr:
+    """Binary expression of one precedence level whose last operand is not parsed yet"""
+
+    __slots__ = ("precedence", "children", "operations")
+
+    def __init__(self, precedence: int, first: Expr, operator: str):
+        self.precedence = precedence
+        self.children = [first]
+        self.operations = [operator]
+
+    def add(self, operand: Expr, operator: str):
+        self.children.append(operand)
+        self.operations.append(operator)
+
+    def build(self, last: Expr):
+        children = self.children
+        children.append(last)
+        pos = children[0].pos
+        if self.precedence == OR_PRECEDENCE:
+            return OrExpr(children, pos)
+        if self.precedence == AND_PRECEDENCE:
+            return AndExpr(children, pos)
+        if self.precedence == REL_PRECEDENCE:
+            return RelationExpr(children[0], children[1], self.operations[0], pos)
+        if self.precedence == ADD_PRECEDENCE:
+            return AddExpr(children, self.operations, pos)
+        return MultiExpr(children, self.operations, pos)
+
+
+class _BinaryExprBuilder:
+    """State of precedence climbing: operand parsed last and expressions still waiting for it"""
+
+    __slots__ = ("operand", "min_precedence", "allow_leading_relation", "pending")
+
+    def __init__(self, first: Expr, min_precedence: int, allow_leading_relation: bool = True):
+        self.operand = first
+        self.min_precedence = min_precedence
+        self.allow_leading_relation = allow_leading_relation
+        self.pending: List[_PendingExpr] = []
+
+    def accepts(self, token_type: TokenType):
+        """Takes binary operator of token_type after current operand.
+        Returns False if the operator does not continue the expression"""
+        op = BINARY_OPERATORS.get(token_type)
+        if op is None:
+            return False
+        precedence, operator = op
+        if precedence < self.min_precedence:
+            return False
+        pending = self.pending
+        while pending and pending[-1].precedence > precedence:
+            self.operand = pending.pop().build(self.operand)
+        if precedence == REL_PRECEDENCE:
+            if pending and pending[-1].precedence == REL_PRECEDENCE:
+                return False
+            if not self.allow_leading_relation and not pending:
+                return False
+        if pending and pending[-1].precedence == precedence:
+            pending[-1].add(self.operand, operator)
+        else:
+            pending.append(_PendingExpr(precedence, self.operand, operator))
+            if precedence < REL_PRECEDENCE:
+                self.allow_leading_relation = True
+        return True
+
+    def build(self):
+        """Returns whole expression with current operand as the last one"""
+        operand = self.operand
+        while self.pending:
+            operand = self.pending.pop().build(operand)
+        return operand
+
+
 class Parser:
     """Parser class"""
 
-    def __init__(self, lexer: Lexer):
-        self.lexer: Lexer = lexer
-        self.lexer._next_token()
+    def __init__(self, lexer: Lexer | TokenStream | Iterable[Token]):
+        """Accepts live lexer, token stream or any iterable of already lexed tokens"""
+        if not isinstance(lexer, (Lexer, TokenStream)):
+            lexer = TokenStream(lexer)
+        self.lexer: Lexer | TokenStream = lexer
+        self._statement_parsers = {
+            TokenType.BEGIN: self._try_parse_block,
+            TokenType.RETURN: self._try_parse_return,
+            TokenType.WHILE: self._try_parse_while_statement,
+            TokenType.IF: self._try_parse_if_statement,
+            TokenType.VISIT: self._try_parse_visit_statement,
+            TokenType.IDENTIFIER: self._try_parse_dec_and_def_or_assign_or_fun_call,
+        }
+        self._after_identifier_parsers = {
+            TokenType.DOT: self._parse_rest_assignment,
+            TokenType.ASSIGNMENT: self._parse_rest_assignment,
+            TokenType.COLON: self._parse_rest_type_def_or_var_dec,
+            TokenType.LEFT_BRACKET: self._parse_rest_func_def_or_func_call,
+        }
+        self._term_parsers = {
+            TokenType.LEFT_BRACKET: self._try_parse_nested_expr,
+            TokenType.IDENTIFIER: self._try_parse_object_access,
+        }
+        for literal_type in LITERAL_CLASSES:
+            self._term_parsers[literal_type] = self._try_parse_literal
+        with located_errors(self.lexer.get_line_index()):
+            self.lexer._next_token()
 
     def parse_program(self):
         """
-        Parses program :) returns Program AST\n
+        Parses program :) returns Program AST with line index of its source\n
         program \:\:\= {statement};
         """
+        line_index = self.lexer.get_line_index()
+        with located_errors(line_index):
+            program = self._parse_program()
+        program.line_index = line_index
+        return program
+
+    def _parse_program(self):
         statements: List[Statement] = []
         pos = self._get_current_pos()
         while statement := self._try_parse_statement():
@@ -48,21 +184,8 @@ class Parser:
         | block
         | function_call_statement
         """
-        if prog := self._try_parse_block():
-            return prog
-        if ret_state := self._try_parse_return():
-            return ret_state
-        if while_state := self._try_parse_while_statement():
-            return while_state
-        if if_state := self._try_parse_if_statement():
-            return if_state
-        if visit_state := self._try_parse_visit_statement():
-            return visit_state
-        if (
-            starting_with_identifier := self._try_parse_dec_and_def_or_assign_or_fun_call()
-        ):
-            return starting_with_identifier
-
+        if parse := self._statement_parsers.get(self.lexer.curr_token.get_type()):
+            return parse()
 
     def _try_parse_return(self):
         """return_statement ::== 'return', [expression], ';';"""
@@ -146,22 +269,22 @@ class Parser:
             return self._parse_after_identifier(name, pos)
 
     def _parse_after_identifier(self, name, pos):
-        if self.lexer.curr_token.get_type() == TokenType.DOT or self.lexer.curr_token.get_type() == TokenType.ASSIGNMENT:
-            return self._parse_rest_assignment(name, pos)
-        if self._try_parse(TokenType.COLON):
-            # variable declaration or type def
-            if struct := self._try_parse_rest_struct(name, pos):
-                return struct
-            if variant := self._try_parse_rest_variant(name, pos):
-                return variant
-            # must be variable declaration or error
-            return self._parse_rest_var_dec_statement(name, pos)
-        if self._try_parse(TokenType.LEFT_BRACKET):
-            return self._parse_rest_func_def_or_func_call(name, pos)
+        if parse := self._after_identifier_parsers.get(self.lexer.curr_token.get_type()):
+            return parse(name, pos)
         raise ExpectedDifferentToken(
-            position=self.lexer.curr_token.get_pos(), msg="Expected: . = : ("
+            position=self.lexer.curr_token.get_offset(), msg="Expected: . = : ("
         )
 
+    def _parse_rest_type_def_or_var_dec(self, name, pos):
+        """':', ('struct' | 'variant' | variable declaration)"""
+        self._must_parse(TokenType.COLON)
+        match self.lexer.curr_token.get_type():
+            case TokenType.STRUCT:
+                return self._try_parse_rest_struct(name, pos)
+            case TokenType.VARIANT:
+                return self._try_parse_rest_variant(name, pos)
+        return self._parse_rest_var_dec_statement(name, pos)
+
     def _try_parse_no_arg_or_no_param_function_def_or_call(self, name, pos):
         if self._try_parse(TokenType.RIGHT_BRACKET):
             if self._try_parse(TokenType.COLON):
@@ -172,6 +295,7 @@ class Parser:
     def _parse_rest_func_def(self, name, params=None, pos=None):
         type_ = self._parse_type()
         program = self._parse_block()
+        program.line_index = self.lexer.get_line_index()
         return FuncDef(name, params, type_, program, pos)
 
     def _parse_start_with_identifier_func_def_or_call(self, name, pos):
@@ -192,6 +316,7 @@ class Parser:
         return FunctionCall(name, args, pos)
 
     def _parse_rest_func_def_or_func_call(self, name, pos):
+        self._must_parse(TokenType.LEFT_BRACKET)
         if empty_brackets_func_call_or_def := (
             self._try_parse_no_arg_or_no_param_function_def_or_call(name, pos)
         ):
@@ -281,7 +406,7 @@ class Parser:
         if name := self._try_parse_identifier():
             return name
         raise ExpectedDifferentToken(
-            self.lexer.curr_token.get_pos(), "Expected identifier"
+            self.lexer.curr_token.get_offset(), "Expected identifier"
         )
 
     def _try_parse_identifier(self):
@@ -350,155 +475,62 @@ class Parser:
             name = get_type_name(self.lexer.curr_token)
             self._consume_token()
             return name
-        raise ExpectedDifferentToken(self.lexer.curr_token.get_pos(), "Expected type")
+        raise ExpectedDifferentToken(self.lexer.curr_token.get_offset(), "Expected type")
 
     def _try_parse_block(self):
         """block ::= 'begin', program, 'end';"""
         if self._try_parse(TokenType.BEGIN):
-            temp = self.parse_program()
+            temp = self._parse_program()
             self._must_parse(TokenType.END)
             return temp
 
     def _parse_block(self):
         if block := self._try_parse_block():
             return block
-        raise ExpectedDifferentToken(self.lexer.curr_token.get_pos(), "Expected block")
+        raise ExpectedDifferentToken(self.lexer.curr_token.get_offset(), "Expected block")
 
     def _parse_expr(self):
         """expression ::= logical_or_expression;"""
-        return self._parse_logical_or_expr()
+        return self._parse_binary_expr(self._parse_unary_expr(), OR_PRECEDENCE)
 
     def _try_parse_expr(self):
-        return self._try_parse_logical_or_expr()
-
-    def _try_parse_logical_or_expr(self):
-        if and_expr := self._try_parse_logical_and_expr():
-            return self._try_parse_rest_logical_or(and_expr)
-
-    def _try_parse_rest_logical_or(self, first : Expr):
-        pos = first.pos
-        and_exprs = [first]
-        while self._try_parse(TokenType.OR):
-            and_exprs.append(self._parse_logical_and_expr())
-        if len(and_exprs) == 1:
-            return first
-        return OrExpr(and_exprs, pos)
-
-    def _try_parse_rest_logical_and(self, first):
-        pos = first.pos
-        rel_exprs = [first]
-        while self._try_parse(TokenType.AND):
-            rel_exprs.append(self._parse_rel_expr())
-        if len(rel_exprs) == 1:
-            return first
-        return AndExpr(rel_exprs, pos)
-
-    def _try_parse_logical_and_expr(self):
-        if rel_expr := self._try_parse_rel_expr():
-            return self._try_parse_rest_logical_and(rel_expr)
-
-    def _try_parse_rel_expr(self):
-        if add_expr := self._try_parse_add_expr():
-            return self._try_parse_rest_logical_and(add_expr)
-
-    def _try_parse_add_expr(self):
-        if multi_expr := self._try_parse_multi_expr():
-            return self._try_parse_rest_add_expr(multi_expr)
-
-    def _try_parse_rest_add_expr(self, first):
-        pos = first.pos
-        multi_exprs = [first]
-        operations = []
-        while op := self._try_parse_additive_operator():
-            operations.append(op)
-            multi_exprs.append(self._parse_multi_expr())
-        if len(multi_exprs) == 1:
-            return first
-        return AddExpr(multi_exprs, operations, pos)
-
-    def _try_parse_multi_expr(self):
-        if unary_expr := self._try_parse_unary_expr():
-            return self._try_parse_rest_multi_expr(unary_expr)
-
-    def _try_parse_rest_multi_expr(self, first):
-        pos = first.pos
-        unary_exprs = [first]
-        operations = []
-        while op := self._try_parse_multi_operator():
-            operations.append(op)
-            unary_exprs.append(self._parse_unary_expr())
-        if len(unary_exprs) == 1:
-            return first
-        return MultiExpr(unary_exprs, operations, pos)
+        if first := self._try_parse_unary_expr():
+            return self._parse_binary_expr(first, OR_PRECEDENCE, allow_leading_relation=False)
 
     def _parse_logical_or_expr(self):
         """logical_or_expression ::= logical_and_expression, {'|', logical_and_expression};"""
-        and_expr = self._parse_logical_and_expr()
-        return self._try_parse_rest_logical_or(and_expr)
+        return self._parse_binary_expr(self._parse_unary_expr(), OR_PRECEDENCE)
 
     def _parse_logical_and_expr(self):
         """logical_and_expression ::= relational_expr {'&', relational_expr};"""
-        rel_expr = self._parse_rel_expr()
-        return self._try_parse_rest_logical_and(rel_expr)
+        return self._parse_binary_expr(self._parse_unary_expr(), AND_PRECEDENCE)
 
     def _parse_rel_expr(self):
         """relational_expr ::= additive_expr, [relational_operator, additive_expr];"""
-        first = self._parse_add_expr()
-        return self._try_parse_rest_rel_expr(first)
-
-    def _try_parse_rest_rel_expr(self, first):
-        if rel := self._try_parse_rel_operator():
-            return RelationExpr(first, self._parse_add_expr(), rel, first.pos)
-        return first
-
-    def _try_parse_rel_operator(self):
-        """'<' | '<=', '!=' | '==' | '>=' | '>'"""
-        less = self._try_parse(TokenType.LESS)
-        if less:
-            return "<"
-        less_eq = self._try_parse(TokenType.LESS_EQUAL)
-        if less_eq:
-            return "<="
-        ineq = self._try_parse(TokenType.INEQUAL)
-        if ineq:
-            return "!="
-        eq = self._try_parse(TokenType.EQUAL)
-        if eq:
-            return "=="
-        greater_eq = self._try_parse(TokenType.GREATER_EQUAL)
-        if greater_eq:
-            return ">="
-        greater = self._try_parse(TokenType.GREATER)
-        if greater:
-            return ">"
+        return self._parse_binary_expr(self._parse_unary_expr(), REL_PRECEDENCE)
 
     def _parse_add_expr(self):
         """additive_expr ::= multi_expr, {additive_operator, multi_expr};"""
-        multi_expr = self._parse_multi_expr()
-        return self._try_parse_rest_add_expr(multi_expr)
-
-    def _try_parse_multi_operator(self):
-        """'*' | '/'"""
-        times = self._try_parse(TokenType.TIMES)
-        if times:
-            return "*"
-        divide = self._try_parse(TokenType.DIVIDE)
-        if divide:
-            return "/"
+        return self._parse_binary_expr(self._parse_unary_expr(), ADD_PRECEDENCE)
 
     def _parse_multi_expr(self):
         """multi_expr ::= unary_expr, {multi_operator, unary_expr};"""
-        unary_expr = self._parse_unary_expr()
-        return self._try_parse_rest_multi_expr(unary_expr)
-
-    def _try_parse_additive_operator(self):
-        """'+' | '-'"""
-        plus = self._try_parse(TokenType.PLUS)
-        if plus:
-            return "+"
-        minus = self._try_parse(TokenType.MINUS)
-        if minus:
-            return "-"
+        return self._parse_binary_expr(self._parse_unary_expr(), MULTI_PRECEDENCE)
+
+    def _parse_binary_expr(self, operand: Expr, min_precedence: int, allow_leading_relation: bool = True):
+        """Precedence climbing over binary operators of at least min_precedence.
+        Operands of one precedence level are collected into single n-ary node,
+        so trees are the same as built by grammar rules above.
+        Relational operator is non-associative - second one ends the expression.
+        With allow_leading_relation=False relational operator is accepted only after '&' or '|'
+        (as in first argument of function call)"""
+        if self.lexer.curr_token.get_type() not in BINARY_OPERATORS:
+            return operand
+        builder = _BinaryExprBuilder(operand, min_precedence, allow_leading_relation)
+        while builder.accepts(self.lexer.curr_token.get_type()):
+            self._consume_token()
+            builder.operand = self._parse_unary_expr()
+        return builder.build()
 
     def _parse_unary_expr(self):
         """unary_expr ::= ['-'], term;"""
@@ -517,18 +549,14 @@ class Parser:
         """term  ::=	literal
         | object_access
         | '(', expression, ')';"""
-        if (
-            (nested_expr := self._try_parse_nested_expr())
-            or (literal := self._try_parse_literal())
-            or (object_access := self._try_parse_object_access())
-        ):
-            return nested_expr or literal or object_access
+        if parse := self._term_parsers.get(self.lexer.curr_token.get_type()):
+            return parse()
 
     def _parse_term(self):
         if term := self._try_parse_term():
             return term
         raise ExpectedDifferentToken(
-            self.lexer.curr_token.get_pos(),
+            self.lexer.curr_token.get_offset(),
             "Expected literal, object access or nested expression",
         )
 
@@ -540,27 +568,15 @@ class Parser:
             return expr
 
     def _try_parse_literal(self):
-        literal_class = None
-        match self.lexer.curr_token.get_type():
-            case TokenType.NULL:
-                self._consume_token()
-                return NullLiteral()
-            case TokenType.INT_LITERAL:
-                literal_class = IntLiteral
-            case TokenType.STR_LITERAL:
-                literal_class = StrLiteral
-            case TokenType.FLOAT_LITERAL:
-                literal_class = FloatLiteral
-            case _:
-                return None
-        temp_value = self.lexer.curr_token.get_value()
-        self._consume_token()
-        return literal_class(temp_value)
+        curr_t = self.lexer.curr_token
+        if literal_class := LITERAL_CLASSES.get(curr_t.get_type()):
+            self._consume_token()
+            return literal_class(curr_t.get_value())
 
     def _shall(self, parsed, if_not_parsed_msg: str = None):
         if not parsed:
             raise ExpectedDifferentToken(
-                position=self.lexer.curr_token.get_pos(), msg=if_not_parsed_msg
+                position=self.lexer.curr_token.get_offset(), msg=if_not_parsed_msg
             )
         return parsed
 
@@ -577,8 +593,8 @@ class Parser:
             self._consume_token()
             return
         raise ExpectedDifferentToken(
-            self.lexer.curr_token.get_pos(), f"Expected token type: {token_type}"
+            self.lexer.curr_token.get_offset(), f"Expected token type: {token_type}"
         )
 
     def _get_current_pos(self):
-        return self.lexer.curr_token.get_pos()
\ No newline at end of file
+        return self.lexer.curr_token.get_offset()
\ No newline at end of file
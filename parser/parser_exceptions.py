@@ -1,14 +1,14 @@
 """Parser exceptions"""
 
 from lexer.my_token import PositionType
+from lexer.source_position import PositionedError
 from lexer.token_type import TokenType
 
-class ParserException(Exception):
+class ParserException(PositionedError):
     """Base class for all Parser related errors"""
 
     def __init__(self, position: PositionType = (None, None)):
-        self.row, self.col = position
-        super().__init__()
+        super().__init__(position)
 
     def __str__(self):
         return f"{self.__class__.__name__}: row: {self.row}, column: {self.col}, {self.__doc__}"
@@ -18,7 +18,7 @@ class ParserException(Exception):
 class ExpectedDifferentToken(ParserException):
     """Got different token than expected"""
     def __init__(self, position: PositionType = (None, None), msg = None):
-        self.row, self.col = position
+        super().__init__(position)
         self.msg = msg
 
     def __str__(self):
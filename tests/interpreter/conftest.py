@@ -0,0 +1,37 @@
+"""Runs every test of interpreter test modules that use Interpreter against each execution engine,
+with optimizer off and on"""
+
+from functools import partialmethod
+
+import pytest
+
+from interpreter.engines import ENGINES
+
+
+def optimizing(engine):
+    """Engine that optimizes every program before running it"""
+    return type(engine.__name__, (engine,), {"__init__": partialmethod(engine.__init__, optimize=True)})
+
+
+TESTED_ENGINES = {
+    **ENGINES,
+    **{f"{name}-optimized": optimizing(engine) for name, engine in ENGINES.items()},
+}
+
+
+def pytest_generate_tests(metafunc):
+    """Only modules that use Interpreter are run once for each engine, other modules,
+    e.g. tests of one engine, run once"""
+    if hasattr(metafunc.module, "Interpreter"):
+        metafunc.parametrize(
+            "interpreter_engine", list(TESTED_ENGINES.values()), ids=list(TESTED_ENGINES.keys()), indirect=True
+        )
+
+
+@pytest.fixture(autouse=True)
+def interpreter_engine(request, monkeypatch):
+    """Replaces Interpreter used by test module with tested engine"""
+    engine = getattr(request, "param", None)
+    if engine is not None:
+        monkeypatch.setattr(request.module, "Interpreter", engine)
+    return engine
@@ -0,0 +1,82 @@
+"""Immutable builtin values and constants of literals"""
+
+import contextlib
+import io
+
+from interpreter.interpreter import Interpreter
+from interpreter.interpreter_types import FALSE, TRUE, BuiltInValue, constant, int_value
+from lexer.char_reader import TextIOReader
+from lexer.lexer import Lexer
+from parser.AST import *
+from parser.my_parser import Parser
+
+
+def run(source: str):
+    interpreter = Interpreter()
+    program = Parser(Lexer(TextIOReader(io.StringIO(source)))).parse_program()
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        program.accept(interpreter)
+    return output.getvalue()
+
+
+def test_conversion_returns_new_value():
+    interpreter = Interpreter()
+    number = BuiltInValue("int", 12)
+    text = interpreter._convert_to_("str", number, (1, 1))
+    assert (text.type, text.value) == ("str", "12")
+    assert (number.type, number.value) == ("int", 12)
+    real = BuiltInValue("float", 2.5)
+    assert interpreter._convert_to_("str", real, (1, 1)).value == "2.5000"
+    assert interpreter._convert_to_("int", real, (1, 1)) is int_value(2)
+    assert (real.type, real.value) == ("float", 2.5)
+
+
+def test_literal_is_evaluated_to_the_same_value():
+    interpreter = Interpreter()
+    for literal in [IntLiteral(1000), FloatLiteral(1.5), StrLiteral("abc")]:
+        assert literal.accept(interpreter) is literal.accept(interpreter)
+
+
+def test_small_ints_and_strings_are_cached():
+    assert constant("int", 7) is constant("int", 7) is int_value(7)
+    assert constant("str", "abc") is constant("str", "abc")
+    assert int_value(10**6) is not int_value(10**6)
+    assert (TRUE.value, FALSE.value) == (1, 0)
+
+
+def test_comparisons_give_shared_values():
+    interpreter = Interpreter()
+    assert interpreter.lt(BuiltInValue("int", 1), BuiltInValue("int", 2), (1, 1)) is TRUE
+    assert interpreter.eq(BuiltInValue("str", "a"), BuiltInValue("str", "b"), (1, 1)) is FALSE
+    assert interpreter.gteq(BuiltInValue("int", 1), BuiltInValue("int", 2), (1, 1)) is FALSE
+
+
+def test_assigned_literal_keeps_its_value():
+    source = """
+    i : mut int = 0;
+    s : mut str = 'a';
+    while i < 3
+    begin
+        n : str = 5;
+        s = s + n;
+        i = i + 1;
+    end
+    print(s);
+    k : int = 5;
+    print(k);
+    """
+    assert run(source) == "interpreter  >>> a555\ninterpreter  >>> 5\n"
+
+
+def test_variant_holding_builtin_is_converted_to_other_builtin():
+    source = """
+    Number : variant
+    begin
+        i : int;
+        f : float;
+    end
+    n : Number = 5;
+    s : str = n;
+    print(s);
+    """
+    assert run(source) == "interpreter  >>> 5\n"
@@ -0,0 +1,167 @@
+"""Values are passed by value, but structs and variants are copied only when changed"""
+
+import contextlib
+import io
+
+from interpreter.interpreter import Interpreter
+from interpreter.interpreter_types import (
+    BuiltInValue,
+    StructLayout,
+    StructValue,
+    VariantValue,
+    Variable,
+    make_owned,
+    share,
+)
+from lexer.char_reader import TextIOReader
+from lexer.lexer import Lexer
+from parser.my_parser import Parser
+from parser.AST import VariableDeclaration
+
+
+POINT = """
+Point : struct
+begin
+    x : mut int;
+    y : mut int;
+end
+Line : struct
+begin
+    start : mut Point;
+    end_ : mut Point;
+end
+"""
+
+
+def run(source: str):
+    interpreter = Interpreter()
+    program = Parser(Lexer(TextIOReader(io.StringIO(source)))).parse_program()
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        program.accept(interpreter)
+    return output.getvalue().replace("interpreter  >>> ", "").split()
+
+
+def test_copy_and_original_are_changed_independently():
+    source = POINT + """
+    a : mut Point;
+    a.x = 1;
+    b : mut Point = a;
+    b.x = 2;
+    print(a.x);
+    a.x = 3;
+    print(b.x);
+    print(a.x);
+    """
+    assert run(source) == ["1", "2", "3"]
+
+
+def test_nested_struct_read_is_not_changed_through_its_parent():
+    source = POINT + """
+    line : mut Line;
+    line.start.x = 1;
+    start : Point = line.start;
+    line.start.x = 5;
+    line.end_.y = 7;
+    print(start.x);
+    print(line.start.x);
+    """
+    assert run(source) == ["1", "5"]
+
+
+def test_argument_changed_in_function():
+    source = POINT + """
+    move(p : mut Point) : int
+    begin
+        p.x = p.x + 10;
+        return p.x;
+    end
+    a : mut Point;
+    a.x = 1;
+    print(move(a));
+    print(a.x);
+    """
+    assert run(source) == ["11", "1"]
+
+
+def test_variant_read_into_other_variable():
+    source = POINT + """
+    Shape : variant
+    begin
+        point : Point;
+        line : Line;
+    end
+    s : mut Shape;
+    s.x = 1;
+    t : mut Shape = s;
+    t.x = 2;
+    print(s.x);
+    print(t.x);
+    """
+    assert run(source) == ["1", "2"]
+
+
+def test_case_variable_is_not_changed_by_changing_visited_variant():
+    source = POINT + """
+    Shape : variant
+    begin
+        point : Point;
+        line : Line;
+    end
+    s : mut Shape;
+    s.x = 1;
+    visit s
+    begin
+        case point
+        begin
+            s.x = 2;
+            print(point.x);
+        end
+    end
+    print(s.x);
+    """
+    assert run(source) == ["1", "2"]
+
+
+def test_conversion_of_read_variant_does_not_change_it():
+    source = """
+    Number : variant
+    begin
+        i : int;
+        f : float;
+    end
+    n : Number = 5;
+    s : str = n;
+    m : int = n + 1;
+    print(m);
+    """
+    assert run(source) == ["6"]
+
+
+def test_reading_struct_shares_it():
+    tree = StructValue(StructLayout("Node", [VariableDeclaration("value", "int", True)]), [BuiltInValue("int", 1)])
+    assert share(tree) is tree
+    assert tree.shared
+    number = BuiltInValue("int", 1)
+    assert share(number) is number
+
+
+def test_shared_value_is_copied_one_level_before_change():
+    leaf = StructValue(StructLayout("Leaf", [VariableDeclaration("value", "int", True)]), [BuiltInValue("int", 1)])
+    tree = StructValue(StructLayout("Node", [VariableDeclaration("left", "Leaf", True)]), [leaf])
+    variable = Variable("Node", True, share(tree))
+    make_owned(variable)
+    assert variable.value is not tree
+    assert not variable.value.shared
+    assert variable.value["left"] is leaf
+    assert leaf.shared
+    owned = variable.value
+    make_owned(variable)
+    assert variable.value is owned
+
+
+def test_struct_in_shared_variant_is_copied_before_change():
+    point = StructValue(StructLayout("Point", []), [])
+    variable = Variable("Shape", True, share(VariantValue("Shape", point, "point")))
+    make_owned(variable)
+    assert variable.value.value is not point
+    assert not variable.value.value.shared
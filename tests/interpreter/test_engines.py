@@ -0,0 +1,191 @@
+"""Every engine prints the same output and raises the same errors as tree-walking interpreter"""
+
+import contextlib
+import functools
+import io
+
+import pytest
+
+from interpreter.engines import ENGINES
+from interpreter.interpreter import Interpreter as TreeInterpreter
+from interpreter.interpreter_errors import DivisionByZero, TypeCheckError
+from lexer.char_reader import TextIOReader
+from lexer.lexer import Lexer
+from parser.my_parser import Parser
+
+
+PROGRAMS = {
+    "binary_tree": open("examples/binary_tree.txt", encoding="ascii").read(),
+    "nested_struct": open("examples/nested_struct.txt", encoding="ascii").read(),
+    "weak_typing": """
+        a : mut int = 1;
+        b : float = 2.5;
+        c : str = 'x';
+        a = a + b;
+        r : mut str = a;
+        print(r);
+        r = b + a;
+        print(r);
+        r = c + a + b;
+        print(r);
+        r = a * '2' + 1.9;
+        print(r);
+        r = c * 3;
+        print(r);
+        r = 'ala' - 'l';
+        print(r);
+        r = 'kot' / 1;
+        print(r);
+        r = -b;
+        print(r);
+        r = a / 2.7;
+        print(r);
+        r = '12.5' + 1;
+        print(r);
+    """,
+    "comparisons": """
+        r : mut int = 1 < 2;
+        print(r);
+        r = 2.5 > 1.5;
+        print(r);
+        r = 'aa' <= 'b';
+        print(r);
+        r = 3 >= 3;
+        print(r);
+        r = 1 == 1.0;
+        print(r);
+        r = 'a' != 'b';
+        print(r);
+        r = 1 < 2 & 2 < 1;
+        print(r);
+        r = 0 | 0 | 2 > 1;
+        print(r);
+    """,
+    "loops_and_functions": """
+        fib(n: int): int
+        begin
+            if n < 2 begin return n; end
+            return fib(n - 1) + fib(n - 2);
+        end
+        i : mut int = 0;
+        while i < 10
+        begin
+            print(fib(i));
+            i = i + 1;
+        end
+    """,
+    "call_statement_returns": """
+        one(): int begin return 1; end
+        f(): int
+        begin
+            one();
+            print('never printed');
+        end
+        f();
+        print('after');
+    """,
+    "return_null_does_not_stop": """
+        f(): null_type
+        begin
+            return null;
+            print('printed after return null');
+        end
+        f();
+    """,
+    "variants": """
+        Num : variant
+        begin
+            i : int;
+            f : float;
+        end
+        n : mut Num = 1;
+        visit n
+        begin
+            case i begin print('int ' + i); end
+            case f begin print('float ' + f); end
+        end
+        n = 2.5;
+        print(-n);
+    """,
+    "number_too_big": """
+        y : int = 99999999;
+        x : int = y * 11 + y;
+    """,
+    "division_by_zero": """
+        y : int = 0;
+        x : int = 1 + y / y;
+    """,
+    "recursion_limit": """
+        f(n: int): int begin return f(n + 1); end
+        f(0);
+    """,
+    "undefined_variable": """
+        print(y);
+    """,
+    "struct_arithmetic": """
+        A : struct begin x : mut int; end
+        a : mut A;
+        a.x = 1;
+        b : int = a + 1;
+    """,
+}
+
+
+def parse(source: str):
+    return Parser(Lexer(TextIOReader(io.StringIO(source)))).parse_program()
+
+
+def run(engine, source: str):
+    interpreter = engine()
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        try:
+            parse(source).accept(interpreter)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            return output.getvalue(), type(e), str(e)
+    return output.getvalue(), None, None
+
+
+@pytest.mark.parametrize("engine", list(ENGINES.values()), ids=list(ENGINES.keys()))
+@pytest.mark.parametrize("program", PROGRAMS.keys())
+def test_same_behaviour_as_tree_interpreter(engine, program):
+    source = PROGRAMS[program]
+    assert run(engine, source) == run(TreeInterpreter, source)
+
+
+@pytest.mark.parametrize("engine", list(ENGINES.values()), ids=list(ENGINES.keys()))
+@pytest.mark.parametrize("program", PROGRAMS.keys())
+def test_type_checked_run_behaves_the_same(engine, program):
+    source = PROGRAMS[program]
+    output, error, message = run(functools.partial(engine, check_types=True), source)
+    if program == "struct_arithmetic":
+        assert (output, error) == ("", TypeCheckError)
+        assert message.endswith("Operator '+' is not supported for struct type 'A'")
+    else:
+        assert (output, error, message) == run(TreeInterpreter, source)
+
+
+@pytest.mark.parametrize("engine", list(ENGINES.values()), ids=list(ENGINES.keys()))
+def test_state_is_kept_between_runs(engine):
+    interpreter = engine()
+    parse("a : mut int = 1;").accept(interpreter)
+    parse("a = a + 41;").accept(interpreter)
+    assert parse("b : int = a;").children[0].default_value.accept(interpreter).value == 42
+
+
+@pytest.mark.parametrize("engine", list(ENGINES.values()), ids=list(ENGINES.keys()))
+def test_error_in_function_of_earlier_program_is_located_in_its_source(engine):
+    interpreter = engine()
+    parse("""
+        a : int = 1;
+        b : int = 2;
+        f(x : int) : int
+        begin
+            y : int = x;
+            return y / (x - 60);
+        end
+    """).accept(interpreter)
+    sources = ("print(f(60));", "i : mut int = 0; while i < 100 begin print(f(i)); i = i + 1; end")
+    for source in sources:
+        with contextlib.redirect_stdout(io.StringIO()), pytest.raises(DivisionByZero) as error:
+            parse(source).accept(interpreter)
+        assert str(error.value) == "DivisionByZero: row: 7, column: 20, Not good."
@@ -662,6 +662,46 @@ def test_max_recursion_depth():
     )
 
 
+def test_max_recursion_depth_is_reached_before_python_recursion_limit():
+    """f(n: int): int begin v : int = f(n + 1); return v; end f(0);"""
+    ast = Program(
+        [
+            FuncDef(
+                "f",
+                [Param("n", "int", False)],
+                "int",
+                Program(
+                    [
+                        VariableDeclaration(
+                            "v",
+                            "int",
+                            False,
+                            ObjectAccess(
+                                [
+                                    FunctionCall(
+                                        "f",
+                                        [AddExpr([ObjectAccess(["n"]), IntLiteral(1)], ["+"])],
+                                        pos=(1, 32),
+                                    )
+                                ]
+                            ),
+                        ),
+                        ReturnStatement(ObjectAccess(["v"])),
+                    ]
+                ),
+            ),
+            FunctionCall("f", [IntLiteral(0)]),
+        ]
+    )
+    i = Interpreter()
+    with pytest.raises(InterpreterError) as e:
+        ast.accept(i)
+    assert (
+        str(e.value)
+        == "InterpreterError: row: 1, column: 32, Maximal recursion depth reached!"
+    )
+
+
 def test_args_evaled_from_left_to_right():
     """c : mut int = 0; increment_and_return(): int begin c = c + 1; return c; end Three_Ints : struct begin x: int; y: int; z:int; end Three_Ints(x: int, y: int, z: int): Three_Ints begin rv : mut Three_Ints; rv.x = x; rv.y = y; rv.z = z; return rv; end result : Three_Ints = Three_Ints( increment_and_return(), increment_and_return(), increment_and_return());"""
     ast = Program(
@@ -0,0 +1,118 @@
+"""IR lowering, optimization passes and IR machine"""
+
+import contextlib
+import io
+
+import pytest
+
+from interpreter.interpreter import Interpreter as TreeInterpreter
+from interpreter.interpreter_errors import InterpreterError
+from interpreter.ir import OP_NAMES, IRLowering, format_ir
+from interpreter.ir_machine import IRInterpreter
+from interpreter.ir_passes import optimize_ir
+from interpreter.resolver import Resolver
+from lexer.char_reader import TextIOReader
+from lexer.lexer import Lexer
+from parser.my_parser import Parser
+
+
+NESTED = """
+A : struct begin v : mut int; end
+B : struct begin a : mut A; end
+b : mut B;
+b.a.v = 4;
+"""
+
+
+def parse(source: str):
+    return Parser(Lexer(TextIOReader(io.StringIO(source)))).parse_program()
+
+
+def lowered(source: str, optimize: bool = True):
+    program = parse(source)
+    resolver = Resolver()
+    resolver.resolve(program)
+    code = IRLowering(resolver.annotations).lower(program)
+    return optimize_ir(code) if optimize else code
+
+
+def ops(code) -> list:
+    return [OP_NAMES[instruction.op] for instruction in code.instructions]
+
+
+def run(source: str, interpreter):
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        parse(source).accept(interpreter)
+    return output.getvalue().replace("interpreter  >>> ", "").split()
+
+
+def test_repeated_access_chain_is_computed_once():
+    source = NESTED + "r : int = b.a.v + b.a.v * b.a.v; print(r);"
+    assert ops(lowered(source, optimize=False)).count("ATTR") == 6
+    assert ops(lowered(source)).count("ATTR") == 2
+    assert run(source, IRInterpreter()) == run(source, TreeInterpreter()) == ["20"]
+
+
+def test_chain_is_read_again_after_store_into_it():
+    source = NESTED + "r : int = b.a.v; b.a.v = 5; s : int = b.a.v; print(r); print(s);"
+    assert ops(lowered(source)).count("ATTR") == 4
+    assert run(source, IRInterpreter()) == ["4", "5"]
+
+
+def test_stored_value_is_forwarded_and_copies_are_removed():
+    code = lowered("x : mut int = 0; y : int = 1; x = y + 2; z : int = x * x;")
+    names = ops(code)
+    assert names.count("LOAD") == 0
+    assert "COPY" not in names
+
+
+def test_overwritten_store_is_removed():
+    assert ops(lowered("x : mut int = 1; x = 2; x = 3;")).count("STORE") == 1
+    assert ops(lowered("x : int; x = 1; x = 2;")).count("STORE") == 3
+    with pytest.raises(InterpreterError, match="non mutable"):
+        run("x : int; x = 1; x = 2;", IRInterpreter())
+
+
+def test_invariants_are_hoisted_before_loop():
+    source = "k : int = 4; i : mut int = 0; s : mut int = 0; while i < 3 begin s = s + k * 3; i = i + 1; end print(s);"
+    names = ops(lowered(source))
+    preheader = names[names.index("LOOP") + 1 : names.index("LABEL")]
+    assert "HOIST" in preheader
+    assert "REDO" in names[names.index("LABEL") :]
+    assert run(source, IRInterpreter()) == run(source, TreeInterpreter()) == ["36"]
+
+
+def test_function_bodies_are_optimized():
+    source = "f(n : int) : int begin s : mut int = 0; while s < 20 begin s = s + n * 2; end return s; end print(f(3));"
+    body = lowered(source).nested_codes()[0]
+    assert "HOIST" in ops(body)
+    assert run(source, IRInterpreter()) == ["24"]
+
+
+@pytest.mark.parametrize("start", [0, 5])
+def test_hoisted_instruction_fails_only_when_loop_runs_it(start):
+    source = f"i : mut int = {start}; y : mut int = 0; while i < 3 begin i = i + 1; y = w + 1; end"
+    interpreters = IRInterpreter(), TreeInterpreter()
+    errors = []
+    for interpreter in interpreters:
+        try:
+            run(source, interpreter)
+            errors.append(None)
+        except InterpreterError as error:
+            errors.append(str(error))
+    assert errors[0] == errors[1]
+    assert (errors[0] is None) == (start == 5)
+    assert [it.scopes.get_variable("i", None).value.value for it in interpreters] == [max(start, 1)] * 2
+
+
+def test_format_ir():
+    source = "f(n: int): int begin return n; end\nx : mut int = 0;\nwhile x < 3 begin x = x + f(1); end"
+    listing = format_ir(lowered(source))
+    lines = listing.splitlines()
+    assert lines[0] == "IR of <program>:"
+    assert lines[1].split() == ["0", "DEFINE_FUNCTION", "(f)"]
+    assert "t5 = BINARY t3, t4 (<)" in listing
+    assert lines[6].strip() == "L0:"
+    assert "IR of f:" in lines
+    assert "CHECK t9 (f())" in listing
+    assert "t0 = LOAD (n at (0, 0))" in listing
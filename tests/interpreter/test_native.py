@@ -0,0 +1,125 @@
+"""Numeric functions of NativeInterpreter compiled into C and called through ctypes"""
+
+import contextlib
+import io
+import shutil
+import subprocess
+
+import pytest
+
+from interpreter.interpreter import Interpreter as TreeInterpreter
+from interpreter.interpreter_errors import DivisionByZero, InterpreterError, NumberTooBig
+from interpreter.native import NativeInterpreter, compiler_command
+from lexer.char_reader import TextIOReader
+from lexer.lexer import Lexer
+from parser.AST import *
+from parser.my_parser import Parser
+
+
+pytestmark = pytest.mark.skipif(shutil.which(compiler_command()[0]) is None, reason="no C compiler")
+
+FUNCTIONS = """
+fib(n : int) : int
+begin
+    if n < 2 begin return n; end
+    return fib(n - 1) + fib(n - 2);
+end
+series(x : float, n : int) : float
+begin
+    acc : mut float = x;
+    i : mut int = 0;
+    while i < n begin acc = acc * 1.5 - i / 3; i = i + 1; end
+    return acc;
+end
+cube(n : int) : int
+begin
+    return n * n * n;
+end
+divide(a : int, b : int) : int
+begin
+    return a / b;
+end
+halve(x : float, d : int) : float
+begin
+    return x / d;
+end
+greet(name : str) : int
+begin
+    print(name);
+    return 0;
+end
+"""
+
+
+def parse(source: str) -> Program:
+    return Parser(Lexer(TextIOReader(io.StringIO(source)))).parse_program()
+
+
+def run(source: str, interpreter):
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        parse(FUNCTIONS + source).accept(interpreter)
+    return output.getvalue().replace("interpreter  >>> ", "").split()
+
+
+def native_names(interpreter: NativeInterpreter):
+    return sorted(func_def.name for func_def, native in interpreter._native.values() if native is not None)
+
+
+@pytest.fixture
+def native(tmp_path):
+    return NativeInterpreter(native_cache_dir=str(tmp_path))
+
+
+def test_numeric_functions_run_natively_and_print_the_same(native):
+    source = "print(fib(20)); a : float = series(1.0, 30); print(a); print(greet('hi'));"
+    assert run(source, native) == run(source, TreeInterpreter()) == ["6765", "30297.3251", "hi", "0"]
+    assert native_names(native) == ["fib", "series"]
+
+
+def test_int64_overflow_is_computed_by_interpreter(native):
+    source = "c : int = cube(3000000); print(c);"
+    assert run(source, native) == run(source, TreeInterpreter()) == [str(3000000**3)]
+    assert native_names(native) == ["cube"]
+
+
+@pytest.mark.parametrize(
+    "source, error",
+    [
+        ("a : int = fib(12);", NumberTooBig),
+        ("a : int = divide(1, 0);", DivisionByZero),
+        ("a : int = fib(25);", InterpreterError),
+        ("a : float = halve(1.0, 0);", ZeroDivisionError),
+    ],
+)
+def test_errors_are_the_same(tmp_path, source, error):
+    """Number limit and recursion depth of interpreter are checked in native calls too"""
+    native = NativeInterpreter(max_recursion_depth=20, native_cache_dir=str(tmp_path))
+    tree = TreeInterpreter(max_recursion_depth=20)
+    for interpreter in (native, tree):
+        interpreter.number_limit = 100 if error is NumberTooBig else interpreter.number_limit
+    with pytest.raises(error) as native_error:
+        run(source, native)
+    with pytest.raises(error) as tree_error:
+        run(source, tree)
+    assert str(native_error.value) == str(tree_error.value)
+    assert native.curr_recursion == tree.curr_recursion
+    assert native_names(native) != []
+
+
+def test_shared_object_is_cached(tmp_path, monkeypatch):
+    run("print(fib(5));", NativeInterpreter(native_cache_dir=str(tmp_path)))
+
+    def compile_again(*args, **kwargs):
+        raise AssertionError("shared object was compiled again")
+
+    monkeypatch.setattr(subprocess, "run", compile_again)
+    interpreter = NativeInterpreter(native_cache_dir=str(tmp_path))
+    assert run("print(fib(5));", interpreter) == ["5"]
+    assert native_names(interpreter) == ["fib"]
+
+
+def test_functions_are_interpreted_without_c_compiler(tmp_path, monkeypatch):
+    monkeypatch.setenv("CC", "no-such-compiler")
+    interpreter = NativeInterpreter(native_cache_dir=str(tmp_path))
+    assert run("print(fib(10));", interpreter) == ["55"]
+    assert native_names(interpreter) == []
@@ -0,0 +1,104 @@
+"""Dispatch tables of arithmetic and comparison operators"""
+
+import subprocess
+import sys
+
+import pytest
+
+from interpreter.interpreter import Interpreter
+from interpreter.interpreter_errors import InterpreterError, NotSupportedOperation, NumberTooBig
+from interpreter.interpreter_types import BuiltInValue, StructLayout, StructValue, VariantValue
+from interpreter.operators import BINARY_OPERATORS, BUILT_IN_TAGS, binary_operation
+from parser.AST import VariableDeclaration
+
+
+POS = (1, 1)
+
+
+def struct():
+    return StructValue(StructLayout("S", [VariableDeclaration("a", "int", True)]), [BuiltInValue("int", 1)])
+
+
+def test_table_is_keyed_by_operator_and_raw_types():
+    assert ("+", int, int) in BINARY_OPERATORS
+    assert ("<", str, str) in BINARY_OPERATORS
+    assert ("==", float, int) not in BINARY_OPERATORS
+
+
+@pytest.mark.parametrize(
+    "method, left, right, expected",
+    [
+        ("add", BuiltInValue("int", 1), BuiltInValue("float", 2.7), ("int", 3)),
+        ("add", BuiltInValue("str", "a"), BuiltInValue("float", 1.5), ("str", "a1.5000")),
+        ("sub", BuiltInValue("str", "abcb"), BuiltInValue("str", "b"), ("str", "acb")),
+        ("mul", BuiltInValue("str", "ab"), BuiltInValue("float", 2.9), ("str", "abab")),
+        ("mul", BuiltInValue("str", "ab"), BuiltInValue("str", "xyz"), ("str", "axby")),
+        ("div", BuiltInValue("int", 7), BuiltInValue("str", "2"), ("int", 3)),
+        ("div", BuiltInValue("str", "abc"), BuiltInValue("int", 1), ("str", "b")),
+        ("eq", BuiltInValue("str", "1"), BuiltInValue("int", 1), ("int", 1)),
+        ("lt", BuiltInValue("str", "zz"), BuiltInValue("str", "aaa"), ("int", 1)),
+        ("gt", BuiltInValue("int", 2), BuiltInValue("int", 1), ("int", 1)),
+        ("lteq", BuiltInValue("float", 2.0), BuiltInValue("float", 2.0), ("int", 1)),
+        ("ieq", BuiltInValue("int", 2), BuiltInValue("int", 2), ("int", 0)),
+    ],
+)
+def test_operators_convert_right_operand(method, left, right, expected):
+    result = getattr(Interpreter(), method)(left, right, POS)
+    assert (result.type, result.value) == expected
+
+
+def test_number_limit_of_int_addition():
+    interpreter = Interpreter()
+    interpreter.number_limit = 10
+    with pytest.raises(NumberTooBig):
+        interpreter.add(BuiltInValue("int", 6), BuiltInValue("int", 5), POS)
+
+
+def test_failed_conversion():
+    with pytest.raises(InterpreterError):
+        Interpreter().add(BuiltInValue("int", 1), BuiltInValue("str", "a"), POS)
+
+
+def test_variants_are_unwrapped():
+    left = VariantValue("int", BuiltInValue("int", 2), "n")
+    right = VariantValue("int", BuiltInValue("int", 3), "m")
+    result = Interpreter().mul(left, right, POS)
+    assert (result.type, result.value) == ("int", 6)
+
+
+def test_minus_of_variant_does_not_change_operand():
+    variant = VariantValue("int", BuiltInValue("int", 2), "n")
+    result = Interpreter().minus(variant, POS)
+    assert (result.type, result.name, result.value.value) == ("int", "n", -2)
+    assert variant.value.value == 2
+
+
+@pytest.mark.parametrize("method", ["add", "sub", "mul", "div", "eq", "lt", "gt", "ieq"])
+def test_struct_operands_are_not_supported(method):
+    with pytest.raises(NotSupportedOperation):
+        getattr(Interpreter(), method)(BuiltInValue("int", 1), struct(), POS)
+    with pytest.raises(NotSupportedOperation):
+        getattr(Interpreter(), method)(VariantValue("S", struct(), "s"), BuiltInValue("int", 1), POS)
+
+
+def test_operands_without_signature():
+    with pytest.raises(NotImplementedError):
+        Interpreter().eq(BuiltInValue("float", 1.0), BuiltInValue("int", 1), POS)
+    with pytest.raises(NotImplementedError):
+        Interpreter().sub(struct(), struct(), POS)
+    with pytest.raises(NotImplementedError):
+        binary_operation(Interpreter(), "+", None, BuiltInValue("int", 1), POS)
+
+
+def test_every_builtin_pair_of_arithmetic_operators_is_defined():
+    for operator in "+-*/":
+        for left_tag in (int, float, str):
+            for right_tag in (int, float, str):
+                assert (operator, left_tag, right_tag) in BINARY_OPERATORS
+    assert ("+", BUILT_IN_TAGS[-1], int) not in BINARY_OPERATORS
+
+
+def test_multipledispatch_is_not_imported():
+    code = "import sys, interpreter.interpreter; print('multipledispatch' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "False"
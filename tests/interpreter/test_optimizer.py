@@ -0,0 +1,199 @@
+"""Constant folding, literal propagation and dead code removal"""
+
+import contextlib
+import io
+
+import pytest
+
+from interpreter.interpreter import Interpreter
+from interpreter.interpreter_errors import InterpreterError
+from interpreter.optimizer import Optimizer
+from lexer.char_reader import TextIOReader
+from lexer.lexer import Lexer
+from parser.AST import *
+from parser.my_parser import Parser
+
+
+def optimized(source: str, interpreter=None) -> Program:
+    program = Parser(Lexer(TextIOReader(io.StringIO(source)))).parse_program()
+    return Optimizer(interpreter or Interpreter()).optimize(program)
+
+
+def run(source: str, optimize: bool):
+    program = Parser(Lexer(TextIOReader(io.StringIO(source)))).parse_program()
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        program.accept(Interpreter(optimize=optimize))
+    return output.getvalue().replace("interpreter  >>> ", "").split()
+
+
+def default_values(program: Program):
+    return [statement.default_value for statement in program.children]
+
+
+@pytest.mark.parametrize(
+    "expr, literal",
+    [
+        ("1 + 2 * 3", IntLiteral(7)),
+        ("'a' + 1.5", StrLiteral("a1.5000")),
+        ("7 / '2'", IntLiteral(3)),
+        ("-(2 - 5)", IntLiteral(3)),
+        ("'ab' * 'xyz'", StrLiteral("axby")),
+        ("2 < 3", IntLiteral(1)),
+        ("'1' == 1", IntLiteral(1)),
+        ("2.5 >= 3.0", IntLiteral(0)),
+    ],
+)
+def test_constant_expression_is_folded(expr, literal):
+    program = optimized(f"x : int = {expr};")
+    assert default_values(program) == [literal]
+
+
+def test_only_constant_start_of_chain_is_folded():
+    program = optimized("y : mut int = 1; a : int = 1 + 2 + y; b : int = y + 1 + 2;")
+    folded, unchanged = default_values(program)[1:]
+    assert folded == AddExpr([IntLiteral(3), ObjectAccess(["y"])], ["+"])
+    assert unchanged == AddExpr([ObjectAccess(["y"]), IntLiteral(1), IntLiteral(2)], ["+", "+"])
+
+
+def test_failing_expression_is_left_to_runtime():
+    interpreter = Interpreter()
+    interpreter.number_limit = 10
+    program = optimized("a : int = 1 / 0; b : int = 6 + 5; c : float = 1.5 == 1; d : str = 'a' * 2000;", interpreter)
+    assert [type(value) for value in default_values(program)] == [MultiExpr, AddExpr, RelationExpr, MultiExpr]
+
+
+def test_or_and_are_not_folded():
+    program = optimized("a : int = 0 | 0; b : int = 1 & 1;")
+    assert [type(value) for value in default_values(program)] == [OrExpr, AndExpr]
+
+
+def test_immutable_literal_is_propagated():
+    program = optimized("a : int = 2; s : str = a; b : int = a * 3; c : str = s + b; print(c);")
+    assert default_values(Program(program.children[:4])) == [
+        IntLiteral(2),
+        IntLiteral(2),
+        IntLiteral(6),
+        StrLiteral("26"),
+    ]
+    assert program.children[4].args == [StrLiteral("26")]
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "a : mut int = 2; print(a);",
+        "a : int = 1.5 + x; print(a);",
+        "a : int = 'x'; print(a);",
+        "print(a); a : int = 2;",
+        "a : int = 2; f() : int begin return a; end print(a); ",
+        "a : int = 2; if x begin a : mut int = 3; print(a); end",
+    ],
+)
+def test_other_variables_are_not_propagated(source):
+    program = optimized(source)
+    calls = [s for s in program.children if isinstance(s, FunctionCall)]
+    if_stmts = [s for s in program.children if isinstance(s, IfStatement)]
+    func_defs = [s for s in program.children if isinstance(s, FuncDef)]
+    if func_defs:
+        assert func_defs[0].prog.children[0].expr == ObjectAccess(["a"])
+        assert calls[0].args == [IntLiteral(2)]
+    elif if_stmts:
+        assert if_stmts[0].prog.children[1].args == [ObjectAccess(["a"])]
+    else:
+        assert calls[0].args == [ObjectAccess(["a"])]
+
+
+def test_case_variable_shadows_propagated_variable():
+    source = """
+    point : int = 1;
+    visit s
+    begin
+        case point
+        begin
+            print(point);
+        end
+    end
+    """
+    case_section = optimized(source).children[1].case_sections[0]
+    assert case_section.program.children[0].args == [ObjectAccess(["point"])]
+
+
+def test_if_with_constant_condition_keeps_taken_branch():
+    program = optimized("if 1 < 2 begin print(1); end else begin print(2); end if 0 begin print(3); end")
+    assert program.children == [FunctionCall("print", [IntLiteral(1)])]
+    program = optimized("if '' begin print(1); end else begin x : int = 2; print(x); end")
+    assert len(program.children) == 1
+    kept = program.children[0]
+    assert (kept.cond, kept.else_prog) == (IntLiteral(1), None)
+    assert kept.prog.children[1].args == [IntLiteral(2)]
+
+
+def test_while_with_false_condition_is_removed():
+    program = optimized("while 0 begin print(1); end while x begin print(1 + 1); end")
+    assert len(program.children) == 1
+    assert program.children[0].prog.children[0].args == [IntLiteral(2)]
+
+
+def test_statements_after_return_are_removed():
+    source = """
+    f() : int
+    begin
+        if 1 begin return 2; end
+        print(3);
+    end
+    g() : int
+    begin
+        return null;
+        return 4;
+    end
+    """
+    f, g = optimized(source).children
+    assert f.prog.children == [ReturnStatement(IntLiteral(2))]
+    assert len(g.prog.children) == 2
+
+
+def test_optimized_program_prints_the_same():
+    source = """
+    limit : int = 2 * 5;
+    text : str = 'n' + ':';
+    i : mut int = 0;
+    while i < limit
+    begin
+        if limit > 100 begin print('never'); end
+        i = i + 1 + 1;
+        line : str = text + i;
+        print(line);
+    end
+    f(n : int) : int
+    begin
+        if 1 begin return n * limit; end
+        return 0;
+    end
+    print(f(3));
+    """
+    assert run(source, optimize=True) == run(source, optimize=False)
+
+
+def test_runtime_error_is_kept_by_optimizer():
+    with pytest.raises(InterpreterError):
+        run("print(1); x : int = 'a' + 1;", optimize=True)
+
+
+def test_nested_block_is_optimized_in_scope_of_enclosing_block():
+    source = "i : mut int = 0; while i < 3 begin begin print(i); end i = i + 1; end begin x : int = 5; end y : int = x + 1;"
+    program = optimized(source)
+    assert program.children[2].children == [VariableDeclaration("x", "int", False, IntLiteral(5))]
+    assert program.children[3].default_value == IntLiteral(6)
+    source += " print(y);"
+    assert run(source, optimize=True) == run(source, optimize=False) == ["0", "1", "2", "6"]
+
+
+def test_declaration_in_nested_block_of_taken_branch_stays_in_scope_of_branch():
+    program = optimized("if 1 begin begin x : int = 5; end end")
+    assert isinstance(program.children[0], IfStatement)
+    source = "if 1 begin begin x : int = 5; end end print(x);"
+    for optimize in (True, False):
+        with pytest.raises(InterpreterError, match="Variable 'x' not found in any scope"):
+            run(source, optimize=optimize)
+    source = "v1 : str = 'a'; if v1 begin begin v1 : mut str = 'b'; print(v1); end end print(v1);"
+    assert run(source, optimize=True) == run(source, optimize=False) == ["b", "a"]
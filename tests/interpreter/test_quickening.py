@@ -0,0 +1,142 @@
+"""Operator nodes of QuickeningInterpreter specialized on operand types they have seen"""
+
+import contextlib
+import io
+
+import pytest
+
+from interpreter.interpreter import Interpreter as TreeInterpreter
+from interpreter.interpreter_errors import InterpreterError, NumberTooBig
+from interpreter.quickening import MAX_DEOPTIMIZATIONS, WARMUP, QuickeningInterpreter
+from lexer.char_reader import TextIOReader
+from lexer.lexer import Lexer
+from parser.AST import *
+from parser.my_parser import Parser
+
+
+def parse(source: str) -> Program:
+    return Parser(Lexer(TextIOReader(io.StringIO(source)))).parse_program()
+
+
+def run(program: Program, interpreter=None):
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        program.accept(interpreter or QuickeningInterpreter())
+    return output.getvalue().replace("interpreter  >>> ", "").split()
+
+
+LOOP = """
+i : mut int = 0;
+acc : mut float = 0.5;
+while i < {n}
+begin
+    acc = acc * 2 - i / 2;
+    i = i + 1;
+end
+print(acc);
+"""
+
+USES_X = """
+i : mut int = 0;
+while i < {n}
+begin
+    y : float = x + 1;
+    print(y);
+    i = i + 1;
+end
+"""
+
+
+def run_with_x(program: Program, declaration: str, interpreter):
+    """Runs program after x declared in new scope of interpreter. Interpreter keeps
+    quickened nodes of program run before, so operand types seen by them can change"""
+    interpreter.scopes.push_scope()
+    try:
+        run(parse(declaration), interpreter)
+        return run(program, interpreter)
+    finally:
+        interpreter.scopes.pop_scope(None)
+
+
+def operations(node, interpreter):
+    return interpreter.quickened.get(node).operations
+
+
+def test_loop_operations_are_specialized():
+    interpreter = QuickeningInterpreter()
+    program = parse(LOOP.format(n=WARMUP + 2))
+    assert run(program, interpreter) == run(parse(LOOP.format(n=WARMUP + 2)), TreeInterpreter())
+    loop = program.children[2]
+    condition = loop.cond
+    acc_expr, i_expr = (statement.expr for statement in loop.prog.children)
+    assert [op.tags for op in operations(condition, interpreter)] == [(int, int)]
+    assert [op.tags for op in operations(acc_expr, interpreter)] == [(float, int)]
+    assert [op.tags for op in operations(acc_expr.children[0], interpreter)] == [(float, int)]
+    assert [op.tags for op in operations(i_expr, interpreter)] == [(int, int)]
+    assert all(
+        op.specialized is not None for op in operations(i_expr, interpreter) + operations(condition, interpreter)
+    )
+
+
+def test_quickened_nodes_are_not_shared_between_interpreters():
+    program = parse(LOOP.format(n=WARMUP + 2))
+    first, second = QuickeningInterpreter(), QuickeningInterpreter()
+    run(program, first)
+    assert len(first.quickened) == 5
+    assert len(second.quickened) == 0
+    assert run(program, second) == run(parse(LOOP.format(n=WARMUP + 2)), TreeInterpreter())
+    condition = program.children[2].cond
+    assert operations(condition, first) is not operations(condition, second)
+
+
+def test_node_is_not_specialized_before_warmup():
+    interpreter = QuickeningInterpreter()
+    program = parse(LOOP.format(n=WARMUP - 2))
+    run(program, interpreter)
+    i_expr = program.children[2].prog.children[1].expr
+    assert operations(i_expr, interpreter)[0].specialized is None
+
+
+def test_changed_operand_types_deoptimize_node():
+    interpreter = QuickeningInterpreter()
+    program = parse(USES_X.format(n=WARMUP + 2))
+    generic_program = parse(USES_X.format(n=WARMUP + 2))
+    for declaration in ("x : int = 1;", "x : float = 1.5;"):
+        assert run_with_x(program, declaration, interpreter) == run_with_x(
+            generic_program, declaration, TreeInterpreter()
+        )
+    operation = operations(program.children[1].prog.children[0].default_value, interpreter)[0]
+    assert (operation.tags, operation.deoptimizations) == ((float, int), 1)
+    assert operation.specialized is not None
+
+
+def test_node_deoptimized_too_many_times_stays_generic():
+    interpreter = QuickeningInterpreter()
+    program = parse(USES_X.format(n=WARMUP))
+    for _ in range(MAX_DEOPTIMIZATIONS):
+        run_with_x(program, "x : int = 1;", interpreter)
+        run_with_x(program, "x : float = 1.5;", interpreter)
+    operation = operations(program.children[1].prog.children[0].default_value, interpreter)[0]
+    assert operation.is_generic
+    assert operation.evaluator(None, None).__name__ == "run_generic"
+
+
+def test_specialized_add_checks_number_limit():
+    interpreter = QuickeningInterpreter()
+    interpreter.number_limit = 100
+    program = parse("i : mut int = 0; while 1 begin i = i + 10; end")
+    with pytest.raises(NumberTooBig):
+        run(program, interpreter)
+    assert interpreter.scopes.get_variable("i", None).value.value == 100
+    assert operations(program.children[1].prog.children[0].expr, interpreter)[0].specialized is not None
+
+
+def test_struct_operand_fails_in_specialized_node_like_in_generic_one():
+    declaration = "A : struct begin a : mut int; end x : mut A; x.a = 1;"
+    interpreter = QuickeningInterpreter()
+    program = parse(USES_X.format(n=WARMUP + 2))
+    run_with_x(program, "x : int = 1;", interpreter)
+    with pytest.raises(InterpreterError) as quickened:
+        run_with_x(program, declaration, interpreter)
+    with pytest.raises(InterpreterError) as generic:
+        run_with_x(parse(USES_X.format(n=WARMUP + 2)), declaration, TreeInterpreter())
+    assert str(quickened.value) == str(generic.value)
@@ -0,0 +1,170 @@
+"""Static (depth, slot) addresses of variables"""
+
+import contextlib
+import io
+
+from interpreter.interpreter import Interpreter
+from interpreter.resolver import Resolver
+from interpreter.scopes import Scopes
+from lexer.char_reader import TextIOReader
+from lexer.lexer import Lexer
+from parser.my_parser import Parser
+
+
+def parse(source: str):
+    return Parser(Lexer(TextIOReader(io.StringIO(source)))).parse_program()
+
+
+def resolved(source: str, current_scope_names=None):
+    program = parse(source)
+    resolver = Resolver(current_scope_names)
+    resolver.resolve(program)
+    return program, resolver.annotations.addresses.get
+
+
+def run(source: str):
+    interpreter = Interpreter()
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        parse(source).accept(interpreter)
+    return output.getvalue()
+
+
+def test_declarations_get_consecutive_slots():
+    program, address = resolved("a : int = 1; b : int = 2;")
+    assert [address(statement) for statement in program.children] == [(0, 0), (0, 1)]
+
+
+def test_access_in_nested_blocks():
+    program, address = resolved("a : mut int = 1; if a begin b : int = a; while b begin a = b; end end")
+    if_stmt = program.children[1]
+    assert address(if_stmt.cond) == (0, 0)
+    declaration = if_stmt.prog.children[0]
+    assert address(declaration) == (0, 0)
+    assert address(declaration.default_value) == (1, 0)
+    while_stmt = if_stmt.prog.children[1]
+    assert address(while_stmt.cond) == (0, 0)
+    assignment = while_stmt.prog.children[0]
+    assert address(assignment) == (2, 0)
+    assert address(assignment.expr) == (1, 0)
+
+
+def test_shadowing_follows_order_of_execution():
+    program, address = resolved("a : int = 1; if a begin b : int = a; a : int = 2; c : int = a; end")
+    block = program.children[1].prog
+    assert address(block.children[0].default_value) == (1, 0)
+    assert address(block.children[1]) == (0, 1)
+    assert address(block.children[2].default_value) == (0, 1)
+
+
+def test_params_and_function_scope():
+    program, address = resolved("a : int = 1; f(x: int, y: int): int begin z : int = y; return a; end")
+    func_def = program.children[1]
+    assert [address(param) for param in func_def.params] == [(0, 0), (0, 1)]
+    assert address(func_def.prog.children[0]) == (0, 2)
+    assert address(func_def.prog.children[0].default_value) == (0, 1)
+    assert address(func_def.prog.children[1].expr) == (1, 0)
+
+
+def test_name_declared_after_function_definition_is_looked_up_by_name():
+    source = """
+    a : int = 1;
+    if a
+    begin
+        f(): int begin return a; end
+        g(): int begin return a; end
+        print(f());
+        a : int = 2;
+        print(g());
+    end
+    """
+    program, address = resolved(source)
+    block = program.children[1].prog
+    assert address(block.children[0].prog.children[0].expr) is None
+    assert run(source) == "interpreter  >>> 1\ninterpreter  >>> 2\n"
+
+
+def test_case_section_variable():
+    program, address = resolved("visit n begin case i begin x : int = i; end end")
+    case_program = program.children[0].case_sections[0].program
+    assert address(case_program.children[0]) == (0, 1)
+    assert address(case_program.children[0].default_value) == (0, 0)
+
+
+def test_redeclaration_and_unknown_names_get_no_address():
+    program, address = resolved("a : int = 1; a : int = 2; b = c;")
+    assert address(program.children[1]) is None
+    assert address(program.children[2]) is None
+    assert address(program.children[2].expr) is None
+
+
+def test_names_of_current_scope_are_known():
+    program, address = resolved("b : int = a;", current_scope_names=["x", "a"])
+    assert address(program.children[0]) == (0, 2)
+    assert address(program.children[0].default_value) == (0, 1)
+
+
+def test_slots_of_scopes_follow_declarations():
+    interpreter = Interpreter()
+    parse("a : int = 1; b : mut int = 2;").accept(interpreter)
+    assert interpreter.scopes.current_scope_names() == ["a", "b"]
+    program = parse("c : int = b; b = a + c;")
+    program.accept(interpreter)
+    assert interpreter.annotations.addresses.get(program.children[0].default_value) == (0, 1)
+    assert interpreter.scopes.get_variable("b", (1, 1)).value.value == 3
+
+
+def test_addresses_are_not_shared_between_interpreters():
+    first, second = Interpreter(), Interpreter()
+    parse("a : int = 1;").accept(first)
+    parse("x : int = 2; a : int = 3;").accept(second)
+    program = parse("b : int = a;")
+    program.accept(first)
+    program.accept(second)
+    assert first.annotations.addresses.get(program.children[0].default_value) == (0, 0)
+    assert second.annotations.addresses.get(program.children[0].default_value) == (0, 1)
+    assert second.scopes.get_variable("b", (1, 1)).value.value == 3
+
+
+def test_wrong_slot_falls_back_to_lookup_by_name():
+    scopes = Scopes()
+    scopes.reserve_place_for_("a", "int", False, (1, 1))
+    scopes.reserve_place_for_("b", "int", False, (1, 1))
+    assert scopes.get_variable_at((0, 0), "b", (1, 1)) is scopes.get_variable("b", (1, 1))
+    assert scopes.get_variable_at((0, 5), "a", (1, 1)) is scopes.get_variable("a", (1, 1))
+
+
+def test_function_called_with_less_arguments_than_params():
+    source = """
+    f(x: int, y: int): null_type
+    begin
+        z : int = 3;
+        print(z);
+    end
+    f(1);
+    """
+    assert run(source) == "interpreter  >>> 3\n"
+
+
+def test_loop_body_variables_are_declared_in_every_iteration():
+    source = """
+    i : mut int = 0;
+    while i < 3
+    begin
+        j : int = i * 2;
+        print(j);
+        i = i + 1;
+    end
+    """
+    assert run(source) == "interpreter  >>> 0\ninterpreter  >>> 2\ninterpreter  >>> 4\n"
+
+
+def test_function_sees_scope_of_its_definition_not_of_its_caller():
+    source = """
+    x : int = 1;
+    g(): int begin return x; end
+    h(x: int): int begin return g(); end
+    f(x: int): int begin return h(x + 1); end
+    r : int = f(10);
+    print(r);
+    """
+    assert run(source) == "interpreter  >>> 1\n"
@@ -0,0 +1,57 @@
+"""Linked frames of scopes"""
+
+import pytest
+
+from interpreter.interpreter_errors import InterpreterError
+from interpreter.scopes import Scopes
+from parser.AST import FuncDef, Program
+
+
+def test_entering_scope_links_frame_to_current_one():
+    scopes = Scopes()
+    global_scope = scopes.curr_scope
+    scopes.push_scope()
+    assert scopes.curr_scope.parent is global_scope
+    scopes.pop_scope((1, 1))
+    assert scopes.curr_scope is global_scope
+
+
+def test_popping_global_scope():
+    with pytest.raises(InterpreterError):
+        Scopes().pop_scope((1, 1))
+
+
+def test_frame_without_declarations_shares_empty_namespaces():
+    scopes = Scopes()
+    scopes.push_scope()
+    first = scopes.curr_scope
+    scopes.pop_scope((1, 1))
+    scopes.push_scope()
+    second = scopes.curr_scope
+    assert first.variables is second.variables
+    assert first.functions is second.functions
+    scopes.reserve_place_for_("a", "int", False, (1, 1))
+    assert "a" in second.variables
+    assert "a" not in first.variables
+
+
+def test_variables_of_outer_scopes_are_visible():
+    scopes = Scopes()
+    scopes.add_variable("a", "int", True, None, (1, 1))
+    scopes.push_scope()
+    scopes.add_variable("b", "int", True, None, (1, 1))
+    assert scopes.get_variable("a", (1, 1)) is scopes.global_scope.variables["a"]
+    scopes.pop_scope((1, 1))
+    with pytest.raises(InterpreterError):
+        scopes.get_variable("b", (1, 1))
+
+
+def test_function_is_found_with_scope_of_its_definition():
+    scopes = Scopes()
+    scopes.push_scope()
+    definition_scope = scopes.curr_scope
+    func_def = FuncDef("f", [], "int", Program([]))
+    scopes.add_function(func_def)
+    scopes.push_scope()
+    scopes.push_scope()
+    assert scopes.get_function_definition_and_its_scope("f", (1, 1)) == (func_def, definition_scope)
@@ -0,0 +1,122 @@
+"""Struct values kept in lists laid out by their struct type"""
+
+import pytest
+
+from interpreter.interpreter import Interpreter
+from interpreter.interpreter_errors import InterpreterError
+from interpreter.interpreter_types import BuiltInValue, StructLayout, StructValue
+from parser.AST import *
+
+
+LEAF = StructDef("Leaf", [VariableDeclaration("value", "int", True)])
+NODE = StructDef(
+    "Node",
+    [
+        VariableDeclaration("value", "int", True),
+        VariableDeclaration("left", "Leaf", True),
+        VariableDeclaration("name", "str", False, StrLiteral("n")),
+    ],
+)
+
+
+def test_layout_is_computed_when_struct_is_defined():
+    i = Interpreter()
+    Program([LEAF, NODE]).accept(i)
+    layout = i.scopes.get_layout_for_("Node", (1, 1))
+    assert layout.names == ("value", "left", "name")
+    assert layout.types == ("int", "Leaf", "str")
+    assert layout.mutables == (True, True, False)
+    assert layout.offsets == {"value": 0, "left": 1, "name": 2}
+    assert i.scopes.get_var_defs_for_("Node", (1, 1)) is NODE.attributes
+
+
+def test_struct_value_is_list_of_attribute_values():
+    """Node : struct ...; n : mut Node; n.value = 3;"""
+    ast = Program(
+        [
+            LEAF,
+            NODE,
+            VariableDeclaration("n", "Node", True),
+            AssignmentStatement(ObjectAccess(["n", "value"]), IntLiteral(3)),
+        ]
+    )
+    i = Interpreter()
+    ast.accept(i)
+    node = i.scopes.get_variable("n", (1, 1)).value
+    assert node.layout is i.scopes.get_layout_for_("Node", (1, 1))
+    assert [value.value if value else value for value in node.values] == [3, None, "n"]
+    assert not hasattr(node, "__dict__")
+
+
+def test_attribute_is_variable_with_metadata_of_layout():
+    layout = StructLayout("Node", NODE.attributes)
+    node = StructValue(layout, [None, None, BuiltInValue("str", "n")])
+    attribute = node.get_inner_variable("name")
+    assert (attribute.type, attribute.is_mutable) == ("str", False)
+    assert not attribute.can_variable_be_updated()
+    value = node.get_inner_variable("value")
+    value.value = BuiltInValue("int", 1)
+    assert node["value"].value == 1
+
+
+def test_clone_shares_only_struct_attributes():
+    layout = StructLayout("Node", NODE.attributes)
+    leaf_layout = StructLayout("Leaf", LEAF.attributes)
+    left = StructValue(leaf_layout, leaf_layout.empty_values())
+    values = [BuiltInValue("int", 1), left, None]
+    clone = layout.clone(values)
+    assert clone == values and clone is not values
+    assert left.shared
+    assert StructLayout("Point", [VariableDeclaration("x", "int", True)]).clone is list.copy
+
+
+def test_reading_attribute_without_value():
+    """Node : struct ...; n : mut Node; n.value = 3; x : Leaf = n.left;"""
+    ast = Program(
+        [
+            LEAF,
+            NODE,
+            VariableDeclaration("n", "Node", True),
+            AssignmentStatement(ObjectAccess(["n", "value"]), IntLiteral(3)),
+            VariableDeclaration("x", "Leaf", False, ObjectAccess(["n", "left"], pos=(4, 1))),
+        ]
+    )
+    with pytest.raises(InterpreterError) as e:
+        ast.accept(Interpreter())
+    assert str(e.value) == "InterpreterError: row: 4, column: 1, Variable 'n.left' has no value"
+
+
+def test_getting_unset_attribute_of_returned_struct():
+    """make() : Node begin n : mut Node; n.value = 1; return n; end x : Leaf = make().left;"""
+    make = FuncDef(
+        "make",
+        [],
+        "Node",
+        Program(
+            [
+                VariableDeclaration("n", "Node", True),
+                AssignmentStatement(ObjectAccess(["n", "value"]), IntLiteral(1)),
+                ReturnStatement(ObjectAccess(["n"])),
+            ]
+        ),
+    )
+    access = ObjectAccess([FunctionCall("make", []), "left"], pos=(5, 1))
+    ast = Program([LEAF, NODE, make, VariableDeclaration("x", "Leaf", False, access)])
+    with pytest.raises(InterpreterError) as e:
+        ast.accept(Interpreter())
+    assert str(e.value) == "InterpreterError: row: 5, column: 1, Variable 'make().left' has no value"
+
+
+def test_assigning_unknown_attribute():
+    """Node : struct ...; n : mut Node; n.right = 3;"""
+    ast = Program(
+        [
+            LEAF,
+            NODE,
+            VariableDeclaration("n", "Node", True),
+            AssignmentStatement(ObjectAccess(["n", "right"]), IntLiteral(3), pos=(3, 1)),
+        ]
+    )
+    with pytest.raises(InterpreterError) as e:
+        ast.accept(Interpreter())
+    assert str(e.value) == "InterpreterError: row: 3, column: 1, Attribute 'right' not found in type 'Node'"
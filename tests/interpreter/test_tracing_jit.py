@@ -0,0 +1,125 @@
+"""Hot loops and functions of TracingInterpreter compiled into code traced for their scopes"""
+
+import contextlib
+import io
+
+from interpreter.interpreter import Interpreter as TreeInterpreter
+from interpreter.tracing_jit import HOT_THRESHOLD, MAX_TRACES, TracingInterpreter
+from lexer.char_reader import TextIOReader
+from lexer.lexer import Lexer
+from parser.AST import *
+from parser.my_parser import Parser
+
+
+LOOP = """
+i : mut int = 0;
+acc : mut int = 0;
+while i < {n}
+begin
+    acc = acc + i * 2 - i / 3;
+    i = i + 1;
+end
+print(acc);
+"""
+
+USES_X = """
+i : mut int = 0;
+while i < {n}
+begin
+    y : float = x + 1;
+    print(y);
+    i = i + 1;
+end
+"""
+
+FIB = """
+fib(n : int) : int
+begin
+    if n < 2 begin return n; end
+    return fib(n - 1) + fib(n - 2);
+end
+print(fib(15));
+"""
+
+
+def parse(source: str) -> Program:
+    return Parser(Lexer(TextIOReader(io.StringIO(source)))).parse_program()
+
+
+def run(program: Program, interpreter):
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        program.accept(interpreter)
+    return output.getvalue().replace("interpreter  >>> ", "").split()
+
+
+def run_in_new_scope(program: Program, declaration: str, interpreter):
+    """Runs program in new scope of interpreter, after x is declared in it. Slots of
+    that scope are the ones program was resolved for, but type of x may be other"""
+    interpreter.scopes.push_scope()
+    output = run(parse(declaration), interpreter) + run(program, interpreter)
+    interpreter.scopes.pop_scope(None)
+    return output
+
+
+def test_hot_loop_is_compiled_and_prints_the_same():
+    interpreter = TracingInterpreter()
+    source = LOOP.format(n=HOT_THRESHOLD * 10)
+    assert run(parse(source), interpreter) == run(parse(source), TreeInterpreter())
+    assert interpreter.jit_stats.as_dict() == {
+        "compiled_loops": 1,
+        "compiled_functions": 0,
+        "compiled_runs": 1,
+        "guard_failures": 0,
+        "compile_failures": 0,
+        "blacklisted": 0,
+    }
+
+
+def test_loop_is_not_compiled_before_it_is_hot():
+    interpreter = TracingInterpreter()
+    run(parse(LOOP.format(n=HOT_THRESHOLD - 1)), interpreter)
+    assert interpreter.jit_stats.compiled_loops == 0
+
+
+def test_hot_function_is_compiled():
+    interpreter = TracingInterpreter()
+    assert run(parse(FIB), interpreter) == ["610"]
+    assert interpreter.jit_stats.compiled_functions == 1
+    assert interpreter.jit_stats.compiled_runs > 900
+
+
+def test_guard_failure_falls_back_to_interpreter_and_traces_again():
+    program = parse(USES_X.format(n=HOT_THRESHOLD * 2))
+    interpreter = TracingInterpreter()
+    tree_interpreter = TreeInterpreter()
+    for declaration in ("x : int = 1;", "x : float = 1.5;"):
+        expected = run_in_new_scope(parse(USES_X.format(n=HOT_THRESHOLD * 2)), declaration, tree_interpreter)
+        assert run_in_new_scope(program, declaration, interpreter) == expected
+    stats = interpreter.jit_stats
+    assert (stats.compiled_loops, stats.guard_failures, stats.compiled_runs) == (2, 1, 2)
+
+
+def test_loop_traced_too_many_times_is_only_interpreted():
+    program = parse(USES_X.format(n=HOT_THRESHOLD * 2))
+    interpreter = TracingInterpreter()
+    for _ in range(MAX_TRACES + 1):
+        run_in_new_scope(program, "x : int = 1;", interpreter)
+        run_in_new_scope(program, "x : float = 1.5;", interpreter)
+    stats = interpreter.jit_stats
+    assert (stats.compiled_loops, stats.guard_failures, stats.blacklisted) == (MAX_TRACES, MAX_TRACES, 1)
+
+
+def test_hot_loop_with_nested_block_is_compiled():
+    source = f"i : mut int = 0; while i < {HOT_THRESHOLD * 2} begin begin print(i); end i = i + 1; end"
+    interpreter = TracingInterpreter()
+    assert run(parse(source), interpreter) == run(parse(source), TreeInterpreter())
+    assert (interpreter.jit_stats.compiled_loops, interpreter.jit_stats.compile_failures) == (1, 0)
+
+
+def test_loop_that_can_not_be_traced_is_only_interpreted():
+    source = f"i : mut int = 0; while i < {HOT_THRESHOLD * 2} begin print(i); i = i + 1; end"
+    program = parse(source)
+    program.children[-1].prog.children.append(CaseSection("a", Program([])))
+    interpreter = TracingInterpreter()
+    assert run(program, interpreter) == run(parse(source), TreeInterpreter())
+    assert (interpreter.jit_stats.compiled_loops, interpreter.jit_stats.compile_failures) == (0, 1)
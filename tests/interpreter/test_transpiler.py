@@ -0,0 +1,161 @@
+"""Programs transpiled into Python modules, run from memory and from modules cached on disk"""
+
+import contextlib
+import io
+
+import pytest
+
+from interpreter.interpreter import Interpreter as TreeInterpreter
+from interpreter.transpiler import TRANSPILED_SUFFIX, NotTranspilable, Transpiler, TranspilingInterpreter
+from lexer.char_reader import TextIOReader
+from lexer.lexer import Lexer
+from parser.AST import *
+from parser.my_parser import Parser
+
+
+PROGRAM = """
+Point : struct
+begin
+    x : mut int = 3;
+end
+Line : struct
+begin
+    start : mut Point;
+end
+Shape : variant
+begin
+    point : Point;
+    line : Line;
+end
+fib(n : int) : int
+begin
+    if n < 2 begin return n; end
+    return fib(n - 1) + fib(n - 2);
+end
+p : mut Point;
+i : mut int = 0;
+while i < 10 begin i = i + 1; end
+p.x = -i * 2;
+print(fib(i));
+print(p.x);
+s : Shape = p;
+visit s
+begin
+    case line begin print('line'); end
+    case point begin y : int = point.x + 1; print(y); end
+end
+"""
+OUTPUT = ["55", "-20", "-19"]
+
+
+def parse(source: str) -> Program:
+    return Parser(Lexer(TextIOReader(io.StringIO(source)))).parse_program()
+
+
+def output_of(run):
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        run()
+    return output.getvalue().replace("interpreter  >>> ", "").split()
+
+
+def transpile(source: str) -> str:
+    program = parse(source)
+    interpreter = TranspilingInterpreter()
+    interpreter._resolve(program)
+    return Transpiler(interpreter.annotations).transpile(program)
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    path = tmp_path / "program.txt"
+    path.write_text(PROGRAM, encoding="ascii")
+    return str(path)
+
+
+def test_generated_module_runs_without_ast():
+    source = transpile(PROGRAM)
+    namespace = {}
+    exec(compile(source, "<test>", "exec"), namespace)
+    assert output_of(lambda: namespace["main"](TranspilingInterpreter())) == OUTPUT
+
+
+def test_functions_become_python_functions_and_visit_dispatches_on_option():
+    source = transpile(PROGRAM)
+    assert source.count("    def fn") == 1
+    assert "== 'line':" in source and "== 'point':" in source
+    assert "visit_func_call" not in source and "accept" not in source
+
+
+def test_equal_literals_are_one_constant():
+    source = transpile("a : int = 300; b : int = 300; c : str = 'a'; d : str = 'a';")
+    assert source.count("constant('int', 300)") == 1
+    assert source.count("constant('str', 'a')") == 1
+
+
+def test_program_python_can_not_compile_is_run_by_tree_interpreter():
+    depth = 25
+    source = "i : mut int = 1;\n" + "while i begin\n" * depth + "i = 0; print('deep');\n" + "end\n" * depth
+    program = parse(source)
+    interpreter = TranspilingInterpreter()
+    assert output_of(lambda: program.accept(interpreter)) == ["deep"]
+    assert output_of(lambda: parse(source).accept(TreeInterpreter())) == ["deep"]
+    assert interpreter._modules[id(program)][1] is None
+
+
+def test_generated_module_is_cached_next_to_source(source_file):
+    assert output_of(lambda: TranspilingInterpreter().interpret_file(source_file, lambda: parse(PROGRAM))) == OUTPUT
+    with open(source_file + TRANSPILED_SUFFIX, encoding="utf-8") as f:
+        assert f.readline().startswith("# source sha256 ")
+
+    def parse_again():
+        raise AssertionError("cached module was not used")
+
+    assert output_of(lambda: TranspilingInterpreter().interpret_file(source_file, parse_again)) == OUTPUT
+
+
+def test_cached_module_is_replaced_when_source_or_options_change(source_file):
+    parsed = []
+
+    def counting_parse():
+        parsed.append(True)
+        with open(source_file, encoding="ascii") as f:
+            return parse(f.read())
+
+    output_of(lambda: TranspilingInterpreter().interpret_file(source_file, counting_parse))
+    output_of(lambda: TranspilingInterpreter(optimize=True).interpret_file(source_file, counting_parse))
+    with open(source_file, "a", encoding="ascii") as f:
+        f.write("print('more');\n")
+    output = output_of(lambda: TranspilingInterpreter(optimize=True).interpret_file(source_file, counting_parse))
+    assert output == OUTPUT + ["more"]
+    assert len(parsed) == 3
+
+
+def test_module_is_not_cached_for_interpreter_with_declarations(source_file):
+    interpreter = TranspilingInterpreter()
+    output_of(lambda: parse("a : int = 1;").accept(interpreter))
+    assert output_of(lambda: interpreter.interpret_file(source_file, lambda: parse(PROGRAM))) == OUTPUT
+    with pytest.raises(FileNotFoundError):
+        open(source_file + TRANSPILED_SUFFIX)
+
+
+def test_nested_block_is_inlined_into_enclosing_block():
+    source = "i : mut int = 0; while i < 3 begin begin print(i); end i = i + 1; end begin x : int = i; end print(x);"
+    program = parse(source)
+    interpreter = TranspilingInterpreter()
+    assert output_of(lambda: program.accept(interpreter)) == ["0", "1", "2", "3"]
+    assert output_of(lambda: parse(source).accept(TreeInterpreter())) == ["0", "1", "2", "3"]
+    assert interpreter._modules[id(program)][1] is not None
+
+
+def test_program_that_is_not_transpilable_is_run_by_tree_interpreter():
+    program = parse("print(1);")
+    program.children.append(ReturnStatement(FunctionCall("print", [IntLiteral(2)])))
+    program.children[0] = CaseSection("a", Program([]))
+    interpreter = TranspilingInterpreter()
+    assert output_of(lambda: program.accept(interpreter)) == ["2"]
+    assert interpreter._modules[id(program)][1] is None
+
+
+def test_return_without_value_is_not_transpiled():
+    with pytest.raises(NotTranspilable):
+        Transpiler().transpile(Program([ReturnStatement(None)]))
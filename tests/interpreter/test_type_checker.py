@@ -0,0 +1,160 @@
+"""Static type checking and annotations that let engines skip dynamic checks"""
+
+import contextlib
+import io
+
+import pytest
+
+from interpreter.interpreter import Interpreter
+from interpreter.interpreter_errors import TypeCheckError
+from interpreter.scopes import Scopes
+from interpreter.type_checker import BUILT_IN, CONVERT, KEEP, TypeChecker
+from lexer.char_reader import TextIOReader
+from lexer.lexer import Lexer
+from parser.AST import *
+from parser.my_parser import Parser
+
+
+SHAPES = """
+Point : struct
+begin
+    x : mut int;
+end
+Line : struct
+begin
+    start : mut Point;
+end
+Shape : variant
+begin
+    point : Point;
+    line : Line;
+end
+Number : variant
+begin
+    i : int;
+    f : float;
+end
+"""
+
+
+def parse(source: str) -> Program:
+    return Parser(Lexer(TextIOReader(io.StringIO(source)))).parse_program()
+
+
+def check(source: str, scopes: Scopes = None):
+    program = parse(source)
+    checker = TypeChecker(scopes or Scopes())
+    errors = checker.check(program)
+    return program, [str(error) for error in errors], checker.annotations
+
+
+def run(source: str):
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        parse(source).accept(Interpreter(check_types=True))
+    return output.getvalue().replace("interpreter  >>> ", "").split()
+
+
+@pytest.mark.parametrize(
+    "source, conversions",
+    [
+        ("a : int = 1; b : str = a; c : float = '2';", [KEEP, BUILT_IN, BUILT_IN]),
+        ("a : mut int; a = 1 + 'a' * 2;", [CONVERT, KEEP]),
+        ("a : mut str = 1 < 2; a = 1 | 0;", [BUILT_IN, CONVERT]),
+        (SHAPES + "p : mut Point; l : mut Line; l.start = p; s : Shape = p; n : Number = 1;", [CONVERT] * 2 + [KEEP] + [CONVERT] * 2),
+    ],
+)
+def test_conversions_are_chosen_from_static_types(source, conversions):
+    program, errors, annotations = check(source)
+    statements = [s for s in program.children if isinstance(s, (VariableDeclaration, AssignmentStatement))]
+    assert errors == []
+    assert [annotations.conversions.get(statement) for statement in statements] == conversions
+
+
+@pytest.mark.parametrize(
+    "source, error",
+    [
+        ("a : Foo;", "row: 1, column: 1, Type 'Foo' not found"),
+        (SHAPES + "p : Point; a : int = p;", "row: 20, column: 12, Can not convert struct type 'Point' to builtin type 'int'"),
+        (SHAPES + "l : mut Line; l.start = 1;", "row: 20, column: 15, Can not convert built in type 'int' into struct type 'Point'"),
+        (SHAPES + "l : Line; p : Point = l;", "row: 20, column: 11, Can not convert struct type 'Line' to struct type 'Point'"),
+        (SHAPES + "l : Line; a : int = l.end_;", "row: 20, column: 21, Attribute 'end_' not found in type 'Line'"),
+        (SHAPES + "p : Point; a : int = 1 + p;", "row: 20, column: 12, Operator '+' is not supported for struct type 'Point'"),
+        (SHAPES + "n : Number; p : Point; n = p;", "row: 20, column: 24, No matching struct variant option while converting from struct 'Point' to variant type 'Number'"),
+        ("a : int = 1; visit a begin end", "row: 1, column: 14, There is no variant type in visit"),
+        ("f(a : Foo) : int begin return 1; end", "row: 1, column: 3, Type 'Foo' not found"),
+        (SHAPES + "f() : int begin p : Point; return p; end", "row: 20, column: 28, Can not convert struct type 'Point' to builtin type 'int'"),
+    ],
+)
+def test_type_errors_are_found_before_run(source, error):
+    _, errors, _ = check(source)
+    assert [text.removeprefix("TypeCheckError: ") for text in errors] == [error]
+
+
+def test_every_error_is_reported():
+    _, errors, _ = check("a : Foo; b : Bar;")
+    assert len(errors) == 2
+
+
+def test_visit_of_variant_of_structs_is_checked():
+    source = SHAPES + """
+    s : Shape;
+    visit s begin case point begin x : int = point.x; end end
+    n : Number = 1;
+    visit n begin case i begin j : str = i; end end
+    """
+    program, errors, annotations = check(source)
+    shapes, numbers = [s for s in program.children if isinstance(s, VisitStatement)]
+    assert errors == []
+    assert (annotations.checked.get(shapes, False), annotations.checked.get(numbers, False)) == (True, False)
+    assert annotations.conversions.get(shapes.case_sections[0].program.children[0]) == KEEP
+    assert annotations.conversions.get(numbers.case_sections[0].program.children[0]) == BUILT_IN
+
+
+def test_names_declared_later_are_not_known_in_function():
+    source = """
+    y : int = 1;
+    f() : int
+    begin
+        x : str = y;
+        z : str = w;
+        return 0;
+    end
+    if 1 begin y : str = 'a'; print(f()); end
+    w : int = 2;
+    """
+    program, errors, annotations = check(source)
+    x, z = program.children[1].prog.children[:2]
+    assert errors == []
+    assert (annotations.conversions.get(x), annotations.conversions.get(z)) == (BUILT_IN, CONVERT)
+    source = "f() : int begin x : str = y; return 0; end y : int = 1;"
+    program, _, annotations = check(source)
+    assert annotations.conversions.get(program.children[0].prog.children[0]) == CONVERT
+
+
+def test_names_of_interpreter_scopes_are_known():
+    interpreter = Interpreter()
+    parse("P : struct begin x : mut int; end p : mut P;").accept(interpreter)
+    program, errors, annotations = check("q : P = p; a : int = p;", interpreter.scopes)
+    assert annotations.conversions.get(program.children[0]) == KEEP
+    assert errors == ["TypeCheckError: row: 1, column: 12, Can not convert struct type 'P' to builtin type 'int'"]
+
+
+def test_program_with_type_error_is_not_run():
+    with pytest.raises(TypeCheckError) as e:
+        run("print('never'); a : int = 1; visit a begin end")
+    assert str(e.value) == "TypeCheckError: row: 1, column: 30, There is no variant type in visit"
+
+
+def test_checked_program_prints_the_same():
+    source = SHAPES + """
+    s : mut Shape;
+    s.x = 4;
+    total : mut float = 0.5;
+    visit s begin case point begin total = total + point.x; end end
+    text : str = total;
+    print(text);
+    n : Number = 2;
+    m : str = n;
+    print(m);
+    """
+    assert run(source) == ["4.5000", "2"]
@@ -0,0 +1,75 @@
+"""Bytecode compiler, virtual machine and disassembler"""
+
+import contextlib
+import io
+import sys
+from array import array
+
+from interpreter.bytecode import BytecodeCompiler
+from interpreter.disassembler import disassemble
+from interpreter.interpreter_types import BuiltInValue, constant
+from interpreter.opcodes import OPCODE_NAMES
+from interpreter.vm import VMInterpreter
+from lexer.char_reader import TextIOReader
+from lexer.lexer import Lexer
+from parser.my_parser import Parser
+
+
+DEEP_RECURSION = """
+depth(n: int): int
+begin
+    if n == 0 begin return 0; end
+    return depth(n - 1) + 1;
+end
+r : int = depth(3000);
+print(r);
+"""
+
+
+def parse(source: str):
+    return Parser(Lexer(TextIOReader(io.StringIO(source)))).parse_program()
+
+
+def test_recursion_deeper_than_python_stack():
+    program = parse(DEEP_RECURSION)
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(200)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            program.accept(VMInterpreter(max_recursion_depth=10_000))
+    finally:
+        sys.setrecursionlimit(limit)
+    assert output.getvalue() == "interpreter  >>> 3000\n"
+
+
+def test_code_is_array_with_pools():
+    code = BytecodeCompiler().compile(parse("a : int = 1; b : int = a + 1; c : int = a + 1;"))
+    assert isinstance(code.code, array)
+    assert len(code.code) == 2 * len(code.positions)
+    assert code.consts.count(("a", None)) == 1
+    assert [const for const in code.consts if isinstance(const, BuiltInValue)] == [constant("int", 1)]
+
+
+def test_function_body_is_separate_code_object():
+    code = BytecodeCompiler().compile(parse("f(n: int): int begin return n; end"))
+    body = code.consts[0].prog.code
+    assert body.name == "f"
+    assert [OPCODE_NAMES[op] for op in body.code[::2]] == [
+        "LOAD_NAME",
+        "RETURN_IF_VALUE",
+        "LOAD_NONE",
+        "RETURN_VALUE",
+    ]
+
+
+def test_disassemble():
+    source = "f(n: int): int begin return n; end\nx : mut int = 0;\nwhile x < 3 begin x = x + f(1); end"
+    program = parse(source)
+    listing = disassemble(BytecodeCompiler().compile(program), program.line_index)
+    lines = listing.splitlines()
+    assert lines[0] == "Disassembly of <program>:"
+    assert lines[1].split() == ["1", "0", "DEFINE_FUNCTION", "0", "(function", "f)"]
+    assert ["BINARY_OP", "6", "(<)"] in [line.split()[-3:] for line in lines]
+    assert "POP_JUMP_IF_FALSE" in listing
+    assert "CALL_FUNCTION" in listing
+    assert "Disassembly of f:" in listing
@@ -0,0 +1,26 @@
+"""Runs every test of lexer test modules that use Lexer against each lexer engine"""
+
+import pytest
+
+from lexer.lexer import Lexer
+from lexer.regex_lexer import RegexLexer
+
+
+LEXER_ENGINES = {"default": Lexer, "regex": RegexLexer}
+
+
+def pytest_generate_tests(metafunc):
+    """Only modules that use Lexer are run once for each engine, other modules run once"""
+    if hasattr(metafunc.module, "Lexer"):
+        metafunc.parametrize(
+            "lexer_engine", list(LEXER_ENGINES.values()), ids=list(LEXER_ENGINES.keys()), indirect=True
+        )
+
+
+@pytest.fixture(autouse=True)
+def lexer_engine(request, monkeypatch):
+    """Replaces Lexer used by test module with tested engine"""
+    engine = getattr(request, "param", None)
+    if engine is not None:
+        monkeypatch.setattr(request.module, "Lexer", engine)
+    return engine
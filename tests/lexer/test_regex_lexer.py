@@ -0,0 +1,65 @@
+"""Compares tokens and exceptions of RegexLexer with the hand written Lexer"""
+
+from io import StringIO
+import pytest
+
+from lexer.char_reader import TextIOReader, BufferedCharReader
+from lexer.lexer import Lexer as HandWrittenLexer
+from lexer.regex_lexer import RegexLexer
+from lexer.token_type import TokenType
+from lexer.my_token_exceptions import MyTokenException
+
+
+def tokenise(lexer_class, code: str):
+    lexer = lexer_class(TextIOReader(StringIO(code)))
+    tokens = []
+    try:
+        while (token := lexer.get_next_token()).get_type() != TokenType.EOT:
+            tokens.append(str(token))
+        tokens.append(str(token))
+    except MyTokenException as e:
+        tokens.append(str(e))
+    return tokens
+
+
+codes = [
+    "",
+    "   \n\t  ",
+    "a:mut int=1;b:float=0.25;c:str='x\\n\\t\\\\\\'y';",
+    "if a<=b&c>=d|e!=f begin x=x-1*2/3; end else begin end",
+    "@ comment\r\nwhile 1 begin end @ last",
+    "0 0.0 0.001 12345678 123456789 1234567.123 1234567890123456789.1 12345678901234567890.1",
+    "1" * 40,
+    "1" * 31 + ".5",
+    "00.1", "01", "0.", "1.a", "1.",
+    "abc$", "abc\tdef", "abc def", "_abc", "a!b", "a != b", "!", '"a"',
+    "a" * 100, "a" * 101, "a" * 101 + "$", "a" * 101 + ";", "a" * 102 + "$",
+    "'abc", "'abc\n'", "'", "'\n'", "'a\\", "'a\\x'", "'a\\\n'", "'\\''",
+    "a.b.c(1, 'x').d", "null null_type struct variant visit case return mut",
+    "#", "x = 1 # 2", "ą", "aą",
+]
+
+
+@pytest.mark.parametrize("code", codes)
+def test_same_tokens_and_errors_as_hand_written_lexer(code):
+    """Both engines produce identical tokens and exceptions with identical positions"""
+    assert tokenise(RegexLexer, code) == tokenise(HandWrittenLexer, code)
+
+
+@pytest.mark.parametrize("path", ["examples/binary_tree.txt", "examples/nested_struct.txt"])
+def test_same_tokens_for_examples(path):
+    """Example programs are tokenised identically"""
+    with open(path, "r", encoding="ascii") as f:
+        code = f.read()
+    assert tokenise(RegexLexer, code) == tokenise(HandWrittenLexer, code)
+
+
+def test_reader_partially_consumed():
+    """RegexLexer continues from current char of reader and keeps positions"""
+    reader = BufferedCharReader(StringIO("skip\n  a = 1;"), chunk_size=3)
+    for _ in range(5):
+        reader.next_char()
+    lexer = RegexLexer(reader)
+    token = lexer.get_next_token()
+    assert token.get_value() == "a"
+    assert token.get_pos() == (2, 3)
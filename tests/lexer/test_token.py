@@ -0,0 +1,56 @@
+"""Unit tests for Token class"""
+
+import pytest
+
+from lexer.my_token import Token, ValueShouldBeNoneError
+from lexer.source_position import LineIndex
+from lexer.token_type import TokenType
+
+
+def test_token_has_no_instance_dict():
+    """Token is compact - attributes are stored in slots"""
+    token = Token(TokenType.IDENTIFIER, "abc", (1, 1))
+    assert not hasattr(token, "__dict__")
+    with pytest.raises(AttributeError):
+        token.some_attribute = 1
+
+
+def test_accessors_return_stored_values():
+    """Stored values are immutable so accessors do not copy them"""
+    value = "identifier" * 10
+    pos = (3, 4)
+    token = Token(TokenType.IDENTIFIER, value, pos)
+    assert token.get_value() is value
+    assert token.get_type() is TokenType.IDENTIFIER
+    assert token.get_pos() is pos
+
+
+def test_value_should_be_none():
+    """Tokens of types without value can not get one"""
+    with pytest.raises(ValueShouldBeNoneError):
+        Token(TokenType.SEMICOLON, ";")
+    token = Token(TokenType.IDENTIFIER, "if")
+    with pytest.raises(ValueShouldBeNoneError):
+        token.set_value_and_type(TokenType.IF, "if")
+
+
+def test_eq_and_str():
+    """Equality compares type, value and position"""
+    token = Token(TokenType.STR_LITERAL, "abc", (1, 2))
+    assert token == Token(TokenType.STR_LITERAL, "abc", (1, 2))
+    assert not token == Token(TokenType.STR_LITERAL, "abc", (1, 3))
+    assert token == token.copy()
+    assert str(token) == "Token(TokenType.STR_LITERAL, 'abc', position=(1, 2))"
+    assert str(Token(TokenType.EOT)) == "Token(TokenType.EOT)"
+
+
+def test_offset_position_is_turned_into_row_and_column_by_line_index():
+    """Lexer keeps offset of token, row and column are computed only by get_pos"""
+    index = LineIndex()
+    index.feed("ab\ncd", 0)
+    token = Token(TokenType.IDENTIFIER, "cd", 3, index)
+    assert token.get_offset() == 3
+    assert token.get_pos() == (2, 1)
+    assert token == Token(TokenType.IDENTIFIER, "cd", (2, 1))
+    assert str(token) == "Token(TokenType.IDENTIFIER, 'cd', position=(2, 1))"
+    assert token.copy().get_offset() == 3
@@ -0,0 +1,26 @@
+"""Runs every test of parser test modules that use Parser against recursive and iterative parser"""
+
+import pytest
+
+from parser.my_parser import Parser
+from parser.iterative_parser import IterativeParser
+
+
+PARSER_ENGINES = {"recursive": Parser, "iterative": IterativeParser}
+
+
+def pytest_generate_tests(metafunc):
+    """Only modules that use Parser are run once for each parser, other modules run once"""
+    if hasattr(metafunc.module, "Parser"):
+        metafunc.parametrize(
+            "parser_engine", list(PARSER_ENGINES.values()), ids=list(PARSER_ENGINES.keys()), indirect=True
+        )
+
+
+@pytest.fixture(autouse=True)
+def parser_engine(request, monkeypatch):
+    """Replaces Parser used by test module with tested parser"""
+    engine = getattr(request, "param", None)
+    if engine is not None:
+        monkeypatch.setattr(request.module, "Parser", engine)
+    return engine
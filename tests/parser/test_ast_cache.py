@@ -0,0 +1,105 @@
+"""Tests of on-disk cache of parsed programs"""
+
+import os
+from io import StringIO
+import pytest
+
+import parser.ast_cache
+from parser.ast_cache import ASTCache
+from lexer.char_reader import BufferedCharReader
+from lexer.lexer import Lexer
+from parser.my_parser import Parser
+from parser.AST import *
+
+
+CODE = "a : mut int = 1;\nwhile a begin a = a - 1; end"
+
+
+def parse(code: str):
+    return Parser(Lexer(BufferedCharReader(StringIO(code)))).parse_program()
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    path = tmp_path / "source.txt"
+    path.write_text(CODE, encoding="ascii")
+    return str(path)
+
+
+def test_store_and_load(tmp_path):
+    """Loaded program is equal to stored one and keeps positions"""
+    cache = ASTCache(str(tmp_path / "cache"))
+    program = parse(CODE)
+    key = cache.key_for_source(CODE.encode())
+    assert cache.load(key) is None
+    assert cache.store(key, program)
+    loaded = cache.load(key)
+    assert loaded == program
+    assert loaded.line_index.get_row_and_col(loaded.children[1].pos) == (2, 1)
+
+
+def test_key_depends_on_source_and_format_version(tmp_path, monkeypatch):
+    """Changed source or AST format version never hits old entries"""
+    cache = ASTCache(str(tmp_path))
+    key = cache.key_for_source(b"a : int;")
+    assert key != cache.key_for_source(b"a : int ;")
+    monkeypatch.setattr(parser.ast_cache, "AST_FORMAT_VERSION", parser.ast_cache.AST_FORMAT_VERSION + 1)
+    assert key != cache.key_for_source(b"a : int;")
+
+
+def test_key_for_file_same_as_key_for_source(tmp_path, source_file):
+    """File is hashed in chunks but key is the same"""
+    cache = ASTCache(str(tmp_path / "cache"))
+    assert cache.key_for_file(source_file) == cache.key_for_source(CODE.encode())
+
+
+def test_get_or_parse_parses_only_once(tmp_path, source_file):
+    """Unchanged source is parsed only once"""
+    cache = ASTCache(str(tmp_path / "cache"))
+    calls = []
+
+    def parse_file():
+        calls.append(1)
+        return parse(CODE)
+
+    first = cache.get_or_parse(source_file, parse_file)
+    second = cache.get_or_parse(source_file, parse_file)
+    assert first == second
+    assert len(calls) == 1
+
+
+def test_corrupted_entry_is_removed(tmp_path):
+    """Unreadable entry is treated as a miss and removed"""
+    cache = ASTCache(str(tmp_path))
+    key = cache.key_for_source(CODE.encode())
+    cache.store(key, parse(CODE))
+    path = tmp_path / (key + ".ast")
+    path.write_bytes(b"not a pickle")
+    assert cache.load(key) is None
+    assert not path.exists()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    """Cache never exceeds its size. Entries used recently survive eviction"""
+    cache = ASTCache(str(tmp_path), max_size_bytes=10**9)
+    codes = [f"a{i} : int = {i};" for i in range(3)]
+    keys = [cache.key_for_source(code.encode()) for code in codes]
+    for i, (key, code) in enumerate(zip(keys, codes)):
+        cache.store(key, parse(code))
+        os.utime(tmp_path / (key + ".ast"), ns=(i * 10**9, i * 10**9))
+    assert cache.load(keys[0]) is not None
+    entry_size = os.path.getsize(tmp_path / (keys[0] + ".ast"))
+    cache.max_size_bytes = 2 * entry_size + entry_size // 2
+    cache.evict()
+    assert cache.load(keys[1]) is None
+    assert cache.load(keys[0]) is not None
+    assert cache.load(keys[2]) is not None
+
+
+def test_clear(tmp_path):
+    """clear removes every entry"""
+    cache = ASTCache(str(tmp_path))
+    key = cache.key_for_source(CODE.encode())
+    cache.store(key, parse(CODE))
+    cache.clear()
+    assert cache.load(key) is None
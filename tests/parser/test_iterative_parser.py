@@ -0,0 +1,144 @@
+"""Parsing of deeply nested programs without recursion"""
+
+# pylint: disable=protected-access
+
+import sys
+from io import StringIO
+
+import pytest
+
+from lexer.char_reader import TextIOReader
+from lexer.lexer import Lexer
+from parser.AST import *
+from parser.iterative_parser import IterativeParser
+from parser.my_parser import Parser as RecursiveParser
+from parser.parser_exceptions import ExpectedDifferentToken
+
+
+DEPTH = 10_000
+
+
+def tokens_of(source: str):
+    return list(Lexer(TextIOReader(StringIO(source))).iter_tokens())
+
+
+def nesting_depth(node, child_of):
+    depth = 0
+    while (node := child_of(node)) is not None:
+        depth += 1
+    return depth
+
+
+def test_deeply_nested_blocks():
+    source = "begin " * DEPTH + "x = 1;" + " end" * DEPTH
+    program = IterativeParser(tokens_of(source)).parse_program()
+    assert nesting_depth(program, lambda p: p.children[0] if isinstance(p, Program) else None) == DEPTH + 1
+    innermost = program
+    for _ in range(DEPTH):
+        innermost = innermost.children[0]
+    assert innermost.children == [AssignmentStatement(ObjectAccess(["x"]), IntLiteral(1))]
+
+
+def test_deeply_nested_if_else():
+    source = "if a begin x = 1; end else begin " * DEPTH + "x = 2;" + " end" * DEPTH
+    program = IterativeParser(tokens_of(source)).parse_program()
+
+    def child_of(node):
+        if isinstance(node, Program) and node.children and isinstance(node.children[0], IfStatement):
+            return node.children[0].else_prog
+        return None
+
+    assert nesting_depth(program, child_of) == DEPTH
+
+
+def test_deeply_nested_while_and_function_definitions():
+    source = "while a begin f(): int begin " * DEPTH + "return 1;" + " end end" * DEPTH
+    program = IterativeParser(tokens_of(source)).parse_program()
+
+    def child_of(node):
+        statement = node.children[0] if isinstance(node, Program) else None
+        if isinstance(statement, (WhileStatement, FuncDef)):
+            return statement.prog
+        return None
+
+    assert nesting_depth(program, child_of) == 2 * DEPTH
+
+
+def test_deeply_nested_visit():
+    source = "visit a begin case int begin " * DEPTH + " end end" * DEPTH
+    program = IterativeParser(tokens_of(source)).parse_program()
+
+    def child_of(node):
+        if isinstance(node, Program) and node.children:
+            return node.children[0].case_sections[0].program
+        return None
+
+    assert nesting_depth(program, child_of) == DEPTH
+
+
+def test_deeply_nested_brackets():
+    source = "x = " + "(" * DEPTH + "1" + ")" * DEPTH + ";"
+    program = IterativeParser(tokens_of(source)).parse_program()
+    assert program.children[0].expr == IntLiteral(1)
+
+
+def test_deeply_nested_arithmetic_and_calls():
+    source = "x = " + "1 + f(-(" * DEPTH + "2" + "))" * DEPTH + ";"
+    program = IterativeParser(tokens_of(source)).parse_program()
+
+    def child_of(node):
+        if isinstance(node, AddExpr):
+            call = node.children[1].name_chain[0]
+            return call.args[0].negated
+        return None
+
+    assert nesting_depth(program.children[0].expr, child_of) == DEPTH
+
+
+def test_error_inside_deep_nesting():
+    source = "begin " * DEPTH + "x = 1 +;" + " end" * DEPTH
+    with pytest.raises(ExpectedDifferentToken):
+        IterativeParser(tokens_of(source)).parse_program()
+
+
+def test_missing_end_of_deep_nesting():
+    source = "begin " * DEPTH + " end" * (DEPTH - 1)
+    with pytest.raises(ExpectedDifferentToken):
+        IterativeParser(tokens_of(source)).parse_program()
+
+
+def mixed_program(depth: int):
+    parts = []
+    for i in range(depth):
+        match i % 5:
+            case 0:
+                parts.append("if a < (b + 1) begin x = 1; end else begin ")
+            case 1:
+                parts.append("while f(a & b < c, -d) begin y = 2; ")
+            case 2:
+                parts.append("g(a: int, b: mut float = 1.5): int begin ")
+            case 3:
+                parts.append("visit a.b(c) begin case int begin end case Car begin ")
+            case 4:
+                parts.append("begin s: str = 'a'; ")
+    body = "return (1 + (2 * (3 - null)));"
+    endings = []
+    for i in reversed(range(depth)):
+        endings.append(" end end" if i % 5 == 3 else " end")
+    return "".join(parts) + body + "".join(endings)
+
+
+def test_same_tree_as_recursive_parser():
+    tokens = tokens_of(mixed_program(50))
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(10_000)
+    try:
+        expected = RecursiveParser(tokens).parse_program()
+        assert IterativeParser(tokens).parse_program() == expected
+    finally:
+        sys.setrecursionlimit(limit)
+
+
+def test_mixed_deep_program():
+    program = IterativeParser(tokens_of(mixed_program(DEPTH))).parse_program()
+    assert len(program.children) == 1
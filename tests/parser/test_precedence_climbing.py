@@ -0,0 +1,118 @@
+"""Precedence climbing over binary operators"""
+
+# pylint: disable=protected-access
+
+import sys
+from io import StringIO
+
+import pytest
+
+from lexer.char_reader import TextIOReader
+from lexer.lexer import Lexer
+from lexer.token_type import TokenType
+from parser.my_parser import Parser
+from parser.AST import *
+from parser.parser_exceptions import ExpectedDifferentToken
+
+
+def parser_for(source: str):
+    return Parser(Lexer(TextIOReader(StringIO(source))))
+
+
+def test_mixed_precedence_levels():
+    result = parser_for("a | b & c < d + e * f")._parse_expr()
+    expected = OrExpr(
+        [
+            ObjectAccess(["a"]),
+            AndExpr(
+                [
+                    ObjectAccess(["b"]),
+                    RelationExpr(
+                        ObjectAccess(["c"]),
+                        AddExpr(
+                            [ObjectAccess(["d"]), MultiExpr([ObjectAccess(["e"]), ObjectAccess(["f"])], ["*"])],
+                            ["+"],
+                        ),
+                        "<",
+                    ),
+                ]
+            ),
+        ]
+    )
+    assert result == expected
+
+
+def test_same_level_operands_are_flattened():
+    result = parser_for("1 - 2 + 3 * 4 / 5 - 6")._parse_expr()
+    expected = AddExpr(
+        [
+            IntLiteral(1),
+            IntLiteral(2),
+            MultiExpr([IntLiteral(3), IntLiteral(4), IntLiteral(5)], ["*", "/"]),
+            IntLiteral(6),
+        ],
+        ["-", "+", "-"],
+    )
+    assert result == expected
+
+
+def test_lower_precedence_ends_sub_expression():
+    parser = parser_for("a * b + c")
+    result = parser._parse_multi_expr()
+    assert result == MultiExpr([ObjectAccess(["a"]), ObjectAccess(["b"])], ["*"])
+    assert parser.lexer.curr_token.get_type() == TokenType.PLUS
+
+
+def test_second_relational_operator_ends_expression():
+    parser = parser_for("a < b + c < d")
+    result = parser._parse_expr()
+    expected = RelationExpr(
+        ObjectAccess(["a"]), AddExpr([ObjectAccess(["b"]), ObjectAccess(["c"])], ["+"]), "<"
+    )
+    assert result == expected
+    assert parser.lexer.curr_token.get_type() == TokenType.LESS
+
+
+def test_try_parse_does_not_start_with_relation():
+    parser = parser_for("a + b < c")
+    result = parser._try_parse_expr()
+    assert result == AddExpr([ObjectAccess(["a"]), ObjectAccess(["b"])], ["+"])
+    assert parser.lexer.curr_token.get_type() == TokenType.LESS
+
+
+def test_try_parse_accepts_relation_after_logical_operator():
+    result = parser_for("a & b < c")._try_parse_expr()
+    expected = AndExpr(
+        [ObjectAccess(["a"]), RelationExpr(ObjectAccess(["b"]), ObjectAccess(["c"]), "<")]
+    )
+    assert result == expected
+
+
+def test_missing_operand_after_operator():
+    with pytest.raises(ExpectedDifferentToken):
+        parser_for("a + * b")._parse_expr()
+
+
+def test_positions_of_built_nodes():
+    result = parser_for("x + -y * z")._parse_expr()
+    assert result.pos == 0
+    assert result.children[1].pos == 4
+    assert result.children[1].children[0].pos == 4
+
+
+def test_long_operator_chain_does_not_recurse():
+    n = 5 * sys.getrecursionlimit()
+    result = parser_for(" + ".join(["1"] * n))._parse_expr()
+    assert len(result.children) == n
+
+
+def test_nesting_depth_per_bracket():
+    depth = 150
+    source = "(" * depth + "1" + ")" * depth
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(8 * depth)
+    try:
+        result = parser_for(source)._parse_expr()
+    finally:
+        sys.setrecursionlimit(limit)
+    assert result == IntLiteral(1)
@@ -0,0 +1,86 @@
+"""Tests of token streaming API and parsing from token streams"""
+
+from io import StringIO
+import pytest
+
+from lexer.char_reader import TextIOReader
+from lexer.lexer import Lexer
+from lexer.regex_lexer import RegexLexer
+from lexer.my_token import Token
+from lexer.token_stream import TokenStream
+from lexer.token_type import TokenType
+from parser.my_parser import Parser
+
+
+CODE = "a : mut int = 1;\nwhile a begin a = a - 1; end"
+
+
+def tokens_of(code: str):
+    return Lexer(TextIOReader(StringIO(code))).iter_tokens()
+
+
+@pytest.mark.parametrize("lexer_class", [Lexer, RegexLexer])
+def test_iter_tokens_ends_with_single_eot(lexer_class):
+    """iter_tokens yields every token and EOT once"""
+    tokens = list(lexer_class(TextIOReader(StringIO("a = 1;"))).iter_tokens())
+    assert [t.get_type() for t in tokens] == [
+        TokenType.IDENTIFIER,
+        TokenType.ASSIGNMENT,
+        TokenType.INT_LITERAL,
+        TokenType.SEMICOLON,
+        TokenType.EOT,
+    ]
+    assert tokens[-1].get_pos() == (1, 7)
+
+
+def test_peek_does_not_consume():
+    """peek(k) looks k tokens ahead, current token stays the same"""
+    stream = TokenStream(tokens_of("a = 1;"), max_lookahead=3)
+    stream._next_token()
+    assert stream.peek(0).get_type() == TokenType.IDENTIFIER
+    assert stream.peek(3).get_type() == TokenType.SEMICOLON
+    assert stream.peek(1).get_type() == TokenType.ASSIGNMENT
+    assert stream.curr_token.get_type() == TokenType.IDENTIFIER
+    assert stream.get_next_token().get_type() == TokenType.ASSIGNMENT
+    assert stream.get_next_token().get_type() == TokenType.INT_LITERAL
+    assert stream.peek(2).get_type() == TokenType.EOT
+
+
+def test_peek_beyond_buffer_raises():
+    """Lookahead is limited by the size of ring buffer"""
+    stream = TokenStream(tokens_of("a = 1;"), max_lookahead=2)
+    with pytest.raises(ValueError):
+        stream.peek(3)
+
+
+def test_stream_keeps_returning_eot():
+    """After EOT stream returns EOT forever - just like Lexer"""
+    stream = TokenStream([Token(TokenType.IDENTIFIER, "a", (1, 1))])
+    assert stream.get_next_token().get_type() == TokenType.IDENTIFIER
+    for _ in range(3):
+        eot = stream.get_next_token()
+        assert eot.get_type() == TokenType.EOT
+        assert eot.get_pos() == (1, 1)
+        assert stream.peek(2) is eot
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        lambda: Lexer(TextIOReader(StringIO(CODE))),
+        lambda: list(tokens_of(CODE)),
+        lambda: tokens_of(CODE),
+        lambda: TokenStream(tokens_of(CODE), max_lookahead=5),
+    ],
+    ids=["live lexer", "token list", "token generator", "token stream"],
+)
+def test_parser_accepts_lexer_or_tokens(source):
+    """Parser produces the same AST no matter where tokens come from"""
+    expected = Parser(Lexer(TextIOReader(StringIO(CODE)))).parse_program()
+    assert Parser(source()).parse_program() == expected
+
+
+def test_cached_tokens_can_be_parsed_many_times():
+    """Pre-lexed token list can be parsed independently of lexing"""
+    tokens = list(tokens_of(CODE))
+    assert Parser(tokens).parse_program() == Parser(tokens).parse_program()
@@ -0,0 +1,113 @@
+"""Unit tests for BufferedCharReader class"""
+
+from io import StringIO
+import pytest
+
+from lexer.char_reader import TextIOReader, BufferedCharReader
+
+
+chunk_sizes = [1, 2, 3, 7, BufferedCharReader.DEFAULT_CHUNK_SIZE]
+
+
+def test_sanity():
+    """."""
+    assert 1 == 1
+
+
+@pytest.mark.parametrize("chunk_size", chunk_sizes)
+def test_empty_string(chunk_size):
+    """Empty input always returns empty string and position does not change"""
+    r = BufferedCharReader(StringIO(""), chunk_size)
+    for _ in range(5):
+        assert r.get_next_char() == ""
+        assert r.get_position() == (1, 1)
+
+
+@pytest.mark.parametrize("chunk_size", [0, -1])
+def test_chunk_size_has_to_be_positive(chunk_size):
+    """Chunk size smaller than 1 is not allowed"""
+    with pytest.raises(ValueError):
+        BufferedCharReader(StringIO("abc"), chunk_size)
+
+
+@pytest.mark.parametrize("chunk_size", chunk_sizes)
+def test_few_letters(chunk_size):
+    """abcdef"""
+    r = BufferedCharReader(StringIO("abcdef"), chunk_size)
+    assert r.get_curr_char() == "a"
+    assert r.get_next_char() == "b"
+    assert r.get_next_char() == "c"
+    assert r.get_next_char() == "d"
+    assert r.get_next_char() == "e"
+    assert r.get_next_char() == "f"
+    assert r.get_next_char() == ""
+    assert r.get_next_char() == ""
+
+
+@pytest.mark.parametrize("chunk_size", chunk_sizes)
+def test_newline_affects_the_new_character(chunk_size):
+    """'a\n'\n"""
+    r = BufferedCharReader(StringIO("'a\n'\n"), chunk_size)
+
+    assert r.get_curr_char() == "'"
+    assert r.get_position() == (1, 1)
+    assert r.get_next_char() == "a"
+    assert r.get_position() == (1, 2)
+    assert r.get_next_char() == "\n"
+    assert r.get_position() == (1, 3)
+    assert r.get_next_char() == "'"
+    assert r.get_position() == (2, 1)
+    assert r.get_next_char() == "\n"
+    assert r.get_position() == (2, 2)
+    for _ in range(10):
+        assert r.get_next_char() == ""
+        assert r.get_position() == (3, 1)
+
+
+@pytest.mark.parametrize("chunk_size", chunk_sizes)
+def test_next_char_returns_none_but_advances_in_stream(chunk_size):
+    """ab"""
+    r = BufferedCharReader(StringIO("ab"), chunk_size)
+    assert r.next_char() is None
+    assert r.get_curr_char() == "b"
+    assert r.next_char() is None
+    assert r.get_curr_char() == ""
+
+
+sources = [
+    "a",
+    "\n\n\n",
+    "x : mut int = 10;\nwhile x begin\n    x = x - 1;\nend\n",
+    "print('Hello\\n');\r\n@ comment\r\n",
+    "abc" * 1000 + "\n" + "d" * 500,
+]
+
+
+@pytest.mark.parametrize("chunk_size", chunk_sizes)
+@pytest.mark.parametrize("source", sources)
+def test_same_chars_and_positions_as_text_io_reader(source, chunk_size):
+    """BufferedCharReader is a drop-in replacement of TextIOReader"""
+    expected = TextIOReader(StringIO(source))
+    r = BufferedCharReader(StringIO(source), chunk_size)
+    while expected.get_curr_char() != "":
+        assert r.get_curr_char() == expected.get_curr_char()
+        assert r.get_position() == expected.get_position()
+        assert r.get_next_char() == expected.get_next_char()
+    assert r.get_curr_char() == ""
+    assert r.get_position() == expected.get_position()
+
+
+@pytest.mark.parametrize("chunk_size", chunk_sizes)
+@pytest.mark.parametrize("reader_class", [TextIOReader, BufferedCharReader])
+def test_read_rest(reader_class, chunk_size):
+    """read_rest returns source from current char and moves reader to its end"""
+    if reader_class is TextIOReader:
+        r = TextIOReader(StringIO("ab\ncd\nef"))
+    else:
+        r = BufferedCharReader(StringIO("ab\ncd\nef"), chunk_size)
+    r.next_char()
+    r.next_char()
+    assert r.read_rest() == "\ncd\nef"
+    assert r.get_curr_char() == ""
+    assert r.get_position() == (3, 3)
+    assert r.read_rest() == ""
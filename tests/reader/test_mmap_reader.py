@@ -0,0 +1,68 @@
+"""Unit tests for MmapCharReader class"""
+
+from io import StringIO
+import pytest
+
+from lexer.char_reader import TextIOReader, MmapCharReader
+
+
+def make_reader(tmp_path, content: bytes):
+    path = tmp_path / "source.txt"
+    path.write_bytes(content)
+    with open(path, "rb") as binary_io:
+        return MmapCharReader(binary_io)
+
+
+def test_empty_file(tmp_path):
+    """Empty file can not be memory-mapped but behaves like empty source"""
+    r = make_reader(tmp_path, b"")
+    for _ in range(5):
+        assert r.get_next_char() == ""
+        assert r.get_position() == (1, 1)
+    r.close()
+
+
+def test_few_letters(tmp_path):
+    """abc"""
+    with make_reader(tmp_path, b"abc") as r:
+        assert r.get_curr_char() == "a"
+        assert r.get_next_char() == "b"
+        assert r.get_next_char() == "c"
+        assert r.get_next_char() == ""
+        assert r.get_next_char() == ""
+
+
+def test_reader_works_after_file_is_closed(tmp_path):
+    """Memory map outlives file object it was created from"""
+    r = make_reader(tmp_path, b"a\nb")
+    assert r.get_next_char() == "\n"
+    assert r.get_next_char() == "b"
+    assert r.get_position() == (2, 1)
+    r.close()
+
+
+def test_non_ascii_char_raises(tmp_path):
+    """Source has to be ascii just like in main.py"""
+    with make_reader(tmp_path, b"a\xc5\x82") as r:
+        with pytest.raises(UnicodeDecodeError):
+            r.next_char()
+
+
+sources = [
+    "\n\n\n",
+    "x : mut int = 10;\nwhile x begin\n    x = x - 1;\nend\n",
+    "print('Hello\\n');\n@ comment\n",
+]
+
+
+@pytest.mark.parametrize("source", sources)
+def test_same_chars_and_positions_as_text_io_reader(tmp_path, source):
+    """MmapCharReader is a drop-in replacement of TextIOReader"""
+    expected = TextIOReader(StringIO(source))
+    with make_reader(tmp_path, source.encode("ascii")) as r:
+        while expected.get_curr_char() != "":
+            assert r.get_curr_char() == expected.get_curr_char()
+            assert r.get_position() == expected.get_position()
+            assert r.get_next_char() == expected.get_next_char()
+        assert r.get_curr_char() == ""
+        assert r.get_position() == expected.get_position()
@@ -0,0 +1,111 @@
+"""Unit tests for offset based positions"""
+
+from io import StringIO
+import pytest
+
+from lexer.char_reader import TextIOReader, BufferedCharReader
+from lexer.lexer import Lexer
+from lexer.my_token_exceptions import InvalidCharInIdentifier
+from lexer.source_position import LineIndex, LazyLineIndex, PositionedError
+from interpreter.interpreter import Interpreter
+from interpreter.interpreter_errors import InterpreterError
+from parser.my_parser import Parser
+from parser.parser_exceptions import ExpectedDifferentToken
+
+
+def test_empty_line_index():
+    """Every offset is in the first row when there are no newlines"""
+    index = LineIndex()
+    assert index.get_row_and_col(0) == (1, 1)
+    assert index.get_row_and_col(41) == (1, 42)
+
+
+def test_feed_registers_line_starts():
+    """ab\\n\\ncd"""
+    index = LineIndex()
+    index.feed("ab\n", 0)
+    index.feed("\ncd", 3)
+    assert index.get_row_and_col(2) == (1, 3)
+    assert index.get_row_and_col(3) == (2, 1)
+    assert index.get_row_and_col(4) == (3, 1)
+    assert index.get_row_and_col(5) == (3, 2)
+
+
+@pytest.mark.parametrize("offset", range(9))
+def test_lazy_line_index_same_as_fed_one(offset):
+    """a\\nbc\\n\\nd\\n"""
+    source = "a\nbc\n\nd\n"
+    fed = LineIndex()
+    fed.feed(source, 0)
+    lazy = LazyLineIndex(source.encode("ascii"))
+    assert lazy.get_row_and_col(offset) == fed.get_row_and_col(offset)
+
+
+def test_lazy_line_index_works_after_detach():
+    """Detached index does not need source anymore"""
+    lazy = LazyLineIndex(b"a\nb\nc")
+    lazy.detach()
+    assert lazy.get_row_and_col(4) == (3, 1)
+
+
+def test_error_at_offset_is_located():
+    """Offset of error is turned into row and column once, when it is located"""
+    index = LineIndex()
+    index.feed("abc\ndef", 0)
+    error = PositionedError(5)
+    assert (error.offset, error.row, error.col) == (5, None, None)
+    error.locate(index)
+    assert (error.offset, error.row, error.col) == (None, 2, 2)
+    error.locate(LineIndex())
+    assert (error.row, error.col) == (2, 2)
+
+
+def test_error_at_row_and_column_is_not_located_again():
+    """Hand built positions are (row, column) already"""
+    error = PositionedError((4, 7))
+    error.locate(LineIndex())
+    assert (error.offset, error.row, error.col) == (None, 4, 7)
+
+
+@pytest.mark.parametrize("reader_class", [TextIOReader, BufferedCharReader])
+def test_lexer_exception_reports_row_and_column(reader_class):
+    """Exceptions get row and column from offset"""
+    lexer = Lexer(reader_class(StringIO("a : int;\n  abc$d = 1;")))
+    for _ in range(4):
+        lexer.get_next_token()
+    with pytest.raises(InvalidCharInIdentifier) as e:
+        lexer.get_next_token()
+    assert (e.value.row, e.value.col) == (2, 3)
+
+
+def test_parser_exception_reports_row_and_column():
+    """Parser exceptions get row and column from offset"""
+    parser = Parser(Lexer(BufferedCharReader(StringIO("a : int;\nb : int = ;"))))
+    with pytest.raises(ExpectedDifferentToken) as e:
+        parser.parse_program()
+    assert (e.value.row, e.value.col) == (2, 11)
+
+
+def test_ast_node_position():
+    """AST nodes keep offset of their first token, program keeps line index of source"""
+    parser = Parser(Lexer(BufferedCharReader(StringIO("\n\n   x : int = 1;"))))
+    program = parser.parse_program()
+    assert program.children[0].pos == 5
+    assert program.line_index.get_row_and_col(program.children[0].pos) == (3, 4)
+
+
+def test_interpreter_exception_reports_row_and_column():
+    """Errors raised while program runs are located by program"""
+    program = Parser(Lexer(TextIOReader(StringIO("x : int = 1;\nprint(x);\n  print(y);")))).parse_program()
+    with pytest.raises(InterpreterError) as e:
+        program.accept(Interpreter())
+    assert (e.value.row, e.value.col) == (3, 9)
+
+
+def test_lazy_line_index_can_be_pickled():
+    """Pickled LazyLineIndex becomes plain LineIndex without reference to source"""
+    import pickle
+
+    loaded = pickle.loads(pickle.dumps(LazyLineIndex(b"a\nb\nc")))
+    assert type(loaded) is LineIndex
+    assert loaded.get_row_and_col(4) == (3, 1)